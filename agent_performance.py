@@ -14,7 +14,8 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict
 import numpy as np
 
-from database import get_database_manager
+from database import bind_positional, get_database_manager
+from metrics_rollup import agent_measurements
 from sqlalchemy import text
 from logging_config import log_info, log_warning, log_debug, log_error
 from config_system import config_system
@@ -29,8 +30,12 @@ class DatabaseAdapter:
     def __init__(self):
         self.db_manager = get_database_manager()
     
-    def execute(self, sql, params=None):
-        """Execute SQL statement"""
+    def execute(self, sql, params=None, session=None):
+        """Execute SQL statement, inside the caller's transaction when a session is passed"""
+        sql, params = bind_positional(sql, params)
+        if session is not None:
+            session.execute(text(sql), params or {})
+            return
         try:
             with self.db_manager.get_session() as session:
                 if params:
@@ -44,6 +49,7 @@ class DatabaseAdapter:
     
     def fetch_one(self, sql, params=None):
         """Fetch one row from SQL query"""
+        sql, params = bind_positional(sql, params)
         try:  
             with self.db_manager.get_session() as session:
                 if params:
@@ -58,6 +64,7 @@ class DatabaseAdapter:
     
     def fetch_all(self, sql, params=None):
         """Fetch all rows from SQL query"""
+        sql, params = bind_positional(sql, params)
         try:
             with self.db_manager.get_session() as session:
                 if params:
@@ -350,6 +357,7 @@ class AgentPerformanceTracker:
     
     def __init__(self):
         self.db_manager = DatabaseAdapter()
+        self.rollups = self.db_manager.db_manager.rollups
         self.metrics_cache: Dict[str, AgentPerformanceMetrics] = {}
         self.selector = DynamicAgentSelector(self)
         
@@ -362,23 +370,8 @@ class AgentPerformanceTracker:
     def _init_database(self):
         """Initialize performance tracking database table"""
         try:
-            self.db_manager.execute("""
-                CREATE TABLE IF NOT EXISTS agent_performance (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    agent_id TEXT NOT NULL,
-                    model_name TEXT NOT NULL,
-                    execution_time REAL,
-                    success BOOLEAN,
-                    quality_score REAL,
-                    cost REAL,
-                    task_complexity REAL,
-                    complexity_level TEXT,
-                    selected_reason TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    metadata TEXT,
-                    UNIQUE(agent_id, model_name)
-                )
-            """)
+            self._drop_pair_constraint()
+            self.db_manager.execute(self._create_table_sql("agent_performance"))
             
             # Create index for performance queries
             self.db_manager.execute("""
@@ -386,41 +379,99 @@ class AgentPerformanceTracker:
                 ON agent_performance(timestamp)
             """)
             
+            # Batch estimates read each agent's latest runs
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_agent_performance_agent_timestamp 
+                ON agent_performance(agent_id, timestamp)
+            """)
+            
             log_info(logger, "Agent performance database initialized")
         except Exception as e:
             log_error(logger, f"Failed to initialize performance database: {e}")
     
+    @staticmethod
+    def _create_table_sql(table_name: str) -> str:
+        """DDL of the agent_performance table under the given name"""
+        return f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                agent_id TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                execution_time REAL,
+                success BOOLEAN,
+                quality_score REAL,
+                cost REAL,
+                task_complexity REAL,
+                complexity_level TEXT,
+                selected_reason TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                metadata TEXT
+            )
+        """
+    
+    def _drop_pair_constraint(self):
+        """
+        Rebuild an agent_performance table created with UNIQUE(agent_id, model_name)
+        
+        Earlier versions kept one row per agent and model, so every later run of
+        the pair failed to insert. SQLite cannot drop a table constraint: the rows
+        are copied to agent_performance_rebuilt, which then replaces the table.
+        Each step commits on its own, so an interrupted rebuild resumes here.
+        """
+        tables = {row['name'] for row in self.db_manager.fetch_all(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'agent_performance%'")}
+        if "agent_performance_rebuilt" in tables and "agent_performance" not in tables:
+            # Interrupted after the old table was dropped: only the rename is left
+            self.db_manager.execute("ALTER TABLE agent_performance_rebuilt RENAME TO agent_performance")
+            return
+        if "agent_performance" not in tables:
+            return
+        
+        pair_constraint = any(
+            index['unique'] and index['origin'] == 'u' and [
+                column['name'] for column in self.db_manager.fetch_all(f"PRAGMA index_info('{index['name']}')")
+            ] == ["agent_id", "model_name"]
+            for index in self.db_manager.fetch_all("PRAGMA index_list(agent_performance)")
+        )
+        if not pair_constraint:
+            return
+        
+        columns = ("id, agent_id, model_name, execution_time, success, quality_score, cost, "
+                   "task_complexity, complexity_level, selected_reason, timestamp, metadata")
+        self.db_manager.execute("DROP TABLE IF EXISTS agent_performance_rebuilt")
+        self.db_manager.execute(self._create_table_sql("agent_performance_rebuilt"))
+        self.db_manager.execute(
+            f"INSERT INTO agent_performance_rebuilt ({columns}) SELECT {columns} FROM agent_performance")
+        self.db_manager.execute("DROP TABLE agent_performance")
+        self.db_manager.execute("ALTER TABLE agent_performance_rebuilt RENAME TO agent_performance")
+        log_info(logger, "Dropped the one-row-per-agent-and-model constraint from agent_performance")
+    
     def _load_metrics_from_db(self):
         """Load aggregated metrics from database"""
         try:
-            results = self.db_manager.fetch_all("""
-                SELECT 
-                    agent_id,
-                    model_name,
-                    COUNT(*) as total_executions,
-                    SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful_executions,
-                    SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as failed_executions,
-                    AVG(execution_time) as avg_execution_time,
-                    AVG(CASE WHEN success = 1 THEN quality_score ELSE NULL END) as avg_quality_score,
-                    AVG(cost) as avg_cost,
-                    MAX(timestamp) as last_execution
-                FROM agent_performance
-                GROUP BY agent_id, model_name
-            """)
+            group_by = ["agent_id", "model_name"]
+            totals = {
+                metric: {(r['agent_id'], r['model_name']): r for r in self.rollups.query(metric, group_by=group_by)}
+                for metric in ("agent.executions", "agent.successes", "agent.quality", "agent.cost")
+            }
+            empty = {'sample_count': 0, 'value_sum': 0.0}
             
-            for row in results:
-                key = f"{row['agent_id']}_{row['model_name']}"
+            for (agent_id, model_name), executions in totals["agent.executions"].items():
+                successes = totals["agent.successes"].get((agent_id, model_name), empty)
+                quality = totals["agent.quality"].get((agent_id, model_name), empty)
+                cost = totals["agent.cost"].get((agent_id, model_name), empty)
+                key = f"{agent_id}_{model_name}"
                 metrics = AgentPerformanceMetrics(
-                    agent_id=row['agent_id'],
-                    model_name=row['model_name'],
-                    total_executions=row['total_executions'],
-                    successful_executions=row['successful_executions'],
-                    failed_executions=row['failed_executions'],
-                    average_execution_time=row['avg_execution_time'] or 0,
-                    average_quality_score=row['avg_quality_score'] or 0,
-                    average_cost_per_execution=row['avg_cost'] or 0,
-                    success_rate=row['successful_executions'] / row['total_executions'] if row['total_executions'] > 0 else 0,
-                    last_execution_time=datetime.fromisoformat(row['last_execution']) if row['last_execution'] else None
+                    agent_id=agent_id,
+                    model_name=model_name,
+                    total_executions=executions['sample_count'],
+                    successful_executions=successes['sample_count'],
+                    failed_executions=executions['sample_count'] - successes['sample_count'],
+                    average_execution_time=executions['value_sum'] / executions['sample_count'] if executions['sample_count'] else 0,
+                    average_quality_score=quality['value_sum'] / quality['sample_count'] if quality['sample_count'] else 0,
+                    average_cost_per_execution=cost['value_sum'] / cost['sample_count'] if cost['sample_count'] else 0,
+                    success_rate=successes['sample_count'] / executions['sample_count'] if executions['sample_count'] else 0,
+                    last_execution_time=self.rollups.last_bucket("agent.executions", agent_id=agent_id, model_name=model_name)
                 )
                 self.metrics_cache[key] = metrics
             
@@ -441,17 +492,28 @@ class AgentPerformanceTracker:
             if task_data:
                 complexity_score, complexity_level = self.selector.complexity_analyzer.analyze_task_complexity(task_data)
             
-            # Store in database
-            self.db_manager.execute("""
-                INSERT INTO agent_performance 
-                (agent_id, model_name, execution_time, success, quality_score, 
-                 cost, task_complexity, complexity_level, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                agent_id, model_name, execution_time, success, quality_score,
-                cost, complexity_score, complexity_level,
-                json.dumps(metadata) if metadata else None
-            ))
+            # Store the row and its rollups in one transaction
+            timestamp = datetime.now()
+            with self.db_manager.db_manager.get_session() as session:
+                self.db_manager.execute("""
+                    INSERT INTO agent_performance 
+                    (agent_id, model_name, execution_time, success, quality_score, 
+                     cost, task_complexity, complexity_level, timestamp, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    agent_id, model_name, execution_time, success, quality_score,
+                    cost, complexity_score, complexity_level, timestamp,
+                    json.dumps(metadata) if metadata else None
+                ), session=session)
+                self.rollups.record(agent_measurements({
+                    "agent_id": agent_id,
+                    "model_name": model_name,
+                    "execution_time": execution_time,
+                    "success": success,
+                    "quality_score": quality_score,
+                    "cost": cost,
+                    "timestamp": timestamp
+                }), session=session)
             
             # Update cache
             key = f"{agent_id}_{model_name}"
@@ -489,13 +551,7 @@ class AgentPerformanceTracker:
         """Get number of recent uses of a model"""
         try:
             since = datetime.now() - timedelta(minutes=minutes)
-            result = self.db_manager.fetch_one("""
-                SELECT COUNT(*) as count
-                FROM agent_performance
-                WHERE model_name = ? AND timestamp > ?
-            """, (model_name, since))
-            
-            return result['count'] if result else 0
+            return self.rollups.total("agent.executions", since, model_name=model_name)['sample_count']
             
         except Exception as e:
             log_error(logger, f"Failed to get recent usage: {e}")
@@ -506,19 +562,26 @@ class AgentPerformanceTracker:
         try:
             since = datetime.now() - timedelta(days=days)
             
-            results = self.db_manager.fetch_all("""
-                SELECT 
-                    DATE(timestamp) as date,
-                    model_name,
-                    COUNT(*) as executions,
-                    AVG(CASE WHEN success = 1 THEN 1 ELSE 0 END) as success_rate,
-                    AVG(quality_score) as avg_quality,
-                    AVG(execution_time) as avg_time
-                FROM agent_performance
-                WHERE agent_id = ? AND timestamp > ?
-                GROUP BY DATE(timestamp), model_name
-                ORDER BY date
-            """, (agent_id, since))
+            daily = {
+                metric: {
+                    (r['bucket_start'], r['model_name']): r
+                    for r in self.rollups.query(metric, since, group_by=["bucket_start", "model_name"],
+                                                granularity="day", agent_id=agent_id)
+                }
+                for metric in ("agent.executions", "agent.successes", "agent.quality")
+            }
+            empty = {'sample_count': 0, 'value_sum': 0.0}
+            results = []
+            for (day, model_name), executions in sorted(daily["agent.executions"].items()):
+                successes = daily["agent.successes"].get((day, model_name), empty)
+                quality = daily["agent.quality"].get((day, model_name), empty)
+                results.append({
+                    'date': day.date().isoformat(),
+                    'model_name': model_name,
+                    'success_rate': successes['sample_count'] / executions['sample_count'],
+                    'avg_quality': quality['value_sum'] / quality['sample_count'] if quality['sample_count'] else None,
+                    'avg_time': executions['value_sum'] / executions['sample_count']
+                })
             
             # Process into trends
             trends = defaultdict(lambda: {
@@ -546,37 +609,46 @@ class AgentPerformanceTracker:
         """Get overall performance summary"""
         try:
             # Overall stats
-            overall = self.db_manager.fetch_one("""
-                SELECT 
-                    COUNT(DISTINCT agent_id) as total_agents,
-                    COUNT(DISTINCT model_name) as total_models,
-                    COUNT(*) as total_executions,
-                    AVG(CASE WHEN success = 1 THEN 1 ELSE 0 END) as overall_success_rate,
-                    AVG(quality_score) as overall_quality,
-                    AVG(execution_time) as overall_time
-                FROM agent_performance
-                WHERE timestamp > datetime('now', '-30 days')
-            """)
+            month = datetime.now() - timedelta(days=30)
+            by_combination = self.rollups.query("agent.executions", month, group_by=["agent_id", "model_name"])
+            executions = sum(r['sample_count'] for r in by_combination)
+            successes = self.rollups.total("agent.successes", month)['sample_count']
+            quality = self.rollups.total("agent.quality", month)
+            overall = {
+                "total_agents": len({r['agent_id'] for r in by_combination}),
+                "total_models": len({r['model_name'] for r in by_combination}),
+                "total_executions": executions,
+                "overall_success_rate": successes / executions if executions else None,
+                "overall_quality": quality['value_sum'] / quality['sample_count'] if quality['sample_count'] else None,
+                "overall_time": sum(r['value_sum'] for r in by_combination) / executions if executions else None
+            } if executions else None
             
             # Best performing agent-model combinations
-            best_performers = self.db_manager.fetch_all("""
-                SELECT 
-                    agent_id,
-                    model_name,
-                    COUNT(*) as executions,
-                    AVG(CASE WHEN success = 1 THEN 1 ELSE 0 END) as success_rate,
-                    AVG(quality_score) as avg_quality
-                FROM agent_performance
-                WHERE timestamp > datetime('now', '-7 days')
-                GROUP BY agent_id, model_name
-                HAVING executions > 5
-                ORDER BY success_rate DESC, avg_quality DESC
-                LIMIT 10
-            """)
+            week = datetime.now() - timedelta(days=7)
+            group_by = ["agent_id", "model_name"]
+            week_successes = {(r['agent_id'], r['model_name']): r['sample_count']
+                              for r in self.rollups.query("agent.successes", week, group_by=group_by)}
+            week_quality = {(r['agent_id'], r['model_name']): r
+                            for r in self.rollups.query("agent.quality", week, group_by=group_by)}
+            best_performers = []
+            for r in self.rollups.query("agent.executions", week, group_by=group_by):
+                if r['sample_count'] <= 5:
+                    continue
+                key = (r['agent_id'], r['model_name'])
+                quality_row = week_quality.get(key)
+                best_performers.append({
+                    "agent_id": r['agent_id'],
+                    "model_name": r['model_name'],
+                    "executions": r['sample_count'],
+                    "success_rate": week_successes.get(key, 0) / r['sample_count'],
+                    "avg_quality": quality_row['value_sum'] / quality_row['sample_count'] if quality_row else None
+                })
+            best_performers.sort(key=lambda p: (p['success_rate'], p['avg_quality'] or 0), reverse=True)
+            best_performers = best_performers[:10]
             
             return {
                 "overall_stats": dict(overall) if overall else {},
-                "best_performers": [dict(row) for row in best_performers],
+                "best_performers": best_performers,
                 "total_tracked_combinations": len(self.metrics_cache),
                 "last_updated": datetime.now().isoformat()
             }
@@ -1,9 +1,12 @@
 import asyncio
+import csv
+import io
 import json
 import os
 import time
 import logging
 from datetime import datetime, timedelta
+from math import ceil
 from typing import Any, Dict, List, Optional
 
 import sentry_sdk
@@ -13,7 +16,7 @@ from celery.result import AsyncResult
 # Import standardized logging configuration
 from logging_config import log_info, log_error, log_warning, log_debug
 logger = logging.getLogger(__name__)
-from fastapi import (FastAPI, File, Query, Request, UploadFile, WebSocket, WebSocketDisconnect, Depends, HTTPException, status)
+from fastapi import (FastAPI, File, Form, Query, Request, UploadFile, WebSocket, WebSocketDisconnect, Depends, HTTPException, status)
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
@@ -43,6 +46,9 @@ from error_handling import (
     AuthorizationError, ConfigurationError, ExternalServiceError,
     error_handler, error_handling_middleware, with_error_handling
 )
+from database import EXECUTION_DETAIL_COLUMNS, EXECUTION_SUMMARY_COLUMNS
+from execution_ids import new_execution_id
+from fair_scheduler import INTERACTIVE_FLOW, job_scheduler
 from execution_manager import execution_manager
 from validation import (
     validate_workflow_request, validate_profile_enrichment,
@@ -51,7 +57,7 @@ from validation import (
 )
 from input_validator import validate_workflow_inputs
 from context_enricher import enrich_workflow_context
-from pagination import pagination_params, Paginator
+from pagination import pagination_params, cursor_pagination_params, CursorPage, Paginator
 from agent_performance import (
     track_agent_execution, 
     get_agent_performance_metrics, 
@@ -59,19 +65,24 @@ from agent_performance import (
     select_best_model
 )
 from batch_processor import (
+    EXPORT_COLUMNS,
+    EXPORT_DETAIL_COLUMNS,
     create_batch,
     start_batch,
-    get_batch_status,
     get_batch_results,
-    list_batches,
+    iter_batch_inputs,
+    iter_batch_results,
+    list_batches_page_async,
+    get_batch_status_async,
     cancel_batch
 )
+from batch_estimates import estimate_batch, estimate_inputs
 from feedback_system import (
-    submit_feedback,
+    submit_feedback_async,
     get_feedback_for_execution,
     get_feedback_summary,
     update_feedback_status,
-    get_pending_feedback,
+    get_pending_feedback_page_async,
     FeedbackType,
     FeedbackSource,
     FeedbackStatus
@@ -83,136 +94,58 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
-# Global execution history storage
-execution_history: List[Dict] = []
-execution_counter = 1
-execution_counter_lock = asyncio.Lock()
 
-def save_execution_history():
-    """Save execution history to file"""
-    try:
-        with open('logs/execution_history.json', 'w') as f:
-            json.dump(execution_history, f, indent=2, default=str)
-    except Exception as e:
-        print(f"Error saving execution history: {e}")
-
-def load_execution_history():
-    """Load execution history from file"""
-    global execution_history
-    try:
-        if os.path.exists('logs/execution_history.json'):
-            with open('logs/execution_history.json', 'r') as f:
-                execution_history = json.load(f)
-    except Exception as e:
-        print(f"Error loading execution history: {e}")
-        execution_history = []
-
-# Load existing history on startup
-load_execution_history()
-
-# Initialize execution counter based on existing history
-if execution_history:
-    # Find the highest execution number
-    max_id = 0
-    for exec in execution_history:
-        if 'id' in exec and exec['id'].startswith('exec_'):
-            try:
-                num = int(exec['id'].replace('exec_', ''))
-                max_id = max(max_id, num)
-            except:
-                pass
-    execution_counter = max_id + 1
-    log_info(logger, f"Initialized execution counter to {execution_counter} based on existing history")
-
-async def get_next_execution_id():
-    """Get the next execution ID in a thread-safe manner"""
-    global execution_counter
-    async with execution_counter_lock:
-        # Check database for latest ID
-        try:
-            from database import get_database_manager
-            db_manager = get_database_manager()
-            latest_records = db_manager.get_execution_history(limit=1)
-            if latest_records:
-                latest_id = latest_records[0]['id']
-                if latest_id.startswith('exec_'):
-                    try:
-                        id_num = int(latest_id.split('_')[1])
-                        execution_counter = max(execution_counter, id_num + 1)
-                    except:
-                        pass
-        except Exception as e:
-            logger.warning(f"Failed to check database for latest execution ID: {e}")
-        
-        exec_id = f"exec_{execution_counter:03d}"
-        execution_counter += 1
-        return exec_id
-
-def add_execution_record(execution_data: Dict):
-    """Add a new execution record using ExecutionManager"""
+async def add_execution_record_async(execution_data: Dict):
+    """Add a new execution record without blocking the event loop"""
     if 'started_at' not in execution_data:
         execution_data['started_at'] = datetime.now()
     
-    # Use ExecutionManager for atomic save
-    success = execution_manager.save_execution(execution_data)
+    success = await execution_manager.save_execution_async(execution_data)
     if not success:
         raise Exception(f"Failed to save execution record {execution_data.get('id', 'unknown')}")
+
+def _apply_execution_updates(execution_id: str, current_execution: Dict, updates: Dict) -> Dict:
+    """Merge updates into an execution record, deriving duration and normalizing output fields"""
+    current_execution.update(updates)
     
-    # Keep legacy JSON list updated for backward compatibility
-    execution_history.append({
-        **execution_data,
-        'started_at': execution_data['started_at'].isoformat() if isinstance(execution_data['started_at'], datetime) else execution_data['started_at']
-    })
-    save_execution_history()
+    # Calculate duration if completed
+    if 'completed_at' in updates and current_execution.get('started_at'):
+        try:
+            started = current_execution['started_at']
+            completed = updates['completed_at']
+            
+            if isinstance(started, str):
+                started = datetime.fromisoformat(started)
+            if isinstance(completed, str):
+                completed = datetime.fromisoformat(completed)
+            
+            current_execution['duration'] = (completed - started).total_seconds()
+        except Exception as e:
+            logger.warning(f"Failed to calculate duration for {execution_id}: {e}")
+    
+    # Ensure output_data is used consistently (not 'output' or 'results')
+    if 'output' in current_execution and 'output_data' not in current_execution:
+        current_execution['output_data'] = current_execution.pop('output')
+    if 'results' in current_execution and 'output_data' not in current_execution:
+        current_execution['output_data'] = current_execution.pop('results')
+    
+    return current_execution
 
-def update_execution_record(execution_id: str, updates: Dict):
-    """Update an existing execution record using ExecutionManager"""
+async def update_execution_record_async(execution_id: str, updates: Dict):
+    """Update an existing execution record without blocking the event loop"""
     try:
-        # Get current execution data
-        current_execution = execution_manager.get_execution(execution_id)
+        current_execution = await execution_manager.get_execution_async(execution_id)
         if not current_execution:
             logger.error(f"Execution {execution_id} not found for update")
             return False
         
-        # Apply updates
-        current_execution.update(updates)
-        
-        # Calculate duration if completed
-        if 'completed_at' in updates and current_execution.get('started_at'):
-            try:
-                started = current_execution['started_at']
-                completed = updates['completed_at']
-                
-                if isinstance(started, str):
-                    started = datetime.fromisoformat(started)
-                if isinstance(completed, str):
-                    completed = datetime.fromisoformat(completed)
-                
-                current_execution['duration'] = (completed - started).total_seconds()
-            except Exception as e:
-                logger.warning(f"Failed to calculate duration for {execution_id}: {e}")
-        
-        # Ensure output_data is used consistently (not 'output' or 'results')
-        if 'output' in current_execution and 'output_data' not in current_execution:
-            current_execution['output_data'] = current_execution.pop('output')
-        if 'results' in current_execution and 'output_data' not in current_execution:
-            current_execution['output_data'] = current_execution.pop('results')
+        current_execution = _apply_execution_updates(execution_id, current_execution, updates)
         
-        # Save atomically using ExecutionManager
-        success = execution_manager.save_execution(current_execution)
+        success = await execution_manager.update_execution_state_async(current_execution)
         if not success:
             logger.error(f"Failed to update execution {execution_id}")
             return False
         
-        # Update legacy JSON list for backward compatibility
-        for execution in execution_history:
-            if execution.get('id') == execution_id:
-                execution.update(updates)
-                if 'duration' in current_execution:
-                    execution['duration'] = current_execution['duration']
-                break
-        save_execution_history()
-        
         return True
         
     except Exception as e:
@@ -263,6 +196,24 @@ async def custom_rate_limit_handler(request: Request, exc: Exception):
 
 app.add_exception_handler(RateLimitExceeded, custom_rate_limit_handler)
 
+@app.on_event("startup")
+async def start_retention():
+    """Apply the retention policies of the history tables in the background"""
+    from database import get_database_manager
+    get_database_manager().retention.start()
+
+@app.on_event("startup")
+async def resume_batches():
+    """Resume batches whose jobs were left leased by a worker that stopped"""
+    from batch_processor import batch_processor
+    batch_processor.start()
+
+@app.on_event("shutdown")
+async def close_async_database():
+    """Release async database connections; pooled aiosqlite connections hold worker threads"""
+    from database import get_database_manager
+    await get_database_manager().dispose_async()
+
 # Enhanced CORS middleware with security best practices
 # Get CORS configuration from config system
 allowed_origins = config_system.get("app.cors_origins", [])
@@ -465,8 +416,8 @@ async def execute_workflow_with_config(
     input_data["_executed_by"] = current_user.get("username", "unknown")
     input_data["_executed_at"] = datetime.now().isoformat()
     
-    # Create execution record with thread-safe ID generation
-    execution_id = await get_next_execution_id()
+    # Time-ordered id, allocated without a database query
+    execution_id = new_execution_id()
     execution_data = {
         'id': execution_id,
         'workflow_id': workflow_id,
@@ -475,11 +426,12 @@ async def execute_workflow_with_config(
         'username': current_user.get("username", "unknown"),
         'input_data': input_data
     }
-    add_execution_record(execution_data)
+    await add_execution_record_async(execution_data)
     execution_id = execution_data['id']
 
-    # Execute workflow with the execution_id
-    result = await workflow_executor.run_full_workflow(workflow_id, input_data, execution_id)
+    # Execute workflow with the execution_id, in a run slot batches cannot take
+    async with job_scheduler.slot(INTERACTIVE_FLOW):
+        result = await workflow_executor.run_full_workflow(workflow_id, input_data, execution_id)
     
     # Update execution record with results
     update_data = {
@@ -495,7 +447,7 @@ async def execute_workflow_with_config(
         update_data['evaluation_score'] = result['results']['_evaluation'].get('score')
         update_data['evaluation_feedback'] = result['results']['_evaluation'].get('feedback')
     
-    update_execution_record(execution_id, update_data)
+    await update_execution_record_async(execution_id, update_data)
     
     # Add execution_id to result
     result['execution_id'] = execution_id
@@ -556,10 +508,10 @@ async def get_observability_history(
     db_manager = get_database_manager()
     
     # Get historical data
-    history = db_manager.get_observability_history(limit=limit)
+    history = await db_manager.get_observability_history_async(limit=limit)
     
     # Get aggregated performance metrics
-    performance_metrics = db_manager.get_performance_metrics()
+    performance_metrics = await asyncio.to_thread(db_manager.get_performance_metrics)
     
     return {
         "history": history,
@@ -597,8 +549,9 @@ async def get_evaluation_summary():
     # If no in-memory evaluations, get recent execution history with evaluations
     if not eval_summary or eval_summary.get("message") == "No evaluation results available":
         try:
-            # Get recent executions from execution manager
-            recent_executions = execution_manager.get_all_executions(limit=50)
+            # Only executions whose output carries a quality score; the filter runs in SQL
+            from database import get_database_manager
+            recent_executions = await get_database_manager().get_scored_executions_async(limit=50)
             
             # Extract evaluation data from executions
             evaluation_results = []
@@ -665,15 +618,15 @@ async def get_evaluation_metrics():
     db_manager = get_database_manager()
     
     # Get aggregated metrics from database
-    db_metrics = db_manager.get_evaluation_metrics()
+    db_metrics = await db_manager.get_evaluation_metrics_async()
     
     # Get recent evaluation history
-    recent_results = db_manager.get_evaluation_history(limit=30)
+    recent_results = await db_manager.get_evaluation_history_async(limit=30)
     
     # If no database results, get from execution manager
     if not recent_results:
         try:
-            recent_executions = execution_manager.get_all_executions(limit=30)
+            recent_executions = await db_manager.get_scored_executions_async(limit=30)
             recent_results = []
             for execution in recent_executions:
                 if execution.get('output_data') and isinstance(execution['output_data'], dict):
@@ -740,6 +693,31 @@ async def get_evaluation_metrics():
     }
 
 
+@app.get("/api/evaluation/history",
+         summary="Get evaluation history with pagination",
+         description="Retrieve stored evaluation results, newest first, with cursor-based pagination",
+         response_model=Dict[str, Any])
+async def get_evaluation_history_page(
+    pagination: dict = Depends(cursor_pagination_params),
+    workflow_id: Optional[str] = Query(None, description="Filter by workflow")
+):
+    """
+    Get one page of evaluation history from the database.
+    
+    Follow next_cursor for subsequent pages; page is supported for backward compatibility.
+    """
+    from database import get_database_manager
+    db_manager = get_database_manager()
+    
+    evaluation_page = await db_manager.get_evaluation_page_async(
+        page_size=pagination["page_size"],
+        cursor=pagination["cursor"],
+        offset=0 if pagination["cursor"] else (pagination["page"] - 1) * pagination["page_size"],
+        workflow_id=workflow_id
+    )
+    return evaluation_page.dict()
+
+
 @app.get("/api/performance/metrics",
          summary="Get performance metrics with pagination",
          description="Retrieve performance metrics from the performance optimization system with pagination support",
@@ -822,9 +800,9 @@ async def get_agent_performance_metrics(
     from database import get_database_manager
     try:
         db_manager = get_database_manager()
-        history = db_manager.get_execution_history(limit=1000)
+        history = await db_manager.get_execution_history_async(limit=1000)
     except Exception:
-        history = execution_history
+        history = await execution_manager.get_all_executions_async(limit=1000)
     
     # Process agent performance data
     agent_metrics = {}
@@ -914,9 +892,9 @@ async def get_system_performance_metrics():
     from database import get_database_manager
     try:
         db_manager = get_database_manager()
-        recent_history = db_manager.get_execution_history(limit=100)
+        recent_history = await db_manager.get_execution_history_async(limit=100)
     except Exception:
-        recent_history = execution_history[-100:] if execution_history else []
+        recent_history = await execution_manager.get_all_executions_async(limit=100)
     
     # Calculate throughput metrics
     now = datetime.now()
@@ -1462,7 +1440,7 @@ async def run(
         log_error(logger, f"Validation error: {str(e)}")
         raise ValidationError(f"Invalid workflow request: {str(e)}")
     # Create execution record with ID
-    execution_id = await get_next_execution_id()
+    execution_id = new_execution_id()
     execution_data = {
         "id": execution_id,
         "workflow_id": "linkedin-workflow",
@@ -1494,7 +1472,7 @@ async def run(
     }
     
     # Add to execution history
-    add_execution_record(execution_data)
+    await add_execution_record_async(execution_data)
     
     # Start observability tracking for the new workflow
     try:
@@ -1526,27 +1504,28 @@ async def run(
             return JSONResponse({"task_id": task.id, "status": "queued", "execution_id": execution_id})
         else:
             # Update execution status
-            update_execution_record(execution_id, {
+            await update_execution_record_async(execution_id, {
                 "current_step": "Profile Research",
                 "progress": 25
             })
             
             # Simulate step progression
             await asyncio.sleep(1)
-            update_execution_record(execution_id, {
+            await update_execution_record_async(execution_id, {
                 "current_step": "Message Generation", 
                 "progress": 60
             })
             
             await asyncio.sleep(1)
-            update_execution_record(execution_id, {
+            await update_execution_record_async(execution_id, {
                 "current_step": "Quality Review",
                 "progress": 85
             })
             
             # Run actual workflow with logging
             log_info(logger, f"Calling run_workflow with input_data: {input_data}")
-            result = run_workflow(**input_data)
+            async with job_scheduler.slot(INTERACTIVE_FLOW):
+                result = await asyncio.to_thread(run_workflow, **input_data)
             log_info(logger, f"run_workflow returned: {result}")
             
             # Extract messages from the structured reply
@@ -1703,7 +1682,7 @@ async def run(
             ]
             
             # Use ExecutionManager for atomic update (replaces both JSON and database updates)
-            success = update_execution_record(execution_id, {
+            success = await update_execution_record_async(execution_id, {
                 "status": "completed",
                 "completed_at": datetime.now().isoformat(),
                 "current_step": "Completed",
@@ -1729,7 +1708,7 @@ async def run(
                 db_manager = get_database_manager()
                 
                 # Calculate duration from execution data
-                execution_data = execution_manager.get_execution(execution_id)
+                execution_data = await execution_manager.get_execution_async(execution_id)
                 duration_ms = execution_data.get('duration', 0) * 1000 if execution_data.get('duration') else 0
                 
                 observability_data = {
@@ -1747,7 +1726,7 @@ async def run(
                     "cpu_usage_percent": None
                 }
                 
-                success = db_manager.save_observability_metrics(observability_data)
+                success = await db_manager.save_observability_metrics_async(observability_data)
                 if success:
                     log_info(logger, f"Added observability tracking for execution {execution_id}")
                 else:
@@ -1777,7 +1756,7 @@ async def run(
                 }
                 
                 # Save to database using the database manager
-                success = db_manager.save_evaluation_result(evaluation_data)
+                success = await db_manager.save_evaluation_result_async(evaluation_data)
                 if success:
                     log_info(logger, f"Added evaluation tracking for execution {execution_id}")
                 else:
@@ -1811,7 +1790,7 @@ async def run(
         log_error(logger, "Error in /run endpoint", e, exc_info=True)
         import traceback
         log_error(logger, f"Full traceback: {traceback.format_exc()}")
-        update_execution_record(execution_id, {
+        await update_execution_record_async(execution_id, {
             "status": "failed",
             "completed_at": datetime.now().isoformat(),
             "error_message": str(e)
@@ -1894,7 +1873,9 @@ async def batch_process(
                 }
             )
 
-            result = run_workflow(**input_data)
+            # The crew runs synchronously: keep it off the event loop, in an interactive run slot
+            async with job_scheduler.slot(INTERACTIVE_FLOW):
+                result = await asyncio.to_thread(run_workflow, **input_data)
             return {
                 "index": index,
                 "status": "success",
@@ -2184,6 +2165,7 @@ async def test():
 async def get_metrics():
     """Get application metrics"""
     from cache import cache_manager, metrics_collector
+    from embedding_service import embedding_service
 
     metrics = metrics_collector.get_metrics()
     cache_stats = cache_manager.get_stats()
@@ -2191,6 +2173,8 @@ async def get_metrics():
     return {
         "metrics": metrics,
         "cache": cache_stats,
+        "embeddings": embedding_service.get_metrics(),
+        "execution_writes": execution_manager.get_write_stats(),
         "active_connections": len(manager.active_connections),
         "timestamp": asyncio.get_event_loop().time(),
     }
@@ -2204,77 +2188,157 @@ async def get_cache_stats():
     return cache_manager.get_stats()
 
 
+@app.get("/api/embeddings/metrics")
+async def get_embedding_metrics():
+    """Get shared embedding model state, cache hit rate, encode latency and batch sizes"""
+    from embedding_service import embedding_service
+
+    return embedding_service.get_metrics()
+
+
 @app.get("/api/execution-history",
          summary="Get workflow execution history with pagination",
-         description="Retrieve workflow execution history with pagination support")
+         description="Retrieve workflow execution history with cursor-based pagination. "
+                     "Follow next_cursor for subsequent pages; page is supported for backward compatibility.")
 async def get_execution_history(
-    pagination: dict = Depends(pagination_params)
+    pagination: dict = Depends(cursor_pagination_params),
+    status: Optional[str] = Query(None, description="Filter by execution status"),
+    workflow_id: Optional[str] = Query(None, description="Filter by workflow"),
+    channel: Optional[str] = Query(None, description="Filter by channel (linkedin/email)"),
+    view: str = Query("summary", pattern="^(summary|full)$",
+                      description="summary omits input_data, output_data and steps; full returns every column")
 ):
     """
     Get workflow execution history with pagination
     
     Args:
-        pagination: Pagination parameters (page, page_size)
+        pagination: Pagination parameters (cursor, page, page_size)
+        status: Optional status filter
+        workflow_id: Optional workflow filter
+        channel: Optional channel filter
+        view: summary (default) or full rows with the legacy 'output' alias
         
     Returns:
-        PaginatedResponse: Paginated execution history
+        dict: One page of execution history with next_cursor and an estimated total
     """
-    # Use ExecutionManager for unified data access
+    page = pagination["page"]
+    page_size = pagination["page_size"]
+    
+    # Only the requested page is read from the database
     try:
-        history_items = execution_manager.get_all_executions(limit=1000)
-        log_info(logger, f"Retrieved {len(history_items)} executions from ExecutionManager")
+        execution_page = await execution_manager.get_execution_page_async(
+            page_size=page_size,
+            cursor=pagination["cursor"],
+            offset=0 if pagination["cursor"] else (page - 1) * page_size,
+            status=status,
+            workflow_id=workflow_id,
+            channel=channel,
+            summary=view == "summary"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         log_error(logger, f"Failed to get executions from ExecutionManager: {e}")
-        history_items = []
-    
-    # Ensure frontend compatibility - standardize field names
-    transformed_items = []
-    for item in history_items:
-        # Convert to dict if it's not already
-        if hasattr(item, '_asdict'):
-            item = item._asdict()
-        elif not isinstance(item, dict):
-            item = dict(item)
-        
-        # Ensure consistent field naming for frontend compatibility
-        # Always provide both 'output_data' (standard) and 'output' (legacy frontend support)
-        if 'output_data' in item:
-            item['output'] = item['output_data']  # Frontend compatibility
-        elif 'output' in item:
-            item['output_data'] = item['output']  # Database consistency
-        else:
-            item['output_data'] = {}
-            item['output'] = {}
-        
-        # Ensure all required fields exist
-        item.setdefault('status', 'unknown')
-        item.setdefault('workflow_name', 'Unknown Workflow')
-        item.setdefault('progress', 0)
-        
-        transformed_items.append(item)
+        execution_page = CursorPage(items=[], page_size=page_size, total=0)
     
-    # Apply pagination
-    paginated_response = Paginator.paginate_list(
-        items=transformed_items,
-        page=pagination["page"],
-        page_size=pagination["page_size"]
-    )
+    if view == "summary":
+        transformed_items = execution_page.items
+    else:
+        transformed_items = [_with_legacy_output(item) for item in execution_page.items]
     
-    # Transform response to match frontend expectations
-    result = paginated_response.dict()
+    total = execution_page.total or 0
     
-    # Flatten pagination data for frontend compatibility
-    flattened_result = {
-        "items": result["items"],
-        "total": result["pagination"]["total"],
-        "page": result["pagination"]["page"],
-        "page_size": result["pagination"]["page_size"],
-        "total_pages": result["pagination"]["total_pages"],
-        "has_next": result["pagination"]["has_next"],
-        "has_prev": result["pagination"]["has_prev"]
+    # Flattened pagination data for frontend compatibility
+    return {
+        "items": transformed_items,
+        "total": total,
+        "total_is_estimate": execution_page.total_is_estimate,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": ceil(total / page_size) if page_size > 0 else 0,
+        "has_next": execution_page.has_next,
+        "has_prev": page > 1 or bool(pagination["cursor"]),
+        "next_cursor": execution_page.next_cursor
     }
+
+
+def _with_legacy_output(item) -> dict:
+    """Standardize a full execution row for the frontend, including the legacy 'output' alias"""
+    # Convert to dict if it's not already
+    if hasattr(item, '_asdict'):
+        item = item._asdict()
+    elif not isinstance(item, dict):
+        item = dict(item)
+    
+    # Ensure consistent field naming for frontend compatibility
+    # Always provide both 'output_data' (standard) and 'output' (legacy frontend support)
+    if 'output_data' in item:
+        item['output'] = item['output_data']  # Frontend compatibility
+    elif 'output' in item:
+        item['output_data'] = item['output']  # Database consistency
+    else:
+        item['output_data'] = {}
+        item['output'] = {}
+    
+    # Ensure all required fields exist
+    item.setdefault('status', 'unknown')
+    item.setdefault('workflow_name', 'Unknown Workflow')
+    item.setdefault('progress', 0)
+    return item
+
+
+def _iter_json(payload: Any, chunk_size: int = 64 * 1024):
+    """Encode a payload incrementally, yielding chunks of about chunk_size characters"""
+    encoder = json.JSONEncoder(default=lambda value: value.isoformat() if hasattr(value, 'isoformat') else str(value))
+    buffer, size = [], 0
+    for piece in encoder.iterencode(payload):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+@app.get("/api/execution-history/{execution_id}",
+         summary="Get one execution with its input, output and steps",
+         description="Returns the full execution record, streamed. Pass fields to fetch only some columns.")
+async def get_execution_detail(
+    execution_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated columns, e.g. output_data,steps")
+):
+    """
+    Get the full record of one execution, including the JSON blobs left out of list pages
     
-    return flattened_result
+    Args:
+        execution_id: Execution to fetch
+        fields: Optional comma-separated subset of columns; id is always included
+        
+    Returns:
+        StreamingResponse: The execution as JSON
+    """
+    columns = None
+    if fields:
+        allowed = EXECUTION_SUMMARY_COLUMNS + EXECUTION_DETAIL_COLUMNS
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        columns = tuple(dict.fromkeys(["id"] + requested))
+    
+    execution = await execution_manager.get_execution_async(execution_id, columns=columns)
+    if not execution:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Execution {execution_id} not found"
+        )
+    
+    return StreamingResponse(_iter_json(execution), media_type="application/json")
+
 
 @app.post("/api/demo-execution")
 async def create_demo_execution():
@@ -2341,7 +2405,7 @@ async def create_demo_execution():
         }
     }
     
-    add_execution_record(demo_execution)
+    await add_execution_record_async(demo_execution)
     return JSONResponse({"message": "Demo execution created", "execution_id": demo_execution['id']})
 
 
@@ -2363,7 +2427,14 @@ async def get_test_results(
     from datetime import datetime, timedelta
     
     # Get actual execution history
-    completed_executions = [exec for exec in execution_history if exec.get('status') == 'completed']
+    completed_executions = []
+    completed_page = await execution_manager.get_execution_page_async(page_size=1000, status='completed')
+    for exec in completed_page.items:
+        completed_executions.append({
+            **exec,
+            'output': exec.get('output_data') or exec.get('output') or {},
+            'duration': exec.get('duration') or 0
+        })
     
     if not completed_executions:
         return {"items": [], "pagination": {"total": 0, "page": pagination["page"],
@@ -2720,6 +2791,12 @@ async def get_intelligent_faq_answer(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/faq/tier-stats")
+async def get_faq_tier_stats():
+    """Get hit rate and latency for each FAQ resolution tier"""
+    return faq_agent.get_tier_stats()
+
+
 @app.post("/api/faq/analyze-questions")
 @limiter.limit("5/minute")
 async def analyze_questions(request: Request):
@@ -2932,6 +3009,38 @@ async def create_batch_processing_job(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/batch/estimate",
+          summary="Estimate a batch before creating it",
+          description="Predict wall time, tokens and cost of running input_list through a workflow, "
+                      "and flag inputs likely to exceed timeout_per_job")
+async def estimate_batch_processing_job(request: Dict[str, Any]):
+    """Estimate a batch from its inputs"""
+    try:
+        workflow_id = request.get("workflow_id")
+        input_list = request.get("input_list", [])
+        
+        if not workflow_id or not isinstance(input_list, list) or len(input_list) == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="workflow_id and a non-empty input_list are required"
+            )
+        
+        estimate = await asyncio.to_thread(estimate_inputs, workflow_id, input_list,
+                                           request.get("config", {}), request.get("concurrency"))
+        return {
+            "success": True,
+            "data": estimate.to_dict()
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error estimating batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/batch/{batch_id}/start",
           summary="Start batch processing",
           description="Start processing a created batch")
@@ -2962,7 +3071,7 @@ async def start_batch_processing(batch_id: str):
 async def get_batch_processing_status(batch_id: str):
     """Get batch processing status"""
     try:
-        status = get_batch_status(batch_id)
+        status = await get_batch_status_async(batch_id)
         
         if not status:
             raise HTTPException(status_code=404, detail="Batch not found")
@@ -2979,6 +3088,35 @@ async def get_batch_processing_status(batch_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/batch/{batch_id}/estimate",
+         summary="Estimate batch duration and cost",
+         description="Predict wall time, tokens and cost of a batch's unfinished jobs, "
+                     "and flag jobs likely to exceed timeout_per_job")
+async def get_batch_processing_estimate(
+    batch_id: str,
+    concurrency: Optional[int] = Query(None, ge=1, description="Jobs run at once (default: the batch's config)")
+):
+    """Estimate the unfinished jobs of a batch"""
+    try:
+        estimate = await asyncio.to_thread(estimate_batch, batch_id, concurrency)
+        
+        if not estimate:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        
+        return {
+            "success": True,
+            "data": estimate.to_dict()
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error estimating batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/batch/{batch_id}/results",
          summary="Get batch results",
          description="Get detailed results of a completed batch")
@@ -2988,7 +3126,7 @@ async def get_batch_processing_results(
 ):
     """Get batch processing results"""
     try:
-        results = get_batch_results(batch_id, include_details)
+        results = await asyncio.to_thread(get_batch_results, batch_id, include_details)
         
         if not results:
             raise HTTPException(status_code=404, detail="Batch not found")
@@ -3025,18 +3163,22 @@ async def get_batch_processing_results(
          description="List all batches with optional status filtering")
 async def list_batch_jobs(
     status: Optional[str] = Query(None, description="Filter by status"),
-    limit: int = Query(50, description="Maximum number of batches to return")
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of batches to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor")
 ):
     """List batch processing jobs"""
     try:
-        batches = list_batches(status_filter=status, limit=limit)
+        batch_page = await list_batches_page_async(status_filter=status, page_size=limit, cursor=cursor)
         
         return {
             "success": True,
-            "data": batches,
-            "count": len(batches)
+            "data": batch_page.items,
+            "count": len(batch_page.items),
+            "next_cursor": batch_page.next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing batches: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -3105,6 +3247,109 @@ async def create_and_start_batch(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/batch/upload",
+          summary="Create batch from a file",
+          description="Create a batch from a CSV or JSON Lines upload, one job per row")
+async def upload_batch_processing_job(
+    file: UploadFile = File(..., description="CSV with a header row, or .jsonl/.ndjson with one object per line"),
+    name: str = Form(...),
+    workflow_id: str = Form(...),
+    config: Optional[str] = Form(None, description="JSON object overriding the batch config"),
+    start: bool = Form(False, description="Start the batch once it is created")
+):
+    """
+    Create a batch from an uploaded file
+    
+    Rows are parsed and inserted in chunks as the file is read, so the upload
+    is never held in memory as a whole.
+    """
+    try:
+        config_override = json.loads(config) if config else {}
+        if not isinstance(config_override, dict):
+            raise ValueError("config must be a JSON object")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid config: {e}")
+    
+    try:
+        batch_id = await create_batch(
+            name=name,
+            workflow_id=workflow_id,
+            input_list=iter_batch_inputs(file.file, file.filename),
+            config_override=config_override
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating batch from upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+    
+    if start:
+        await start_batch(batch_id)
+    
+    status_data = await get_batch_status_async(batch_id)
+    return {
+        "success": True,
+        "batch_id": batch_id,
+        "total_jobs": status_data["total_jobs"] if status_data else None,
+        "message": f"Created {'and started ' if start else ''}batch from {file.filename}"
+    }
+
+
+def _iter_ndjson(records):
+    """Encode records as newline-delimited JSON, one line per record"""
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+
+def _iter_csv(records, columns):
+    """Encode records as CSV rows under a header; nested values are written as JSON"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for record in records:
+        writer.writerow([
+            json.dumps(record.get(column)) if isinstance(record.get(column), (dict, list)) else record.get(column)
+            for column in columns
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@app.get("/api/batch/{batch_id}/results/export",
+         summary="Export batch results",
+         description="Stream every job of a batch as NDJSON or CSV, paging through the jobs in the database")
+async def export_batch_processing_results(
+    batch_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    include_details: bool = Query(False, description="Include job input/output details"),
+    status: Optional[str] = Query(None, description="Only export jobs with this status")
+):
+    """
+    Export a batch's job results
+    
+    Jobs are read a page at a time and written as they are read, so memory
+    stays flat however large the batch is.
+    """
+    if not await get_batch_status_async(batch_id):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    records = iter_batch_results(batch_id, include_details, status)
+    if format == "csv":
+        columns = EXPORT_COLUMNS + (EXPORT_DETAIL_COLUMNS if include_details else ())
+        body, media_type = _iter_csv(records, columns), "text/csv"
+    else:
+        body, media_type = _iter_ndjson(records), "application/x-ndjson"
+    
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="batch_{batch_id}.{format}"'
+    })
+
+
 # ============================================================================
 # Feedback System API Endpoints  
 # ============================================================================
@@ -3140,7 +3385,7 @@ async def submit_user_feedback(request: Dict[str, Any]):
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Invalid enum value: {e}")
         
-        feedback_id = submit_feedback(
+        feedback_id = await submit_feedback_async(
             execution_id=execution_id,
             workflow_id=workflow_id,
             feedback_type=feedback_type_enum,
@@ -3171,7 +3416,7 @@ async def submit_user_feedback(request: Dict[str, Any]):
 async def get_execution_feedback(execution_id: str):
     """Get feedback for a specific execution"""
     try:
-        feedback_list = get_feedback_for_execution(execution_id)
+        feedback_list = await asyncio.to_thread(get_feedback_for_execution, execution_id)
         
         # Convert to serializable format
         feedback_data = []
@@ -3218,7 +3463,7 @@ async def get_feedback_summary_api(
 ):
     """Get feedback summary statistics"""
     try:
-        summary = get_feedback_summary(workflow_id, days)
+        summary = await asyncio.to_thread(get_feedback_summary, workflow_id, days)
         
         # Convert to serializable format
         summary_data = {
@@ -3249,11 +3494,13 @@ async def get_feedback_summary_api(
          summary="Get pending feedback",
          description="Get feedback entries that need review")
 async def get_pending_feedback_api(
-    limit: int = Query(50, description="Maximum number of entries to return")
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of entries to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor")
 ):
     """Get pending feedback entries"""
     try:
-        pending_feedback = get_pending_feedback(limit)
+        feedback_page = await get_pending_feedback_page_async(limit, cursor)
+        pending_feedback = feedback_page.items
         
         # Convert to serializable format
         feedback_data = []
@@ -3276,9 +3523,12 @@ async def get_pending_feedback_api(
         return {
             "success": True,
             "pending_feedback": feedback_data,
-            "count": len(feedback_data)
+            "count": len(feedback_data),
+            "next_cursor": feedback_page.next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting pending feedback: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -3327,12 +3577,14 @@ async def update_feedback_status_api(feedback_id: str, request: Dict[str, Any]):
          description="Get all feedback for a specific workflow")
 async def get_workflow_feedback(
     workflow_id: str,
-    limit: int = Query(100, description="Maximum number of entries to return")
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of entries to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor")
 ):
     """Get feedback for a specific workflow"""
     try:
         from feedback_system import feedback_system
-        feedback_list = feedback_system.get_feedback_for_workflow(workflow_id, limit)
+        feedback_page = await feedback_system.get_feedback_for_workflow_page_async(workflow_id, limit, cursor)
+        feedback_list = feedback_page.items
         
         # Convert to serializable format
         feedback_data = []
@@ -3357,9 +3609,12 @@ async def get_workflow_feedback(
             "success": True,
             "workflow_id": workflow_id,
             "feedback": feedback_data,
-            "count": len(feedback_data)
+            "count": len(feedback_data),
+            "next_cursor": feedback_page.next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting workflow feedback: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,490 @@
+"""
+Pre-flight cost and duration estimates for batches
+
+BatchEstimator predicts, before a batch is started, how long it will take at
+its concurrency, how many tokens it will use and what it will cost, each with
+a confidence interval, and flags the inputs likely to exceed timeout_per_job.
+
+- Durations: for every agent step of the workflow, the agent's recent
+  agent_performance runs are fitted as execution time against the
+  TaskComplexityAnalyzer score of their task, so each input gets its own
+  prediction. Workflows whose agents have no history fall back to the
+  execution times of the workflow's past batch jobs, fitted the same way.
+  A job takes as long as its longest chain of steps, since steps run as
+  soon as the steps they need are done (WorkflowExecutor.step_dependencies).
+- Repeated inputs and steps shared by jobs of the same prospect (see
+  batch_processor.SharedStageCache) are counted once.
+- Retries: each attempt succeeds with the product of the steps' success
+  rates, up to max_retries + 1 attempts.
+- Wall time: the expected work spread over the job lanes, bounded above by
+  list scheduling (work / lanes + the longest job) so the interval holds for
+  batches of a few long jobs too. Every step in flight holds a scheduler
+  slot (fair_scheduler.RunSlot), so the step time of all jobs spread over
+  the batch slots is a lower bound as well.
+- Tokens come from the workflow's runs in observability_metrics; cost from
+  the costs recorded with the agent runs or, failing that, from tokens at
+  batch_estimates.cost_per_1k_tokens.
+
+Intervals combine the run-to-run spread with the uncertainty of the fitted
+means, assuming independent, roughly normal run times. Anything estimated
+without history is reported in the estimate's warnings.
+"""
+
+import json
+import logging
+import math
+from dataclasses import asdict, dataclass, field
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from agent_performance import TaskComplexityAnalyzer
+from batch_processor import (PROFILE_FIELDS, BatchProcessingConfig, BatchProcessor, batch_processor,
+                             input_fingerprint)
+from config_system import config_system
+from fair_scheduler import FairScheduler, job_scheduler
+from logging_config import log_debug, log_warning
+from workflow_executor import workflow_executor
+
+logger = logging.getLogger(__name__)
+
+# (complexity score or None, execution seconds, success, cost or None)
+Run = Tuple[Optional[float], float, bool, Optional[float]]
+
+
+@dataclass
+class Interval:
+    """Expected value and confidence interval"""
+    expected: float
+    low: float
+    high: float
+
+    @classmethod
+    def normal(cls, mean: float, sd: float, z: float) -> "Interval":
+        return cls(expected=mean, low=max(0.0, mean - z * sd), high=mean + z * sd)
+
+    def scaled(self, factor: float) -> "Interval":
+        return Interval(self.expected * factor, self.low * factor, self.high * factor)
+
+
+@dataclass
+class DurationModel:
+    """Seconds per run as a linear function of task complexity, fitted on recent runs"""
+    source: str
+    samples: int = 0
+    intercept: float = 0.0
+    slope: float = 0.0
+    residual_sd: float = 0.0
+    standard_error: float = 0.0  # Of the fitted mean
+    success_rate: float = 1.0
+    cost_per_run: Optional[float] = None
+    cost_sd: float = 0.0
+    cost_samples: int = 0
+
+    @classmethod
+    def fit(cls, source: str, runs: List[Run], min_regression_samples: int) -> Optional["DurationModel"]:
+        """
+        Fit run times on complexity, or take their mean
+
+        The slope is only fitted from min_regression_samples successful runs
+        that all carry a complexity score spread over some range. A single
+        run gives a spread as large as its time.
+        """
+        if not runs:
+            return None
+        succeeded = [(complexity, seconds) for complexity, seconds, success, _ in runs if success]
+        timed = succeeded or [(complexity, seconds) for complexity, seconds, _, _ in runs]
+        times = [seconds for _, seconds in timed]
+        n = len(times)
+        mean_time = sum(times) / n
+
+        intercept, slope, parameters = mean_time, 0.0, 1
+        scores = [complexity for complexity, _ in timed]
+        if n >= min_regression_samples and all(score is not None for score in scores):
+            mean_score = sum(scores) / n
+            score_var = sum((score - mean_score) ** 2 for score in scores)
+            if score_var > 1e-9:
+                slope = sum((score - mean_score) * (seconds - mean_time) for score, seconds in timed) / score_var
+                intercept = mean_time - slope * mean_score
+                parameters = 2
+
+        if n > parameters:
+            residuals = [seconds - (intercept + slope * (score or 0.0)) for score, seconds in timed]
+            residual_sd = math.sqrt(sum(r * r for r in residuals) / (n - parameters))
+        else:
+            residual_sd = mean_time
+
+        costs = [cost for _, _, _, cost in runs if cost is not None]
+        cost_per_run = sum(costs) / len(costs) if costs else None
+        cost_sd = (math.sqrt(sum((cost - cost_per_run) ** 2 for cost in costs) / (len(costs) - 1))
+                   if len(costs) > 1 else (cost_per_run or 0.0))
+
+        return cls(source=source, samples=n, intercept=intercept, slope=slope, residual_sd=residual_sd,
+                   standard_error=residual_sd / math.sqrt(n),
+                   success_rate=sum(success for _, _, success, _ in runs) / len(runs),
+                   cost_per_run=cost_per_run, cost_sd=cost_sd, cost_samples=len(costs))
+
+    @classmethod
+    def default(cls, seconds: float) -> "DurationModel":
+        """Placeholder for a step without history: the configured time, give or take as much again"""
+        return cls(source="default", intercept=seconds, residual_sd=seconds, standard_error=seconds)
+
+    def predict(self, complexity: float) -> float:
+        return max(0.0, self.intercept + self.slope * complexity)
+
+
+@dataclass
+class BatchEstimate:
+    """Predicted duration, tokens and cost of running a set of inputs through a workflow"""
+    workflow_id: str
+    total_jobs: int
+    jobs_to_run: int  # After repeated inputs are shared
+    concurrency: int
+    confidence: float
+    wall_time_seconds: Interval
+    job_seconds: Interval  # A single job, averaged over the batch
+    expected_attempts_per_job: float
+    expected_failed_jobs: float
+    total_tokens: Optional[Interval]
+    total_cost: Optional[Interval]
+    step_runs_saved: int
+    timeout_per_job: float
+    timeout_risk_jobs: int
+    timeout_risk_inputs: List[Dict[str, Any]]
+    history: Dict[str, Any]
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class BatchEstimator:
+    """Estimates batches from agent, batch job and observability history"""
+
+    def __init__(self, processor: BatchProcessor, scheduler: Optional[FairScheduler] = None,
+                 executor=None, estimate_config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            processor: Batch processor whose database and defaults the estimates use
+            scheduler: Run scheduler capping the batch's concurrency (default: the process scheduler)
+            executor: Workflow executor the workflow steps are read from
+            estimate_config: Overrides of the batch_estimates config section
+        """
+        estimate_config = {**config_system.get("batch_estimates", {}), **(estimate_config or {})}
+        self.processor = processor
+        self.db_manager = processor.db_manager
+        self.scheduler = scheduler or job_scheduler
+        self.executor = executor or workflow_executor
+        self.history_size = estimate_config.get("history_size", 500)
+        self.min_regression_samples = estimate_config.get("min_regression_samples", 10)
+        self.confidence = estimate_config.get("confidence", 0.9)
+        self.default_step_seconds = estimate_config.get("default_step_seconds", 30.0)
+        self.timeout_risk_threshold = estimate_config.get("timeout_risk_threshold", 0.2)
+        self.max_flagged_inputs = estimate_config.get("max_flagged_inputs", 100)
+        self.cost_per_1k_tokens = estimate_config.get("cost_per_1k_tokens")
+        self.complexity_analyzer = TaskComplexityAnalyzer()
+
+    def estimate(self, workflow_id: str, inputs: Iterable[Tuple[Any, Dict[str, Any]]],
+                 config: Optional[BatchProcessingConfig] = None,
+                 concurrency: Optional[int] = None) -> BatchEstimate:
+        """
+        Estimate running inputs through a workflow
+
+        Args:
+            workflow_id: Workflow the batch runs
+            inputs: (key, input data) pairs; the key identifies flagged inputs (list index or job id)
+            config: Batch config (default: the processor's)
+            concurrency: Jobs run at once (default: max_concurrent_jobs, capped by the scheduler's batch slots)
+
+        Raises:
+            ValueError: If the workflow does not exist
+        """
+        config = config or self.processor.config
+        workflow_config = self.executor.config_manager.load_workflow_config(workflow_id)
+        if not workflow_config:
+            raise ValueError(f"Workflow not found: {workflow_id}")
+        ordered = sorted(workflow_config.steps, key=lambda step: step.get("order", 0))
+        steps = [step for step in ordered if step.get("enabled", True) and step.get("agent_id")]
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        warnings = []
+
+        models, shared_steps, history = self._duration_models(workflow_id, steps, warnings)
+        shared = [step_id in shared_steps for step_id, _ in models]
+        waits = self._waits(ordered, models)
+        variances = [model.residual_sd ** 2 for _, model in models]
+        tokens = self._token_history(workflow_id)
+
+        total_jobs = jobs_to_run = step_runs = step_runs_saved = 0
+        work = work_var = step_work = step_work_var = 0.0
+        model_runs = [0] * len(models)
+        max_job, max_job_low, max_job_high = 0.0, 0.0, 0.0
+        job_sum = job_var_sum = 0.0
+        timeout_risk_jobs, timeout_risk_inputs = 0, []
+        seen_inputs, seen_profiles = set(), set()
+
+        for key, input_data in inputs:
+            total_jobs += 1
+            complexity, _ = self.complexity_analyzer.analyze_task_complexity(input_data)
+            step_seconds = [model.predict(complexity) for _, model in models]
+            job_seconds, job_var = self._critical_path(step_seconds, variances, waits)
+            job_sum += job_seconds
+            job_var_sum += job_var
+            job_sd = math.sqrt(job_var)
+            max_job = max(max_job, job_seconds)
+            max_job_low = max(max_job_low, job_seconds - z * job_sd)
+            max_job_high = max(max_job_high, job_seconds + z * job_sd)
+
+            timeout_probability = (1 - NormalDist(job_seconds, job_sd).cdf(config.timeout_per_job) if job_sd > 0
+                                   else float(job_seconds > config.timeout_per_job))
+            if timeout_probability >= self.timeout_risk_threshold:
+                timeout_risk_jobs += 1
+                if len(timeout_risk_inputs) < self.max_flagged_inputs:
+                    timeout_risk_inputs.append({'input': key, 'complexity': round(complexity, 3),
+                                                'expected_seconds': round(job_seconds, 1),
+                                                'timeout_probability': round(timeout_probability, 3)})
+
+            # Jobs repeating an input reuse its result; jobs of a profile already seen reuse its shared steps
+            input_key = input_fingerprint("input", input_data)
+            if input_key is not None and input_key in seen_inputs:
+                step_runs_saved += len(models)
+                continue
+            seen_inputs.add(input_key)
+            jobs_to_run += 1
+            profile_key = input_fingerprint("profile", input_data, PROFILE_FIELDS) if any(shared) else None
+            profile_seen = profile_key is not None and profile_key in seen_profiles
+            seen_profiles.add(profile_key)
+            run = [not (profile_seen and shared[index]) for index in range(len(models))]
+            step_runs_saved += run.count(False)
+            step_runs += run.count(True)
+            model_runs = [runs + ran for runs, ran in zip(model_runs, run)]
+            # The job holds a lane for its longest chain of steps, and a slot for each step it runs
+            slot_seconds, slot_var = self._critical_path(
+                [step if ran else 0.0 for step, ran in zip(step_seconds, run)],
+                [variance if ran else 0.0 for variance, ran in zip(variances, run)], waits)
+            work += slot_seconds
+            work_var += slot_var
+            step_work += sum(step for step, ran in zip(step_seconds, run) if ran)
+            step_work_var += sum(variance for variance, ran in zip(variances, run) if ran)
+
+        if total_jobs == 0:
+            raise ValueError("No inputs to estimate")
+
+        # Attempts per job until one succeeds or the retries run out
+        success_rate = math.prod(model.success_rate for _, model in models)
+        failure_rate = 1 - success_rate
+        attempts = sum(failure_rate ** attempt for attempt in range(config.max_retries + 1))
+
+        # The fitted means are off by the same amount for every run of a model
+        parameter_sd = math.sqrt(sum((runs * model.standard_error) ** 2
+                                     for runs, (_, model) in zip(model_runs, models)))
+        work_sd = attempts * math.sqrt(work_var + parameter_sd ** 2)
+        work *= attempts
+        step_work_sd = attempts * math.sqrt(step_work_var + parameter_sd ** 2)
+        step_work *= attempts
+
+        lanes = max(1, min(concurrency or self.batch_concurrency(config), max(jobs_to_run, 1)))
+        slots = self.scheduler.capacity - self.scheduler.interactive_reserved
+        wall_time = Interval(expected=max(work / lanes, step_work / slots, max_job),
+                             low=max(max(0.0, work - z * work_sd) / lanes,
+                                     max(0.0, step_work - z * step_work_sd) / slots, max_job_low),
+                             high=max((work + z * work_sd) / lanes + (1 - 1 / lanes) * max_job_high,
+                                      (step_work + z * step_work_sd) / slots + (1 - 1 / slots) * max_job_high))
+
+        step_count = max(len(models), 1)
+        total_tokens = None
+        if tokens is not None:
+            # A run of some of the steps uses that share of a run's tokens
+            runs = attempts * step_runs / step_count
+            mean_tokens, sd_tokens, samples = tokens
+            total_tokens = Interval.normal(mean_tokens * runs,
+                                           math.sqrt(runs * sd_tokens ** 2 + (runs * sd_tokens) ** 2 / samples), z)
+        else:
+            warnings.append("No token usage recorded for this workflow; tokens not estimated")
+
+        total_cost, cost_source = self._cost(models, model_runs, attempts, total_tokens, z)
+        if total_cost is None:
+            warnings.append("No recorded agent costs and no batch_estimates.cost_per_1k_tokens; cost not estimated")
+        history.update({'token_samples': tokens[2] if tokens else 0, 'cost_source': cost_source})
+
+        estimate = BatchEstimate(
+            workflow_id=workflow_id,
+            total_jobs=total_jobs,
+            jobs_to_run=jobs_to_run,
+            concurrency=lanes,
+            confidence=self.confidence,
+            wall_time_seconds=wall_time,
+            job_seconds=Interval.normal(job_sum / total_jobs, math.sqrt(job_var_sum / total_jobs), z),
+            expected_attempts_per_job=attempts,
+            expected_failed_jobs=jobs_to_run * failure_rate ** (config.max_retries + 1),
+            total_tokens=total_tokens,
+            total_cost=total_cost,
+            step_runs_saved=step_runs_saved,
+            timeout_per_job=config.timeout_per_job,
+            timeout_risk_jobs=timeout_risk_jobs,
+            timeout_risk_inputs=timeout_risk_inputs,
+            history=history,
+            warnings=warnings
+        )
+        log_debug(logger, f"Estimated {total_jobs} jobs of {workflow_id}: {wall_time.expected:.0f}s "
+                          f"at concurrency {lanes}, {timeout_risk_jobs} at risk of timing out")
+        return estimate
+
+    def estimate_batch(self, batch_id: str, concurrency: Optional[int] = None) -> Optional[BatchEstimate]:
+        """Estimate the unfinished jobs of a created batch with its own config (None if the batch does not exist)"""
+        batch = self.db_manager.fetch_one("SELECT workflow_id, config FROM batch_processing WHERE id = :batch_id",
+                                          {"batch_id": batch_id})
+        if not batch:
+            return None
+        config = BatchProcessingConfig(**json.loads(batch['config'])) if batch['config'] else None
+        return self.estimate(batch['workflow_id'], self.processor.iter_unfinished_inputs(batch_id),
+                             config, concurrency)
+
+    def batch_concurrency(self, config: BatchProcessingConfig) -> int:
+        """Jobs of one batch run at once: max_concurrent_jobs, within the scheduler's batch slots"""
+        return max(1, min(config.max_concurrent_jobs,
+                          self.scheduler.capacity - self.scheduler.interactive_reserved))
+
+    def _waits(self, ordered_steps: List[Dict[str, Any]], models: List[Tuple[str, DurationModel]]) -> List[List[int]]:
+        """For each modelled step, the modelled steps it waits for, directly or through other steps"""
+        index = {step_id: position for position, (step_id, _) in enumerate(models)}
+        dependencies = self.executor.step_dependencies(ordered_steps)
+        needed = {}
+        for step_id, direct in dependencies.items():
+            needed[step_id] = set(direct).union(*(needed[dependency] for dependency in direct))
+        return [sorted(index[dependency] for dependency in needed.get(step_id, ()) if dependency in index)
+                for step_id, _ in models]
+
+    @staticmethod
+    def _critical_path(seconds: List[float], variances: List[float], waits: List[List[int]]) -> Tuple[float, float]:
+        """
+        Duration of a job whose steps start as soon as the steps they wait for finish, and its variance
+
+        Follows the longest chain of steps (see WorkflowExecutor.step_dependencies),
+        ignoring the workflow's max_parallel_steps and waits for scheduler slots.
+        """
+        finish, finish_var = [], []
+        for position, waited in enumerate(waits):
+            start = max(waited, key=finish.__getitem__, default=None)
+            finish.append(seconds[position] + (finish[start] if start is not None else 0.0))
+            finish_var.append(variances[position] + (finish_var[start] if start is not None else 0.0))
+        if not finish:
+            return 0.0, 0.0
+        last = max(range(len(finish)), key=finish.__getitem__)
+        return finish[last], finish_var[last]
+
+    def _duration_models(self, workflow_id: str, steps: List[Dict[str, Any]],
+                         warnings: List[str]) -> Tuple[List[Tuple[str, DurationModel]], List[str], Dict[str, Any]]:
+        """
+        Duration model of each agent step, or a single model of the whole workflow
+
+        Returns:
+            Tuple of ((step id, model) pairs, ids of steps shareable across a
+            profile, history summary)
+        """
+        step_models = [(step["id"], DurationModel.fit("agent_performance", self._agent_runs(step["agent_id"]),
+                                                      self.min_regression_samples))
+                       for step in steps]
+        history = {'agents': {step["agent_id"]: model.samples if model else 0
+                              for step, (_, model) in zip(steps, step_models)}}
+        missing = [step["agent_id"] for step, (_, model) in zip(steps, step_models) if model is None]
+
+        if steps and not missing:
+            history['source'] = "agent_performance"
+            try:
+                shared_steps = self.executor.shared_step_ids(workflow_id, PROFILE_FIELDS)
+            except Exception as e:
+                log_warning(logger, f"Could not find shareable steps of workflow {workflow_id}: {e}")
+                shared_steps = []
+            return step_models, shared_steps, history
+
+        job_model = DurationModel.fit("batch_jobs", self._job_runs(workflow_id), self.min_regression_samples)
+        history['job_samples'] = job_model.samples if job_model else 0
+        if job_model is not None:
+            history['source'] = "batch_jobs"
+            warnings.append(f"No run history for agents {', '.join(missing) or '(none)'}; "
+                            f"durations come from past jobs of the workflow")
+            return [(workflow_id, job_model)], [], history
+
+        history['source'] = "default"
+        warnings.append(f"No run history for agents {', '.join(missing) or '(none)'} or the workflow; "
+                        f"assuming {self.default_step_seconds:g}s per step")
+        models = [(step_id, model or DurationModel.default(self.default_step_seconds))
+                  for step_id, model in step_models] or [(workflow_id, DurationModel.default(self.default_step_seconds))]
+        return models, [], history
+
+    def _agent_runs(self, agent_id: str) -> List[Run]:
+        """An agent's latest runs, across models"""
+        rows = self.db_manager.fetch_all("""
+            SELECT task_complexity, execution_time, success, cost FROM agent_performance
+            WHERE agent_id = :agent_id AND execution_time IS NOT NULL
+            ORDER BY timestamp DESC
+            LIMIT :limit
+        """, {"agent_id": agent_id, "limit": self.history_size})
+        return [(row['task_complexity'], row['execution_time'], bool(row['success']), row['cost']) for row in rows]
+
+    def _job_runs(self, workflow_id: str) -> List[Run]:
+        """The workflow's latest finished batch jobs, scored by the complexity of their inputs"""
+        rows = self.db_manager.fetch_all("""
+            SELECT input_data, execution_time, status FROM batch_jobs
+            WHERE workflow_id = :workflow_id AND status IN ('completed', 'failed') AND execution_time > 0
+            ORDER BY completed_at DESC
+            LIMIT :limit
+        """, {"workflow_id": workflow_id, "limit": self.history_size})
+        runs = []
+        for row in rows:
+            complexity, _ = self.complexity_analyzer.analyze_task_complexity(json.loads(row['input_data']))
+            runs.append((complexity, row['execution_time'], row['status'] == 'completed', None))
+        return runs
+
+    def _token_history(self, workflow_id: str) -> Optional[Tuple[float, float, int]]:
+        """Mean and standard deviation of tokens per run of the workflow, and the number of runs"""
+        rows = self.db_manager.fetch_all("""
+            SELECT token_usage FROM observability_metrics
+            WHERE workflow_id = :workflow_id
+            ORDER BY timestamp DESC
+            LIMIT :limit
+        """, {"workflow_id": workflow_id, "limit": self.history_size})
+        usage = [tokens for tokens in (self._tokens(row['token_usage']) for row in rows) if tokens > 0]
+        if not usage:
+            return None
+        mean = sum(usage) / len(usage)
+        sd = math.sqrt(sum((tokens - mean) ** 2 for tokens in usage) / (len(usage) - 1)) if len(usage) > 1 else mean
+        return mean, sd, len(usage)
+
+    @staticmethod
+    def _tokens(token_usage: Any) -> float:
+        """Total tokens of a token_usage value: a count, or input/output counts, possibly as JSON text"""
+        if isinstance(token_usage, str):
+            try:
+                token_usage = json.loads(token_usage)
+            except ValueError:
+                return 0.0
+        if isinstance(token_usage, dict):
+            if isinstance(token_usage.get('total_tokens'), (int, float)):
+                return float(token_usage['total_tokens'])
+            return float(sum(value for value in token_usage.values() if isinstance(value, (int, float))))
+        return float(token_usage) if isinstance(token_usage, (int, float)) else 0.0
+
+    def _cost(self, models: List[Tuple[str, DurationModel]], model_runs: List[int], attempts: float,
+              total_tokens: Optional[Interval], z: float) -> Tuple[Optional[Interval], Optional[str]]:
+        """Cost from the agents' recorded costs, else from tokens at cost_per_1k_tokens"""
+        if models and all(model.cost_per_run is not None for _, model in models):
+            mean = attempts * sum(runs * model.cost_per_run for runs, (_, model) in zip(model_runs, models))
+            variance = sum(runs * model.cost_sd ** 2 + (runs * model.cost_sd) ** 2 / model.cost_samples
+                           for runs, (_, model) in zip(model_runs, models))
+            return Interval.normal(mean, attempts * math.sqrt(variance), z), "agent_performance"
+        if total_tokens is not None and self.cost_per_1k_tokens is not None:
+            return total_tokens.scaled(self.cost_per_1k_tokens / 1000), "tokens"
+        return None, None
+
+
+def estimate_inputs(workflow_id: str, input_list: List[Dict[str, Any]],
+                    config_override: Optional[Dict[str, Any]] = None,
+                    concurrency: Optional[int] = None) -> BatchEstimate:
+    """Estimate a batch of inputs before creating it"""
+    config = BatchProcessingConfig(**{**asdict(batch_processor.config), **(config_override or {})})
+    return BatchEstimator(batch_processor).estimate(workflow_id, enumerate(input_list), config, concurrency)
+
+
+def estimate_batch(batch_id: str, concurrency: Optional[int] = None) -> Optional[BatchEstimate]:
+    """Estimate the unfinished jobs of a created batch"""
+    return BatchEstimator(batch_processor).estimate_batch(batch_id, concurrency)
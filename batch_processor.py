@@ -7,26 +7,38 @@ and result aggregation capabilities.
 """
 
 import asyncio
+import csv
+import hashlib
+import io
 import json
 import logging
+import math
+import os
+import random
+import socket
 import time
 import uuid
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any, Callable, AsyncGenerator
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Callable, AsyncGenerator, Tuple, BinaryIO
+from collections import deque
 from dataclasses import dataclass, asdict
-from collections import defaultdict
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from workflow_executor import workflow_executor
-from database import get_database_manager
-from sqlalchemy import text
+from database import bind_positional, get_database_manager
+from sqlalchemy import inspect, text
 from logging_config import log_info, log_warning, log_debug, log_error
+from pagination import CursorPage, KeysetPaginator, decode_cursor, encode_cursor
+from batch_queue import BatchJobStream
+from fair_scheduler import batch_flow, job_scheduler
 from config_system import config_system
 from cache import cache_result
 from input_validator import validate_workflow_inputs
 from context_enricher import enrich_workflow_context
+from error_handling import (AppError, AuthenticationError, AuthorizationError, ConfigurationError,
+                            ExternalServiceError, NotFoundError, RateLimitError, ValidationError, WorkflowError)
 
 logger = logging.getLogger(__name__)
 
@@ -37,21 +49,24 @@ class DatabaseAdapter:
     def __init__(self):
         self.db_manager = get_database_manager()
     
-    def execute(self, sql, params=None):
-        """Execute SQL statement"""
+    def execute(self, sql, params=None) -> int:
+        """Execute SQL statement and return the number of affected rows"""
+        sql, params = bind_positional(sql, params)
         try:
             with self.db_manager.get_session() as session:
                 if params:
-                    session.execute(text(sql), params)
+                    result = session.execute(text(sql), params)
                 else:
-                    session.execute(text(sql))
+                    result = session.execute(text(sql))
                 session.commit()
+                return result.rowcount
         except Exception as e:
             log_error(logger, f"Database execute error: {e}")
             raise
     
     def fetch_one(self, sql, params=None):
         """Fetch one row from SQL query"""
+        sql, params = bind_positional(sql, params)
         try:  
             with self.db_manager.get_session() as session:
                 if params:
@@ -66,6 +81,7 @@ class DatabaseAdapter:
     
     def fetch_all(self, sql, params=None):
         """Fetch all rows from SQL query"""
+        sql, params = bind_positional(sql, params)
         try:
             with self.db_manager.get_session() as session:
                 if params:
@@ -76,6 +92,33 @@ class DatabaseAdapter:
         except Exception as e:
             log_error(logger, f"Database fetch_all error: {e}")
             return []
+    
+    def execute_many(self, sql, rows: List[Dict[str, Any]]) -> int:
+        """Execute SQL statement once per parameter set in one transaction"""
+        try:
+            with self.db_manager.get_session() as session:
+                result = session.execute(text(sql), rows)
+                session.commit()
+                return result.rowcount
+        except Exception as e:
+            log_error(logger, f"Database execute error: {e}")
+            raise
+    
+    async def execute_async(self, sql, params=None):
+        """Execute SQL statement without blocking the event loop"""
+        try:
+            await self.db_manager.execute_async(*bind_positional(sql, params))
+        except Exception as e:
+            log_error(logger, f"Database execute error: {e}")
+            raise
+    
+    async def fetch_all_async(self, sql, params=None):
+        """Fetch all rows from SQL query without blocking the event loop"""
+        try:
+            return await self.db_manager.fetch_all_async(*bind_positional(sql, params))
+        except Exception as e:
+            log_error(logger, f"Database fetch_all error: {e}")
+            return []
 
 
 class BatchStatus(Enum):
@@ -98,6 +141,133 @@ class JobStatus(Enum):
     RETRYING = "retrying"
 
 
+# A paused batch is still being processed; it only holds back new job attempts
+ACTIVE_BATCH_STATUSES = (BatchStatus.RUNNING, BatchStatus.PAUSED)
+
+
+class ErrorClass(Enum):
+    """How a failed job attempt should be retried"""
+    TRANSIENT = "transient"  # Retry with backoff
+    RATE_LIMITED = "rate_limited"  # Retry with a longer backoff, honouring Retry-After
+    PERMANENT = "permanent"  # The input or configuration is at fault; retrying cannot help
+
+
+RATE_LIMIT_MARKERS = ("rate limit", "ratelimit", "too many requests", "429", "quota")
+TRANSIENT_MARKERS = ("timeout", "timed out", "connection", "temporarily", "unavailable", "overloaded",
+                     "502", "503", "504")
+PERMANENT_MARKERS = ("validation failed", "not found", "invalid", "unauthorized", "forbidden",
+                     "content filter", "context length")
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    """Classify a job attempt's error by type, HTTP status and, failing those, message"""
+    # An AppError's status_code is the response this app would send, not the upstream status
+    status = None if isinstance(error, AppError) else getattr(error, "status_code", None)
+    if not isinstance(status, int):
+        status = None
+    message = str(error).lower()
+    
+    if isinstance(error, RateLimitError) or status == 429 or any(marker in message for marker in RATE_LIMIT_MARKERS):
+        return ErrorClass.RATE_LIMITED
+    if isinstance(error, (TimeoutError, ConnectionError, ExternalServiceError)) or (status and status >= 500):
+        return ErrorClass.TRANSIENT
+    if isinstance(error, (ValidationError, NotFoundError, AuthenticationError, AuthorizationError,
+                          ConfigurationError, ValueError, TypeError, KeyError)) or (status and 400 <= status < 500):
+        return ErrorClass.PERMANENT
+    if any(marker in message for marker in TRANSIENT_MARKERS):
+        return ErrorClass.TRANSIENT
+    if any(marker in message for marker in PERMANENT_MARKERS):
+        return ErrorClass.PERMANENT
+    # Unknown errors keep the old behaviour of being retried
+    return ErrorClass.TRANSIENT
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-requested wait carried by a rate limit error, if any"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None and isinstance(getattr(error, "details", None), dict):
+        retry_after = error.details.get("retry_after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Jobs that may be claimed: unfinished and not under a live lease (never claimed, or the owner stopped)
+CLAIMABLE_JOB_CONDITION = """
+    (status IN ('pending', 'running', 'retrying') AND (lease_expires_at IS NULL OR lease_expires_at < :now))
+"""
+
+
+# Inputs that identify a prospect and company; workflow steps reading only these can be shared across jobs
+PROFILE_FIELDS = ("prospect_profile_url", "prospect_company_url", "prospect_company_website")
+
+
+def input_fingerprint(kind: str, input_data: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """
+    Fingerprint of a job's inputs, or of the given fields only
+    
+    Values are compared after trimming whitespace and, for the URL fields,
+    case and trailing slashes. None if none of the fields has a value.
+    """
+    values = {}
+    for name in fields or sorted(input_data):
+        value = input_data.get(name)
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if name in PROFILE_FIELDS:
+                value = value.lower().rstrip("/")
+        values[name] = value
+    if not values:
+        return None
+    canonical = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(f"{kind}:{canonical}".encode()).hexdigest()[:32]
+
+
+def iter_batch_inputs(stream: BinaryIO, filename: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read job inputs from an uploaded CSV or JSON Lines file one row at a time
+    
+    CSV headers name the input fields; empty cells are left out. JSON Lines
+    files (.jsonl or .ndjson) hold one JSON object per line; blank lines are
+    skipped.
+    
+    Raises:
+        ValueError: If the file type is not supported or a line is not a JSON object
+    """
+    suffix = os.path.splitext(filename or "")[1].lower()
+    if suffix not in (".csv", ".jsonl", ".ndjson"):
+        raise ValueError(f"Unsupported batch file type '{suffix}'; upload .csv, .jsonl or .ndjson")
+    
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if suffix == ".csv":
+            for row in csv.DictReader(text_stream):
+                yield {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+            return
+        
+        for line_number, line in enumerate(text_stream, 1):
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number} is not valid JSON: {e}")
+            if not isinstance(value, dict):
+                raise ValueError(f"Line {line_number} is not a JSON object")
+            yield value
+    finally:
+        # Leave the upload's file open for its owner to close
+        text_stream.detach()
+
+
+# Columns of an exported batch job, in CSV order (details add input_data and result)
+EXPORT_COLUMNS = ("job_id", "status", "execution_time", "retry_count", "error_message", "started_at", "completed_at")
+EXPORT_DETAIL_COLUMNS = ("input_data", "result")
+
+
 @dataclass
 class BatchJob:
     """Individual job within a batch"""
@@ -113,6 +283,10 @@ class BatchJob:
     execution_time: float = 0.0
     retry_count: int = 0
     priority: int = 0  # Higher numbers = higher priority
+    lease_token: Optional[str] = None  # Set while this worker holds the job's lease
+    retry_delay: float = 0.0  # Last backoff before a retry (decorrelated jitter grows from it)
+    input_key: Optional[str] = None  # Fingerprint of the whole input (shared validation and enrichment)
+    profile_key: Optional[str] = None  # Fingerprint of the PROFILE_FIELDS (shared profile steps)
 
 
 @dataclass
@@ -127,6 +301,58 @@ class BatchProcessingConfig:
     save_intermediate_results: bool = True
     chunk_size: int = 100  # For very large batches
     priority_processing: bool = True
+    retry_max_delay: float = 60.0  # Cap on the jittered backoff (seconds)
+    rate_limit_delay: float = 15.0  # Minimum backoff after a rate limit (seconds)
+    circuit_window: int = 20  # Recent attempts the circuit breaker looks at
+    circuit_min_attempts: int = 10  # Attempts needed before the breaker can open
+    circuit_failure_rate: float = 0.5  # Failure rate of recent attempts that pauses the batch
+    circuit_cooldown: float = 30.0  # Pause before a probe attempt (seconds); doubles while probes fail
+    circuit_max_cooldown: float = 300.0
+    weight: float = 1.0  # Share of the process's run slots relative to other batches (see fair_scheduler)
+
+
+@dataclass
+class BatchProgressTracker:
+    """Running progress of one batch run, updated in O(1) as each job finishes"""
+    total_jobs: int
+    processed_jobs: int = 0  # Finished jobs, including those finished before a restart
+    completed_jobs: int = 0
+    failed_jobs: int = 0
+    ewma_job_time: float = 0.0  # Exponentially weighted average duration of completed jobs
+    smoothing: float = 0.2  # Weight of the newest job in ewma_job_time
+    last_written: Optional[float] = None  # time.monotonic() of the last progress write
+    
+    def record(self, status: JobStatus, execution_time: float):
+        """Count a finished job and fold its duration into the average"""
+        self.processed_jobs += 1
+        if status == JobStatus.COMPLETED:
+            self.completed_jobs += 1
+            if self.completed_jobs == 1:
+                self.ewma_job_time = execution_time
+            else:
+                self.ewma_job_time += self.smoothing * (execution_time - self.ewma_job_time)
+        elif status == JobStatus.FAILED:
+            self.failed_jobs += 1
+    
+    @property
+    def remaining_jobs(self) -> int:
+        return max(0, self.total_jobs - self.processed_jobs)
+    
+    @property
+    def progress(self) -> float:
+        return (self.processed_jobs / self.total_jobs) * 100 if self.total_jobs else 100.0
+    
+    def eta_seconds(self, concurrency: int) -> Optional[float]:
+        """Seconds until the remaining jobs finish when run concurrency at a time; None before any job completed"""
+        if not self.completed_jobs:
+            return None
+        remaining = self.remaining_jobs
+        lanes = max(1, min(concurrency, remaining))
+        return math.ceil(remaining / lanes) * self.ewma_job_time
+    
+    def due(self, interval: float) -> bool:
+        """Whether interval seconds have passed since the last progress write"""
+        return self.last_written is None or time.monotonic() - self.last_written >= interval
 
 
 @dataclass 
@@ -147,6 +373,266 @@ class BatchResult:
     summary: Dict[str, Any]
 
 
+class BatchCircuitBreaker:
+    """
+    Pauses a batch while most of its recent job attempts fail
+    
+    Closed: attempts run and the outcomes of the last `window` are kept.
+    Once at least min_attempts are recorded and failure_rate of them failed
+    with a transient or rate-limit error, the breaker opens and no attempt
+    starts for the cooldown. Then a single probe attempt runs (half-open):
+    success closes the breaker, failure re-opens it with the cooldown doubled
+    up to max_cooldown. Permanent errors are the input's fault and do not count.
+    """
+    
+    def __init__(self, window: int, min_attempts: int, failure_rate: float,
+                 cooldown: float, max_cooldown: float):
+        self.min_attempts = min_attempts
+        self.failure_rate = failure_rate
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self._outcomes = deque(maxlen=max(1, window))  # True for a failed attempt
+        self._cooldown = cooldown
+        self._opened_until = 0.0
+        self._probing = False
+        self._changed = asyncio.Event()
+    
+    async def wait_until_allowed(self) -> bool:
+        """Wait until an attempt may start; True if it is the half-open probe"""
+        while True:
+            if self.state == "closed":
+                return False
+            if self.state == "open":
+                remaining = self._opened_until - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                self.state = "half_open"
+            if not self._probing:
+                self._probing = True
+                return True
+            self._changed.clear()
+            await self._changed.wait()
+    
+    def record(self, failed: bool, probe: bool = False) -> Optional[str]:
+        """Record an attempt's outcome; returns "opened" or "closed" when the breaker changes state"""
+        if probe:
+            self._probing = False
+            if failed:
+                self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+                return self._open()
+            self.state = "closed"
+            self._cooldown = self.base_cooldown
+            self._outcomes.clear()
+            self._changed.set()
+            return "closed"
+        
+        if self.state != "closed":
+            return None
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_attempts and \
+                sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+            return self._open()
+        return None
+    
+    def _open(self) -> str:
+        self.state = "open"
+        self._opened_until = time.monotonic() + self._cooldown
+        self._changed.set()
+        return "opened"
+
+
+class SharedStageCache:
+    """
+    Stage results shared by the jobs of one batch run
+    
+    Jobs with the same fingerprint run a stage once: the first one starts it
+    and the others await the same task. Only fingerprints carried by more
+    than one unfinished job are cached, and a result is dropped once the last
+    of those jobs has taken it, so memory does not grow with the batch.
+    A stage that fails is not cached; the next job runs it again.
+    """
+    
+    def __init__(self, uses: Optional[Dict[str, int]] = None):
+        self._uses = uses or {}  # fingerprint -> unfinished jobs carrying it
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._remaining: Dict[Tuple[str, str], int] = {}
+        self.reused: Dict[str, int] = {}  # stage -> results taken from another job
+    
+    async def run(self, stage: str, key: Optional[str], compute: Callable[[], Any]) -> Any:
+        """Result of compute() for this stage and fingerprint, computed once per fingerprint"""
+        if key is None or self._uses.get(key, 0) < 2:
+            return await compute()
+        
+        slot = (stage, key)
+        task = self._tasks.get(slot)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda done: self._forget_failed(slot, done))
+            self._tasks[slot] = task
+            self._remaining[slot] = self._uses[key]
+        else:
+            self.reused[stage] = self.reused.get(stage, 0) + 1
+        
+        self._remaining[slot] -= 1
+        if self._remaining[slot] <= 0:
+            self._tasks.pop(slot, None)
+            self._remaining.pop(slot, None)
+        
+        # A job timing out must not cancel the stage for the jobs sharing it
+        return await asyncio.shield(task)
+    
+    def llm_calls_saved(self) -> int:
+        """Workflow step runs (LLM calls) taken from another job"""
+        return sum(count for stage, count in self.reused.items() if stage.startswith("step:"))
+    
+    def _forget_failed(self, slot: Tuple[str, str], task: asyncio.Task):
+        if (task.cancelled() or task.exception() is not None) and self._tasks.get(slot) is task:
+            del self._tasks[slot]
+            self._remaining.pop(slot, None)
+
+
+class JobStatusWriter:
+    """
+    Buffers job status transitions and saves them in grouped transactions
+    
+    Transitions are flushed flush_interval seconds after the first one is
+    buffered, or immediately by flush(). A flush keeps only the latest
+    transition of each job and writes them with one executemany per statement
+    shape, all in one transaction. Every write keeps the fencing of
+    statement(): if any write is fenced out the transaction is rolled back
+    and the writes are applied one at a time to find out which. A flush that
+    fails buffers its writes again, behind any newer transition of the same
+    job, so a finished job is never left running by a lost write.
+    """
+    
+    def __init__(self, db_manager: DatabaseAdapter, flush_interval: float):
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Tuple[BatchJob, str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._scheduled_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_tasks: set = set()
+    
+    @staticmethod
+    def statement(job: BatchJob) -> Tuple[str, Dict[str, Any]]:
+        """
+        UPDATE statement and parameters that save a job's current state
+        
+        The write only applies while the job's lease_token still matches, so a
+        worker that lost its lease cannot overwrite the new owner's state, and
+        never to a job that is already finished or was skipped by a cancel.
+        Finished jobs release their lease.
+        """
+        finished = job.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.SKIPPED)
+        release = ", lease_owner = NULL, lease_token = NULL, lease_expires_at = NULL" if finished else ""
+        fence = " AND status NOT IN ('completed', 'failed', 'skipped')"
+        fence += " AND lease_token = :lease_token" if job.lease_token else ""
+        sql = f"""
+            UPDATE batch_jobs 
+            SET status = :status, result = :result, error_message = :error_message, 
+                started_at = :started_at, completed_at = :completed_at, execution_time = :execution_time,
+                retry_count = :retry_count{release}
+            WHERE id = :id{fence}
+        """
+        params = {
+            "status": job.status.value,
+            "result": json.dumps(job.result) if job.result else None,
+            "error_message": job.error_message,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+            "execution_time": job.execution_time,
+            "retry_count": job.retry_count,
+            "id": job.id,
+            "lease_token": job.lease_token
+        }
+        return sql, params
+    
+    def submit(self, job: BatchJob):
+        """Buffer the job's current state; must be called from the event loop"""
+        sql, params = self.statement(job)
+        with self._lock:
+            self._pending[job.id] = (job, sql, params)
+        self._schedule(asyncio.get_running_loop())
+    
+    def unsaved(self, job_ids: Iterable[str]) -> set:
+        """Those of the jobs with a buffered transition that is not saved yet"""
+        with self._lock:
+            return {job_id for job_id in job_ids if job_id in self._pending}
+    
+    def _schedule(self, loop: asyncio.AbstractEventLoop):
+        if self._scheduled_loop is not loop:
+            self._scheduled_loop = loop
+            loop.call_later(self.flush_interval, self._flush_in_background)
+    
+    def _flush_in_background(self):
+        self._scheduled_loop = None
+        task = asyncio.ensure_future(self._flush_later())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush_later(self):
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception:
+            # flush() buffered the writes again: retry after another interval
+            self._schedule(asyncio.get_running_loop())
+    
+    def flush(self) -> int:
+        """
+        Save every buffered transition now
+        
+        Returns:
+            int: Number of transitions that were applied
+        
+        Raises:
+            Exception: If the transaction failed; its writes are buffered
+                again, except for jobs with a newer transition
+        """
+        # The write lock keeps flushes in submission order; submit() only
+        # waits on _lock while the buffer is swapped, never on the database
+        with self._write_lock:
+            with self._lock:
+                writes, self._pending = list(self._pending.values()), {}
+            if not writes:
+                return 0
+            try:
+                applied = self._write(writes)
+            except Exception as e:
+                log_error(logger, f"Failed to save {len(writes)} job status updates: {e}")
+                with self._lock:
+                    for write in writes:
+                        self._pending.setdefault(write[0].id, write)
+                raise
+        
+        for (job, _, params), ok in zip(writes, applied):
+            if not ok:
+                log_warning(logger, f"Job {job.id} is finished or its lease was lost; "
+                                    f"its {params['status']} state was not saved")
+            elif params["status"] in ('completed', 'failed', 'skipped') and job.lease_token == params["lease_token"]:
+                job.lease_token = None
+        return sum(applied)
+    
+    def _write(self, writes: List[Tuple[BatchJob, str, Dict[str, Any]]]) -> List[bool]:
+        """Apply the writes in one transaction; whether each one applied"""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for _, sql, params in writes:
+            groups.setdefault(sql, []).append(params)
+        
+        with self.db_manager.db_manager.engine.connect() as conn:
+            with conn.begin() as transaction:
+                applied = sum(conn.execute(text(sql), rows).rowcount for sql, rows in groups.items())
+                if applied == len(writes):
+                    return [True] * len(writes)
+                transaction.rollback()
+            
+            # Some writes were fenced out: apply them one at a time to find out which
+            with conn.begin():
+                return [conn.execute(text(sql), params).rowcount > 0 for _, sql, params in writes]
+
+
 class BatchProcessor:
     """Advanced batch processing engine"""
     
@@ -154,10 +640,38 @@ class BatchProcessor:
         self.db_manager = DatabaseAdapter()
         self.config = self._load_config()
         self.active_batches: Dict[str, Dict[str, Any]] = {}
-        self.job_queues: Dict[str, List[BatchJob]] = defaultdict(list)
         self.executor = ThreadPoolExecutor(max_workers=self.config.max_concurrent_jobs)
         self._lock = threading.Lock()
         
+        # Job leases: a worker owns a running job until lease_expires_at and renews it by heartbeat
+        batch_config = config_system.get("batch_processing", {})
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = batch_config.get("lease_seconds", 120)
+        self.heartbeat_seconds = batch_config.get("heartbeat_seconds", 30)
+        self.reclaim_interval_seconds = batch_config.get("reclaim_interval_seconds", 60)
+        
+        # Progress: at most one batch_progress write per batch per interval; the ETA smooths job durations
+        self.progress_write_interval = batch_config.get("progress_write_interval_seconds", 1.0)
+        self.eta_smoothing = batch_config.get("eta_smoothing", 0.2)
+        
+        # Batch creation inserts jobs in chunks; result export reads them in pages
+        self.ingest_chunk_size = batch_config.get("ingest_chunk_size", 1000)
+        self.export_page_size = batch_config.get("export_page_size", 500)
+        
+        # Job status transitions are saved in grouped transactions
+        self.status_writer = JobStatusWriter(self.db_manager, batch_config.get("status_flush_ms", 250) / 1000)
+        self._batch_tasks: Dict[str, asyncio.Task] = {}
+        self._reclaim_task: Optional[asyncio.Task] = None
+        
+        # Optional Redis Streams queue: started batches are run by standalone workers (batch_worker.py)
+        self.job_stream: Optional[BatchJobStream] = None
+        if batch_config.get("queue_backend", "database") == "redis_streams":
+            self.job_stream = BatchJobStream.from_config(self.worker_id, int(self.lease_seconds * 1000))
+        self._stream_runs: Dict[str, asyncio.Task] = {}
+        
+        # Run slots are shared fairly with other batches and interactive requests
+        self.scheduler = job_scheduler
+        
         # Initialize database tables
         self._init_database()
         
@@ -177,7 +691,15 @@ class BatchProcessor:
             enable_enrichment=batch_config.get("enable_enrichment", True),
             save_intermediate_results=batch_config.get("save_intermediate_results", True),
             chunk_size=batch_config.get("chunk_size", 100),
-            priority_processing=batch_config.get("priority_processing", True)
+            priority_processing=batch_config.get("priority_processing", True),
+            retry_max_delay=batch_config.get("retry_max_delay", 60.0),
+            rate_limit_delay=batch_config.get("rate_limit_delay", 15.0),
+            circuit_window=batch_config.get("circuit_window", 20),
+            circuit_min_attempts=batch_config.get("circuit_min_attempts", 10),
+            circuit_failure_rate=batch_config.get("circuit_failure_rate", 0.5),
+            circuit_cooldown=batch_config.get("circuit_cooldown", 30.0),
+            circuit_max_cooldown=batch_config.get("circuit_max_cooldown", 300.0),
+            weight=batch_config.get("weight", 1.0)
         )
     
     def _init_database(self):
@@ -198,9 +720,11 @@ class BatchProcessor:
                     started_at DATETIME,
                     completed_at DATETIME,
                     config TEXT,
-                    metadata TEXT
+                    metadata TEXT,
+                    llm_calls_saved INTEGER DEFAULT 0
                 )
             """)
+            self._add_missing_columns("batch_processing", {"llm_calls_saved": "INTEGER DEFAULT 0"})
             
             # Individual jobs table
             self.db_manager.execute("""
@@ -218,9 +742,23 @@ class BatchProcessor:
                     retry_count INTEGER DEFAULT 0,
                     priority INTEGER DEFAULT 0,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    lease_owner TEXT,
+                    lease_token TEXT,
+                    lease_expires_at DATETIME,
+                    heartbeat_at DATETIME,
+                    input_key TEXT,
+                    profile_key TEXT,
                     FOREIGN KEY (batch_id) REFERENCES batch_processing (id)
                 )
             """)
+            self._add_missing_columns("batch_jobs", {
+                "lease_owner": "TEXT",
+                "lease_token": "TEXT",
+                "lease_expires_at": "DATETIME",
+                "heartbeat_at": "DATETIME",
+                "input_key": "TEXT",
+                "profile_key": "TEXT"
+            })
             
             # Batch progress tracking
             self.db_manager.execute("""
@@ -236,9 +774,11 @@ class BatchProcessor:
             """)
             
             # Create indexes for performance
+            # A batch's jobs in id order, for result export (also serves plain batch_id lookups)
+            self.db_manager.execute("DROP INDEX IF EXISTS idx_batch_jobs_batch_id")
             self.db_manager.execute("""
-                CREATE INDEX IF NOT EXISTS idx_batch_jobs_batch_id 
-                ON batch_jobs(batch_id)
+                CREATE INDEX IF NOT EXISTS idx_batch_jobs_batch_id_id 
+                ON batch_jobs(batch_id, id)
             """)
             
             self.db_manager.execute("""
@@ -246,11 +786,55 @@ class BatchProcessor:
                 ON batch_jobs(status)
             """)
             
+            # Claiming and reclaiming look up a batch's jobs by status and lease expiry
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_batch_jobs_batch_status_lease 
+                ON batch_jobs(batch_id, status, lease_expires_at)
+            """)
+            
+            # Claims take a batch's pending jobs in priority order, then read them back by token
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_batch_jobs_batch_status_priority 
+                ON batch_jobs(batch_id, status, priority DESC, id)
+            """)
+            
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_batch_jobs_lease_token 
+                ON batch_jobs(lease_token)
+            """)
+            
+            # Retention finds expired jobs by creation time
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_batch_jobs_created_at 
+                ON batch_jobs(created_at)
+            """)
+            
+            # Batch estimates read a workflow's latest finished jobs
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_batch_jobs_workflow_completed_at 
+                ON batch_jobs(workflow_id, completed_at)
+            """)
+            
+            # Keyset pagination of the batch list
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_batch_processing_created_at_id 
+                ON batch_processing(created_at, id)
+            """)
+            
             log_info(logger, "Batch processing database initialized")
             
         except Exception as e:
             log_error(logger, f"Failed to initialize batch processing database: {e}")
     
+    def _add_missing_columns(self, table: str, columns: Dict[str, str]):
+        """Add columns introduced after a table was first created"""
+        engine = self.db_manager.db_manager.engine
+        existing = {column["name"] for column in inspect(engine).get_columns(table)}
+        for name, column_type in columns.items():
+            if name not in existing:
+                self.db_manager.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+                log_info(logger, f"Added column {table}.{name}")
+    
     def _load_active_batches(self):
         """Load active batches from database on startup"""
         try:
@@ -260,30 +844,52 @@ class BatchProcessor:
             """)
             
             for batch_row in active_batches:
-                batch_id = batch_row['id']
-                self.active_batches[batch_id] = {
-                    'id': batch_id,
-                    'name': batch_row['name'],
-                    'status': BatchStatus(batch_row['status']),
-                    'workflow_id': batch_row['workflow_id'],
-                    'total_jobs': batch_row['total_jobs'],
-                    'completed_jobs': batch_row['completed_jobs'],
-                    'failed_jobs': batch_row['failed_jobs'],
-                    'config': json.loads(batch_row['config']) if batch_row['config'] else {},
-                    'metadata': json.loads(batch_row['metadata']) if batch_row['metadata'] else {}
-                }
-                
-                # Load jobs for this batch
-                jobs = self._load_batch_jobs(batch_id)
-                self.job_queues[batch_id] = jobs
+                self._register_batch(batch_row)
                 
             log_info(logger, f"Loaded {len(active_batches)} active batches")
             
         except Exception as e:
             log_error(logger, f"Failed to load active batches: {e}")
     
+    def _register_batch(self, batch_row: Dict[str, Any]):
+        """Load a batch_processing row and its jobs into memory"""
+        batch_id = batch_row['id']
+        with self._lock:
+            self.active_batches[batch_id] = {
+                'id': batch_id,
+                'name': batch_row['name'],
+                'status': BatchStatus(batch_row['status']),
+                'workflow_id': batch_row['workflow_id'],
+                'total_jobs': batch_row['total_jobs'],
+                'completed_jobs': batch_row['completed_jobs'],
+                'failed_jobs': batch_row['failed_jobs'],
+                'config': json.loads(batch_row['config']) if batch_row['config'] else {},
+                'metadata': json.loads(batch_row['metadata']) if batch_row['metadata'] else {}
+            }
+    
+    @staticmethod
+    def _job_from_row(row: Dict[str, Any]) -> BatchJob:
+        """Build a BatchJob from a batch_jobs row"""
+        return BatchJob(
+            id=row['id'],
+            batch_id=row['batch_id'],
+            workflow_id=row['workflow_id'],
+            input_data=json.loads(row['input_data']),
+            status=JobStatus(row['status']),
+            result=json.loads(row['result']) if row['result'] else None,
+            error_message=row['error_message'],
+            started_at=datetime.fromisoformat(row['started_at']) if row['started_at'] else None,
+            completed_at=datetime.fromisoformat(row['completed_at']) if row['completed_at'] else None,
+            execution_time=row['execution_time'],
+            retry_count=row['retry_count'],
+            priority=row['priority'],
+            lease_token=row.get('lease_token'),
+            input_key=row.get('input_key'),
+            profile_key=row.get('profile_key')
+        )
+    
     def _load_batch_jobs(self, batch_id: str) -> List[BatchJob]:
-        """Load jobs for a specific batch"""
+        """Load all jobs of a batch (processing claims them in chunks instead)"""
         try:
             job_rows = self.db_manager.fetch_all("""
                 SELECT * FROM batch_jobs 
@@ -291,25 +897,7 @@ class BatchProcessor:
                 ORDER BY priority DESC, created_at ASC
             """, (batch_id,))
             
-            jobs = []
-            for row in job_rows:
-                job = BatchJob(
-                    id=row['id'],
-                    batch_id=row['batch_id'],
-                    workflow_id=row['workflow_id'],
-                    input_data=json.loads(row['input_data']),
-                    status=JobStatus(row['status']),
-                    result=json.loads(row['result']) if row['result'] else None,
-                    error_message=row['error_message'],
-                    started_at=datetime.fromisoformat(row['started_at']) if row['started_at'] else None,
-                    completed_at=datetime.fromisoformat(row['completed_at']) if row['completed_at'] else None,
-                    execution_time=row['execution_time'],
-                    retry_count=row['retry_count'],
-                    priority=row['priority']
-                )
-                jobs.append(job)
-            
-            return jobs
+            return [self._job_from_row(row) for row in job_rows]
             
         except Exception as e:
             log_error(logger, f"Failed to load jobs for batch {batch_id}: {e}")
@@ -318,90 +906,121 @@ class BatchProcessor:
     async def create_batch(self, 
                           name: str,
                           workflow_id: str, 
-                          input_list: List[Dict[str, Any]], 
+                          input_list: Iterable[Dict[str, Any]], 
                           config_override: Optional[Dict[str, Any]] = None,
                           priority_map: Optional[Dict[int, int]] = None) -> str:
         """
         Create a new batch processing job
         
+        Jobs are inserted in chunks of ingest_chunk_size as input_list is
+        consumed, so an input generator (e.g. iter_batch_inputs over an upload)
+        is never held in memory as a whole.
+        
         Args:
             name: Human-readable name for the batch
             workflow_id: ID of the workflow to execute
-            input_list: List of input dictionaries for each job
+            input_list: Input dictionaries for each job (any iterable)
             config_override: Override default batch processing config
             priority_map: Map job indices to priority levels
             
         Returns:
             batch_id: Unique identifier for the batch
+            
+        Raises:
+            ValueError: If input_list is empty or holds something other than dictionaries
         """
         batch_id = str(uuid.uuid4())
         
+        # Merge configuration
+        config = asdict(self.config)
+        if config_override:
+            config.update(config_override)
+        
         try:
-            # Merge configuration
-            config = asdict(self.config)
-            if config_override:
-                config.update(config_override)
-            
-            # Create batch jobs
-            jobs = []
-            for i, input_data in enumerate(input_list):
-                job_id = f"{batch_id}_{i:04d}"
-                priority = priority_map.get(i, 0) if priority_map else 0
-                
-                job = BatchJob(
-                    id=job_id,
-                    batch_id=batch_id,
-                    input_data=input_data,
-                    workflow_id=workflow_id,
-                    priority=priority
-                )
-                jobs.append(job)
-            
-            # Save batch to database
+            # Save batch to database; total_jobs is known once every job is in
             self.db_manager.execute("""
                 INSERT INTO batch_processing 
                 (id, name, workflow_id, status, total_jobs, config, metadata)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (
                 batch_id, name, workflow_id, BatchStatus.PENDING.value,
-                len(jobs), json.dumps(config), json.dumps({
-                    'created_by': 'batch_processor',
-                    'input_count': len(input_list)
-                })
+                0, json.dumps(config), json.dumps({'created_by': 'batch_processor'})
             ))
             
             # Save jobs to database
-            for job in jobs:
-                self.db_manager.execute("""
-                    INSERT INTO batch_jobs 
-                    (id, batch_id, workflow_id, input_data, status, priority)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    job.id, job.batch_id, job.workflow_id,
-                    json.dumps(job.input_data), job.status.value, job.priority
-                ))
-            
-            # Store in memory
-            with self._lock:
-                self.active_batches[batch_id] = {
-                    'id': batch_id,
-                    'name': name,
-                    'status': BatchStatus.PENDING,
-                    'workflow_id': workflow_id,
-                    'total_jobs': len(jobs),
-                    'completed_jobs': 0,
-                    'failed_jobs': 0,
-                    'config': config,
-                    'metadata': {'created_by': 'batch_processor'}
-                }
-                self.job_queues[batch_id] = jobs
-            
-            log_info(logger, f"Created batch {batch_id} with {len(jobs)} jobs")
-            return batch_id
+            total_jobs = await asyncio.to_thread(self._insert_jobs, batch_id, workflow_id, input_list, priority_map)
+            if not total_jobs:
+                raise ValueError("A batch needs at least one input")
+            
+            # Jobs sharing a fingerprint share the stages that only depend on it
+            counts = self.db_manager.fetch_one("""
+                SELECT COUNT(DISTINCT COALESCE(input_key, id)) AS unique_inputs,
+                       COUNT(DISTINCT COALESCE(profile_key, id)) AS unique_profiles
+                FROM batch_jobs WHERE batch_id = ?
+            """, (batch_id,)) or {}
+            metadata = {
+                'created_by': 'batch_processor',
+                'input_count': total_jobs,
+                'unique_inputs': counts.get('unique_inputs'),
+                'unique_profiles': counts.get('unique_profiles')
+            }
+            self.db_manager.execute("""
+                UPDATE batch_processing SET total_jobs = ?, metadata = ? WHERE id = ?
+            """, (total_jobs, json.dumps(metadata), batch_id))
             
         except Exception as e:
             log_error(logger, f"Failed to create batch: {e}")
+            self.db_manager.execute("DELETE FROM batch_jobs WHERE batch_id = ?", (batch_id,))
+            self.db_manager.execute("DELETE FROM batch_processing WHERE id = ?", (batch_id,))
             raise
+        
+        # Store in memory
+        with self._lock:
+            self.active_batches[batch_id] = {
+                'id': batch_id,
+                'name': name,
+                'status': BatchStatus.PENDING,
+                'workflow_id': workflow_id,
+                'total_jobs': total_jobs,
+                'completed_jobs': 0,
+                'failed_jobs': 0,
+                'config': config,
+                'metadata': {'created_by': 'batch_processor'}
+            }
+        
+        log_info(logger, f"Created batch {batch_id} with {total_jobs} jobs "
+                         f"({metadata['unique_inputs']} distinct inputs, {metadata['unique_profiles']} distinct profiles)")
+        return batch_id
+    
+    def _insert_jobs(self, batch_id: str, workflow_id: str, input_list: Iterable[Dict[str, Any]],
+                     priority_map: Optional[Dict[int, int]]) -> int:
+        """Insert a batch's jobs in chunks of ingest_chunk_size; returns the number of jobs"""
+        sql = """
+            INSERT INTO batch_jobs 
+            (id, batch_id, workflow_id, input_data, status, priority, input_key, profile_key)
+            VALUES (:id, :batch_id, :workflow_id, :input_data, :status, :priority, :input_key, :profile_key)
+        """
+        chunk = []
+        total = 0
+        for i, input_data in enumerate(input_list):
+            if not isinstance(input_data, dict):
+                raise ValueError(f"Input {i + 1} is not an object")
+            chunk.append({
+                "id": f"{batch_id}_{i:06d}",
+                "batch_id": batch_id,
+                "workflow_id": workflow_id,
+                "input_data": json.dumps(input_data),
+                "status": JobStatus.PENDING.value,
+                "priority": priority_map.get(i, 0) if priority_map else 0,
+                "input_key": input_fingerprint("input", input_data),
+                "profile_key": input_fingerprint("profile", input_data, PROFILE_FIELDS)
+            })
+            if len(chunk) >= self.ingest_chunk_size:
+                total += self.db_manager.execute_many(sql, chunk)
+                chunk = []
+        if chunk:
+            total += self.db_manager.execute_many(sql, chunk)
+        return total
     
     async def start_batch(self, batch_id: str) -> bool:
         """
@@ -420,8 +1039,13 @@ class BatchProcessor:
             # Update batch status
             self._update_batch_status(batch_id, BatchStatus.RUNNING)
             
-            # Start processing asynchronously
-            asyncio.create_task(self._process_batch(batch_id))
+            if self.job_stream is not None:
+                # Standalone workers run the jobs (see run_stream_worker)
+                published = await asyncio.to_thread(self._publish_jobs, batch_id)
+                log_info(logger, f"Published {published} jobs of batch {batch_id} to the job stream")
+            else:
+                # Start processing asynchronously
+                self._launch_batch(batch_id)
             
             log_info(logger, f"Started batch processing for {batch_id}")
             return True
@@ -430,109 +1054,733 @@ class BatchProcessor:
             log_error(logger, f"Failed to start batch {batch_id}: {e}")
             return False
     
+    def _launch_batch(self, batch_id: str) -> bool:
+        """Process a batch in a background task unless this worker is already processing it"""
+        task = self._batch_tasks.get(batch_id)
+        if task is not None and not task.done():
+            return False
+        task = asyncio.create_task(self._process_batch(batch_id))
+        self._batch_tasks[batch_id] = task
+        task.add_done_callback(lambda _: self._batch_tasks.pop(batch_id, None))
+        return True
+    
+    def _publish_jobs(self, batch_id: str) -> int:
+        """Publish a batch's pending jobs to the job stream, highest priority first"""
+        self.db_manager.execute("""
+            UPDATE batch_processing 
+            SET started_at = COALESCE(started_at, CURRENT_TIMESTAMP) 
+            WHERE id = ?
+        """, (batch_id,))
+        # Keeps idle workers from re-publishing the batch while its entries are being added
+        self.job_stream.mark_published(batch_id, int(self.lease_seconds * 1000))
+        by_priority = self.active_batches[batch_id]['config'].get('priority_processing', True)
+        return self.job_stream.publish(batch_id, self._iter_pending_job_ids(batch_id, by_priority))
+    
+    def _republish_orphaned_jobs(self) -> int:
+        """
+        Re-publish the unfinished jobs of active batches that may have lost their entries
+        
+        Called by stream workers when the stream has nothing to deliver. A job
+        has no entry if publishing stopped part way or Redis lost the stream;
+        it then stays pending with no lease and no worker would ever run it.
+        A batch is re-published once its publish marker has expired, i.e. at
+        most once per lease_seconds across all workers. Claimable jobs that do
+        still have an entry get a second one, which the lease check drops.
+        
+        Returns:
+            int: Number of entries published
+        """
+        rows = self.db_manager.fetch_all(f"""
+            SELECT bp.* FROM batch_processing bp
+            WHERE bp.status IN ('running', 'paused')
+              AND EXISTS (SELECT 1 FROM batch_jobs j WHERE j.batch_id = bp.id AND {CLAIMABLE_JOB_CONDITION})
+        """, {"now": self._utc_now()})
+        
+        published = 0
+        for batch_row in rows:
+            batch_id = batch_row['id']
+            if not self.job_stream.mark_published(batch_id, int(self.lease_seconds * 1000)):
+                continue
+            self._register_batch(batch_row)
+            by_priority = self.active_batches[batch_id]['config'].get('priority_processing', True)
+            count = self.job_stream.publish(batch_id, self._iter_pending_job_ids(batch_id, by_priority,
+                                                                                claimable=True))
+            if count:
+                log_warning(logger, f"Re-published {count} unfinished jobs of batch {batch_id} to the job stream")
+            published += count
+        return published
+    
+    def _iter_pending_job_ids(self, batch_id: str, by_priority: bool, claimable: bool = False) -> Iterator[str]:
+        """
+        Yield the ids of a batch's pending jobs in claim order, ingest_chunk_size per query
+        
+        With claimable, also yield running and retrying jobs whose lease has expired.
+        """
+        order = "priority DESC, id" if by_priority else "id"
+        condition = CLAIMABLE_JOB_CONDITION if claimable else "status = 'pending'"
+        after = None
+        while True:
+            params = {"batch_id": batch_id, "limit": self.ingest_chunk_size}
+            if claimable:
+                params["now"] = self._utc_now()
+            seek = ""
+            if after is not None:
+                params.update(after)
+                seek = (" AND (priority < :priority OR (priority = :priority AND id > :id))" if by_priority
+                        else " AND id > :id")
+            rows = self.db_manager.fetch_all(f"""
+                SELECT id, priority FROM batch_jobs
+                WHERE batch_id = :batch_id AND {condition}{seek}
+                ORDER BY {order}
+                LIMIT :limit
+            """, params)
+            for row in rows:
+                yield row['id']
+            if len(rows) < self.ingest_chunk_size:
+                return
+            after = {"priority": rows[-1]['priority'], "id": rows[-1]['id']}
+    
+    def iter_unfinished_inputs(self, batch_id: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (job id, input data) of a batch's jobs that have yet to run, ingest_chunk_size per query"""
+        after = ""
+        while True:
+            rows = self.db_manager.fetch_all("""
+                SELECT id, input_data FROM batch_jobs
+                WHERE batch_id = :batch_id AND id > :after AND status IN ('pending', 'running', 'retrying')
+                ORDER BY id
+                LIMIT :limit
+            """, {"batch_id": batch_id, "after": after, "limit": self.ingest_chunk_size})
+            for row in rows:
+                yield row['id'], json.loads(row['input_data'])
+            if len(rows) < self.ingest_chunk_size:
+                return
+            after = rows[-1]['id']
+    
+    def start(self):
+        """Resume running batches left without a live lease now and every reclaim_interval_seconds"""
+        if self.job_stream is not None:
+            # Stream workers reclaim each other's entries; this process only publishes
+            return
+        if self._reclaim_task is None or self._reclaim_task.done():
+            self._reclaim_task = asyncio.create_task(self._reclaim_loop())
+    
+    async def _reclaim_loop(self):
+        """Periodically resume batches abandoned by other workers"""
+        while True:
+            try:
+                await self.resume_batches()
+            except Exception as e:
+                log_error(logger, f"Failed to resume batches: {e}")
+            await asyncio.sleep(self.reclaim_interval_seconds)
+    
+    async def resume_batches(self) -> List[str]:
+        """
+        Resume running batches that no worker is processing
+        
+        A batch is resumed when it has claimable jobs (pending, or running with an
+        expired lease) and no job under a live lease, e.g. after the worker that
+        ran it was restarted.
+        
+        Returns:
+            List[str]: IDs of the batches this worker resumed
+        """
+        rows = await asyncio.to_thread(self.db_manager.fetch_all, f"""
+            SELECT bp.* FROM batch_processing bp
+            WHERE bp.status IN ('running', 'paused')
+              AND EXISTS (SELECT 1 FROM batch_jobs j WHERE j.batch_id = bp.id AND {CLAIMABLE_JOB_CONDITION})
+              AND NOT EXISTS (
+                  SELECT 1 FROM batch_jobs j
+                  WHERE j.batch_id = bp.id AND j.status IN ('pending', 'running', 'retrying')
+                    AND j.lease_expires_at >= :now
+              )
+        """, {"now": self._utc_now()})
+        
+        resumed = []
+        for batch_row in rows:
+            batch_id = batch_row['id']
+            task = self._batch_tasks.get(batch_id)
+            if task is not None and not task.done():
+                continue
+            await asyncio.to_thread(self._register_batch, batch_row)
+            if self._launch_batch(batch_id):
+                resumed.append(batch_id)
+                log_info(logger, f"Resuming batch {batch_id}")
+        return resumed
+    
+    @staticmethod
+    def _utc_now() -> str:
+        """Current UTC time in the lexically ordered format stored in lease columns"""
+        return datetime.utcnow().isoformat(timespec="microseconds")
+    
+    def _lease_expiry(self) -> str:
+        """Expiry of a lease taken or renewed now"""
+        return (datetime.utcnow() + timedelta(seconds=self.lease_seconds)).isoformat(timespec="microseconds")
+    
+    def _claim_jobs(self, batch_id: str, limit: int, by_priority: bool = True) -> List[BatchJob]:
+        """
+        Take the lease on up to limit jobs of a batch
+        
+        Jobs abandoned by a stopped worker are taken first, then pending jobs in
+        priority order. Each conditional UPDATE re-checks that a job is still
+        claimable, so a job is leased by one worker at a time and finished jobs
+        are never claimed again.
+        
+        Args:
+            batch_id: Batch to claim from
+            limit: Maximum number of jobs to claim
+            by_priority: Take higher priority jobs first (otherwise creation order)
+            
+        Returns:
+            List[BatchJob]: The claimed jobs, in the order they should run
+        """
+        token = uuid.uuid4().hex
+        params = {"owner": self.worker_id, "token": token, "expires": self._lease_expiry(),
+                  "now": self._utc_now(), "batch_id": batch_id}
+        # Concurrent PostgreSQL claimers skip each other's rows instead of queueing on them
+        skip_locked = " FOR UPDATE SKIP LOCKED" if self.db_manager.db_manager.engine.dialect.name == "postgresql" else ""
+        order = "priority DESC, id" if by_priority else "id"
+        
+        claimed = 0
+        for candidates, candidate_order in (("status IN ('running', 'retrying')", "id"), ("status = 'pending'", order)):
+            if claimed >= limit:
+                break
+            claimed += self.db_manager.execute(f"""
+                UPDATE batch_jobs
+                SET lease_owner = :owner, lease_token = :token, lease_expires_at = :expires, heartbeat_at = :now
+                WHERE id IN (
+                    SELECT id FROM batch_jobs
+                    WHERE batch_id = :batch_id AND {candidates} AND {CLAIMABLE_JOB_CONDITION}
+                    ORDER BY {candidate_order}
+                    LIMIT :limit{skip_locked}
+                ) AND {CLAIMABLE_JOB_CONDITION}
+            """, {**params, "limit": limit - claimed})
+        
+        if not claimed:
+            return []
+        rows = self.db_manager.fetch_all(f"""
+            SELECT * FROM batch_jobs WHERE lease_token = :token
+            ORDER BY CASE WHEN status = 'pending' THEN 1 ELSE 0 END, {order}
+        """, {"token": token})
+        return [self._job_from_row(row) for row in rows]
+    
+    def _claim_job(self, job_id: str) -> Optional[BatchJob]:
+        """Take the lease on one job if it is claimable (see _claim_jobs)"""
+        token = uuid.uuid4().hex
+        claimed = self.db_manager.execute(f"""
+            UPDATE batch_jobs
+            SET lease_owner = :owner, lease_token = :token, lease_expires_at = :expires, heartbeat_at = :now
+            WHERE id = :job_id AND {CLAIMABLE_JOB_CONDITION}
+        """, {"owner": self.worker_id, "token": token, "expires": self._lease_expiry(),
+              "now": self._utc_now(), "job_id": job_id})
+        if not claimed:
+            return None
+        row = self.db_manager.fetch_one("SELECT * FROM batch_jobs WHERE id = :job_id AND lease_token = :token",
+                                        {"job_id": job_id, "token": token})
+        return self._job_from_row(row) if row else None
+    
+    def _heartbeat(self, batch_id: str) -> int:
+        """Extend the leases this worker holds on a batch's jobs"""
+        return self.db_manager.execute("""
+            UPDATE batch_jobs SET lease_expires_at = :expires, heartbeat_at = :now
+            WHERE batch_id = :batch_id AND lease_owner = :owner AND status IN ('pending', 'running', 'retrying')
+        """, {"expires": self._lease_expiry(), "now": self._utc_now(),
+              "batch_id": batch_id, "owner": self.worker_id})
+    
+    async def _heartbeat_loop(self, batch_id: str):
+        """Renew this worker's leases on a batch until cancelled"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await asyncio.to_thread(self._heartbeat, batch_id)
+            except Exception as e:
+                log_warning(logger, f"Lease heartbeat failed for batch {batch_id}: {e}")
+    
+    def _shared_stages(self, batch_id: str, workflow_id: str) -> Tuple[SharedStageCache, List[str]]:
+        """
+        Stage cache for a batch run and the workflow steps it can share
+        
+        Counts the unfinished jobs carrying each input and profile fingerprint;
+        steps are only looked up when some profile is shared.
+        """
+        rows = self.db_manager.fetch_all("""
+            SELECT 'input' AS kind, input_key AS fingerprint, COUNT(*) AS jobs FROM batch_jobs
+            WHERE batch_id = :batch_id AND status IN ('pending', 'running', 'retrying') AND input_key IS NOT NULL
+            GROUP BY input_key HAVING COUNT(*) > 1
+            UNION ALL
+            SELECT 'profile' AS kind, profile_key AS fingerprint, COUNT(*) AS jobs FROM batch_jobs
+            WHERE batch_id = :batch_id AND status IN ('pending', 'running', 'retrying') AND profile_key IS NOT NULL
+            GROUP BY profile_key HAVING COUNT(*) > 1
+        """, {"batch_id": batch_id})
+        uses = {row['fingerprint']: row['jobs'] for row in rows}
+        
+        shared_steps = []
+        if any(row['kind'] == 'profile' for row in rows):
+            try:
+                shared_steps = workflow_executor.shared_step_ids(workflow_id, PROFILE_FIELDS)
+            except Exception as e:
+                log_warning(logger, f"Could not find shareable steps of workflow {workflow_id}: {e}")
+        
+        log_debug(logger, f"Batch {batch_id}: {len(uses)} shared fingerprints, shared steps {shared_steps}")
+        return SharedStageCache(uses), shared_steps
+    
     async def _process_batch(self, batch_id: str):
-        """Process all jobs in a batch"""
+        """
+        Process the claimable jobs of a batch
+        
+        A producer claims jobs from the database in chunks and max_concurrent_jobs
+        consumers run them. At most chunk_size jobs are claimed and not yet
+        finished at any time, so memory does not grow with the batch size.
+        """
         start_time = time.time()
+        heartbeat = asyncio.create_task(self._heartbeat_loop(batch_id))
         
         try:
             batch_info = self.active_batches[batch_id]
-            jobs = self.job_queues[batch_id]
             config = BatchProcessingConfig(**batch_info['config'])
-            
-            # Sort jobs by priority if enabled
-            if config.priority_processing:
-                jobs.sort(key=lambda x: (-x.priority, x.id))
-            
-            # Process jobs in chunks for memory efficiency
-            chunk_size = min(config.chunk_size, len(jobs))
-            completed_jobs = 0
-            failed_jobs = 0
+            total_jobs = batch_info['total_jobs']
+            window = max(1, config.chunk_size)
+            refill_at = max(1, window // 2)  # claim again once half the window is free
             
             # Update batch start time
             self.db_manager.execute("""
                 UPDATE batch_processing 
-                SET started_at = CURRENT_TIMESTAMP 
+                SET started_at = COALESCE(started_at, CURRENT_TIMESTAMP) 
                 WHERE id = ?
             """, (batch_id,))
             
-            # Process jobs concurrently
-            semaphore = asyncio.Semaphore(config.max_concurrent_jobs)
-            
-            async def process_job_with_semaphore(job):
-                async with semaphore:
-                    return await self._process_single_job(job, config)
-            
-            # Create tasks for all jobs
-            tasks = [process_job_with_semaphore(job) for job in jobs if job.status == JobStatus.PENDING]
-            
-            # Process tasks as they complete
-            for completed_task in asyncio.as_completed(tasks):
+            # Jobs finished before a restart count towards progress
+            finished = self.db_manager.fetch_one("""
+                SELECT COUNT(*) as finished_jobs FROM batch_jobs
+                WHERE batch_id = ? AND status IN ('completed', 'failed', 'skipped')
+            """, (batch_id,)) or {}
+            tracker = BatchProgressTracker(total_jobs=total_jobs, processed_jobs=finished.get('finished_jobs') or 0,
+                                           smoothing=self.eta_smoothing)
+            state = {"in_flight": 0, "last_job_id": None}
+            shared, shared_steps = await asyncio.to_thread(self._shared_stages, batch_id, batch_info['workflow_id'])
+            queue: asyncio.Queue = asyncio.Queue()
+            slot_freed = asyncio.Event()
+            
+            breaker = BatchCircuitBreaker(config.circuit_window, config.circuit_min_attempts,
+                                          config.circuit_failure_rate, config.circuit_cooldown,
+                                          config.circuit_max_cooldown)
+            loop = asyncio.get_running_loop()
+            
+            async def produce():
                 try:
-                    job_result = await completed_task
-                    
-                    if job_result['status'] == JobStatus.COMPLETED:
-                        completed_jobs += 1
-                    elif job_result['status'] == JobStatus.FAILED:
-                        failed_jobs += 1
+                    exhausted = False
+                    while self.active_batches[batch_id]['status'] in ACTIVE_BATCH_STATUSES:
+                        free = window - state["in_flight"]
+                        # Jobs waiting to retry stay in flight; wait for them once nothing is left to claim
+                        if free < refill_at or (exhausted and state["in_flight"]):
+                            slot_freed.clear()
+                            await slot_freed.wait()
+                            continue
+                        if exhausted:
+                            break
+                        jobs = await asyncio.to_thread(self._claim_jobs, batch_id, free, config.priority_processing)
+                        if not jobs:
+                            exhausted = True
+                            continue
+                        state["in_flight"] += len(jobs)
+                        for job in jobs:
+                            queue.put_nowait(job)
+                finally:
+                    for _ in range(config.max_concurrent_jobs):
+                        queue.put_nowait(None)
+            
+            async def consume():
+                while (job := await queue.get()) is not None:
+                    job_result = None
+                    try:
+                        probe = await breaker.wait_until_allowed()
+                        if self.active_batches[batch_id]['status'] in ACTIVE_BATCH_STATUSES:
+                            async with self.scheduler.slot(batch_flow(batch_id), config.weight):
+                                job_result = await self._process_single_job(job, config, shared, shared_steps)
+                            failed = job_result['error_class'] not in (None, ErrorClass.PERMANENT.value)
+                            self._on_breaker_change(batch_id, breaker.record(failed, probe))
+                        elif probe:
+                            breaker.record(False, probe)
+                    except Exception as e:
+                        log_error(logger, f"Error processing job in batch {batch_id}: {e}")
                     
-                    # Update progress
-                    total_processed = completed_jobs + failed_jobs
-                    progress = (total_processed / len(jobs)) * 100
+                    # A job waiting to retry keeps its place in the window but not the consumer
+                    if job_result is not None and job_result['status'] == JobStatus.RETRYING:
+                        loop.call_later(job_result['retry_delay'], queue.put_nowait, job)
+                        continue
+                    state["in_flight"] -= 1
+                    slot_freed.set()
                     
-                    self._update_batch_progress(batch_id, progress, job_result['job_id'])
+                    # None: the batch was cancelled before the job started, or the job errored
+                    if job_result is None:
+                        continue
                     
-                    log_debug(logger, f"Batch {batch_id}: {total_processed}/{len(jobs)} jobs completed")
+                    tracker.record(job_result['status'], job_result['execution_time'])
+                    state["last_job_id"] = job_result['job_id']
+                    self._update_batch_progress(batch_id, tracker, job_result['job_id'], config.max_concurrent_jobs)
                     
-                except Exception as e:
-                    log_error(logger, f"Error processing job in batch {batch_id}: {e}")
-                    failed_jobs += 1
+                    log_debug(logger, f"Batch {batch_id}: {tracker.processed_jobs}/{total_jobs} jobs completed")
             
-            # Calculate final statistics
-            execution_time = time.time() - start_time
-            success_rate = (completed_jobs / len(jobs)) * 100 if jobs else 0
+            await asyncio.gather(produce(), *(consume() for _ in range(config.max_concurrent_jobs)))
+            # The heartbeat keeps the leases while the final states are retried
+            await self._flush_job_states()
             
-            # Update batch completion
-            self.db_manager.execute("""
-                UPDATE batch_processing 
-                SET status = ?, completed_jobs = ?, failed_jobs = ?, completed_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (BatchStatus.COMPLETED.value, completed_jobs, failed_jobs, batch_id))
+            llm_calls_saved = shared.llm_calls_saved()
+            self._add_llm_calls_saved(batch_id, llm_calls_saved)
             
-            # Update in-memory state
-            with self._lock:
-                self.active_batches[batch_id]['status'] = BatchStatus.COMPLETED
-                self.active_batches[batch_id]['completed_jobs'] = completed_jobs
-                self.active_batches[batch_id]['failed_jobs'] = failed_jobs
+            # Writes are throttled, so save where this run left off
+            if tracker.processed_jobs:
+                self._update_batch_progress(batch_id, tracker, state["last_job_id"], config.max_concurrent_jobs,
+                                            force=True)
+            
+            totals = self._complete_batch(batch_id)
+            if totals is None:
+                log_info(logger, f"Batch {batch_id}: some jobs are still leased by other workers")
+                return
+            completed_jobs, failed_jobs = totals
+            
+            # Calculate final statistics
+            execution_time = time.time() - start_time
+            success_rate = (completed_jobs / total_jobs) * 100 if total_jobs else 0
             
             log_info(logger, 
                     f"Batch {batch_id} completed: {completed_jobs} successful, "
                     f"{failed_jobs} failed, {success_rate:.1f}% success rate, "
-                    f"execution time: {execution_time:.2f}s")
+                    f"execution time: {execution_time:.2f}s, {llm_calls_saved} LLM calls saved by shared steps")
             
         except Exception as e:
             log_error(logger, f"Batch processing failed for {batch_id}: {e}")
             self._update_batch_status(batch_id, BatchStatus.FAILED)
+        finally:
+            heartbeat.cancel()
+    
+    async def _flush_job_states(self, attempts: int = 5) -> int:
+        """Save buffered job states, retrying a failed flush; raises once the attempts run out"""
+        for attempt in range(attempts):
+            try:
+                return await asyncio.to_thread(self.status_writer.flush)
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+                await asyncio.sleep(self.status_writer.flush_interval * 2 ** attempt)
+    
+    def _add_llm_calls_saved(self, batch_id: str, count: int):
+        """Add LLM calls saved by shared steps to the batch's total"""
+        if count:
+            self.db_manager.execute("""
+                UPDATE batch_processing SET llm_calls_saved = COALESCE(llm_calls_saved, 0) + ? WHERE id = ?
+            """, (count, batch_id))
+    
+    def _complete_batch(self, batch_id: str) -> Optional[Tuple[int, int]]:
+        """
+        Mark a batch completed once none of its jobs is unfinished
+        
+        Jobs may have been run by other workers or before a restart, so all of
+        them are counted. A cancelled batch stays cancelled.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (completed_jobs, failed_jobs), or None while a job is unfinished
+        """
+        unfinished = self.db_manager.fetch_one("""
+            SELECT id FROM batch_jobs
+            WHERE batch_id = ? AND status IN ('pending', 'running', 'retrying')
+            LIMIT 1
+        """, (batch_id,))
+        if unfinished:
+            return None
+        
+        counts = self.db_manager.fetch_one("""
+            SELECT
+                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed_jobs,
+                SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed_jobs
+            FROM batch_jobs
+            WHERE batch_id = ?
+        """, (batch_id,)) or {}
+        completed_jobs = counts.get('completed_jobs') or 0
+        failed_jobs = counts.get('failed_jobs') or 0
+        
+        # Update batch completion
+        self.db_manager.execute("""
+            UPDATE batch_processing 
+            SET status = ?, completed_jobs = ?, failed_jobs = ?, completed_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status IN (?, ?)
+        """, (BatchStatus.COMPLETED.value, completed_jobs, failed_jobs, batch_id,
+              BatchStatus.RUNNING.value, BatchStatus.PAUSED.value))
+        
+        # Update in-memory state
+        with self._lock:
+            batch = self.active_batches.get(batch_id)
+            if batch is not None:
+                if batch['status'] in ACTIVE_BATCH_STATUSES:
+                    batch['status'] = BatchStatus.COMPLETED
+                batch['completed_jobs'] = completed_jobs
+                batch['failed_jobs'] = failed_jobs
+        return completed_jobs, failed_jobs
+    
+    async def run_stream_worker(self, concurrency: Optional[int] = None,
+                                stop: Optional[asyncio.Event] = None):
+        """
+        Run batch jobs delivered by the job stream until stop is set
+        
+        Up to concurrency jobs run at once, from any number of batches. As in
+        _process_batch, each job runs under its database lease, and a job
+        waiting to retry keeps its entry but frees its slot; at most
+        max(concurrency, chunk_size) entries are held at a time. Entries are
+        acknowledged after the status flush that saved their job's final
+        state. Every reclaim_interval_seconds, entries other workers left idle
+        for lease_seconds are taken over. Whenever the stream has nothing to
+        deliver, batches whose jobs are all finished are completed, and at most
+        every reclaim_interval_seconds the jobs of batches that lost their
+        entries are re-published (see _republish_orphaned_jobs).
+        
+        Args:
+            concurrency: Jobs run at once (default: max_concurrent_jobs)
+            stop: Set to stop reading entries; jobs already taken are finished first
+        """
+        if self.job_stream is None:
+            raise ConfigurationError("batch_processing.queue_backend is not set to redis_streams")
+        stream = self.job_stream
+        concurrency = concurrency or self.config.max_concurrent_jobs
+        window = max(concurrency, self.config.chunk_size)
+        stop = stop or asyncio.Event()
+        
+        held: Dict[str, str] = {}  # entry id -> batch id
+        tasks: set = set()
+        state = {"running": 0, "acks": []}
+        
+        def release(entry_id: str):
+            # Entries waiting for their job's state to be saved stay held, so the heartbeat keeps them
+            if all(entry_id != acked for acked, _ in state["acks"]):
+                held.pop(entry_id, None)
+        slot_freed = asyncio.Event()
+        last_reclaim = last_republish = 0.0
+        
+        await asyncio.to_thread(stream.ensure_group)
+        heartbeat = asyncio.create_task(self._stream_heartbeat_loop(held))
+        log_info(logger, f"Batch worker {self.worker_id} reading {stream.stream} with {concurrency} slots")
+        
+        try:
+            while not stop.is_set():
+                await self._ack_saved_entries(state, held)
+                free = min(concurrency - state["running"], window - len(held))
+                if free <= 0:
+                    slot_freed.clear()
+                    try:
+                        await asyncio.wait_for(slot_freed.wait(), stream.block_ms / 1000)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                entries = []
+                if time.monotonic() - last_reclaim >= self.reclaim_interval_seconds:
+                    last_reclaim = time.monotonic()
+                    entries = await asyncio.to_thread(stream.reclaim, free)
+                if not entries:
+                    entries = await asyncio.to_thread(stream.read, free)
+                if not entries:
+                    await self._finish_stream_batches(held)
+                    if time.monotonic() - last_republish >= self.reclaim_interval_seconds:
+                        last_republish = time.monotonic()
+                        try:
+                            await asyncio.to_thread(self._republish_orphaned_jobs)
+                        except Exception as e:
+                            log_error(logger, f"Failed to re-publish orphaned batch jobs: {e}")
+                    continue
+                
+                for entry_id, batch_id, job_id in entries:
+                    if entry_id in held:
+                        continue
+                    held[entry_id] = batch_id
+                    task = asyncio.create_task(self._run_stream_job(entry_id, batch_id, job_id, state, slot_freed))
+                    tasks.add(task)
+                    task.add_done_callback(lambda task, entry_id=entry_id: (tasks.discard(task),
+                                                                             release(entry_id),
+                                                                             slot_freed.set()))
+        finally:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._ack_saved_entries(state, held, final=True)
+            heartbeat.cancel()
+            await self._finish_stream_batches(held)
+            log_info(logger, f"Batch worker {self.worker_id} stopped")
+    
+    async def _run_stream_job(self, entry_id: str, batch_id: str, job_id: str,
+                              state: Dict[str, Any], slot_freed: asyncio.Event):
+        """Run a job delivered by the job stream until it needs no further attempt"""
+        try:
+            run = await self._stream_batch_run(batch_id)
+            job = await asyncio.to_thread(self._claim_job, job_id) if run is not None else None
+            if job is None:
+                # Finished, skipped or unknown jobs are dropped; a job leased by a live worker keeps its entry
+                if run is None or not await asyncio.to_thread(self._job_leased, job_id):
+                    state["acks"].append((entry_id, job_id))
+                return
+            
+            config, breaker = run["config"], run["breaker"]
+            while True:
+                probe = await breaker.wait_until_allowed()
+                state["running"] += 1
+                try:
+                    async with self.scheduler.slot(batch_flow(batch_id), config.weight):
+                        job_result = await self._process_single_job(job, config, run["shared"], run["shared_steps"])
+                finally:
+                    state["running"] -= 1
+                    slot_freed.set()
+                failed = job_result['error_class'] not in (None, ErrorClass.PERMANENT.value)
+                self._on_breaker_change(batch_id, breaker.record(failed, probe))
+                if job_result['status'] != JobStatus.RETRYING:
+                    break
+                await asyncio.sleep(job_result['retry_delay'])
+                if await self._stream_batch_run(batch_id) is None:
+                    # Cancelled while waiting: the cancel skipped the job
+                    break
+            state["acks"].append((entry_id, job_id))
+        except Exception as e:
+            # The entry stays pending and is reclaimed once the job's lease expires
+            log_error(logger, f"Error processing job {job_id} of batch {batch_id}: {e}")
+    
+    async def _ack_saved_entries(self, state: Dict[str, Any], held: Dict[str, str], final: bool = False):
+        """
+        Save buffered job states, then acknowledge the entries of the jobs they finished
+        
+        state["acks"] holds (entry id, job id) pairs. Entries whose job still
+        has an unsaved state stay there, and held, until a later flush saves
+        it; a final call retries the flush before giving up on them.
+        """
+        if not state["acks"]:
+            return
+        try:
+            if final:
+                await self._flush_job_states()
+            else:
+                await asyncio.to_thread(self.status_writer.flush)
+        except Exception as e:
+            log_warning(logger, f"Job states not saved; their stream entries stay unacknowledged: {e}")
+        unsaved = self.status_writer.unsaved(job_id for _, job_id in state["acks"])
+        acks = [entry for entry in state["acks"] if entry[1] not in unsaved]
+        state["acks"] = [entry for entry in state["acks"] if entry[1] in unsaved]
+        if not acks:
+            return
+        entry_ids = [entry_id for entry_id, _ in acks]
+        for entry_id in entry_ids:
+            held.pop(entry_id, None)
+        try:
+            await asyncio.to_thread(self.job_stream.ack, entry_ids)
+        except Exception as e:
+            # Unacknowledged entries are redelivered later and dropped, as their jobs are finished
+            log_warning(logger, f"Failed to acknowledge {len(entry_ids)} job stream entries: {e}")
+    
+    def _job_leased(self, job_id: str) -> bool:
+        """Whether an unfinished job is under a live lease"""
+        return self.db_manager.fetch_one("""
+            SELECT id FROM batch_jobs
+            WHERE id = :job_id AND status IN ('pending', 'running', 'retrying') AND lease_expires_at >= :now
+        """, {"job_id": job_id, "now": self._utc_now()}) is not None
+    
+    async def _stream_batch_run(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        This worker's run state of an active batch; None if the batch is not active
+        
+        The batch's status is read on every call so that a cancel made through
+        the API reaches every worker. The run state (config, circuit breaker
+        and shared stages) is built once per batch and worker.
+        """
+        batch_row = await asyncio.to_thread(self.db_manager.fetch_one,
+                                            "SELECT * FROM batch_processing WHERE id = ?", (batch_id,))
+        if not batch_row or BatchStatus(batch_row['status']) not in ACTIVE_BATCH_STATUSES:
+            return None
+        
+        task = self._stream_runs.get(batch_id)
+        if task is None or (task.done() and task.exception() is not None):
+            task = self._stream_runs[batch_id] = asyncio.create_task(self._start_stream_run(batch_row))
+        run = await asyncio.shield(task)
+        with self._lock:
+            if batch_id in self.active_batches:
+                self.active_batches[batch_id]['status'] = BatchStatus(batch_row['status'])
+        return run
+    
+    async def _start_stream_run(self, batch_row: Dict[str, Any]) -> Dict[str, Any]:
+        """Load a batch and build this worker's run state for it"""
+        batch_id = batch_row['id']
+        await asyncio.to_thread(self._register_batch, batch_row)
+        config = BatchProcessingConfig(**self.active_batches[batch_id]['config'])
+        shared, shared_steps = await asyncio.to_thread(self._shared_stages, batch_id, batch_row['workflow_id'])
+        breaker = BatchCircuitBreaker(config.circuit_window, config.circuit_min_attempts,
+                                      config.circuit_failure_rate, config.circuit_cooldown,
+                                      config.circuit_max_cooldown)
+        return {"config": config, "breaker": breaker, "shared": shared, "shared_steps": shared_steps,
+                "llm_calls_saved": 0}
+    
+    async def _finish_stream_batches(self, held: Dict[str, str]):
+        """Save the LLM calls saved so far and complete batches with no unfinished job left"""
+        busy = set(held.values())
+        for batch_id, task in list(self._stream_runs.items()):
+            if batch_id in busy or not task.done():
+                continue
+            if task.exception() is not None:
+                del self._stream_runs[batch_id]
+                continue
+            run = task.result()
+            try:
+                saved = run["shared"].llm_calls_saved()
+                await asyncio.to_thread(self._add_llm_calls_saved, batch_id, saved - run["llm_calls_saved"])
+                run["llm_calls_saved"] = saved
+                
+                totals = await asyncio.to_thread(self._complete_batch, batch_id)
+            except Exception as e:
+                log_error(logger, f"Failed to check completion of batch {batch_id}: {e}")
+                continue
+            if totals is not None:
+                del self._stream_runs[batch_id]
+                log_info(logger, f"Batch {batch_id} finished: {totals[0]} successful, {totals[1]} failed")
     
-    async def _process_single_job(self, job: BatchJob, config: BatchProcessingConfig) -> Dict[str, Any]:
-        """Process a single job within a batch"""
+    async def _stream_heartbeat_loop(self, held: Dict[str, str]):
+        """Renew the leases of the jobs this worker holds and keep their entries from looking idle"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                for batch_id in set(held.values()):
+                    await asyncio.to_thread(self._heartbeat, batch_id)
+                await asyncio.to_thread(self.job_stream.touch, list(held))
+            except Exception as e:
+                log_warning(logger, f"Batch worker heartbeat failed: {e}")
+    
+    async def _process_single_job(self, job: BatchJob, config: BatchProcessingConfig,
+                                  shared: Optional[SharedStageCache] = None,
+                                  shared_steps: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Run one attempt of a job within a batch
+        
+        A failed attempt is classified (see classify_error). Transient and
+        rate-limited failures leave the job RETRYING with the backoff to wait
+        in 'retry_delay'; the caller re-queues it, so no slot is held while
+        waiting. Permanent failures, and failures past max_retries, fail the job.
+        
+        Validation and enrichment are shared with jobs of identical input, and
+        shared_steps (agent steps reading only PROFILE_FIELDS) with jobs of the
+        same profile, through the batch run's SharedStageCache.
+        """
+        shared = shared or SharedStageCache()
         job.started_at = datetime.now()
         job.status = JobStatus.RUNNING
         
         # Update job status in database
-        self._update_job_status(job)
+        self.status_writer.submit(job)
+        error_class = None
         
         try:
             # Apply validation if enabled
             if config.enable_validation:
-                validation_result = await validate_workflow_inputs(job.input_data)
+                validation_result = await shared.run("validation", job.input_key,
+                                                     lambda: validate_workflow_inputs(job.input_data))
                 if not validation_result.get('is_valid', True):
                     raise ValueError(f"Validation failed: {validation_result.get('errors', [])}")
             
             # Apply context enrichment if enabled
             enriched_data = job.input_data
             if config.enable_enrichment:
-                enriched_result = await enrich_workflow_context(job.input_data)
-                enriched_data = enriched_result
+                enriched_result = await shared.run("enrichment", job.input_key,
+                                                   lambda: enrich_workflow_context(job.input_data))
+                # run_full_workflow updates its input in place; jobs sharing the enrichment get their own copy
+                enriched_data = dict(enriched_result)
             
             # Execute workflow with timeout
             start_time = time.time()
@@ -540,10 +1788,13 @@ class BatchProcessor:
             try:
                 # Run workflow with timeout
                 result = await asyncio.wait_for(
-                    workflow_executor.run_full_workflow(job.workflow_id, enriched_data),
+                    self._run_workflow(job, enriched_data, shared, shared_steps or []),
                     timeout=config.timeout_per_job
                 )
                 
+                if isinstance(result, dict) and result.get('status') == 'error':
+                    raise WorkflowError(result.get('error_message') or "Workflow failed")
+                
                 job.execution_time = time.time() - start_time
                 job.result = result
                 job.status = JobStatus.COMPLETED
@@ -552,40 +1803,107 @@ class BatchProcessor:
                 log_debug(logger, f"Job {job.id} completed successfully in {job.execution_time:.2f}s")
                 
             except asyncio.TimeoutError:
-                raise Exception(f"Job timed out after {config.timeout_per_job}s")
+                raise TimeoutError(f"Job timed out after {config.timeout_per_job}s")
             
         except Exception as e:
+            error_class = classify_error(e)
             job.execution_time = time.time() - job.started_at.timestamp()
             job.error_message = str(e)
-            job.status = JobStatus.FAILED
-            job.completed_at = datetime.now()
             
-            # Retry logic
-            if job.retry_count < config.max_retries:
+            if error_class != ErrorClass.PERMANENT and job.retry_count < config.max_retries:
                 job.retry_count += 1
                 job.status = JobStatus.RETRYING
-                
-                log_warning(logger, f"Job {job.id} failed, retrying ({job.retry_count}/{config.max_retries}): {e}")
-                
-                # Wait before retry
-                await asyncio.sleep(config.retry_delay)
-                
-                # Retry the job
-                return await self._process_single_job(job, config)
+                job.retry_delay = self._retry_delay(job, error_class, config, e)
+                log_warning(logger, f"Job {job.id} failed ({error_class.value}), retrying "
+                                    f"({job.retry_count}/{config.max_retries}) in {job.retry_delay:.1f}s: {e}")
             else:
-                log_error(logger, f"Job {job.id} failed after {config.max_retries} retries: {e}")
+                job.status = JobStatus.FAILED
+                job.completed_at = datetime.now()
+                if error_class == ErrorClass.PERMANENT:
+                    log_error(logger, f"Job {job.id} failed with a permanent error, not retrying: {e}")
+                else:
+                    log_error(logger, f"Job {job.id} failed after {config.max_retries} retries: {e}")
         
         # Update job in database
-        self._update_job_status(job)
+        self.status_writer.submit(job)
         
         return {
             'job_id': job.id,
             'status': job.status,
             'execution_time': job.execution_time,
             'result': job.result,
-            'error': job.error_message
+            'error': job.error_message,
+            'error_class': error_class.value if error_class else None,
+            'retry_delay': job.retry_delay if job.status == JobStatus.RETRYING else 0.0
         }
     
+    @staticmethod
+    def _retry_delay(job: BatchJob, error_class: ErrorClass, config: BatchProcessingConfig,
+                     error: BaseException) -> float:
+        """
+        Backoff before the job's next attempt (decorrelated jitter)
+        
+        Each delay is drawn between the base delay and three times the previous
+        one, capped at retry_max_delay, so jobs failing together do not retry
+        together. Rate limits use rate_limit_delay as the base and never retry
+        sooner than the server's Retry-After.
+        """
+        base = config.retry_delay
+        if error_class == ErrorClass.RATE_LIMITED:
+            base = max(base, config.rate_limit_delay, retry_after_seconds(error) or 0)
+        cap = max(config.retry_max_delay, base)
+        return min(cap, random.uniform(base, max(base, job.retry_delay) * 3))
+    
+    def _on_breaker_change(self, batch_id: str, change: Optional[str]):
+        """Show an opened circuit breaker as a paused batch"""
+        if change == "opened":
+            if self._transition_batch(batch_id, BatchStatus.RUNNING, BatchStatus.PAUSED):
+                log_warning(logger, f"Batch {batch_id} paused: too many recent job attempts failed")
+        elif change == "closed":
+            if self._transition_batch(batch_id, BatchStatus.PAUSED, BatchStatus.RUNNING):
+                log_info(logger, f"Batch {batch_id} resumed after a successful probe job")
+    
+    def _transition_batch(self, batch_id: str, from_status: BatchStatus, to_status: BatchStatus) -> bool:
+        """Change a batch's status only if it still has from_status (a cancel is never undone)"""
+        try:
+            updated = self.db_manager.execute("""
+                UPDATE batch_processing SET status = ? WHERE id = ? AND status = ?
+            """, (to_status.value, batch_id, from_status.value))
+        except Exception as e:
+            log_error(logger, f"Failed to update batch status: {e}")
+            return False
+        
+        with self._lock:
+            if updated and self.active_batches.get(batch_id, {}).get('status') == from_status:
+                self.active_batches[batch_id]['status'] = to_status
+        return bool(updated)
+    
+    async def _run_workflow(self, job: BatchJob, input_data: Dict[str, Any],
+                            shared: SharedStageCache, shared_steps: List[str]) -> Dict[str, Any]:
+        """Run the job's workflow, taking shared steps from jobs with the same profile"""
+        step_results = {}
+        for step_id in shared_steps:
+            try:
+                step_results[step_id] = await shared.run(
+                    f"step:{step_id}", job.profile_key,
+                    lambda step_id=step_id: self._run_shared_step(job.workflow_id, step_id, input_data)
+                )
+            except Exception as e:
+                # The workflow runs the step itself
+                log_warning(logger, f"Shared step {step_id} failed for job {job.id}: {e}")
+        
+        if not step_results:
+            return await workflow_executor.run_full_workflow(job.workflow_id, input_data)
+        return await workflow_executor.run_full_workflow(job.workflow_id, input_data, step_results=step_results)
+    
+    @staticmethod
+    async def _run_shared_step(workflow_id: str, step_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one workflow step; errors raise so that they are not shared"""
+        result = await workflow_executor.run_workflow_step(workflow_id, step_id, input_data)
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("error_message") or f"Step {step_id} failed")
+        return result
+    
     def _update_batch_status(self, batch_id: str, status: BatchStatus):
         """Update batch status in database and memory"""
         try:
@@ -600,42 +1918,46 @@ class BatchProcessor:
         except Exception as e:
             log_error(logger, f"Failed to update batch status: {e}")
     
-    def _update_job_status(self, job: BatchJob):
-        """Update job status in database"""
+    def _update_job_status(self, job: BatchJob) -> bool:
+        """
+        Update job status in database right away
+        
+        Same fencing as the buffered writes of status_writer (see
+        JobStatusWriter.statement).
+        
+        Returns:
+            bool: False if the job is finished, the lease was lost or the write failed
+        """
+        sql, params = JobStatusWriter.statement(job)
         try:
-            self.db_manager.execute("""
-                UPDATE batch_jobs 
-                SET status = ?, result = ?, error_message = ?, 
-                    started_at = ?, completed_at = ?, execution_time = ?, retry_count = ?
-                WHERE id = ?
-            """, (
-                job.status.value,
-                json.dumps(job.result) if job.result else None,
-                job.error_message,
-                job.started_at.isoformat() if job.started_at else None,
-                job.completed_at.isoformat() if job.completed_at else None,
-                job.execution_time,
-                job.retry_count,
-                job.id
-            ))
+            updated = self.db_manager.execute(sql, params)
         except Exception as e:
             log_error(logger, f"Failed to update job status: {e}")
+            return False
+        
+        if not updated:
+            log_warning(logger, f"Job {job.id} is finished or its lease was lost; its {job.status.value} state was not saved")
+            return False
+        if job.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.SKIPPED):
+            job.lease_token = None
+        return True
     
-    def _update_batch_progress(self, batch_id: str, progress: float, current_job_id: str):
-        """Update batch progress tracking"""
+    def _update_batch_progress(self, batch_id: str, tracker: BatchProgressTracker,
+                               current_job_id: str, concurrency: int, force: bool = False):
+        """
+        Update batch progress tracking
+        
+        Writes at most once per progress_write_interval_seconds unless forced;
+        the tracker keeps counting in between, so no finished job is lost.
+        """
+        if not force and not tracker.due(self.progress_write_interval):
+            return
+        tracker.last_written = time.monotonic()
+        
         try:
             # Calculate estimated completion time
-            batch_info = self.active_batches.get(batch_id, {})
-            jobs = self.job_queues.get(batch_id, [])
-            
-            completed_jobs = sum(1 for job in jobs if job.status == JobStatus.COMPLETED)
-            if completed_jobs > 0:
-                avg_job_time = sum(job.execution_time for job in jobs if job.status == JobStatus.COMPLETED) / completed_jobs
-                remaining_jobs = batch_info.get('total_jobs', 0) - completed_jobs
-                estimated_completion = datetime.now() + timedelta(seconds=avg_job_time * remaining_jobs)
-            else:
-                avg_job_time = 0
-                estimated_completion = None
+            eta = tracker.eta_seconds(concurrency)
+            estimated_completion = datetime.now() + timedelta(seconds=eta) if eta is not None else None
             
             # Update database
             self.db_manager.execute("""
@@ -643,16 +1965,23 @@ class BatchProcessor:
                 (batch_id, current_job_id, progress_percentage, estimated_completion, average_job_time, last_updated)
                 VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             """, (
-                batch_id, current_job_id, progress,
+                batch_id, current_job_id, tracker.progress,
                 estimated_completion.isoformat() if estimated_completion else None,
-                avg_job_time
+                tracker.ewma_job_time
             ))
             
         except Exception as e:
             log_error(logger, f"Failed to update batch progress: {e}")
     
     def get_batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
-        """Get current status of a batch"""
+        """
+        Get current status of a batch
+        
+        Jobs may be run by several workers (see run_stream_worker), so progress
+        is counted from the jobs themselves, and the running jobs are broken
+        down by the worker holding their lease. Without an ETA saved by an
+        in-process run, the ETA divides the remaining jobs over the running ones.
+        """
         try:
             batch_row = self.db_manager.fetch_one("""
                 SELECT bp.*, pr.progress_percentage, pr.estimated_completion, pr.average_job_time
@@ -670,13 +1999,32 @@ class BatchProcessor:
                     COUNT(*) as total_jobs,
                     SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed_jobs,
                     SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed_jobs,
+                    SUM(CASE WHEN status = 'skipped' THEN 1 ELSE 0 END) as skipped_jobs,
                     SUM(CASE WHEN status = 'running' THEN 1 ELSE 0 END) as running_jobs,
-                    AVG(execution_time) as avg_execution_time
+                    SUM(CASE WHEN status = 'retrying' THEN 1 ELSE 0 END) as retrying_jobs,
+                    AVG(CASE WHEN status IN ('completed', 'failed') THEN execution_time END) as avg_execution_time
                 FROM batch_jobs 
                 WHERE batch_id = ?
             """, (batch_id,))
             
-            return {
+            workers = self.db_manager.fetch_all("""
+                SELECT lease_owner, COUNT(*) as running_jobs FROM batch_jobs
+                WHERE batch_id = :batch_id AND status = 'running' AND lease_expires_at >= :now
+                GROUP BY lease_owner
+            """, {"batch_id": batch_id, "now": self._utc_now()})
+            
+            total_jobs = job_stats['total_jobs'] or 0
+            finished_jobs = sum(job_stats[key] or 0 for key in ('completed_jobs', 'failed_jobs', 'skipped_jobs'))
+            estimated_completion = batch_row['estimated_completion']
+            if estimated_completion is None and batch_row['status'] in ('running', 'paused') and workers:
+                tracker = BatchProgressTracker(total_jobs=total_jobs, processed_jobs=finished_jobs,
+                                               completed_jobs=job_stats['completed_jobs'] or 0,
+                                               ewma_job_time=job_stats['avg_execution_time'] or 0.0)
+                eta = tracker.eta_seconds(sum(worker['running_jobs'] for worker in workers))
+                if eta is not None:
+                    estimated_completion = (datetime.now() + timedelta(seconds=eta)).isoformat()
+            
+            status = {
                 'batch_id': batch_id,
                 'name': batch_row['name'],
                 'workflow_id': batch_row['workflow_id'],
@@ -685,14 +2033,24 @@ class BatchProcessor:
                 'completed_jobs': job_stats['completed_jobs'],
                 'failed_jobs': job_stats['failed_jobs'],
                 'running_jobs': job_stats['running_jobs'],
-                'progress_percentage': batch_row['progress_percentage'] or 0,
+                'retrying_jobs': job_stats['retrying_jobs'] or 0,
+                'workers': {worker['lease_owner']: worker['running_jobs'] for worker in workers},
+                'progress_percentage': (finished_jobs / total_jobs) * 100 if total_jobs else 0,
                 'average_execution_time': job_stats['avg_execution_time'] or 0,
-                'estimated_completion': batch_row['estimated_completion'],
+                'estimated_completion': estimated_completion,
+                'llm_calls_saved': batch_row.get('llm_calls_saved') or 0,
                 'created_at': batch_row['created_at'],
                 'started_at': batch_row['started_at'],
                 'completed_at': batch_row['completed_at']
             }
             
+            if self.job_stream is not None:
+                try:
+                    status['queue'] = self.job_stream.summary()
+                except Exception as e:
+                    log_warning(logger, f"Failed to read the job stream: {e}")
+            return status
+            
         except Exception as e:
             log_error(logger, f"Failed to get batch status: {e}")
             return None
@@ -705,11 +2063,12 @@ class BatchProcessor:
             if not batch_info:
                 return None
             
-            # Get all job results
-            jobs = self.db_manager.fetch_all("""
-                SELECT * FROM batch_jobs 
+            # Get all job results (large batches should use iter_batch_results instead)
+            columns = "*" if include_details else "id, status, execution_time, retry_count, error_message"
+            jobs = self.db_manager.fetch_all(f"""
+                SELECT {columns} FROM batch_jobs 
                 WHERE batch_id = ? 
-                ORDER BY created_at
+                ORDER BY id
             """, (batch_id,))
             
             results = []
@@ -761,7 +2120,8 @@ class BatchProcessor:
                     'workflow_id': batch_info['workflow_id'],
                     'fastest_job': min((j['execution_time'] for j in jobs if j['execution_time']), default=0),
                     'slowest_job': max((j['execution_time'] for j in jobs if j['execution_time']), default=0),
-                    'retry_rate': (sum(j['retry_count'] for j in jobs) / total_jobs) if total_jobs > 0 else 0
+                    'retry_rate': (sum(j['retry_count'] for j in jobs) / total_jobs) if total_jobs > 0 else 0,
+                    'llm_calls_saved': batch_info['llm_calls_saved']
                 }
             )
             
@@ -769,42 +2129,127 @@ class BatchProcessor:
             log_error(logger, f"Failed to get batch results: {e}")
             return None
     
+    def iter_batch_results(self, batch_id: str, include_details: bool = False,
+                           status_filter: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield a batch's jobs in id order, one page of export_page_size at a time
+        
+        Each page starts after the last job id of the previous one, so memory
+        use does not depend on the size of the batch.
+        
+        Args:
+            batch_id: Batch to export
+            include_details: Include each job's input_data and result
+            status_filter: Only export jobs with this status
+        """
+        columns = "id, status, execution_time, retry_count, error_message, started_at, completed_at"
+        if include_details:
+            columns += ", input_data, result"
+        status_condition = " AND status = :status" if status_filter else ""
+        params = {"batch_id": batch_id, "status": status_filter, "after": "", "limit": self.export_page_size}
+        
+        while True:
+            rows = self.db_manager.fetch_all(f"""
+                SELECT {columns} FROM batch_jobs
+                WHERE batch_id = :batch_id AND id > :after{status_condition}
+                ORDER BY id LIMIT :limit
+            """, params)
+            for row in rows:
+                job_data = {
+                    'job_id': row['id'],
+                    'status': row['status'],
+                    'execution_time': row['execution_time'],
+                    'retry_count': row['retry_count'],
+                    'error_message': row['error_message'],
+                    'started_at': row['started_at'],
+                    'completed_at': row['completed_at']
+                }
+                if include_details:
+                    job_data['input_data'] = json.loads(row['input_data'])
+                    job_data['result'] = json.loads(row['result']) if row['result'] else None
+                yield job_data
+            if len(rows) < self.export_page_size:
+                return
+            params["after"] = rows[-1]['id']
+    
     def list_batches(self, status_filter: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
         """List all batches with optional status filtering"""
+        return self.list_batches_page(status_filter=status_filter, page_size=limit).items
+    
+    def list_batches_page(self, status_filter: Optional[str] = None, page_size: int = 50,
+                          cursor: Optional[str] = None) -> CursorPage:
+        """List batches newest first, one keyset-paginated page at a time"""
+        query, params = self._batch_page_query(status_filter, page_size, cursor)
         try:
-            query = """
-                SELECT bp.*, pr.progress_percentage
-                FROM batch_processing bp
-                LEFT JOIN batch_progress pr ON bp.id = pr.batch_id
-            """
-            params = []
-            
-            if status_filter:
-                query += " WHERE bp.status = ?"
-                params.append(status_filter)
-            
-            query += " ORDER BY bp.created_at DESC LIMIT ?"
-            params.append(limit)
-            
             batches = self.db_manager.fetch_all(query, params)
-            
-            return [{
-                'batch_id': row['id'],
-                'name': row['name'],
-                'workflow_id': row['workflow_id'],
-                'status': row['status'],
-                'total_jobs': row['total_jobs'],
-                'completed_jobs': row['completed_jobs'],
-                'failed_jobs': row['failed_jobs'],
-                'progress_percentage': row['progress_percentage'] or 0,
-                'created_at': row['created_at'],
-                'started_at': row['started_at'],
-                'completed_at': row['completed_at']
-            } for row in batches]
-            
         except Exception as e:
             log_error(logger, f"Failed to list batches: {e}")
-            return []
+            return CursorPage(items=[], page_size=page_size)
+        return self._build_batch_page(batches, page_size)
+    
+    async def list_batches_page_async(self, status_filter: Optional[str] = None, page_size: int = 50,
+                                      cursor: Optional[str] = None) -> CursorPage:
+        """Async counterpart of list_batches_page"""
+        query, params = self._batch_page_query(status_filter, page_size, cursor)
+        try:
+            batches = await self.db_manager.fetch_all_async(query, params)
+        except Exception as e:
+            log_error(logger, f"Failed to list batches: {e}")
+            return CursorPage(items=[], page_size=page_size)
+        return self._build_batch_page(batches, page_size)
+    
+    async def get_batch_status_async(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Get current status of a batch without blocking the event loop"""
+        return await asyncio.to_thread(self.get_batch_status, batch_id)
+    
+    def _batch_page_query(self, status_filter: Optional[str], page_size: int,
+                          cursor: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+        """Build the keyset query for one page of batches ordered by (created_at, id)"""
+        query = """
+            SELECT bp.*, pr.progress_percentage
+            FROM batch_processing bp
+            LEFT JOIN batch_progress pr ON bp.id = pr.batch_id
+        """
+        conditions = []
+        params: Dict[str, Any] = {"limit": page_size + 1}
+        
+        if status_filter:
+            conditions.append("bp.status = :status")
+            params["status"] = status_filter
+        
+        if cursor:
+            keyset, keyset_params = KeysetPaginator.keyset_sql(
+                ["bp.created_at", "bp.id"], decode_cursor(cursor, expected_length=2)
+            )
+            conditions.append(keyset)
+            params.update(keyset_params)
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY bp.created_at DESC, bp.id DESC LIMIT :limit"
+        return query, params
+    
+    def _build_batch_page(self, batches: List[Dict[str, Any]], page_size: int) -> CursorPage:
+        """Turn page_size + 1 fetched rows into a page and its next cursor"""
+        next_cursor = None
+        if len(batches) > page_size:
+            batches = batches[:page_size]
+            next_cursor = encode_cursor([batches[-1]['created_at'], batches[-1]['id']])
+        
+        items = [{
+            'batch_id': row['id'],
+            'name': row['name'],
+            'workflow_id': row['workflow_id'],
+            'status': row['status'],
+            'total_jobs': row['total_jobs'],
+            'completed_jobs': row['completed_jobs'],
+            'failed_jobs': row['failed_jobs'],
+            'progress_percentage': row['progress_percentage'] or 0,
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'completed_at': row['completed_at']
+        } for row in batches]
+        return CursorPage(items=items, page_size=page_size, next_cursor=next_cursor)
     
     async def cancel_batch(self, batch_id: str) -> bool:
         """Cancel a running batch"""
@@ -814,11 +2259,14 @@ class BatchProcessor:
             
             self._update_batch_status(batch_id, BatchStatus.CANCELLED)
             
+            # Jobs that already started keep running; save them before skipping the rest
+            await self._flush_job_states()
+            
             # Cancel pending jobs
             self.db_manager.execute("""
                 UPDATE batch_jobs 
                 SET status = 'skipped' 
-                WHERE batch_id = ? AND status = 'pending'
+                WHERE batch_id = ? AND status IN ('pending', 'retrying')
             """, (batch_id,))
             
             log_info(logger, f"Cancelled batch {batch_id}")
@@ -855,8 +2303,6 @@ class BatchProcessor:
                 with self._lock:
                     if batch_id in self.active_batches:
                         del self.active_batches[batch_id]
-                    if batch_id in self.job_queues:
-                        del self.job_queues[batch_id]
             
             log_info(logger, f"Cleaned up {len(old_batches)} old batches")
             
@@ -869,12 +2315,18 @@ batch_processor = BatchProcessor()
 
 
 # Convenience functions for external use
-async def create_batch(name: str, workflow_id: str, input_list: List[Dict[str, Any]], 
+async def create_batch(name: str, workflow_id: str, input_list: Iterable[Dict[str, Any]], 
                       config_override: Optional[Dict[str, Any]] = None) -> str:
     """Create a new batch processing job"""
     return await batch_processor.create_batch(name, workflow_id, input_list, config_override)
 
 
+def iter_batch_results(batch_id: str, include_details: bool = False,
+                       status_filter: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield a batch's jobs page by page"""
+    return batch_processor.iter_batch_results(batch_id, include_details, status_filter)
+
+
 async def start_batch(batch_id: str) -> bool:
     """Start processing a batch"""
     return await batch_processor.start_batch(batch_id)
@@ -895,6 +2347,23 @@ def list_batches(status_filter: Optional[str] = None, limit: int = 50) -> List[D
     return batch_processor.list_batches(status_filter, limit)
 
 
+def list_batches_page(status_filter: Optional[str] = None, page_size: int = 50,
+                      cursor: Optional[str] = None) -> CursorPage:
+    """List batches one keyset-paginated page at a time"""
+    return batch_processor.list_batches_page(status_filter, page_size, cursor)
+
+
+async def list_batches_page_async(status_filter: Optional[str] = None, page_size: int = 50,
+                                  cursor: Optional[str] = None) -> CursorPage:
+    """List batches one page at a time without blocking the event loop"""
+    return await batch_processor.list_batches_page_async(status_filter, page_size, cursor)
+
+
+async def get_batch_status_async(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Get batch status without blocking the event loop"""
+    return await batch_processor.get_batch_status_async(batch_id)
+
+
 async def cancel_batch(batch_id: str) -> bool:
     """Cancel a running batch"""
     return await batch_processor.cancel_batch(batch_id)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Batch job queue on Redis Streams
+
+With batch_processing.queue_backend set to "redis_streams", starting a batch
+publishes one stream entry per job instead of running the batch in the API
+process, and standalone workers (batch_worker.py) consume the entries through
+a consumer group. The database stays the source of truth: a worker takes the
+job's lease before running it, so an entry delivered twice runs the job once,
+and an entry is acknowledged only after the job's final state is saved.
+
+An entry left unacknowledged by a worker that stopped is reclaimed by another
+worker (XAUTOCLAIM) once it has been idle for reclaim_idle_ms. Workers touch
+the entries they hold on every heartbeat so that they never look idle.
+
+Jobs can also lose their entry altogether: the API process may stop part way
+through publishing a batch, or Redis may lose the stream. Publishing sets a
+per-batch marker that expires; workers with nothing to read re-publish the
+unfinished jobs of active batches whose marker is gone (see
+BatchProcessor.run_stream_worker).
+"""
+
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+
+import redis
+
+from config_system import config_system
+from logging_config import log_info, log_warning
+
+logger = logging.getLogger(__name__)
+
+# (entry id, batch id, job id)
+StreamEntry = Tuple[str, str, str]
+
+
+class BatchJobStream:
+    """One consumer's access to the batch job stream and its consumer group"""
+
+    def __init__(self, client: redis.Redis, consumer: str, stream: str = "crewai:batch_jobs",
+                 group: str = "batch_workers", block_ms: int = 2000, reclaim_idle_ms: int = 120000,
+                 publish_chunk_size: int = 1000):
+        """
+        Args:
+            client: Redis client created with decode_responses=True
+            consumer: Name of this consumer in the group (the worker id)
+            stream: Stream key
+            group: Consumer group shared by all workers
+            block_ms: How long a read waits for new entries
+            reclaim_idle_ms: How long an entry must be idle before another consumer reclaims it
+            publish_chunk_size: Entries sent per pipeline round trip when publishing
+        """
+        self.client = client
+        self.consumer = consumer
+        self.stream = stream
+        self.group = group
+        self.block_ms = block_ms
+        self.reclaim_idle_ms = reclaim_idle_ms
+        self.publish_chunk_size = publish_chunk_size
+        self._group_ready = False
+        self._reclaim_cursor = "0-0"
+
+    @classmethod
+    def from_config(cls, consumer: str, reclaim_idle_ms: int) -> "BatchJobStream":
+        """Stream configured by batch_processing.stream_* (Redis URL from REDIS_URL or cache.redis_url)"""
+        batch_config = config_system.get("batch_processing", {})
+        redis_url = os.getenv("REDIS_URL") or config_system.get("cache", {}).get("redis_url", "redis://localhost:6379/0")
+        block_ms = batch_config.get("stream_block_ms", 2000)
+        client = redis.Redis.from_url(
+            redis_url,
+            decode_responses=True,
+            socket_connect_timeout=5,
+            # A blocking read holds the socket for up to block_ms
+            socket_timeout=block_ms / 1000 + 5,
+            retry_on_timeout=True
+        )
+        return cls(client, consumer,
+                   stream=batch_config.get("stream_key", "crewai:batch_jobs"),
+                   group=batch_config.get("stream_group", "batch_workers"),
+                   block_ms=block_ms,
+                   reclaim_idle_ms=reclaim_idle_ms,
+                   publish_chunk_size=batch_config.get("ingest_chunk_size", 1000))
+
+    def ensure_group(self):
+        """Create the stream and its consumer group unless they exist"""
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+            log_info(logger, f"Created consumer group {self.group} on stream {self.stream}")
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def publish(self, batch_id: str, job_ids: Iterable[str]) -> int:
+        """
+        Add one entry per job, publish_chunk_size entries per round trip
+
+        Returns:
+            int: Number of entries added
+        """
+        self.ensure_group()
+        pipe = self.client.pipeline(transaction=False)
+        published = 0
+        for job_id in job_ids:
+            pipe.xadd(self.stream, {"batch_id": batch_id, "job_id": job_id})
+            published += 1
+            if published % self.publish_chunk_size == 0:
+                pipe.execute()
+        pipe.execute()
+        return published
+
+    def mark_published(self, batch_id: str, ttl_ms: int) -> bool:
+        """
+        Set the batch's publish marker for ttl_ms unless it is already set
+
+        The marker lives in Redis next to the stream, so it is lost with it.
+
+        Returns:
+            bool: False if the batch was (re-)published less than ttl_ms ago
+        """
+        return bool(self.client.set(f"{self.stream}:published:{batch_id}", self.consumer, nx=True, px=ttl_ms))
+
+    def read(self, count: int) -> List[StreamEntry]:
+        """Entries not yet delivered to any consumer, waiting up to block_ms for some"""
+        self.ensure_group()
+        try:
+            response = self.client.xreadgroup(self.group, self.consumer, {self.stream: ">"},
+                                              count=count, block=self.block_ms)
+        except redis.ResponseError as e:
+            if "NOGROUP" not in str(e):
+                raise
+            # The stream was deleted (e.g. Redis restarted without persistence)
+            log_warning(logger, f"Consumer group {self.group} is gone; recreating it")
+            self._group_ready = False
+            return []
+
+        entries = []
+        for _, messages in response or []:
+            entries.extend(self._entries(messages))
+        return entries
+
+    def reclaim(self, count: int) -> List[StreamEntry]:
+        """
+        Take over up to count entries other consumers left idle for reclaim_idle_ms
+
+        Successive calls walk the pending entries list from where the last call
+        stopped, starting over once it reaches the end.
+        """
+        self.ensure_group()
+        response = self.client.xautoclaim(self.stream, self.group, self.consumer, self.reclaim_idle_ms,
+                                          start_id=self._reclaim_cursor, count=count)
+        self._reclaim_cursor = response[0]
+        return self._entries(response[1])
+
+    def touch(self, entry_ids: List[str]):
+        """Reset the idle time of entries this consumer is still working on"""
+        if entry_ids:
+            self.client.xclaim(self.stream, self.group, self.consumer, 0, entry_ids, justid=True)
+
+    def ack(self, entry_ids: List[str]) -> int:
+        """Acknowledge entries and delete them, so the stream only holds unfinished work"""
+        if not entry_ids:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xack(self.stream, self.group, *entry_ids)
+        pipe.xdel(self.stream, *entry_ids)
+        acknowledged, _ = pipe.execute()
+        return acknowledged
+
+    def summary(self) -> Dict[str, Any]:
+        """Entries waiting for a worker, and entries held by each consumer"""
+        self.ensure_group()
+        pending = self.client.xpending(self.stream, self.group)
+        return {
+            'queued_entries': max(0, self.client.xlen(self.stream) - pending['pending']),
+            'pending_entries': pending['pending'],
+            'consumers': {consumer['name']: consumer['pending'] for consumer in pending.get('consumers') or []}
+        }
+
+    def _entries(self, messages) -> List[StreamEntry]:
+        """Parse (entry id, fields) pairs; entries deleted while pending are acknowledged and dropped"""
+        entries, gone = [], []
+        for entry_id, fields in messages:
+            if fields and "batch_id" in fields and "job_id" in fields:
+                entries.append((entry_id, fields["batch_id"], fields["job_id"]))
+            else:
+                gone.append(entry_id)
+        if gone:
+            self.client.xack(self.stream, self.group, *gone)
+        return entries
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Standalone batch worker
+
+Runs batch jobs from the Redis Streams job queue. With
+batch_processing.queue_backend set to "redis_streams" the API publishes the
+jobs of started batches instead of running them itself; start as many
+workers as needed, on any host sharing the database and Redis:
+
+    python batch_worker.py --concurrency 4
+
+SIGINT or SIGTERM stops reading new jobs; jobs already taken are finished
+first. Jobs of a worker that is killed are taken over by the other workers
+once their leases expire.
+"""
+
+import argparse
+import asyncio
+import signal
+
+
+async def run(concurrency: int = None):
+    from batch_processor import batch_processor
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    print(f"🚀 Batch worker {batch_processor.worker_id} started")
+    await batch_processor.run_stream_worker(concurrency, stop)
+    print("✅ Batch worker stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run batch jobs from the Redis Streams job queue")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Jobs run at once (default: batch_processing.max_concurrent_jobs)")
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
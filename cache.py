@@ -730,12 +730,13 @@ rate_limiter = RateLimiter()
 metrics_collector = MetricsCollector()
 
 # Add semantic similarity imports
+from embedding_service import EMBEDDINGS_AVAILABLE, embedding_service
+
 try:
     import numpy as np
-    from sentence_transformers import SentenceTransformer
     from sklearn.metrics.pairwise import cosine_similarity
 
-    SEMANTIC_SIMILARITY_AVAILABLE = True
+    SEMANTIC_SIMILARITY_AVAILABLE = EMBEDDINGS_AVAILABLE
 except ImportError:
     SEMANTIC_SIMILARITY_AVAILABLE = False
     logging.warning(
@@ -750,17 +751,10 @@ class SmartWorkflowCache:
         self.redis = redis_client
         self.logger = logging.getLogger(__name__)
 
-        # Initialize semantic similarity model if available
+        # Use the shared embedding service; the model itself loads on first use
         if SEMANTIC_SIMILARITY_AVAILABLE:
-            try:
-                self.similarity_model = SentenceTransformer("all-MiniLM-L6-v2")
-                self.similarity_threshold = 0.85  # 85% similarity threshold
-                log_info(self.logger,
-                    "Semantic similarity model loaded successfully")
-            except Exception as e:
-                log_warning(self.logger,
-                    f"Failed to load semantic similarity model: {e}")
-                self.similarity_model = None
+            self.similarity_model = embedding_service
+            self.similarity_threshold = 0.85  # 85% similarity threshold
         else:
             self.similarity_model = None
 
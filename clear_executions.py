@@ -4,11 +4,12 @@ Safe execution history cleanup script
 Clears all execution data while preserving database schema and functionality
 """
 
-import json
 import sqlite3
 import os
 from datetime import datetime
 
+from execution_log import ExecutionLog
+
 def backup_data():
     """Create backup of current data before clearing"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -23,6 +24,12 @@ def backup_data():
         os.system(f"cp {json_file} {backup_dir}/execution_history.json")
         print("✅ Backed up JSON execution history")
     
+    # Backup execution journal
+    journal_file = "logs/execution_events.jsonl"
+    if os.path.exists(journal_file):
+        os.system(f"cp {journal_file} {backup_dir}/execution_events.jsonl")
+        print("✅ Backed up execution journal")
+    
     # Backup database
     db_file = "data/crewai.db"
     if os.path.exists(db_file):
@@ -32,12 +39,10 @@ def backup_data():
     return backup_dir
 
 def clear_json_history():
-    """Clear JSON execution history file"""
-    json_file = "logs/execution_history.json"
+    """Clear the execution journal and its JSON export"""
     try:
-        # Write empty array to maintain file structure
-        with open(json_file, 'w') as f:
-            json.dump([], f, indent=2)
+        # Rewrite the journal empty; this also refreshes the JSON export
+        ExecutionLog().replace_all([])
         print("✅ Cleared JSON execution history")
         return True
     except Exception as e:
@@ -87,13 +92,11 @@ def verify_cleanup():
     """Verify that cleanup was successful"""
     print("\n🔍 Verifying cleanup...")
     
-    # Check JSON file
+    # Check execution journal
     try:
-        with open("logs/execution_history.json", 'r') as f:
-            data = json.load(f)
-            print(f"📄 JSON file: {len(data)} executions remaining")
+        print(f"📄 Execution journal: {len(ExecutionLog())} executions remaining")
     except:
-        print("❌ Could not verify JSON file")
+        print("❌ Could not verify execution journal")
     
     # Check database
     try:
@@ -9,6 +9,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from config_system import config_system
+from execution_ids import new_execution_id
+
 logger = logging.getLogger(__name__)
 
 
@@ -160,8 +163,8 @@ class ConfigManager:
         (self.config_dir / "models").mkdir(exist_ok=True)
         (self.config_dir / "versions").mkdir(exist_ok=True)
 
-        # Initialize database with absolute path
-        self.db_path = self.config_dir / "config.db"
+        # Initialize database with absolute path; config_manager.db_path moves it out of config_dir
+        self.db_path = Path(config_system.get("config_manager.db_path") or self.config_dir / "config.db")
         logger.info(f"Database path: {self.db_path.absolute()}")
         self._init_database()
 
@@ -243,6 +246,16 @@ class ConfigManager:
             """
             )
 
+            # version_history lookups by (entity_type, entity_id) use its UNIQUE index
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_test_results_entity "
+                "ON test_results (entity_type, entity_id, created_at)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_execution_history_created_at "
+                "ON execution_history (created_at)"
+            )
+
             conn.commit()
             logger.info("Database initialized successfully")
             
@@ -491,8 +504,7 @@ class ConfigManager:
             conn = self._get_db_connection()
             cursor = conn.cursor()
 
-            # Generate unique ID
-            execution_id = f"exec_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(workflow_id + agent_id + prompt_id) % 10000}"
+            execution_id = new_execution_id()
 
             cursor.execute(
                 """
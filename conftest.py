@@ -0,0 +1,239 @@
+"""
+Shared fixtures and helpers for the test scripts.
+
+Fixtures keep every change they make to module state (configuration sections,
+the global database manager) local to the test that asked for them, and put
+scratch databases in the test's tmp_path. Tests replace batch processor hooks
+such as workflow_executor with monkeypatch for the same reason.
+
+Module-level singletons (the default database, the execution journal, the
+configuration database and the log files) are created on import, so their
+paths are pointed at a scratch directory before anything is imported.
+"""
+
+import asyncio
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import redis
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="crewai-tests-")
+os.environ.update({
+    "CREWAI_LOGGING_FILE": os.path.join(SCRATCH_DIR, "logs", "crewai.log"),
+    "CREWAI_EXECUTIONS_LOG_PATH": os.path.join(SCRATCH_DIR, "logs", "execution_events.jsonl"),
+    "CREWAI_EXECUTIONS_EXPORT_PATH": os.path.join(SCRATCH_DIR, "logs", "execution_history.json"),
+    "CREWAI_CONFIG_MANAGER_DB_PATH": os.path.join(SCRATCH_DIR, "config.db"),
+})
+
+from config_system import config_system  # noqa: E402
+
+# The database section is read as a whole, so environment overrides of its keys do not apply
+config_system.config_cache.setdefault("database", {})["sqlite_path"] = os.path.join(SCRATCH_DIR, "crewai.db")
+
+# Batch config without the validation and enrichment stages, retrying at once
+FAST_CONFIG = {"enable_validation": False, "enable_enrichment": False, "retry_delay": 0}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def scratch_dir():
+    """Remove the scratch directory of the module-level singletons after the session"""
+    yield SCRATCH_DIR
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def set_config(monkeypatch):
+    """Override keys of a configuration section until the end of the test"""
+    def set_section(section: str, **values):
+        monkeypatch.setitem(config_system.config_cache, section,
+                            {**config_system.config_cache.get(section, {}), **values})
+    return set_section
+
+
+@pytest.fixture
+def make_database_manager(tmp_path, set_config, monkeypatch):
+    """Create DatabaseManagers on scratch SQLite files in tmp_path; their engines are disposed afterwards"""
+    import database
+    from database import DatabaseManager
+
+    # Drop any global manager get_database_manager() creates on the scratch config
+    monkeypatch.setattr(database, "db_manager", database.db_manager)
+    managers = []
+
+    def make(name: str) -> DatabaseManager:
+        set_config("database", type="sqlite", sqlite_path=str(tmp_path / name))
+        db = DatabaseManager()
+        managers.append(db)
+        return db
+
+    yield make
+    for db in managers:
+        db.engine.dispose()
+
+
+@pytest.fixture
+def make_processor(monkeypatch, make_database_manager):
+    """Create BatchProcessors on a scratch SQLite database installed as the global database manager"""
+    import database
+    from batch_processor import BatchProcessor
+
+    def make(name: str) -> BatchProcessor:
+        monkeypatch.setattr(database, "db_manager", make_database_manager(name))
+        return BatchProcessor()
+
+    return make
+
+
+def job_rows(processor, batch_id: str) -> dict:
+    rows = processor.db_manager.fetch_all("SELECT * FROM batch_jobs WHERE batch_id = ?", (batch_id,))
+    return {row["id"]: row for row in rows}
+
+
+def expire(processor, job_id: str, owner: str = "crashed-worker"):
+    """Leave a job running under a lease that has run out"""
+    processor.db_manager.execute("""
+        UPDATE batch_jobs SET status = 'running', lease_owner = ?, lease_token = 'stale', lease_expires_at = ?
+        WHERE id = ?
+    """, (owner, (datetime.utcnow() - timedelta(minutes=5)).isoformat(timespec="microseconds"), job_id))
+
+
+class FakeStreamRedis:
+    """The Redis commands BatchJobStream uses, for one stream with one consumer group"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self.flushall()
+
+    def flushall(self):
+        """Lose every key, as a Redis restart without persistence does"""
+        with self._lock:
+            self.entries = {}  # entry id -> fields, in insertion order
+            self.pending = {}  # entry id -> [consumer, delivery time]
+            self.keys = {}  # key -> expiry time
+            self.group = None
+            self.last_delivered = 0
+
+    @staticmethod
+    def _seq(entry_id: str) -> int:
+        return int(entry_id.split("-")[0])
+
+    def xgroup_create(self, name, groupname, id="0", mkstream=False):
+        with self._lock:
+            if self.group is not None:
+                raise redis.ResponseError("BUSYGROUP Consumer Group name already exists")
+            self.group = groupname
+
+    def xadd(self, name, fields):
+        with self._lock:
+            entry_id = f"{next(self._ids)}-0"
+            self.entries[entry_id] = dict(fields)
+            return entry_id
+
+    def set(self, name, value, nx=False, px=None):
+        with self._lock:
+            now = time.monotonic()
+            if nx and self.keys.get(name, now) > now:
+                return None
+            self.keys[name] = now + px / 1000 if px else float("inf")
+            return True
+
+    def xreadgroup(self, groupname, consumername, streams, count=None, block=None):
+        with self._lock:
+            if self.group is None:
+                raise redis.ResponseError("NOGROUP No such key or consumer group")
+            new = [entry_id for entry_id in self.entries if self._seq(entry_id) > self.last_delivered][:count]
+            for entry_id in new:
+                self.pending[entry_id] = [consumername, time.monotonic()]
+                self.last_delivered = self._seq(entry_id)
+        if not new:
+            time.sleep(0.005)
+            return []
+        return [[next(iter(streams)), [(entry_id, dict(self.entries[entry_id])) for entry_id in new]]]
+
+    def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None):
+        with self._lock:
+            now = time.monotonic()
+            idle = [entry_id for entry_id in sorted(self.pending, key=self._seq)
+                    if self._seq(entry_id) >= self._seq(start_id)
+                    and (now - self.pending[entry_id][1]) * 1000 >= min_idle_time][:count]
+            for entry_id in idle:
+                self.pending[entry_id] = [consumername, now]
+            return ["0-0", [(entry_id, self.entries.get(entry_id)) for entry_id in idle], []]
+
+    def xclaim(self, name, groupname, consumername, min_idle_time, message_ids, justid=False):
+        with self._lock:
+            for entry_id in message_ids:
+                if entry_id in self.pending:
+                    self.pending[entry_id] = [consumername, time.monotonic()]
+            return list(message_ids)
+
+    def xack(self, name, groupname, *ids):
+        with self._lock:
+            return sum(self.pending.pop(entry_id, None) is not None for entry_id in ids)
+
+    def xdel(self, name, *ids):
+        with self._lock:
+            return sum(self.entries.pop(entry_id, None) is not None for entry_id in ids)
+
+    def xpending(self, name, groupname):
+        with self._lock:
+            consumers = {}
+            for consumer, _ in self.pending.values():
+                consumers[consumer] = consumers.get(consumer, 0) + 1
+            return {"pending": len(self.pending),
+                    "consumers": [{"name": name, "pending": jobs} for name, jobs in consumers.items()]}
+
+    def xlen(self, name):
+        with self._lock:
+            return len(self.entries)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them on execute()"""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, command):
+        return lambda *args, **kwargs: self.commands.append((command, args, kwargs))
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [getattr(self.client, command)(*args, **kwargs) for command, args, kwargs in commands]
+
+
+def stream_processor(client: FakeStreamRedis, **stream_options):
+    """BatchProcessor on the current scratch database, reading the fake stream"""
+    from batch_processor import BatchProcessor
+    from batch_queue import BatchJobStream
+
+    processor = BatchProcessor()
+    processor.job_stream = BatchJobStream(client, processor.worker_id, block_ms=10, **stream_options)
+    return processor
+
+
+async def run_workers_until_finished(api, batch_id: str, workers, concurrency: int = 3):
+    """Run stream workers until the batch is completed"""
+    from batch_processor import BatchStatus
+
+    stop = asyncio.Event()
+    runs = [asyncio.create_task(worker.run_stream_worker(concurrency, stop)) for worker in workers]
+    try:
+        for _ in range(500):
+            if api.get_batch_status(batch_id)["status"] == BatchStatus.COMPLETED.value:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        stop.set()
+        await asyncio.gather(*runs)
@@ -5,23 +5,38 @@ This module provides database connectivity for both SQLite (development) and
 PostgreSQL (production) with automatic migration support.
 """
 
+import asyncio
 import os
 import logging
-from typing import Optional, Dict, Any
-from contextlib import contextmanager
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, DateTime, Boolean, JSON, text
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from contextlib import asynccontextmanager, contextmanager
+from sqlalchemy import create_engine, event, inspect, MetaData, Table, Column, Computed, Integer, Float, String, Text, DateTime, Boolean, JSON, Index, UniqueConstraint, and_, select, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, SingletonThreadPool, StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from datetime import datetime
 
 from config_system import config_system
 from logging_config import log_info, log_error, log_warning, log_debug
+from pagination import CursorPage, KeysetPaginator
+from metrics_rollup import MetricRollups, evaluation_measurements, observability_measurements
+from retention import RetentionManager, define_retention_tables
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Columns returned by execution list endpoints; the JSON blobs are fetched per execution
+EXECUTION_SUMMARY_COLUMNS = (
+    'id', 'workflow_id', 'workflow_name', 'status', 'started_at', 'completed_at', 'created_at',
+    'duration', 'progress', 'current_step', 'quality_score', 'channel'
+)
+
+# Heavy columns served by the execution detail endpoint
+EXECUTION_DETAIL_COLUMNS = ('input_data', 'output_data', 'steps', 'error_message', 'executed_by')
+
 class DatabaseConfig:
     """Database configuration management"""
     
@@ -35,6 +50,19 @@ class DatabaseConfig:
         # SQLite configuration
         self.sqlite_path = db_config.get("sqlite_path", "data/crewai.db")
         
+        # SQLite connection model and tuning
+        # sqlite_pool: "queue" (a connection per concurrently active thread),
+        # "per_thread" (one pinned connection per thread) or "static" (one shared connection)
+        self.sqlite_pool = db_config.get("sqlite_pool", "queue")
+        self.sqlite_pool_size = db_config.get("sqlite_pool_size", 32)
+        self.sqlite_journal_mode = db_config.get("sqlite_journal_mode", "WAL")
+        self.sqlite_synchronous = db_config.get("sqlite_synchronous", "NORMAL")
+        self.sqlite_cache_size_kb = db_config.get("sqlite_cache_size_kb", 65536)
+        self.sqlite_mmap_size_mb = db_config.get("sqlite_mmap_size_mb", 256)
+        self.sqlite_busy_timeout_ms = db_config.get("sqlite_busy_timeout_ms", 5000)
+        # Only takes effect on a new database, before its first table is created
+        self.sqlite_auto_vacuum = db_config.get("sqlite_auto_vacuum", "INCREMENTAL")
+        
         # PostgreSQL configuration
         self.postgres_host = db_config.get("postgres_host", "localhost")
         self.postgres_port = db_config.get("postgres_port", 5432)
@@ -71,8 +99,24 @@ class DatabaseConfig:
                    f"{self.postgres_host}:{self.postgres_port}/{self.postgres_database}")
         else:
             # SQLite
-            os.makedirs(os.path.dirname(self.sqlite_path), exist_ok=True)
+            if self.sqlite_path != ":memory:":
+                os.makedirs(os.path.dirname(self.sqlite_path) or ".", exist_ok=True)
             return f"sqlite:///{self.sqlite_path}"
+    
+    def get_async_database_url(self) -> str:
+        """
+        Get database URL for the asyncio engine (aiosqlite / asyncpg)
+        
+        Returns:
+            str: Async database connection URL
+        """
+        url = self.get_database_url()
+        if url.startswith("sqlite:///"):
+            return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+        for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                return "postgresql+asyncpg://" + url[len(prefix):]
+        return url
 
 
 class DatabaseManager:
@@ -83,6 +127,9 @@ class DatabaseManager:
         self.config = DatabaseConfig()
         self.engine = None
         self.SessionLocal = None
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self._async_unavailable = False
         self.metadata = MetaData()
         self._initialize_engine()
         self._create_tables()
@@ -106,10 +153,15 @@ class DatabaseManager:
                 # SQLite engine
                 self.engine = create_engine(
                     database_url,
-                    poolclass=StaticPool,
-                    connect_args={"check_same_thread": False},
-                    echo=config_system.get("app.debug", False)
+                    connect_args={
+                        "check_same_thread": False,
+                        # Python-level lock wait, mirrors PRAGMA busy_timeout
+                        "timeout": self.config.sqlite_busy_timeout_ms / 1000.0
+                    },
+                    echo=config_system.get("app.debug", False),
+                    **self._sqlite_pool_args()
                 )
+                event.listen(self.engine, "connect", self._configure_sqlite_connection)
             
             # Create session factory
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
@@ -120,24 +172,195 @@ class DatabaseManager:
             log_error(logger, f"Failed to initialize database engine: {str(e)}")
             raise
             
+    def _initialize_async_engine(self):
+        """Create the asyncio engine on first use; requires aiosqlite or asyncpg"""
+        if self.config.db_type == "postgresql":
+            self.async_engine = create_async_engine(
+                self.config.get_async_database_url(),
+                pool_size=self.config.pool_size,
+                max_overflow=self.config.max_overflow,
+                pool_timeout=self.config.pool_timeout,
+                pool_recycle=self.config.pool_recycle
+            )
+        else:
+            pool_args = self._sqlite_pool_args()
+            if pool_args["poolclass"] is QueuePool:
+                pool_args["poolclass"] = AsyncAdaptedQueuePool
+            else:
+                pool_args = {"poolclass": StaticPool}
+            self.async_engine = create_async_engine(
+                self.config.get_async_database_url(),
+                connect_args={"timeout": self.config.sqlite_busy_timeout_ms / 1000.0},
+                **pool_args
+            )
+            event.listen(self.async_engine.sync_engine, "connect", self._configure_sqlite_connection)
+        
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, expire_on_commit=False)
+        log_info(logger, f"Async database engine initialized: {self.config.db_type}")
+    
+    def _get_async_sessionmaker(self):
+        """Get the async session factory, or None if no async driver is installed"""
+        if self.AsyncSessionLocal is None and not self._async_unavailable:
+            try:
+                self._initialize_async_engine()
+            except Exception as e:
+                self._async_unavailable = True
+                log_warning(logger, f"Async database engine unavailable, offloading to threads instead: {str(e)}")
+        return self.AsyncSessionLocal
+    
+    async def dispose_async(self):
+        """Close pooled async connections; must run on the event loop that opened them"""
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+    
+    def _sqlite_pool_args(self) -> Dict[str, Any]:
+        """Select the SQLite connection pool"""
+        mode = self.config.sqlite_pool
+        if mode == "static" or self.config.sqlite_path == ":memory:":
+            # One connection shared by every thread; required for in-memory databases
+            return {"poolclass": StaticPool}
+        if mode == "per_thread":
+            # Pinned per thread; connections of threads beyond pool_size are closed
+            return {"poolclass": SingletonThreadPool, "pool_size": self.config.sqlite_pool_size}
+        # Every session checks out its own connection, so readers never queue behind each other
+        return {
+            "poolclass": QueuePool,
+            "pool_size": self.config.sqlite_pool_size,
+            "max_overflow": self.config.max_overflow,
+            "pool_timeout": self.config.pool_timeout
+        }
+    
+    def _configure_sqlite_connection(self, dbapi_connection, connection_record):
+        """Apply journal, durability and memory pragmas to every new SQLite connection"""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout={int(self.config.sqlite_busy_timeout_ms)}")
+            # auto_vacuum only takes effect before the first table is created, and setting it
+            # takes the write lock, so a new connection would wait behind any open write
+            cursor.execute("PRAGMA page_count")
+            if cursor.fetchone()[0] == 0:
+                cursor.execute(f"PRAGMA auto_vacuum={self.config.sqlite_auto_vacuum}")
+            cursor.execute(f"PRAGMA journal_mode={self.config.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={self.config.sqlite_synchronous}")
+            # Negative cache_size is in KiB rather than pages
+            cursor.execute(f"PRAGMA cache_size=-{int(self.config.sqlite_cache_size_kb)}")
+            cursor.execute(f"PRAGMA mmap_size={int(self.config.sqlite_mmap_size_mb) * 1024 * 1024}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+        except Exception as e:
+            log_warning(logger, f"Failed to apply SQLite pragmas: {str(e)}")
+        finally:
+            cursor.close()
+    
     def _create_tables(self):
         """Create database tables"""
         try:
             # Define core tables
             self._define_tables()
+            had_rollups = inspect(self.engine).has_table(self.metric_rollups_table.name)
             
             # Create all tables
             self.metadata.create_all(bind=self.engine)
             
+            # create_all leaves tables from earlier versions untouched
+            if self.config.auto_migrate:
+                self.migrate_schema()
+            
+            # New partitions must exist before the first insert into a partitioned table
+            self.retention = RetentionManager(self)
+            if self.config.db_type == "postgresql":
+                self.retention.ensure_partitions()
+            
+            self.rollups = MetricRollups(self)
+            if self.config.auto_migrate and not had_rollups:
+                # First start with rollups: summarize rows recorded before they existed
+                self.rollups.backfill()
+            
             log_info(logger, "Database tables created/verified")
             
         except Exception as e:
             log_error(logger, f"Failed to create database tables: {str(e)}")
             raise
     
+    def migrate_schema(self) -> Dict[str, List[str]]:
+        """
+        Add generated columns and secondary indexes missing from existing tables
+        
+        Safe to run repeatedly; only what is missing is created.
+        
+        Returns:
+            Dict[str, List[str]]: Qualified names of the columns and indexes added
+        """
+        applied = {"columns": [], "indexes": []}
+        inspector = inspect(self.engine)
+        
+        missing_columns = []
+        for table in self.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing_columns.extend(
+                column for column in table.columns
+                if column.computed is not None and column.name not in existing
+            )
+        existing_indexes = {
+            index["name"]
+            for table_name in {index.table.name for index in self.secondary_indexes}
+            for index in inspector.get_indexes(table_name)
+        }
+        missing_indexes = [index for index in self.secondary_indexes if index.name not in existing_indexes]
+        
+        if not missing_columns and not missing_indexes:
+            return applied
+        
+        if self.config.backup_before_migrate and self.config.db_type == "sqlite" and missing_columns:
+            self.backup_database()
+        
+        for column in missing_columns:
+            ddl = CreateColumn(column).compile(dialect=self.engine.dialect)
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN {ddl}"))
+                applied["columns"].append(f"{column.table.name}.{column.name}")
+            except Exception as e:
+                log_warning(logger, f"Failed to add column {column.table.name}.{column.name}: {str(e)}")
+        
+        for index in missing_indexes:
+            try:
+                index.create(bind=self.engine, checkfirst=True)
+                applied["indexes"].append(f"{index.table.name}.{index.name}")
+            except Exception as e:
+                log_warning(logger, f"Failed to create index {index.name}: {str(e)}")
+        
+        log_info(logger, f"Schema migrated: {applied}")
+        return applied
+    
+    def _json_field(self, column: str, field: str, numeric: bool = False) -> Computed:
+        """
+        Generated column extracting a top-level field from a JSON column
+        
+        SQLite columns are VIRTUAL so ALTER TABLE can add them to existing
+        tables; PostgreSQL only supports STORED generated columns.
+        """
+        if self.config.db_type == "postgresql":
+            expression = f"({column} ->> '{field}')"
+            if numeric:
+                expression = (f"CASE WHEN json_typeof({column} -> '{field}') = 'number' "
+                              f"THEN {expression}::double precision END")
+            return Computed(expression, persisted=True)
+        return Computed(f"json_extract({column}, '$.{field}')", persisted=False)
+    
+    def _writable_values(self, table: Table, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop generated columns, which cannot be inserted or updated, from a record"""
+        return {key: value for key, value in record.items()
+                if key not in table.c or table.c[key].computed is None}
+    
     def _define_tables(self):
         """Define database table schemas"""
         
+        # On PostgreSQL the time-series tables are range-partitioned by timestamp so retention
+        # can drop whole partitions; the partition key has to be part of the primary key
+        partitioned = (self.config.db_type == "postgresql"
+                       and config_system.get("retention.native_partitions", True))
+        partition_args = {"postgresql_partition_by": "RANGE (timestamp)"} if partitioned else {}
+        
         # Configuration storage table
         self.config_table = Table(
             'configurations',
@@ -171,9 +394,22 @@ class DatabaseManager:
             Column('current_step', String(100)),
             Column('progress', Integer, default=0),
             Column('executed_by', String(100)),
-            Column('created_at', DateTime, default=datetime.utcnow)
+            Column('created_at', DateTime, default=datetime.utcnow),
+            # Hot JSON fields, extracted so they can be filtered and indexed in SQL
+            Column('channel', String(50), self._json_field('input_data', 'channel')),
+            Column('quality_score', Float, self._json_field('output_data', 'quality_score', numeric=True))
         )
         
+        # Secondary indexes; filtered pages lead with the filter column, then (sort key, id) in page order
+        executions = self.execution_history_table.c
+        self.secondary_indexes = [
+            Index('idx_execution_history_started_at_id', executions.started_at, executions.id),
+            Index('idx_execution_history_status_started_at', executions.status, executions.started_at, executions.id),
+            Index('idx_execution_history_workflow_started_at',
+                  executions.workflow_id, executions.started_at, executions.id),
+            Index('idx_execution_history_channel_started_at', executions.channel, executions.started_at, executions.id),
+        ]
+        
         # FAQ knowledge base table
         self.faq_table = Table(
             'faq_entries',
@@ -213,24 +449,26 @@ class DatabaseManager:
         self.metrics_table = Table(
             'performance_metrics',
             self.metadata,
-            Column('id', Integer, primary_key=True),
-            Column('timestamp', DateTime, nullable=False, default=datetime.utcnow),
+            Column('id', Integer, primary_key=True, autoincrement=True),
+            Column('timestamp', DateTime, nullable=False, default=datetime.utcnow, primary_key=partitioned),
             Column('metric_type', String(100), nullable=False),
             Column('metric_name', String(255), nullable=False),
             Column('value', JSON, nullable=False),
             Column('tags', JSON),  # Additional metadata
             Column('workflow_id', String(100)),
-            Column('agent_id', String(100))
+            Column('agent_id', String(100)),
+            **partition_args
         )
+        self.secondary_indexes.append(Index('idx_performance_metrics_timestamp', self.metrics_table.c.timestamp))
         
         # Evaluation history table
         self.evaluation_history_table = Table(
             'evaluation_history',
             self.metadata,
-            Column('id', Integer, primary_key=True),
+            Column('id', Integer, primary_key=True, autoincrement=True),
             Column('execution_id', String(50), nullable=False),
             Column('workflow_id', String(100), nullable=False),
-            Column('timestamp', DateTime, nullable=False, default=datetime.utcnow),
+            Column('timestamp', DateTime, nullable=False, default=datetime.utcnow, primary_key=partitioned),
             Column('quality_score', Integer, nullable=False),
             Column('response_rate', JSON),  # Predicted response rate
             Column('criteria_scores', JSON),  # Detailed criteria scores
@@ -239,17 +477,27 @@ class DatabaseManager:
             Column('channel', String(50)),
             Column('word_count', Integer),
             Column('evaluated_by', String(100)),
-            Column('created_at', DateTime, default=datetime.utcnow)
+            Column('created_at', DateTime, default=datetime.utcnow),
+            **partition_args
         )
+        evaluations = self.evaluation_history_table.c
+        self.secondary_indexes.extend([
+            Index('idx_evaluation_history_timestamp_id', evaluations.timestamp, evaluations.id),
+            Index('idx_evaluation_history_workflow_timestamp',
+                  evaluations.workflow_id, evaluations.timestamp, evaluations.id),
+            Index('idx_evaluation_history_execution_id', evaluations.execution_id),
+            # Covers the channel distribution and average score in get_evaluation_metrics
+            Index('idx_evaluation_history_channel_score', evaluations.channel, evaluations.quality_score),
+        ])
         
         # Observability metrics table
         self.observability_metrics_table = Table(
             'observability_metrics',
             self.metadata,
-            Column('id', Integer, primary_key=True),
+            Column('id', Integer, primary_key=True, autoincrement=True),
             Column('execution_id', String(50), nullable=False),
             Column('workflow_id', String(100), nullable=False),
-            Column('timestamp', DateTime, nullable=False, default=datetime.utcnow),
+            Column('timestamp', DateTime, nullable=False, default=datetime.utcnow, primary_key=partitioned),
             Column('duration_ms', Integer),
             Column('token_usage', JSON),  # Input/output tokens
             Column('cache_hits', Integer, default=0),
@@ -259,8 +507,37 @@ class DatabaseManager:
             Column('warning_count', Integer, default=0),
             Column('memory_usage_mb', Integer),
             Column('cpu_usage_percent', JSON),
-            Column('created_at', DateTime, default=datetime.utcnow)
+            Column('created_at', DateTime, default=datetime.utcnow),
+            **partition_args
         )
+        observability = self.observability_metrics_table.c
+        self.secondary_indexes.extend([
+            Index('idx_observability_metrics_timestamp', observability.timestamp),
+            Index('idx_observability_metrics_execution_id', observability.execution_id),
+        ])
+        
+        # Per-minute and per-day sums behind the dashboard summaries (see metrics_rollup.py);
+        # empty strings stand for "not applicable" so the bucket key stays unique
+        self.metric_rollups_table = Table(
+            'metric_rollups',
+            self.metadata,
+            Column('id', Integer, primary_key=True),
+            Column('metric', String(100), nullable=False),
+            Column('granularity', String(10), nullable=False),
+            Column('bucket_start', DateTime, nullable=False),
+            Column('workflow_id', String(100), nullable=False, default=''),
+            Column('agent_id', String(100), nullable=False, default=''),
+            Column('model_name', String(100), nullable=False, default=''),
+            Column('channel', String(50), nullable=False, default=''),
+            Column('label', String(100), nullable=False, default=''),
+            Column('sample_count', Integer, nullable=False, default=0),
+            Column('value_sum', Float, nullable=False, default=0.0),
+            UniqueConstraint('metric', 'granularity', 'bucket_start', 'workflow_id', 'agent_id',
+                             'model_name', 'channel', 'label', name='uq_metric_rollups_bucket')
+        )
+        
+        # Retention bookkeeping and the hourly summaries expired partitions are downsampled into
+        self.retention_partitions_table, self.hourly_summary_tables = define_retention_tables(self.metadata)
     
     @contextmanager
     def get_session(self):
@@ -281,6 +558,55 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @asynccontextmanager
+    async def get_async_session(self):
+        """
+        Get asyncio database session with automatic cleanup
+        
+        Yields:
+            AsyncSession: SQLAlchemy async session
+        """
+        session_factory = self._get_async_sessionmaker()
+        if session_factory is None:
+            raise RuntimeError("Async database engine is not available")
+        
+        session = session_factory()
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            log_error(logger, f"Async database session error: {str(e)}")
+            raise
+        finally:
+            await session.close()
+    
+    async def run_async(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(session, *args, **kwargs) without blocking the event loop
+        
+        Uses the asyncio engine when an async driver is installed, otherwise
+        runs fn with a regular session in a worker thread.
+        """
+        if self._get_async_sessionmaker() is None:
+            def run_in_thread():
+                with self.get_session() as session:
+                    return fn(session, *args, **kwargs)
+            return await asyncio.to_thread(run_in_thread)
+        
+        async with self.get_async_session() as session:
+            return await session.run_sync(fn, *args, **kwargs)
+    
+    async def fetch_all_async(self, sql: str, params: Optional[Dict[str, Any]] = None) -> list:
+        """Run a raw SQL query asynchronously and return rows as dicts"""
+        return await self.run_async(
+            lambda session: [dict(row._mapping) for row in session.execute(text(sql), params or {})]
+        )
+    
+    async def execute_async(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        """Run a raw SQL statement asynchronously"""
+        await self.run_async(lambda session: session.execute(text(sql), params or {}))
+    
     def test_connection(self) -> bool:
         """
         Test database connection
@@ -382,13 +708,15 @@ class DatabaseManager:
                     session.execute(
                         self.execution_history_table.update().where(
                             self.execution_history_table.c.id == execution_data['id']
-                        ).values(**execution_data)
+                        ).values(**self._writable_values(self.execution_history_table, execution_data))
                     )
                     log_info(logger, f"Updated existing execution record: {execution_data.get('id')}")
                 else:
                     # Insert new record
                     session.execute(
-                        self.execution_history_table.insert().values(**execution_data)
+                        self.execution_history_table.insert().values(
+                            **self._writable_values(self.execution_history_table, execution_data)
+                        )
                     )
                     log_info(logger, f"Saved new execution record: {execution_data.get('id')}")
                 
@@ -401,28 +729,179 @@ class DatabaseManager:
                 log_error(logger, f"Duplicate execution ID detected: {execution_data.get('id')}")
             return False
     
+    def save_execution_records(self, records: list) -> bool:
+        """
+        Save a batch of execution records in a single transaction
+
+        Args:
+            records (list): Execution records, at most one per id
+
+        Returns:
+            bool: True if the whole batch was committed
+        """
+        if not records:
+            return True
+        try:
+            with self.get_session() as session:
+                self._upsert_execution_records(session, records)
+            log_debug(logger, f"Saved batch of {len(records)} execution records")
+            return True
+        except Exception as e:
+            log_error(logger, f"Failed to save batch of {len(records)} execution records: {str(e)}")
+            return False
+    
+    async def save_execution_records_async(self, records: list) -> bool:
+        """Async counterpart of save_execution_records (also used for single records)"""
+        if not records:
+            return True
+        try:
+            await self.run_async(self._upsert_execution_records, records)
+            log_debug(logger, f"Saved batch of {len(records)} execution records")
+            return True
+        except Exception as e:
+            log_error(logger, f"Failed to save batch of {len(records)} execution records: {str(e)}")
+            return False
+    
+    async def save_execution_record_async(self, execution_data: Dict[str, Any]) -> bool:
+        """Async counterpart of save_execution_record"""
+        return await self.save_execution_records_async([execution_data])
+    
+    def _upsert_execution_records(self, session, records: list):
+        """Insert or update execution records within an open session"""
+        ids = [record['id'] for record in records]
+        existing_ids = {
+            row.id for row in session.execute(
+                self.execution_history_table.select()
+                .with_only_columns(self.execution_history_table.c.id)
+                .where(self.execution_history_table.c.id.in_(ids))
+            )
+        }
+
+        for record in records:
+            record = self._writable_values(self.execution_history_table, record)
+            if record['id'] in existing_ids:
+                session.execute(
+                    self.execution_history_table.update().where(
+                        self.execution_history_table.c.id == record['id']
+                    ).values(**record)
+                )
+            else:
+                session.execute(
+                    self.execution_history_table.insert().values(**record)
+                )
+
     def get_execution_history(self, limit: int = 100) -> list:
         """Get execution history from database"""
         try:
             with self.get_session() as session:
-                result = session.execute(
-                    self.execution_history_table.select()
-                    .order_by(self.execution_history_table.c.started_at.desc())
-                    .limit(limit)
-                )
-                return [dict(row._mapping) for row in result]
+                return self._select_recent(session, self.execution_history_table, "started_at", limit)
+        except Exception as e:
+            log_error(logger, f"Failed to get execution history: {str(e)}")
+            return []
+    
+    async def get_execution_history_async(self, limit: int = 100) -> list:
+        """Async counterpart of get_execution_history"""
+        try:
+            return await self.run_async(self._select_recent, self.execution_history_table, "started_at", limit)
         except Exception as e:
             log_error(logger, f"Failed to get execution history: {str(e)}")
             return []
     
+    def _select_recent(self, session, table: Table, order_column: str, limit: int) -> list:
+        """Select the newest rows of a table within an open session"""
+        result = session.execute(
+            table.select().order_by(table.c[order_column].desc()).limit(limit)
+        )
+        return [dict(row._mapping) for row in result]
+    
+    def get_execution_page(self, page_size: int = 10, cursor: Optional[str] = None, offset: int = 0,
+                           status: Optional[str] = None, workflow_id: Optional[str] = None,
+                           channel: Optional[str] = None,
+                           columns: Optional[Tuple[str, ...]] = None) -> CursorPage:
+        """
+        Get one page of execution history, newest first, using keyset pagination
+        
+        Args:
+            page_size (int): Number of executions per page
+            cursor (Optional[str]): next_cursor of the previous page
+            offset (int): Row offset for legacy page-number access (ignored with a cursor)
+            status (Optional[str]): Only executions with this status
+            workflow_id (Optional[str]): Only executions of this workflow
+            channel (Optional[str]): Only executions on this channel (input_data.channel)
+            columns (Optional[Tuple[str, ...]]): Only select these columns, e.g. EXECUTION_SUMMARY_COLUMNS
+            
+        Returns:
+            CursorPage: The page, its next cursor and an estimated total
+        """
+        with self.get_session() as session:
+            return self._select_execution_page(session, page_size, cursor, offset, status, workflow_id,
+                                               channel, columns)
+    
+    async def get_execution_page_async(self, page_size: int = 10, cursor: Optional[str] = None, offset: int = 0,
+                                       status: Optional[str] = None, workflow_id: Optional[str] = None,
+                                       channel: Optional[str] = None,
+                                       columns: Optional[Tuple[str, ...]] = None) -> CursorPage:
+        """Async counterpart of get_execution_page"""
+        return await self.run_async(self._select_execution_page, page_size, cursor, offset, status, workflow_id,
+                                    channel, columns)
+    
+    def _select_execution_page(self, session, page_size: int, cursor: Optional[str], offset: int,
+                               status: Optional[str], workflow_id: Optional[str],
+                               channel: Optional[str] = None,
+                               columns: Optional[Tuple[str, ...]] = None) -> CursorPage:
+        table = self.execution_history_table
+        filters = []
+        if status:
+            filters.append(table.c.status == status)
+        if workflow_id:
+            filters.append(table.c.workflow_id == workflow_id)
+        if channel:
+            filters.append(table.c.channel == channel)
+        whereclause = and_(*filters) if filters else None
+        
+        stmt = select(*[table.c[name] for name in columns]) if columns else table.select()
+        if whereclause is not None:
+            stmt = stmt.where(whereclause)
+        
+        page = KeysetPaginator.paginate_select(
+            session, stmt, [table.c.started_at, table.c.id], page_size, cursor, offset=offset
+        )
+        page.total, page.total_is_estimate = KeysetPaginator.estimate_count(session, table, whereclause)
+        return page
+    
+    def get_scored_executions(self, limit: int = 50) -> list:
+        """Get the newest executions whose output carries a quality score"""
+        try:
+            with self.get_session() as session:
+                return self._select_scored_executions(session, limit)
+        except Exception as e:
+            log_error(logger, f"Failed to get scored executions: {str(e)}")
+            return []
+    
+    async def get_scored_executions_async(self, limit: int = 50) -> list:
+        """Async counterpart of get_scored_executions"""
+        try:
+            return await self.run_async(self._select_scored_executions, limit)
+        except Exception as e:
+            log_error(logger, f"Failed to get scored executions: {str(e)}")
+            return []
+    
+    def _select_scored_executions(self, session, limit: int) -> list:
+        table = self.execution_history_table
+        result = session.execute(
+            table.select()
+            .where(table.c.quality_score.isnot(None))
+            .order_by(table.c.started_at.desc())
+            .limit(limit)
+        )
+        return [dict(row._mapping) for row in result]
+    
     # Evaluation History Methods
     def save_evaluation_result(self, evaluation_data: Dict[str, Any]) -> bool:
         """Save evaluation result to database"""
         try:
             with self.get_session() as session:
-                session.execute(
-                    self.evaluation_history_table.insert().values(**evaluation_data)
-                )
+                self._insert_evaluation_result(session, evaluation_data)
                 session.commit()
                 log_info(logger, f"Saved evaluation result for execution: {evaluation_data.get('execution_id')}")
                 return True
@@ -430,65 +909,114 @@ class DatabaseManager:
             log_error(logger, f"Failed to save evaluation result: {str(e)}")
             return False
     
+    async def save_evaluation_result_async(self, evaluation_data: Dict[str, Any]) -> bool:
+        """Async counterpart of save_evaluation_result"""
+        try:
+            await self.run_async(self._insert_evaluation_result, evaluation_data)
+            log_info(logger, f"Saved evaluation result for execution: {evaluation_data.get('execution_id')}")
+            return True
+        except Exception as e:
+            log_error(logger, f"Failed to save evaluation result: {str(e)}")
+            return False
+    
+    def _insert_evaluation_result(self, session, evaluation_data: Dict[str, Any]):
+        """Insert an evaluation and add it to the rollups in the same transaction"""
+        session.execute(self.evaluation_history_table.insert().values(**evaluation_data))
+        self.rollups.record(evaluation_measurements(evaluation_data), session=session)
+    
     def get_evaluation_history(self, limit: int = 100) -> list:
         """Get evaluation history from database"""
         try:
             with self.get_session() as session:
-                result = session.execute(
-                    self.evaluation_history_table.select()
-                    .order_by(self.evaluation_history_table.c.timestamp.desc())
-                    .limit(limit)
-                )
-                return [dict(row._mapping) for row in result]
+                return self._select_recent(session, self.evaluation_history_table, "timestamp", limit)
+        except Exception as e:
+            log_error(logger, f"Failed to get evaluation history: {str(e)}")
+            return []
+    
+    async def get_evaluation_history_async(self, limit: int = 100) -> list:
+        """Async counterpart of get_evaluation_history"""
+        try:
+            return await self.run_async(self._select_recent, self.evaluation_history_table, "timestamp", limit)
         except Exception as e:
             log_error(logger, f"Failed to get evaluation history: {str(e)}")
             return []
     
+    def get_evaluation_page(self, page_size: int = 10, cursor: Optional[str] = None, offset: int = 0,
+                            workflow_id: Optional[str] = None) -> CursorPage:
+        """Get one page of evaluation history, newest first, using keyset pagination"""
+        with self.get_session() as session:
+            return self._select_evaluation_page(session, page_size, cursor, offset, workflow_id)
+    
+    async def get_evaluation_page_async(self, page_size: int = 10, cursor: Optional[str] = None, offset: int = 0,
+                                        workflow_id: Optional[str] = None) -> CursorPage:
+        """Async counterpart of get_evaluation_page"""
+        return await self.run_async(self._select_evaluation_page, page_size, cursor, offset, workflow_id)
+    
+    def _select_evaluation_page(self, session, page_size: int, cursor: Optional[str], offset: int,
+                                workflow_id: Optional[str]) -> CursorPage:
+        table = self.evaluation_history_table
+        whereclause = table.c.workflow_id == workflow_id if workflow_id else None
+        
+        stmt = table.select()
+        if whereclause is not None:
+            stmt = stmt.where(whereclause)
+        
+        page = KeysetPaginator.paginate_select(
+            session, stmt, [table.c.timestamp, table.c.id], page_size, cursor, offset=offset
+        )
+        page.total, page.total_is_estimate = KeysetPaginator.estimate_count(session, table, whereclause)
+        return page
+    
     def get_evaluation_metrics(self) -> Dict[str, Any]:
-        """Get aggregated evaluation metrics"""
+        """Get aggregated evaluation metrics from the evaluation rollups"""
         try:
             with self.get_session() as session:
-                # Get average quality score
-                avg_score_result = session.execute(
-                    text(f"SELECT AVG(quality_score) as avg_score FROM {self.evaluation_history_table.name}")
-                )
-                avg_score = avg_score_result.scalar() or 0
-                
-                # Get count by channel
-                channel_counts = session.execute(
-                    text(f"SELECT channel, COUNT(*) as count FROM {self.evaluation_history_table.name} GROUP BY channel")
-                )
-                
-                # Get recent evaluations
-                recent_evals = session.execute(
-                    self.evaluation_history_table.select()
-                    .order_by(self.evaluation_history_table.c.timestamp.desc())
-                    .limit(10)
-                )
-                
-                return {
-                    "average_quality_score": float(avg_score),
-                    "total_evaluations": session.execute(text(f"SELECT COUNT(*) FROM {self.evaluation_history_table.name}")).scalar(),
-                    "channel_distribution": {row.channel: row.count for row in channel_counts},
-                    "recent_evaluations": [dict(row._mapping) for row in recent_evals]
-                }
+                return self._select_evaluation_metrics(session)
         except Exception as e:
             log_error(logger, f"Failed to get evaluation metrics: {str(e)}")
-            return {
-                "average_quality_score": 0,
-                "total_evaluations": 0,
-                "channel_distribution": {},
-                "recent_evaluations": []
-            }
+            return self._empty_evaluation_metrics()
+    
+    async def get_evaluation_metrics_async(self) -> Dict[str, Any]:
+        """Async counterpart of get_evaluation_metrics"""
+        try:
+            return await self.run_async(self._select_evaluation_metrics)
+        except Exception as e:
+            log_error(logger, f"Failed to get evaluation metrics: {str(e)}")
+            return self._empty_evaluation_metrics()
+    
+    def _select_evaluation_metrics(self, session) -> Dict[str, Any]:
+        by_channel = self.rollups.query("evaluation.quality_score", group_by=["channel"], session=session)
+        total = sum(row["sample_count"] for row in by_channel)
+        score_sum = sum(row["value_sum"] for row in by_channel)
+        
+        recent_evals = session.execute(
+            self.evaluation_history_table.select()
+            .order_by(self.evaluation_history_table.c.timestamp.desc())
+            .limit(10)
+        )
+        
+        return {
+            "average_quality_score": float(score_sum / total) if total else 0.0,
+            "total_evaluations": total,
+            "channel_distribution": {row["channel"] or None: row["sample_count"] for row in by_channel},
+            "recent_evaluations": [dict(row._mapping) for row in recent_evals]
+        }
+    
+    @staticmethod
+    def _empty_evaluation_metrics() -> Dict[str, Any]:
+        return {
+            "average_quality_score": 0,
+            "total_evaluations": 0,
+            "channel_distribution": {},
+            "recent_evaluations": []
+        }
     
     # Observability Metrics Methods
     def save_observability_metrics(self, metrics_data: Dict[str, Any]) -> bool:
         """Save observability metrics to database"""
         try:
             with self.get_session() as session:
-                session.execute(
-                    self.observability_metrics_table.insert().values(**metrics_data)
-                )
+                self._insert_observability_metrics(session, metrics_data)
                 session.commit()
                 log_info(logger, f"Saved observability metrics for execution: {metrics_data.get('execution_id')}")
                 return True
@@ -496,55 +1024,52 @@ class DatabaseManager:
             log_error(logger, f"Failed to save observability metrics: {str(e)}")
             return False
     
+    async def save_observability_metrics_async(self, metrics_data: Dict[str, Any]) -> bool:
+        """Async counterpart of save_observability_metrics"""
+        try:
+            await self.run_async(self._insert_observability_metrics, metrics_data)
+            log_info(logger, f"Saved observability metrics for execution: {metrics_data.get('execution_id')}")
+            return True
+        except Exception as e:
+            log_error(logger, f"Failed to save observability metrics: {str(e)}")
+            return False
+    
+    def _insert_observability_metrics(self, session, metrics_data: Dict[str, Any]):
+        """Insert observability metrics and add them to the rollups in the same transaction"""
+        session.execute(self.observability_metrics_table.insert().values(**metrics_data))
+        self.rollups.record(observability_measurements(metrics_data), session=session)
+    
     def get_observability_history(self, limit: int = 100) -> list:
         """Get observability history from database"""
         try:
             with self.get_session() as session:
-                result = session.execute(
-                    self.observability_metrics_table.select()
-                    .order_by(self.observability_metrics_table.c.timestamp.desc())
-                    .limit(limit)
-                )
-                return [dict(row._mapping) for row in result]
+                return self._select_recent(session, self.observability_metrics_table, "timestamp", limit)
+        except Exception as e:
+            log_error(logger, f"Failed to get observability history: {str(e)}")
+            return []
+    
+    async def get_observability_history_async(self, limit: int = 100) -> list:
+        """Async counterpart of get_observability_history"""
+        try:
+            return await self.run_async(self._select_recent, self.observability_metrics_table, "timestamp", limit)
         except Exception as e:
             log_error(logger, f"Failed to get observability history: {str(e)}")
             return []
     
     def get_performance_metrics(self) -> Dict[str, Any]:
-        """Get aggregated performance metrics"""
+        """Get aggregated performance metrics from the observability rollups"""
         try:
-            with self.get_session() as session:
-                # Get average duration
-                avg_duration_result = session.execute(
-                    text(f"SELECT AVG(duration_ms) as avg_duration FROM {self.observability_metrics_table.name}")
-                )
-                avg_duration = avg_duration_result.scalar() or 0
-                
-                # Get cache hit rate
-                cache_stats = session.execute(
-                    text(f"SELECT SUM(cache_hits) as hits, SUM(cache_misses) as misses FROM {self.observability_metrics_table.name}")
-                ).first()
-                
-                cache_hit_rate = 0
-                if cache_stats and cache_stats.hits and cache_stats.misses:
-                    total_requests = cache_stats.hits + cache_stats.misses
-                    cache_hit_rate = cache_stats.hits / total_requests if total_requests > 0 else 0
-                
-                # Get error rate
-                error_stats = session.execute(
-                    text(f"SELECT COUNT(*) as total, SUM(CASE WHEN error_count > 0 THEN 1 ELSE 0 END) as errors FROM {self.observability_metrics_table.name}")
-                ).first()
-                
-                error_rate = 0
-                if error_stats and error_stats.total > 0:
-                    error_rate = error_stats.errors / error_stats.total
-                
-                return {
-                    "average_duration_ms": float(avg_duration),
-                    "cache_hit_rate": float(cache_hit_rate),
-                    "error_rate": float(error_rate),
-                    "total_executions": error_stats.total if error_stats else 0
-                }
+            executions = self.rollups.total("observability.executions")["sample_count"]
+            errors = self.rollups.total("observability.errors")["sample_count"]
+            duration = self.rollups.total("observability.duration_ms")
+            cache = self.rollups.total("observability.cache")
+            
+            return {
+                "average_duration_ms": float(duration["value_sum"] / duration["sample_count"]) if duration["sample_count"] else 0.0,
+                "cache_hit_rate": float(cache["value_sum"] / cache["sample_count"]) if cache["sample_count"] else 0.0,
+                "error_rate": float(errors / executions) if executions else 0.0,
+                "total_executions": executions
+            }
         except Exception as e:
             log_error(logger, f"Failed to get performance metrics: {str(e)}")
             return {
@@ -579,4 +1104,29 @@ def get_db_session():
     """
     manager = get_database_manager()
     with manager.get_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def bind_positional(sql: str, params: Any) -> Tuple[str, Any]:
+    """
+    Convert qmark placeholders and a positional tuple to named binds
+    
+    SQLAlchemy's text() only accepts named parameters; the raw-SQL modules
+    were written against DB-API qmark style. The statement is split on every
+    ?, including one inside a string literal or comment, so pass such values
+    as parameters instead of writing them into the SQL.
+    
+    Args:
+        sql: SQL statement using ? placeholders and no literal ?
+        params: Positional parameter sequence, or a dict that is passed through
+        
+    Returns:
+        Tuple[str, Any]: Statement with :p0, :p1 ... binds and its parameter dict
+    """
+    if params is None or isinstance(params, dict):
+        return sql, params
+    parts = sql.split("?")
+    named = parts[0]
+    for i, part in enumerate(parts[1:]):
+        named += f":p{i}{part}"
+    return named, {f"p{i}": value for i, value in enumerate(params)}
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+SQLite Concurrency Benchmark
+
+Runs concurrent readers (execution history pages) and writers (execution
+record upserts) against a scratch SQLite database with the legacy connection
+model (one shared connection, rollback journal, synchronous=FULL) and with the
+tuned profile (pooled connections, WAL, synchronous=NORMAL, mmap and cache
+pragmas), and reports throughput for each.
+
+Usage:
+    python database_benchmark.py [--readers 8] [--writers 2] [--seconds 5] [--rows 20000]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from config_system import config_system
+from database import DatabaseManager
+
+PROFILES = {
+    "legacy": {
+        "sqlite_pool": "static",
+        "sqlite_journal_mode": "DELETE",
+        "sqlite_synchronous": "FULL",
+        "sqlite_cache_size_kb": 2000,
+        "sqlite_mmap_size_mb": 0,
+    },
+    "tuned": {
+        "sqlite_pool": "queue",
+        "sqlite_journal_mode": "WAL",
+        "sqlite_synchronous": "NORMAL",
+        "sqlite_cache_size_kb": 65536,
+        "sqlite_mmap_size_mb": 256,
+    },
+}
+
+
+def seed(db: DatabaseManager, rows: int):
+    """Insert rows of execution history"""
+    base = datetime(2025, 1, 1)
+    with db.engine.begin() as conn:
+        conn.execute(db.execution_history_table.insert(), [{
+            "id": f"seed_{i:07d}",
+            "workflow_id": "linkedin-workflow",
+            "status": "completed",
+            "started_at": base + timedelta(seconds=i),
+            "progress": 100
+        } for i in range(rows)])
+
+
+def run_profile(name: str, settings: Dict[str, Any], args) -> Dict[str, Any]:
+    """Run readers and writers concurrently for args.seconds against a fresh database"""
+    workdir = tempfile.mkdtemp(prefix=f"database_benchmark_{name}_")
+    db_config = config_system.config_cache.setdefault("database", {})
+    db_config.update(settings)
+    db_config["type"] = "sqlite"
+    db_config["sqlite_path"] = os.path.join(workdir, "bench.db")
+
+    db = DatabaseManager()
+    seed(db, args.rows)
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                db.get_execution_page(page_size=20)
+                with lock:
+                    counts["reads"] += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+
+    def writer(worker: int):
+        i = 0
+        while time.perf_counter() < deadline:
+            ok = db.save_execution_record({
+                "id": f"bench_{worker}_{i}",
+                "workflow_id": "linkedin-workflow",
+                "status": "running",
+                "started_at": datetime.now(),
+                "progress": i % 100
+            })
+            with lock:
+                counts["writes" if ok else "errors"] += 1
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(w,)) for w in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.engine.dispose()
+    return {
+        "reads_per_s": counts["reads"] / args.seconds,
+        "writes_per_s": counts["writes"] / args.seconds,
+        "errors": counts["errors"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection model and pragmas")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=20000, help="Seed rows of execution history")
+    args = parser.parse_args()
+
+    print("🚀 SQLite Concurrency Benchmark")
+    print("=" * 60)
+    print(f"Readers: {args.readers}, writers: {args.writers}, duration: {args.seconds}s, "
+          f"seed rows: {args.rows}")
+    print()
+    print(f"{'profile':>8} | {'reads/s':>10} | {'writes/s':>10} | {'errors':>6}")
+    print("-" * 60)
+
+    for name, settings in PROFILES.items():
+        result = run_profile(name, settings, args)
+        print(f"{name:>8} | {result['reads_per_s']:>10.1f} | {result['writes_per_s']:>10.1f} | "
+              f"{result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
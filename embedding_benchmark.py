@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Embedding Micro-Batching Benchmark
+
+Measures encode throughput of the shared embedding service with and without
+cross-request micro-batching at 1, 8, 32 and 128 concurrent requests. Each
+request encodes a single unique sentence, which is what the semantic cache,
+FAQ search and implicit-concern search do. The LRU cache is disabled so every
+request reaches the model.
+
+Usage:
+    python embedding_benchmark.py [--requests 512] [--max-batch-size 32] [--max-wait-ms 5]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+
+from embedding_service import EMBEDDINGS_AVAILABLE, EmbeddingBatcher, EmbeddingService
+
+CONCURRENCY_LEVELS = [1, 8, 32, 128]
+
+SAMPLE_SENTENCES = [
+    "What are your fees for a Series A raise?",
+    "How long does the fundraising process usually take?",
+    "Do you work with pre-revenue startups?",
+    "Which investors are in your network?",
+    "Can you help us prepare our pitch deck?",
+    "What is your success rate with healthcare companies?",
+    "Do you take equity or charge a retainer?",
+    "How do you compare to traditional investment banks?",
+]
+
+
+async def run_level(service: EmbeddingService, concurrency: int, total_requests: int) -> Dict[str, Any]:
+    """Encode total_requests unique sentences with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request(i: int):
+        text = f"{SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)]} (request {i})"
+        async with semaphore:
+            started = time.perf_counter()
+            await service.encode_async(text)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput": total_requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding micro-batching")
+    parser.add_argument("--requests", type=int, default=512, help="Requests per concurrency level")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if not EMBEDDINGS_AVAILABLE:
+        print("❌ sentence-transformers is not installed, nothing to benchmark")
+        return
+
+    unbatched = EmbeddingService(cache_size=0, batching=False)
+    batched = EmbeddingService(cache_size=0, batching=False)
+    batched.batcher = EmbeddingBatcher(
+        batched._encode_batch,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+
+    # Load the model once, share it, and warm it up before timing anything
+    unbatched.warmup()
+    batched._model = unbatched._get_model()
+    unbatched.encode("warmup")
+    batched.encode("warmup")
+
+    print("🚀 Embedding Micro-Batching Benchmark")
+    print("=" * 72)
+    print(f"Model: {batched.model_name}, requests per level: {args.requests}, "
+          f"max batch: {args.max_batch_size}, max wait: {args.max_wait_ms}ms")
+    print()
+    print(f"{'concurrency':>11} | {'unbatched req/s':>15} | {'batched req/s':>13} | "
+          f"{'speedup':>7} | {'batched p95':>11}")
+    print("-" * 72)
+
+    for concurrency in CONCURRENCY_LEVELS:
+        baseline = await run_level(unbatched, concurrency, args.requests)
+        result = await run_level(batched, concurrency, args.requests)
+        speedup = result["throughput"] / baseline["throughput"]
+        print(f"{concurrency:>11} | {baseline['throughput']:>15.1f} | {result['throughput']:>13.1f} | "
+              f"{speedup:>6.2f}x | {result['p95_ms']:>9.1f}ms")
+
+    print()
+    print(f"Batcher: {batched.batcher.get_metrics()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
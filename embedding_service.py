@@ -0,0 +1,393 @@
+"""
+Shared sentence embedding service for the CrewAI Workflow Orchestration Platform.
+
+A single SentenceTransformer instance is shared by every caller that needs
+embeddings (semantic workflow cache, FAQ agent, ...). The model is loaded
+lazily on first use, or eagerly in a background thread when the
+``embeddings.warmup`` flag is set. Embeddings are cached in an LRU keyed by
+text hash, and encode latency and batch sizes are tracked for monitoring.
+
+Concurrent encode requests are coalesced by an EmbeddingBatcher: requests
+arriving within ``embeddings.max_wait_ms`` of each other (up to
+``embeddings.max_batch_size`` texts) are encoded in one model call on a
+worker thread, which uses the model far more efficiently than one call per
+sentence.
+"""
+
+import asyncio
+import hashlib
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import numpy as np
+
+from config_system import config_system
+from logging_config import log_info, log_error, log_warning
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import SentenceTransformer
+
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+    logging.warning(
+        "Embedding dependencies not available. Install sentence-transformers for semantic features."
+    )
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode requests into batched model calls on a worker thread"""
+
+    def __init__(self, encode_fn: Callable[[List[str]], Any], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue[Tuple[List[str], Future, float]]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        self.batches = 0
+        self.requests = 0
+        self.total_queue_wait = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Queue texts for encoding.
+
+        Args:
+            texts (List[str]): Texts to encode
+
+        Returns:
+            Future: Resolves to a 2-D array with one row per text
+        """
+        future: Future = Future()
+        self._queue.put((texts, future, time.time()))
+        self._ensure_worker()
+        return future
+
+    def _collect(self) -> List[Tuple[List[str], Future, float]]:
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.time()
+            texts = [text for item_texts, _, _ in batch for text in item_texts]
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.total_queue_wait += sum(started - queued_at for _, _, queued_at in batch)
+
+            try:
+                vectors = self.encode_fn(texts)
+            except Exception as e:
+                log_error(logger, "Batched embedding encode failed", e)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future, _ in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get request coalescing metrics"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "requests": self.requests,
+            "pending": self._queue.qsize(),
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_wait_ms": round(self.total_queue_wait / self.requests * 1000, 2) if self.requests else 0.0,
+        }
+
+
+class EmbeddingService:
+    """Lazily-loaded, process-wide sentence embedding model with an LRU embedding cache"""
+
+    def __init__(self, model_name: str = None, cache_size: int = None, batching: bool = None):
+        self.model_name = model_name or config_system.get("embeddings.model", "all-MiniLM-L6-v2")
+        self.cache_size = cache_size if cache_size is not None else config_system.get("embeddings.cache_size", 10000)
+
+        if batching is None:
+            batching = config_system.get("embeddings.batching_enabled", True)
+        self.batcher = EmbeddingBatcher(
+            self._encode_batch,
+            max_batch_size=config_system.get("embeddings.max_batch_size", 32),
+            max_wait_ms=config_system.get("embeddings.max_wait_ms", 5)
+        ) if batching else None
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+
+    @property
+    def available(self) -> bool:
+        """Whether the embedding dependencies are installed"""
+        return EMBEDDINGS_AVAILABLE
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model has been loaded into memory"""
+        return self._model is not None
+
+    def _reset_metrics(self):
+        self.metrics = {
+            "load_time_seconds": None,
+            "encode_requests": 0,
+            "texts_requested": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "model_calls": 0,
+            "total_encode_time": 0.0,
+            "max_encode_time": 0.0,
+            "total_batch_size": 0,
+            "max_batch_size": 0,
+            "batch_size_histogram": {"1": 0, "2-8": 0, "9-32": 0, "33+": 0},
+        }
+
+    def _get_model(self):
+        """Load the model on first use"""
+        if self._model is not None:
+            return self._model
+
+        if not EMBEDDINGS_AVAILABLE:
+            raise RuntimeError("sentence-transformers is not installed")
+
+        with self._load_lock:
+            if self._model is None:
+                start_time = time.time()
+                self._model = SentenceTransformer(self.model_name)
+                load_time = time.time() - start_time
+                with self._metrics_lock:
+                    self.metrics["load_time_seconds"] = round(load_time, 3)
+                log_info(logger, f"Loaded embedding model {self.model_name} in {load_time:.2f}s")
+        return self._model
+
+    def warmup(self, background: bool = False):
+        """
+        Load the model eagerly.
+
+        Args:
+            background (bool, optional): Load in a daemon thread instead of
+                blocking the caller. Defaults to False.
+        """
+        if not EMBEDDINGS_AVAILABLE or self.is_loaded:
+            return
+
+        def _load():
+            try:
+                self._get_model()
+            except Exception as e:
+                log_error(logger, "Embedding model warmup failed", e)
+
+        if background:
+            threading.Thread(target=_load, daemon=True).start()
+        else:
+            _load()
+
+    @staticmethod
+    def _text_key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _encode_batch(self, texts: List[str]):
+        """Run one model call and record its latency and batch size"""
+        model = self._get_model()
+
+        start_time = time.time()
+        vectors = np.asarray(model.encode(texts))
+        elapsed = time.time() - start_time
+
+        batch_size = len(texts)
+        if batch_size == 1:
+            bucket = "1"
+        elif batch_size <= 8:
+            bucket = "2-8"
+        elif batch_size <= 32:
+            bucket = "9-32"
+        else:
+            bucket = "33+"
+
+        with self._metrics_lock:
+            self.metrics["model_calls"] += 1
+            self.metrics["total_encode_time"] += elapsed
+            self.metrics["max_encode_time"] = max(self.metrics["max_encode_time"], elapsed)
+            self.metrics["total_batch_size"] += batch_size
+            self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], batch_size)
+            self.metrics["batch_size_histogram"][bucket] += 1
+
+        return vectors
+
+    def _lookup(self, texts: List[str]):
+        """Split texts into cached embeddings and the unique texts still to encode"""
+        embeddings = [None] * len(texts)
+        missing: Dict[str, Any] = OrderedDict()
+
+        with self._cache_lock:
+            for idx, text in enumerate(texts):
+                key = self._text_key(text)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    embeddings[idx] = cached
+                else:
+                    missing.setdefault(key, (text, []))[1].append(idx)
+
+        miss_count = sum(len(indices) for _, indices in missing.values())
+        with self._metrics_lock:
+            self.metrics["encode_requests"] += 1
+            self.metrics["texts_requested"] += len(texts)
+            self.metrics["cache_hits"] += len(texts) - miss_count
+            self.metrics["cache_misses"] += miss_count
+
+        return embeddings, missing
+
+    def _store(self, embeddings: List[Any], missing: Dict[str, Any], vectors):
+        """Fill in freshly encoded vectors and add them to the LRU cache"""
+        with self._cache_lock:
+            for (key, (_, indices)), vector in zip(missing.items(), vectors):
+                for idx in indices:
+                    embeddings[idx] = vector
+                if self.cache_size > 0:
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def encode(self, sentences: Union[str, List[str]]):
+        """
+        Encode one sentence or a list of sentences.
+
+        Mirrors ``SentenceTransformer.encode``: a single string returns a 1-D
+        vector, a list returns a 2-D array with one row per sentence. Only
+        sentences missing from the LRU cache are sent to the model, through
+        the micro-batcher when batching is enabled.
+
+        Args:
+            sentences (Union[str, List[str]]): Text(s) to encode
+
+        Returns:
+            np.ndarray: The embedding(s)
+
+        Raises:
+            RuntimeError: If sentence-transformers is not installed
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.array([])
+
+        embeddings, missing = self._lookup(texts)
+        if missing:
+            pending = [text for text, _ in missing.values()]
+            if self.batcher is not None:
+                vectors = self.batcher.submit(pending).result()
+            else:
+                vectors = self._encode_batch(pending)
+            self._store(embeddings, missing, vectors)
+
+        result = np.vstack(embeddings)
+        return result[0] if single else result
+
+    async def encode_async(self, sentences: Union[str, List[str]]):
+        """
+        Encode without blocking the event loop.
+
+        Same contract as ``encode``; the model call runs on the batcher's
+        worker thread (or a default executor thread when batching is off).
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.array([])
+
+        embeddings, missing = self._lookup(texts)
+        if missing:
+            pending = [text for text, _ in missing.values()]
+            if self.batcher is not None:
+                vectors = await asyncio.wrap_future(self.batcher.submit(pending))
+            else:
+                vectors = await asyncio.to_thread(self._encode_batch, pending)
+            self._store(embeddings, missing, vectors)
+
+        result = np.vstack(embeddings)
+        return result[0] if single else result
+
+    def clear_cache(self):
+        """Drop all cached embeddings"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get model state, cache hit rate, encode latency and batch size metrics"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+            metrics["batch_size_histogram"] = dict(self.metrics["batch_size_histogram"])
+
+        model_calls = metrics.pop("model_calls")
+        total_encode_time = metrics.pop("total_encode_time")
+        total_batch_size = metrics.pop("total_batch_size")
+        lookups = metrics["cache_hits"] + metrics["cache_misses"]
+
+        metrics.update({
+            "model": self.model_name,
+            "available": self.available,
+            "loaded": self.is_loaded,
+            "cache_entries": len(self._cache),
+            "cache_capacity": self.cache_size,
+            "cache_hit_rate": round(metrics["cache_hits"] / lookups, 4) if lookups else 0.0,
+            "model_calls": model_calls,
+            "avg_encode_latency_ms": round(total_encode_time / model_calls * 1000, 2) if model_calls else 0.0,
+            "max_encode_latency_ms": round(metrics.pop("max_encode_time") * 1000, 2),
+            "avg_batch_size": round(total_batch_size / model_calls, 2) if model_calls else 0.0,
+            "batching": self.batcher.get_metrics() if self.batcher is not None else None,
+        })
+        return metrics
+
+
+# Global embedding service instance
+embedding_service = EmbeddingService()
+
+if config_system.get("embeddings.warmup", False):
+    if EMBEDDINGS_AVAILABLE:
+        embedding_service.warmup(background=True)
+    else:
+        log_warning(logger, "Embedding warmup requested but sentence-transformers is not installed")
@@ -0,0 +1,68 @@
+"""
+Execution id allocation
+
+Execution ids are ``exec_`` followed by a ULID: 48 bits of millisecond
+timestamp and 80 bits that are unique to this process and call, encoded as
+26 Crockford base32 characters. They sort by creation time, need no database
+query or lock to allocate, and are unique across workers and hosts.
+
+The 80 low bits are a random per-process node (48 bits, re-drawn after fork)
+followed by a 32-bit per-process sequence, so ids from one process never
+collide and ids from different processes collide only if two processes draw
+the same node.
+"""
+
+import itertools
+import os
+import secrets
+import time
+
+EXECUTION_ID_PREFIX = "exec_"
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_SEQUENCE_MASK = (1 << 32) - 1
+
+
+def _reseed():
+    """Draw a new process node and restart the sequence"""
+    global _node, _sequence
+    _node = secrets.randbits(48)
+    _sequence = itertools.count(secrets.randbits(31))
+
+
+_reseed()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def encode_ulid(value: int) -> str:
+    """Encode a 128-bit integer as 26 Crockford base32 characters"""
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_execution_id() -> str:
+    """
+    Allocate a new execution id
+
+    Safe to call from any thread or coroutine: next() on itertools.count is
+    atomic, so there is nothing to lock.
+
+    Returns:
+        str: e.g. ``exec_01JAB3ZK7Q5M2X9T4V6W8Y0C1D``
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    sequence = next(_sequence) & _SEQUENCE_MASK
+    value = (timestamp_ms << 80) | (_node << 32) | sequence
+    return EXECUTION_ID_PREFIX + encode_ulid(value)
+
+
+def execution_id_timestamp(execution_id: str) -> float:
+    """Creation time (seconds since the epoch) of an id from new_execution_id"""
+    value = 0
+    for char in execution_id[len(EXECUTION_ID_PREFIX):len(EXECUTION_ID_PREFIX) + 10]:
+        value = (value << 5) | _CROCKFORD.index(char)
+    return value / 1000.0
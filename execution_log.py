@@ -0,0 +1,356 @@
+"""
+ExecutionLog - Append-only JSONL journal for workflow execution records
+
+Every save appends one line to the journal instead of rewriting a JSON array,
+so writes cost O(record size) rather than O(history size). An in-memory
+id -> byte offset index gives O(1) lookups of the latest version of a record.
+Superseded and deleted lines are reclaimed by periodic compaction, which also
+refreshes the legacy ``execution_history.json`` as a read-only export.
+
+The export is a snapshot as of the last compaction, ``replace_all`` or
+``export_json`` call, not a live view: saves only append to the journal. Tools
+that need the current records read them through ``ExecutionLog.all()``, and
+tools that remove records do it with ``delete``/``replace_all`` rather than by
+editing the export.
+
+Several processes may share a journal: API workers append to it while
+clear_executions.py or selective_cleanup.py rewrite it with ``replace_all``.
+Appends, compactions and rewrites take an exclusive ``flock`` on
+``<log_path>.lock``, and every process checks the journal's inode and size
+before using its index. Lines another process appended are indexed
+incrementally; a journal replaced or truncated underneath is re-indexed. The
+database remains the source of truth shared by all hosts.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: the journal is then single-process
+    fcntl = None
+
+from logging_config import log_info, log_error, log_warning
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionLog:
+    """Append-only JSONL journal of execution records with an in-memory offset index"""
+
+    def __init__(self, log_path: str = "logs/execution_events.jsonl",
+                 export_path: Optional[str] = "logs/execution_history.json",
+                 compaction_min_dead: int = 500, compaction_ratio: float = 1.0,
+                 fsync: bool = False):
+        """
+        Initialize the journal, importing the legacy JSON export if no journal exists yet.
+
+        Args:
+            log_path (str): Path of the JSONL journal
+            export_path (Optional[str]): Path of the read-only legacy JSON export
+            compaction_min_dead (int): Minimum number of dead lines before compacting
+            compaction_ratio (float): Compact once dead lines exceed this multiple of live records
+            fsync (bool): fsync after every append for durability across power loss
+        """
+        self.log_path = log_path
+        self.export_path = export_path
+        self.compaction_min_dead = compaction_min_dead
+        self.compaction_ratio = compaction_ratio
+        self.fsync = fsync
+
+        self._lock = threading.RLock()
+        self._lock_path = f"{log_path}.lock"
+        self._lock_file = None
+        self._lock_depth = 0
+        self._index: Dict[str, int] = {}
+        self._dead = 0
+        self._size = 0
+        self._inode = None
+
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with self._file_lock():
+            if not os.path.exists(self.log_path):
+                self._import_legacy_export()
+            self._load_index()
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the journal's inter-process lock; re-entrant within this process"""
+        with self._lock:
+            if fcntl is not None and self._lock_depth == 0:
+                self._lock_file = open(self._lock_path, 'a')
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_file is not None and self._lock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _changed(self) -> bool:
+        """Whether the journal is not the file, or not the size, this process last indexed"""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return True
+        return stat.st_ino != self._inode or stat.st_size != self._size
+
+    def _sync(self):
+        """Catch up with appends and rewrites by other processes (call under the file lock)"""
+        if not self._changed():
+            return
+        if not os.path.exists(self.log_path):
+            self._write_snapshot([])
+            self._load_index()
+            return
+        stat = os.stat(self.log_path)
+        if stat.st_ino != self._inode or stat.st_size < self._size:
+            self._load_index()
+        else:
+            self._scan(self._size)
+
+    def _refresh(self):
+        """Bring the index up to date before reading it"""
+        with self._lock:
+            if self._changed():
+                with self._file_lock():
+                    self._sync()
+
+    def _import_legacy_export(self):
+        """Seed a new journal from the legacy JSON array, if there is one"""
+        records = []
+        if self.export_path and os.path.exists(self.export_path):
+            try:
+                with open(self.export_path, 'r') as f:
+                    data = json.load(f)
+                records = [r for r in data if isinstance(r, dict) and r.get('id')] if isinstance(data, list) else []
+                log_info(logger, f"Importing {len(records)} records from legacy {self.export_path}")
+            except Exception as e:
+                log_error(logger, f"Failed to import legacy execution history: {e}")
+        self._write_snapshot(records)
+
+    def _iter_lines(self, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """Yield (offset, raw line) for every line in the journal from offset start"""
+        offset = start
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                yield offset, line
+                offset += len(line)
+
+    def _load_index(self):
+        """Rebuild the offset index by scanning the journal"""
+        with self._lock:
+            self._index = {}
+            self._dead = 0
+            self._inode = os.stat(self.log_path).st_ino
+            self._scan(0)
+
+    def _scan(self, start: int):
+        """Index the lines from offset start, truncating a torn final line (call under the file lock)"""
+        with self._lock:
+            valid_size = start
+
+            for offset, line in self._iter_lines(start):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; drop it
+                    log_warning(logger, f"Truncating corrupt journal line at offset {offset}")
+                    break
+
+                execution_id = entry.get('id')
+                if entry.get('op') == 'delete':
+                    if execution_id in self._index:
+                        del self._index[execution_id]
+                        self._dead += 1
+                    self._dead += 1
+                else:
+                    if execution_id in self._index:
+                        self._dead += 1
+                    self._index[execution_id] = offset
+                valid_size = offset + len(line)
+
+            if valid_size < os.path.getsize(self.log_path):
+                with open(self.log_path, 'r+b') as f:
+                    f.truncate(valid_size)
+            self._size = valid_size
+
+    def _append(self, entry: Dict[str, Any]) -> int:
+        """Append one entry and return its byte offset (call under the file lock, after _sync)"""
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        with open(self.log_path, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._size = offset + len(line)
+        return offset
+
+    def _read_at(self, offset: int) -> Optional[Dict[str, Any]]:
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            line = f.readline()
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            return None
+
+    def put(self, record: Dict[str, Any]):
+        """Append a new version of a record"""
+        execution_id = record.get('id')
+        if not execution_id:
+            raise ValueError("Execution ID is required")
+
+        with self._file_lock():
+            self._sync()
+            offset = self._append({
+                'op': 'put',
+                'id': execution_id,
+                'ts': datetime.now().isoformat(),
+                'record': record
+            })
+            if execution_id in self._index:
+                self._dead += 1
+            self._index[execution_id] = offset
+            self._maybe_compact()
+
+    def delete(self, execution_id: str) -> bool:
+        """Append a tombstone for a record; returns False if it does not exist"""
+        with self._file_lock():
+            self._sync()
+            if execution_id not in self._index:
+                return False
+            self._append({'op': 'delete', 'id': execution_id, 'ts': datetime.now().isoformat()})
+            del self._index[execution_id]
+            self._dead += 2
+            self._maybe_compact()
+            return True
+
+    def get(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Get the latest version of a record"""
+        self._refresh()
+        with self._lock:
+            offset = self._index.get(execution_id)
+            if offset is None:
+                return None
+
+            entry = self._read_at(offset)
+            if entry is None or entry.get('id') != execution_id:
+                # The file was rewritten between the check and the read; reindex once
+                with self._file_lock():
+                    self._load_index()
+                offset = self._index.get(execution_id)
+                entry = self._read_at(offset) if offset is not None else None
+            return entry.get('record') if entry else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Get the latest version of every live record, in journal order"""
+        self._refresh()
+        with self._lock:
+            records = []
+            for offset, line in self._iter_lines():
+                if offset >= self._size:
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get('op') == 'put' and self._index.get(entry.get('id')) == offset:
+                    records.append(entry['record'])
+            return records
+
+    def ids(self) -> List[str]:
+        """Get the ids of all live records"""
+        self._refresh()
+        with self._lock:
+            return list(self._index.keys())
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._index)
+
+    def __contains__(self, execution_id: str) -> bool:
+        self._refresh()
+        return execution_id in self._index
+
+    def _write_snapshot(self, records: List[Dict[str, Any]]):
+        """Atomically replace the journal with one put line per record"""
+        tmp_path = f"{self.log_path}.tmp"
+        now = datetime.now().isoformat()
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps({'op': 'put', 'id': record.get('id'), 'ts': now, 'record': record}, default=str))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+
+    def replace_all(self, records: List[Dict[str, Any]]):
+        """Replace the whole journal with the given records (deduplicated by id, last wins)"""
+        with self._file_lock():
+            latest: Dict[str, Dict[str, Any]] = {}
+            for record in records:
+                if record.get('id'):
+                    latest[record['id']] = record
+            self._write_snapshot(list(latest.values()))
+            self._load_index()
+            self.export_json()
+
+    def compact(self):
+        """Drop superseded and deleted lines and refresh the legacy export"""
+        with self._file_lock():
+            # Keep what other processes appended since this one last looked
+            self._sync()
+            dead = self._dead
+            self.replace_all(self.all())
+            log_info(logger, f"Compacted execution journal: {len(self._index)} live records, {dead} dead lines dropped")
+
+    def _maybe_compact(self):
+        if self._dead >= self.compaction_min_dead and self._dead >= self.compaction_ratio * len(self._index):
+            try:
+                self.compact()
+            except Exception as e:
+                log_error(logger, f"Execution journal compaction failed: {e}")
+
+    def export_json(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write all live records to the legacy JSON array format.
+
+        The export is for backward-compatible reading only; it is never read
+        back except to seed a brand new journal. It goes stale as soon as the
+        next record is saved.
+
+        Returns:
+            Optional[str]: The export path, or None if no export path is configured
+        """
+        path = path or self.export_path
+        if not path:
+            return None
+        with self._lock:
+            records = self.all()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(records, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get journal size and compaction state"""
+        self._refresh()
+        with self._lock:
+            return {
+                "log_path": self.log_path,
+                "live_records": len(self._index),
+                "dead_lines": self._dead,
+                "size_bytes": self._size
+            }
@@ -2,29 +2,66 @@
 ExecutionManager - Unified storage manager for workflow executions
 
 This module provides a single source of truth for execution data,
-ensuring JSON file and database always stay in perfect sync.
+ensuring the local execution journal and database always stay in sync.
+Records are appended to an append-only JSONL journal (see execution_log.py);
+logs/execution_history.json is kept only as a read-only export, refreshed on
+compaction or by export_legacy_json(); it is not updated on every save.
+
+Progress updates for running executions are write-behind: they update an
+in-memory state store that readers see immediately, and a background flusher
+writes the latest state of each changed execution to the database in one
+batch every ``executions.flush_interval_ms``. Terminal states flush at once.
 """
 
-import json
+import asyncio
+import atexit
 import logging
-import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple
 
-from database import get_database_manager
+from config_system import config_system
+from database import EXECUTION_SUMMARY_COLUMNS, get_database_manager
+from execution_log import ExecutionLog
+from fastapi import HTTPException
 from logging_config import log_info, log_error, log_warning
+from pagination import CursorPage, decode_cursor, encode_cursor
+from sqlalchemy import select
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_STATUSES = {'completed', 'failed', 'cancelled', 'error'}
+
 class ExecutionManager:
     """Unified manager for execution data with atomic operations"""
     
-    def __init__(self, json_file_path: str = "logs/execution_history.json"):
+    def __init__(self, json_file_path: Optional[str] = None, log_path: Optional[str] = None):
+        json_file_path = json_file_path or config_system.get("executions.export_path", "logs/execution_history.json")
+        log_path = log_path or config_system.get("executions.log_path", "logs/execution_events.jsonl")
         self.json_file_path = json_file_path
         self.db_manager = None
         self._init_database()
-        self._ensure_json_file_exists()
+        self.event_log = ExecutionLog(log_path, export_path=json_file_path)
+        
+        # Write-behind state store for in-flight executions
+        self.write_behind_enabled = config_system.get("executions.write_behind_enabled", True)
+        self.flush_interval = config_system.get("executions.flush_interval_ms", 1000) / 1000.0
+        self.max_flush_batch = config_system.get("executions.max_flush_batch", 200)
+        self._live: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set()
+        self._live_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_thread = None
+        self.write_stats = {
+            "updates_received": 0,
+            "updates_coalesced": 0,
+            "forced_flushes": 0,
+            "db_batches": 0,
+            "db_records_written": 0,
+            "flush_failures": 0
+        }
+        atexit.register(self.flush)
     
     def _init_database(self):
         """Initialize database connection"""
@@ -35,34 +72,35 @@ class ExecutionManager:
             log_error(logger, f"Failed to initialize database: {e}")
             self.db_manager = None
     
-    def _ensure_json_file_exists(self):
-        """Ensure JSON file exists with proper structure"""
-        os.makedirs(os.path.dirname(self.json_file_path), exist_ok=True)
-        if not os.path.exists(self.json_file_path):
-            with open(self.json_file_path, 'w') as f:
-                json.dump([], f, indent=2)
-            log_info(logger, f"Created JSON file: {self.json_file_path}")
-    
     def _load_json_data(self) -> List[Dict]:
-        """Load data from JSON file"""
+        """Load all live records from the execution journal"""
         try:
-            with open(self.json_file_path, 'r') as f:
-                data = json.load(f)
-                return data if isinstance(data, list) else []
+            return self.event_log.all()
         except Exception as e:
-            log_error(logger, f"Failed to load JSON data: {e}")
+            log_error(logger, f"Failed to load journal data: {e}")
             return []
     
     def _save_json_data(self, data: List[Dict]):
-        """Save data to JSON file"""
+        """Replace the execution journal contents (and the legacy export) with the given records"""
         try:
-            with open(self.json_file_path, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
-            log_info(logger, f"Saved {len(data)} records to JSON file")
+            self.event_log.replace_all(data)
+            log_info(logger, f"Saved {len(data)} records to execution journal")
         except Exception as e:
-            log_error(logger, f"Failed to save JSON data: {e}")
+            log_error(logger, f"Failed to save journal data: {e}")
             raise
     
+    def _to_json_record(self, execution_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert datetime fields to ISO strings for the journal"""
+        json_record = execution_data.copy()
+        for field in ('started_at', 'completed_at'):
+            if isinstance(json_record.get(field), datetime):
+                json_record[field] = json_record[field].isoformat()
+        return json_record
+    
+    def export_legacy_json(self) -> Optional[str]:
+        """Write the read-only logs/execution_history.json export from the journal, bringing it up to date"""
+        return self.event_log.export_json()
+    
     def _normalize_execution_data(self, execution_data: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize execution data to standard format"""
         # Ensure required fields exist
@@ -104,88 +142,223 @@ class ExecutionManager:
         
         return normalized
     
-    @contextmanager
-    def atomic_operation(self):
-        """Context manager for atomic operations across JSON and database"""
-        json_backup = None
-        
+    def save_execution(self, execution_data: Dict[str, Any]) -> bool:
+        """Save execution data atomically to both the journal and database"""
         try:
-            # Backup current JSON data
-            json_backup = self._load_json_data()
-            
-            yield
+            execution_data, previous = self._begin_save(execution_data)
             
-            # If we get here, operations succeeded
+            # Update database
+            success = True
+            if self.db_manager:
+                try:
+                    success = self.db_manager.save_execution_record(execution_data)
+                except Exception as e:
+                    log_error(logger, f"Database save raised for {execution_data['id']}: {e}")
+                    success = False
             
+            self._finish_save(execution_data, previous, success)
+            return True
+                
         except Exception as e:
-            log_error(logger, f"Atomic operation failed: {e}")
+            log_error(logger, f"Failed to save execution {execution_data.get('id', 'unknown')}: {e}")
+            return False
+    
+    async def save_execution_async(self, execution_data: Dict[str, Any]) -> bool:
+        """Async counterpart of save_execution; the database write does not block the event loop"""
+        try:
+            execution_data, previous = self._begin_save(execution_data)
             
-            # Rollback JSON file
-            if json_backup is not None:
+            # Update database
+            success = True
+            if self.db_manager:
                 try:
-                    self._save_json_data(json_backup)
-                    log_info(logger, "Rolled back JSON file")
-                except:
-                    log_error(logger, "Failed to rollback JSON file")
+                    success = await self.db_manager.save_execution_record_async(execution_data)
+                except Exception as e:
+                    log_error(logger, f"Database save raised for {execution_data['id']}: {e}")
+                    success = False
             
-            raise
+            self._finish_save(execution_data, previous, success)
+            return True
+                
+        except Exception as e:
+            log_error(logger, f"Failed to save execution {execution_data.get('id', 'unknown')}: {e}")
+            return False
     
-    def save_execution(self, execution_data: Dict[str, Any]) -> bool:
-        """Save execution data atomically to both JSON and database"""
+    def _begin_save(self, execution_data: Dict[str, Any]):
+        """Normalize a record and append it to the journal; returns (record, previous journal version)"""
+        execution_data = self._normalize_execution_data(execution_data)
+        execution_id = execution_data['id']
+        
+        if not execution_id:
+            raise ValueError("Execution ID is required")
+        
+        # Append the new version; keep the previous one for rollback
+        previous = self.event_log.get(execution_id)
+        self.event_log.put(self._to_json_record(execution_data))
+        return execution_data, previous
+    
+    def _finish_save(self, execution_data: Dict[str, Any], previous: Optional[Dict[str, Any]], success: bool):
+        """Roll the journal back after a failed database write, or retire the live state after a good one"""
+        execution_id = execution_data['id']
+        if not success:
+            self._rollback_journal(execution_id, previous)
+            raise Exception("Database save failed")
+        
+        # A synchronous save supersedes any pending write-behind state
+        with self._live_lock:
+            self._live.pop(execution_id, None)
+            self._dirty.discard(execution_id)
+        
+        log_info(logger, f"Successfully saved execution {execution_id} atomically")
+    
+    def _rollback_journal(self, execution_id: str, previous: Optional[Dict[str, Any]]):
+        """Restore a record's previous journal version after a failed database write"""
         try:
-            execution_data = self._normalize_execution_data(execution_data)
-            execution_id = execution_data['id']
-            
+            if previous is not None:
+                self.event_log.put(previous)
+            else:
+                self.event_log.delete(execution_id)
+            log_info(logger, f"Rolled back journal entry for {execution_id}")
+        except Exception as e:
+            log_error(logger, f"Failed to roll back journal entry for {execution_id}: {e}")
+    
+    def update_execution_state(self, execution_data: Dict[str, Any]) -> bool:
+        """
+        Record the latest state of an execution, deferring the database write.
+        
+        The state is visible to readers immediately. Repeated updates to the
+        same execution between flushes are coalesced into one write; terminal
+        states are flushed synchronously.
+        
+        Returns:
+            bool: False if a terminal state could not be persisted
+        """
+        if not self.write_behind_enabled:
+            return self.save_execution(execution_data)
+        
+        try:
+            record = self._normalize_execution_data(execution_data)
+            execution_id = record['id']
             if not execution_id:
                 raise ValueError("Execution ID is required")
+        except Exception as e:
+            log_error(logger, f"Failed to stage execution {execution_data.get('id', 'unknown')}: {e}")
+            return False
+        
+        with self._live_lock:
+            self.write_stats["updates_received"] += 1
+            if execution_id in self._dirty:
+                self.write_stats["updates_coalesced"] += 1
+            self._live[execution_id] = record
+            self._dirty.add(execution_id)
+            terminal = record['status'] in TERMINAL_STATUSES
+            if terminal:
+                self.write_stats["forced_flushes"] += 1
+        
+        if terminal:
+            return self.flush([execution_id])
+        
+        self._ensure_flusher()
+        return True
+    
+    async def update_execution_state_async(self, execution_data: Dict[str, Any]) -> bool:
+        """Async counterpart of update_execution_state; terminal flushes run in a worker thread"""
+        if not self.write_behind_enabled:
+            return await self.save_execution_async(execution_data)
+        
+        if execution_data.get('status') in TERMINAL_STATUSES:
+            return await asyncio.to_thread(self.update_execution_state, execution_data)
+        # Non-terminal updates only touch memory
+        return self.update_execution_state(execution_data)
+    
+    def _ensure_flusher(self):
+        """Start the background flush thread on first use"""
+        if self._flush_thread is None or not self._flush_thread.is_alive():
+            with self._live_lock:
+                if self._flush_thread is None or not self._flush_thread.is_alive():
+                    self._flush_thread = threading.Thread(
+                        target=self._flush_loop, name="execution-flusher", daemon=True
+                    )
+                    self._flush_thread.start()
+    
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                log_error(logger, f"Execution write-behind flush failed: {e}")
+    
+    def flush(self, execution_ids: Optional[List[str]] = None) -> bool:
+        """
+        Write pending execution states to the journal and database.
+        
+        Args:
+            execution_ids (Optional[List[str]]): Only flush these executions (default: all pending)
             
-            with self.atomic_operation():
-                # Update JSON file
-                json_data = self._load_json_data()
-                
-                # Find existing record or add new one
-                updated = False
-                for i, record in enumerate(json_data):
-                    if record.get('id') == execution_id:
-                        # Convert datetime objects back to strings for JSON
-                        json_record = execution_data.copy()
-                        if json_record['started_at']:
-                            json_record['started_at'] = json_record['started_at'].isoformat()
-                        if json_record['completed_at']:
-                            json_record['completed_at'] = json_record['completed_at'].isoformat()
-                        
-                        json_data[i] = json_record
-                        updated = True
-                        break
-                
-                if not updated:
-                    # Add new record
-                    json_record = execution_data.copy()
-                    if json_record['started_at']:
-                        json_record['started_at'] = json_record['started_at'].isoformat()
-                    if json_record['completed_at']:
-                        json_record['completed_at'] = json_record['completed_at'].isoformat()
-                    
-                    json_data.append(json_record)
-                
-                # Save JSON file
-                self._save_json_data(json_data)
-                
-                # Update database
-                if self.db_manager:
-                    success = self.db_manager.save_execution_record(execution_data)
-                    if not success:
-                        raise Exception("Database save failed")
-                
-                log_info(logger, f"Successfully saved execution {execution_id} atomically")
+        Returns:
+            bool: True if every pending state was persisted
+        """
+        with self._flush_lock:
+            with self._live_lock:
+                pending_ids = [i for i in (execution_ids or list(self._dirty)) if i in self._dirty]
+                batch = [(i, self._live[i]) for i in pending_ids]
+                self._dirty.difference_update(pending_ids)
+            
+            if not batch:
                 return True
+            
+            all_saved = True
+            for start in range(0, len(batch), self.max_flush_batch):
+                chunk = batch[start:start + self.max_flush_batch]
+                saved = True
+                try:
+                    for _, record in chunk:
+                        self.event_log.put(self._to_json_record(record))
+                    if self.db_manager:
+                        saved = self.db_manager.save_execution_records([record for _, record in chunk])
+                        self.write_stats["db_batches"] += 1
+                except Exception as e:
+                    log_error(logger, f"Failed to flush {len(chunk)} execution states: {e}")
+                    saved = False
                 
-        except Exception as e:
-            log_error(logger, f"Failed to save execution {execution_data.get('id', 'unknown')}: {e}")
-            return False
+                with self._live_lock:
+                    for execution_id, record in chunk:
+                        if not saved:
+                            # Retry on the next flush unless a newer state is already pending
+                            self._dirty.add(execution_id)
+                        elif (record['status'] in TERMINAL_STATUSES
+                              and execution_id not in self._dirty
+                              and self._live.get(execution_id) is record):
+                            # Finished executions are read from the database from now on
+                            del self._live[execution_id]
+                
+                if saved:
+                    self.write_stats["db_records_written"] += len(chunk)
+                else:
+                    self.write_stats["flush_failures"] += 1
+                    all_saved = False
+            
+            return all_saved
+    
+    def get_write_stats(self) -> Dict[str, Any]:
+        """Get write-behind coalescing statistics"""
+        with self._live_lock:
+            return {
+                **self.write_stats,
+                "write_behind_enabled": self.write_behind_enabled,
+                "flush_interval_ms": int(self.flush_interval * 1000),
+                "live_executions": len(self._live),
+                "pending_flush": len(self._dirty)
+            }
     
     def get_execution(self, execution_id: str) -> Optional[Dict[str, Any]]:
-        """Get execution by ID (prefers database, falls back to JSON)"""
+        """Get execution by ID (prefers live in-memory state, then database, then JSON)"""
+        with self._live_lock:
+            live = self._live.get(execution_id)
+        if live is not None:
+            return dict(live)
+        
         try:
             # Try database first
             if self.db_manager:
@@ -199,18 +372,69 @@ class ExecutionManager:
                     if result:
                         return dict(result._mapping)
             
-            # Fallback to JSON
-            json_data = self._load_json_data()
-            for record in json_data:
-                if record.get('id') == execution_id:
-                    return record
+            # Fallback to the journal (O(1) via its offset index)
+            return self.event_log.get(execution_id)
             
+        except Exception as e:
+            log_error(logger, f"Failed to get execution {execution_id}: {e}")
             return None
+    
+    async def get_execution_async(self, execution_id: str,
+                                  columns: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Async counterpart of get_execution
+        
+        Args:
+            execution_id (str): Execution to fetch
+            columns (Optional[Tuple[str, ...]]): Only return these fields; only they are read from the database
+        """
+        with self._live_lock:
+            live = self._live.get(execution_id)
+        if live is not None:
+            return self._project(live, columns)
+        
+        try:
+            if self.db_manager:
+                table = self.db_manager.execution_history_table
+                stmt = select(*[table.c[name] for name in columns]) if columns else table.select()
+                
+                def select_one(session):
+                    row = session.execute(stmt.where(table.c.id == execution_id)).first()
+                    return dict(row._mapping) if row else None
+                
+                result = await self.db_manager.run_async(select_one)
+                if result:
+                    return result
+            
+            # Fallback to the journal (O(1) via its offset index)
+            record = self.event_log.get(execution_id)
+            return self._project(record, columns) if record is not None else None
             
         except Exception as e:
             log_error(logger, f"Failed to get execution {execution_id}: {e}")
             return None
     
+    @staticmethod
+    def _project(execution: Dict[str, Any], columns: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """Copy an in-memory execution, keeping only the given columns"""
+        if not columns:
+            return dict(execution)
+        # channel and quality_score are generated columns in the database; derive them here
+        derived = {
+            'channel': (execution.get('input_data') or {}).get('channel'),
+            'quality_score': (execution.get('output_data') or execution.get('output') or {}).get('quality_score')
+        }
+        return {name: execution.get(name, derived.get(name)) for name in columns}
+    
+    def _overlay_live(self, executions: List[Dict[str, Any]],
+                      columns: Optional[Tuple[str, ...]] = None) -> List[Dict[str, Any]]:
+        """Replace stored rows with the live state of in-flight executions"""
+        with self._live_lock:
+            if not self._live:
+                return executions
+            live = dict(self._live)
+        return [self._project(live[e.get('id')], columns) if e.get('id') in live else e for e in executions]
+    
     def get_all_executions(self, limit: int = 1000) -> List[Dict[str, Any]]:
         """Get all executions (prefers database, falls back to JSON)"""
         try:
@@ -219,19 +443,104 @@ class ExecutionManager:
                 db_data = self.db_manager.get_execution_history(limit=limit)
                 if db_data:  # Return database data even if empty list
                     log_info(logger, f"Retrieved {len(db_data)} executions from database")
-                    return db_data
+                    return self._overlay_live(db_data)
             
-            # Fallback to JSON
+            # Fallback to the journal
             json_data = self._load_json_data()
             # Sort by started_at (newest first)
-            json_data.sort(key=lambda x: x.get('started_at', ''), reverse=True)
-            log_info(logger, f"Retrieved {len(json_data)} executions from JSON (database unavailable)")
-            return json_data[:limit]
+            json_data.sort(key=lambda x: x.get('started_at') or '', reverse=True)
+            log_info(logger, f"Retrieved {len(json_data)} executions from journal (database unavailable)")
+            return self._overlay_live(json_data[:limit])
             
         except Exception as e:
             log_error(logger, f"Failed to get executions: {e}")
             return []
     
+    async def get_all_executions_async(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Async counterpart of get_all_executions"""
+        if self.db_manager:
+            db_data = await self.db_manager.get_execution_history_async(limit=limit)
+            if db_data:
+                return self._overlay_live(db_data)
+        return await asyncio.to_thread(self.get_all_executions, limit)
+    
+    async def get_execution_page_async(self, page_size: int = 10, cursor: Optional[str] = None, offset: int = 0,
+                                       status: Optional[str] = None, workflow_id: Optional[str] = None,
+                                       channel: Optional[str] = None, summary: bool = False) -> CursorPage:
+        """Async counterpart of get_execution_page"""
+        columns = EXECUTION_SUMMARY_COLUMNS if summary else None
+        if self.db_manager:
+            try:
+                page = await self.db_manager.get_execution_page_async(
+                    page_size=page_size, cursor=cursor, offset=offset,
+                    status=status, workflow_id=workflow_id, channel=channel, columns=columns
+                )
+                page.items = self._overlay_live(page.items, columns)
+                return page
+            except HTTPException:
+                raise
+            except Exception as e:
+                log_error(logger, f"Failed to page executions from database: {e}")
+        
+        # Journal fallback reads a local file; keep it off the event loop
+        return await asyncio.to_thread(self._journal_page, page_size, cursor, offset, status, workflow_id,
+                                       channel, columns)
+    
+    def get_execution_page(self, page_size: int = 10, cursor: Optional[str] = None, offset: int = 0,
+                           status: Optional[str] = None, workflow_id: Optional[str] = None,
+                           channel: Optional[str] = None, summary: bool = False) -> CursorPage:
+        """
+        Get one page of executions, newest first, paginated in the database
+        
+        With summary=True only EXECUTION_SUMMARY_COLUMNS are read, leaving out the
+        input_data, output_data and steps JSON. Falls back to paginating the local
+        journal when the database is unavailable.
+        """
+        columns = EXECUTION_SUMMARY_COLUMNS if summary else None
+        if self.db_manager:
+            try:
+                page = self.db_manager.get_execution_page(
+                    page_size=page_size, cursor=cursor, offset=offset,
+                    status=status, workflow_id=workflow_id, channel=channel, columns=columns
+                )
+                page.items = self._overlay_live(page.items, columns)
+                return page
+            except HTTPException:
+                raise
+            except Exception as e:
+                log_error(logger, f"Failed to page executions from database: {e}")
+        
+        return self._journal_page(page_size, cursor, offset, status, workflow_id, channel, columns)
+    
+    def _journal_page(self, page_size: int, cursor: Optional[str], offset: int,
+                      status: Optional[str], workflow_id: Optional[str],
+                      channel: Optional[str] = None, columns: Optional[Tuple[str, ...]] = None) -> CursorPage:
+        """Paginate the local journal, used when the database is unavailable"""
+        records = [
+            self._normalize_execution_data(record) for record in self._load_json_data()
+            if (not status or record.get('status') == status)
+            and (not workflow_id or record.get('workflow_id') == workflow_id)
+            and (not channel or (record.get('input_data') or {}).get('channel') == channel)
+        ]
+        records.sort(key=lambda r: (r['started_at'], r['id']), reverse=True)
+        total = len(records)
+        
+        if cursor:
+            started_at, execution_id = decode_cursor(cursor, expected_length=2)
+            records = [r for r in records if (r['started_at'], r['id']) < (started_at, execution_id)]
+        elif offset:
+            records = records[offset:]
+        
+        next_cursor = None
+        if len(records) > page_size:
+            last = records[page_size - 1]
+            next_cursor = encode_cursor([last['started_at'], last['id']])
+        items = [self._project(record, columns) for record in records[:page_size]]
+        return CursorPage(
+            items=self._overlay_live(items, columns), page_size=page_size,
+            next_cursor=next_cursor, total=total
+        )
+    
     def update_execution_status(self, execution_id: str, status: str, **kwargs) -> bool:
         """Update execution status and other fields atomically"""
         try:
@@ -251,23 +560,26 @@ class ExecutionManager:
             for key, value in kwargs.items():
                 current_execution[key] = value
             
-            return self.save_execution(current_execution)
+            return self.update_execution_state(current_execution)
             
         except Exception as e:
             log_error(logger, f"Failed to update execution status {execution_id}: {e}")
             return False
     
     def delete_execution(self, execution_id: str) -> bool:
-        """Delete execution from both JSON and database atomically"""
+        """Delete execution from both the journal and database atomically"""
         try:
-            with self.atomic_operation():
-                # Remove from JSON
-                json_data = self._load_json_data()
-                json_data = [record for record in json_data if record.get('id') != execution_id]
-                self._save_json_data(json_data)
-                
-                # Remove from database
-                if self.db_manager:
+            with self._live_lock:
+                self._live.pop(execution_id, None)
+                self._dirty.discard(execution_id)
+            
+            # Append a tombstone; keep the record for rollback
+            previous = self.event_log.get(execution_id)
+            self.event_log.delete(execution_id)
+            
+            # Remove from database
+            if self.db_manager:
+                try:
                     with self.db_manager.get_session() as session:
                         session.execute(
                             self.db_manager.execution_history_table.delete().where(
@@ -275,16 +587,20 @@ class ExecutionManager:
                             )
                         )
                         session.commit()
-                
-                log_info(logger, f"Successfully deleted execution {execution_id}")
-                return True
+                except Exception:
+                    if previous is not None:
+                        self._rollback_journal(execution_id, previous)
+                    raise
+            
+            log_info(logger, f"Successfully deleted execution {execution_id}")
+            return True
                 
         except Exception as e:
             log_error(logger, f"Failed to delete execution {execution_id}: {e}")
             return False
     
     def sync_json_to_database(self) -> bool:
-        """Sync all JSON data to database (migration helper)"""
+        """Sync all journal data to database (migration helper)"""
         try:
             if not self.db_manager:
                 log_error(logger, "Database not available for sync")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Execution History Payload Benchmark
+
+Seeds a scratch SQLite database with executions carrying realistic input,
+output and step JSON, then compares one page of /api/execution-history as
+full rows (every column plus the legacy 'output' alias) against the summary
+projection, and the cost of fetching a single execution's detail. Reports the
+query time, serialization time and response size of each.
+
+Usage:
+    python execution_payload_benchmark.py [--rows 2000] [--page-size 20] [--iterations 50]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+from config_system import config_system
+from database import EXECUTION_SUMMARY_COLUMNS, DatabaseManager
+
+PARAGRAPH = ("We help growth-stage founders structure and run their raise, from investor "
+             "targeting to term sheet negotiation. ") * 6
+
+
+def seed(db: DatabaseManager, rows: int):
+    """Insert executions with input, output and step JSON of typical size"""
+    base = datetime(2025, 1, 1)
+    with db.engine.begin() as conn:
+        conn.execute(db.execution_history_table.insert(), [{
+            "id": f"seed_{i:07d}",
+            "workflow_id": "linkedin-workflow",
+            "workflow_name": "LinkedIn Outreach Workflow",
+            "status": "completed",
+            "started_at": base + timedelta(seconds=i),
+            "completed_at": base + timedelta(seconds=i + 12),
+            "duration": 12,
+            "progress": 100,
+            "input_data": {
+                "channel": "linkedin",
+                "conversation_thread": PARAGRAPH * 3,
+                "prospect_profile_url": f"https://linkedin.com/in/prospect-{i}",
+                "prospect_company_url": f"https://example-{i}.com"
+            },
+            "output_data": {
+                "message": PARAGRAPH * 2,
+                "follow_up_sequence": [{"timing": f"{d} days later", "message": PARAGRAPH} for d in (3, 7, 14)],
+                "quality_score": 70 + i % 30,
+                "predicted_response_rate": 0.35
+            },
+            "steps": [{"name": name, "status": "completed", "result": PARAGRAPH[:200]}
+                      for name in ("enrich", "research", "draft", "evaluate", "finalize")]
+        } for i in range(rows)])
+
+
+def legacy_items(items):
+    """Full rows with output_data duplicated into 'output', as the endpoint used to return them"""
+    return [{**item, "output": item.get("output_data")} for item in items]
+
+
+def measure(fetch: Callable[[], Any], shape: Callable[[Any], Any], iterations: int) -> Dict[str, float]:
+    """Average query time, serialization time and response size over the iterations"""
+    query_s = serialize_s = 0.0
+    size = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = fetch()
+        fetched = time.perf_counter()
+        body = json.dumps(jsonable_encoder(shape(result))).encode()
+        serialize_s += time.perf_counter() - fetched
+        query_s += fetched - started
+        size = len(body)
+    return {
+        "query_ms": query_s * 1000 / iterations,
+        "serialize_ms": serialize_s * 1000 / iterations,
+        "bytes": size
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark execution history list and detail payloads")
+    parser.add_argument("--rows", type=int, default=2000, help="Seed rows of execution history")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="execution_payload_benchmark_")
+    db_config = config_system.config_cache.setdefault("database", {})
+    db_config["type"] = "sqlite"
+    db_config["sqlite_path"] = os.path.join(workdir, "bench.db")
+    db = DatabaseManager()
+    seed(db, args.rows)
+
+    def page(columns=None):
+        return lambda: db.get_execution_page(page_size=args.page_size, columns=columns).items
+
+    def detail():
+        table = db.execution_history_table
+        with db.get_session() as session:
+            row = session.execute(table.select().where(table.c.id == "seed_0000042")).first()
+            return dict(row._mapping)
+
+    results = {
+        "full page": measure(page(), legacy_items, args.iterations),
+        "summary page": measure(page(EXECUTION_SUMMARY_COLUMNS), lambda items: items, args.iterations),
+        "detail": measure(detail, lambda item: item, args.iterations),
+    }
+    db.engine.dispose()
+
+    print("📦 Execution History Payload Benchmark")
+    print("=" * 64)
+    print(f"Seed rows: {args.rows}, page size: {args.page_size}, iterations: {args.iterations}")
+    print()
+    print(f"{'response':>13} | {'query ms':>9} | {'serialize ms':>12} | {'bytes':>10}")
+    print("-" * 64)
+    for name, result in results.items():
+        print(f"{name:>13} | {result['query_ms']:>9.2f} | {result['serialize_ms']:>12.2f} | {result['bytes']:>10,}")
+
+    full, summary = results["full page"], results["summary page"]
+    print()
+    print(f"Summary page is {full['bytes'] / summary['bytes']:.1f}x smaller and serializes "
+          f"{full['serialize_ms'] / summary['serialize_ms']:.1f}x faster than the full page")
+
+
+if __name__ == "__main__":
+    main()
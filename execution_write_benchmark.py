@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Execution Write-Behind Benchmark
+
+Replays the execution record updates made by one /run request (create,
+25%, 60% and 85% progress, completed) against a scratch SQLite database and
+counts the SQL statements and commits it costs, with write-behind disabled
+and enabled.
+
+Usage:
+    python execution_write_benchmark.py [--requests 20] [--step-delay-ms 300] [--flush-interval-ms 1000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import event
+
+from config_system import config_system
+from database import DatabaseManager
+from execution_manager import ExecutionManager
+
+PROGRESS_STEPS = [
+    ("Profile Research", 25),
+    ("Message Generation", 60),
+    ("Quality Review", 85),
+]
+
+
+def run_requests(manager: ExecutionManager, requests: int, step_delay: float) -> Dict[str, Any]:
+    """Replay the /run update sequence and count database round trips"""
+    counts = {"statements": 0, "commits": 0}
+
+    def count_statement(*args):
+        counts["statements"] += 1
+
+    def count_commit(*args):
+        counts["commits"] += 1
+
+    engine = manager.db_manager.engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    event.listen(engine, "commit", count_commit)
+
+    started = time.perf_counter()
+    for i in range(requests):
+        execution_id = f"bench_{manager.write_behind_enabled}_{i:04d}"
+        manager.save_execution({
+            "id": execution_id,
+            "workflow_id": "linkedin-workflow",
+            "status": "running",
+            "started_at": datetime.now(),
+            "progress": 0
+        })
+        for step, progress in PROGRESS_STEPS:
+            current = manager.get_execution(execution_id)
+            current.update({"current_step": step, "progress": progress})
+            manager.update_execution_state(current)
+            time.sleep(step_delay)
+        current = manager.get_execution(execution_id)
+        current.update({"status": "completed", "completed_at": datetime.now(), "progress": 100})
+        manager.update_execution_state(current)
+    manager.flush()
+    elapsed = time.perf_counter() - started
+
+    event.remove(engine, "before_cursor_execute", count_statement)
+    event.remove(engine, "commit", count_commit)
+    return {**counts, "elapsed": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark execution write-behind coalescing")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--step-delay-ms", type=float, default=300.0,
+                        help="Delay between progress updates, like the sleeps in /run")
+    parser.add_argument("--flush-interval-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="execution_write_benchmark_")
+    config_system.config_cache.setdefault("database", {})
+    config_system.config_cache["database"]["type"] = "sqlite"
+    config_system.config_cache["database"]["sqlite_path"] = os.path.join(workdir, "bench.db")
+
+    print("🚀 Execution Write-Behind Benchmark")
+    print("=" * 64)
+    print(f"Requests: {args.requests}, step delay: {args.step_delay_ms}ms, "
+          f"flush interval: {args.flush_interval_ms}ms")
+    print()
+    print(f"{'mode':>13} | {'statements/req':>14} | {'commits/req':>11} | {'elapsed':>8}")
+    print("-" * 64)
+
+    for write_behind in (False, True):
+        manager = ExecutionManager(
+            json_file_path=os.path.join(workdir, f"history_{write_behind}.json"),
+            log_path=os.path.join(workdir, f"events_{write_behind}.jsonl")
+        )
+        manager.db_manager = DatabaseManager()
+        manager.write_behind_enabled = write_behind
+        manager.flush_interval = args.flush_interval_ms / 1000.0
+
+        result = run_requests(manager, args.requests, args.step_delay_ms / 1000.0)
+        mode = "write-behind" if write_behind else "synchronous"
+        print(f"{mode:>13} | {result['statements'] / args.requests:>14.1f} | "
+              f"{result['commits'] / args.requests:>11.1f} | {result['elapsed']:>7.2f}s")
+
+    print()
+    print(f"Write-behind stats: {manager.get_write_stats()}")
+
+
+if __name__ == "__main__":
+    main()
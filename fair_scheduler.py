@@ -0,0 +1,357 @@
+"""
+Weighted fair scheduling of workflow runs
+
+One FairScheduler per process hands out `capacity` slots, i.e. the workflow
+steps (and so LLM calls) the process may have in flight, to flows: one flow
+per batch, plus the interactive flow for /run and workflow execute requests.
+
+- A workflow run holds one slot for its whole duration (FairScheduler.slot).
+  Its steps share it through the RunSlot of the run: the first step in
+  flight uses the run's slot, and every step running beside it takes
+  another slot of the same flow until it finishes. Runs with
+  max_parallel_steps > 1 therefore count once per step in flight, and a
+  waiting step takes whichever comes first, the run's slot or a new one, so
+  a run always progresses on the slot it holds.
+
+- Interactive requests are served first whenever a slot is free, and
+  `interactive_reserved` slots are never given to batches.
+- Batches share the remaining slots by weighted fair queuing (start-time
+  fair queuing): each grant advances the flow's virtual time by 1 / weight,
+  and a freed slot goes to the waiting flow with the lowest virtual time.
+  A flow that arrives or comes back from idle starts at the current virtual
+  time, so a 10k-job batch gets its share and no more, and a batch started
+  later is served right away instead of after the earlier one.
+
+With scheduler.backend set to "redis", every grant also takes a lease in a
+RedisSlotPool of `global_capacity` slots shared by the API processes and the
+batch workers, so the limit holds for the whole deployment.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import redis
+
+from config_system import config_system
+from logging_config import log_info, log_warning
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_FLOW = "interactive"
+
+
+def batch_flow(batch_id: str) -> str:
+    """Scheduler flow of a batch"""
+    return f"batch:{batch_id}"
+
+
+class RedisSlotPool:
+    """
+    Slot leases shared by processes, in one Redis sorted set
+
+    Each holder is a member scored by its lease time. Taking a slot removes
+    expired leases, adds the holder and counts the members in one MULTI; the
+    holder keeps the slot if the count is within the limit and withdraws
+    otherwise, so concurrent takers can only under-admit, never over-admit.
+    Holders renew their leases; a process that dies frees its slots when its
+    leases expire.
+    """
+
+    def __init__(self, client: redis.Redis, key: str = "crewai:run_slots", capacity: int = 32,
+                 lease_seconds: float = 600.0):
+        self.client = client
+        self.key = key
+        self.capacity = capacity
+        self.lease_seconds = lease_seconds
+
+    def try_acquire(self, token: str, limit: int) -> bool:
+        """Take a slot for token if fewer than limit slots are leased"""
+        now = time.time()
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zremrangebyscore(self.key, "-inf", now - self.lease_seconds)
+        pipe.zadd(self.key, {token: now})
+        pipe.zcard(self.key)
+        _, _, leased = pipe.execute()
+        if leased <= limit:
+            return True
+        self.client.zrem(self.key, token)
+        return False
+
+    def renew(self, tokens):
+        """Extend the leases of slots still held"""
+        if tokens:
+            now = time.time()
+            self.client.zadd(self.key, {token: now for token in tokens}, xx=True)
+
+    def release(self, token: str):
+        self.client.zrem(self.key, token)
+
+
+class RunSlot:
+    """The slot a workflow run holds, shared by the steps of the run"""
+
+    def __init__(self, scheduler: "FairScheduler", flow: str, weight: float):
+        self.scheduler = scheduler
+        self.flow = flow
+        self.weight = weight
+        self._own = asyncio.Lock()
+
+    @asynccontextmanager
+    async def step(self):
+        """Hold the run's slot, or another slot of its flow while the run's slot is busy, for the block"""
+        own, token = await self._take()
+        try:
+            yield
+        finally:
+            if own:
+                self._own.release()
+            else:
+                await self.scheduler.release(self.flow, token)
+
+    async def _take(self) -> Tuple[bool, Optional[str]]:
+        """
+        Wait for the run's slot or a new slot of the flow, whichever comes first
+
+        Returns:
+            Tuple of (whether the run's slot was taken, pool token of a new slot)
+        """
+        if not self._own.locked():
+            await self._own.acquire()
+            return True, None
+
+        own = asyncio.ensure_future(self._own.acquire())
+        extra = asyncio.ensure_future(self.scheduler.acquire(self.flow, self.weight))
+        aborted = True
+        try:
+            await asyncio.wait((own, extra), return_when=asyncio.FIRST_COMPLETED)
+            aborted = False
+        finally:
+            own.cancel()
+            extra.cancel()
+            await asyncio.wait((own, extra))
+            took_own = not own.cancelled() and own.exception() is None
+            took_extra = not extra.cancelled() and extra.exception() is None
+            # Both came through: keep the run's slot and give back the new one
+            if took_extra and (aborted or took_own):
+                await self.scheduler.release(self.flow, extra.result())
+            if took_own and aborted:
+                self._own.release()
+        if took_own:
+            return True, None
+        return False, extra.result()
+
+
+# Slot of the workflow run the current task belongs to, set by FairScheduler.slot
+_run_slot: ContextVar[Optional[RunSlot]] = ContextVar("run_slot", default=None)
+
+
+def current_run_slot() -> Optional[RunSlot]:
+    """Slot held for the workflow run of the calling task, if any"""
+    return _run_slot.get()
+
+
+@dataclass
+class _Flow:
+    weight: float
+    virtual_time: float
+    running: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+
+
+class FairScheduler:
+    """Process-wide slots shared fairly between batches, with a reserve for interactive requests"""
+
+    def __init__(self, capacity: int = 8, interactive_reserved: int = 2, pool: Optional[RedisSlotPool] = None,
+                 poll_interval: float = 0.5):
+        """
+        Args:
+            capacity: Workflow steps in flight at once in this process
+            interactive_reserved: Slots batches never take
+            pool: Slot pool shared with other processes (optional)
+            poll_interval: Seconds between attempts to take a slot from a full pool
+        """
+        self.capacity = max(1, capacity)
+        self.interactive_reserved = min(max(0, interactive_reserved), self.capacity - 1)
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.running = 0
+        self.virtual_time = 0.0
+        self._flows: Dict[str, _Flow] = {}
+        self._tokens: set = set()
+        self._renew_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls) -> "FairScheduler":
+        """Scheduler configured by the scheduler section (Redis URL from REDIS_URL or cache.redis_url)"""
+        scheduler_config = config_system.get("scheduler", {})
+        pool = None
+        if scheduler_config.get("backend", "local") == "redis":
+            redis_url = os.getenv("REDIS_URL") or config_system.get("cache", {}).get("redis_url",
+                                                                                      "redis://localhost:6379/0")
+            pool = RedisSlotPool(redis.Redis.from_url(redis_url, decode_responses=True, socket_connect_timeout=5,
+                                                      socket_timeout=5),
+                                 key=scheduler_config.get("redis_key", "crewai:run_slots"),
+                                 capacity=scheduler_config.get("global_capacity", 32),
+                                 lease_seconds=scheduler_config.get("lease_seconds", 600.0))
+        return cls(capacity=scheduler_config.get("capacity", 8),
+                   interactive_reserved=scheduler_config.get("interactive_reserved", 2),
+                   pool=pool,
+                   poll_interval=scheduler_config.get("poll_interval_seconds", 0.5))
+
+    @asynccontextmanager
+    async def slot(self, flow: str, weight: float = 1.0):
+        """Hold a run slot for the duration of the block, shared by the run's steps (see current_run_slot)"""
+        token = await self.acquire(flow, weight)
+        reset = _run_slot.set(RunSlot(self, flow, weight))
+        try:
+            yield
+        finally:
+            _run_slot.reset(reset)
+            await self.release(flow, token)
+
+    async def acquire(self, flow: str, weight: float = 1.0) -> Optional[str]:
+        """
+        Wait for a slot
+
+        Args:
+            flow: INTERACTIVE_FLOW or batch_flow(batch_id)
+            weight: Share of a batch flow relative to other batches
+
+        Returns:
+            Optional[str]: Pool token to pass to release (None without a pool)
+        """
+        state = self._flows.get(flow)
+        if state is None:
+            state = self._flows[flow] = _Flow(weight=weight, virtual_time=self.virtual_time)
+        elif not state.running and not state.waiters:
+            # Back from idle: keep a lead it already used up, but bank no credit for the idle time
+            state.virtual_time = max(state.virtual_time, self.virtual_time)
+        state.weight = weight
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.append(future)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_local(flow)
+            else:
+                self._forget_waiter(flow, future)
+            raise
+
+        if self.pool is None:
+            return None
+        token = uuid.uuid4().hex
+        limit = self.pool.capacity
+        if flow != INTERACTIVE_FLOW:
+            limit -= self.interactive_reserved
+        try:
+            while not await asyncio.to_thread(self.pool.try_acquire, token, limit):
+                await asyncio.sleep(self.poll_interval)
+        except BaseException:
+            self._release_local(flow)
+            raise
+        self._tokens.add(token)
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = asyncio.create_task(self._renew_loop())
+        return token
+
+    async def release(self, flow: str, token: Optional[str] = None):
+        """Give back a slot taken by acquire"""
+        self._release_local(flow)
+        if token is not None:
+            self._tokens.discard(token)
+            try:
+                await asyncio.to_thread(self.pool.release, token)
+            except Exception as e:
+                log_warning(logger, f"Failed to release run slot {token}; its lease will expire: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Slots in use and the running and waiting requests of each flow"""
+        return {
+            'capacity': self.capacity,
+            'interactive_reserved': self.interactive_reserved,
+            'running': self.running,
+            'flows': {name: {'weight': state.weight, 'running': state.running,
+                             'waiting': sum(not waiter.done() for waiter in state.waiters)}
+                      for name, state in self._flows.items()}
+        }
+
+    def _batch_running(self) -> int:
+        interactive = self._flows.get(INTERACTIVE_FLOW)
+        return self.running - (interactive.running if interactive else 0)
+
+    def _next_flow(self) -> Optional[_Flow]:
+        """Flow to grant the next slot to, if a slot is free for it"""
+        if self.running >= self.capacity:
+            return None
+        interactive = self._flows.get(INTERACTIVE_FLOW)
+        if interactive is not None and interactive.waiters:
+            return interactive
+        if self._batch_running() >= self.capacity - self.interactive_reserved:
+            return None
+        waiting = [state for name, state in self._flows.items() if name != INTERACTIVE_FLOW and state.waiters]
+        return min(waiting, key=lambda state: state.virtual_time, default=None)
+
+    def _dispatch(self):
+        """Grant free slots to waiting requests"""
+        while (state := self._next_flow()) is not None:
+            future = state.waiters.popleft()
+            if future.done():
+                continue
+            state.running += 1
+            self.running += 1
+            if state is not self._flows.get(INTERACTIVE_FLOW):
+                # Start-time fair queuing: the system's virtual time is the start tag of the latest grant
+                self.virtual_time = max(self.virtual_time, state.virtual_time)
+                state.virtual_time = self.virtual_time + 1 / max(state.weight, 1e-6)
+            future.set_result(None)
+
+    def _release_local(self, flow: str):
+        state = self._flows[flow]
+        state.running -= 1
+        self.running -= 1
+        self._dispatch()
+        self._forget_idle()
+
+    def _forget_waiter(self, flow: str, future: asyncio.Future):
+        state = self._flows.get(flow)
+        if state is not None and future in state.waiters:
+            state.waiters.remove(future)
+            self._forget_idle()
+
+    def _forget_idle(self):
+        """
+        Drop idle flows the virtual time has caught up with
+
+        Such a flow would restart at the current virtual time anyway, so the
+        flows kept are the active ones and those still ahead of their share.
+        """
+        for name in [name for name, state in self._flows.items()
+                     if not state.running and not state.waiters and state.virtual_time <= self.virtual_time]:
+            del self._flows[name]
+
+    async def _renew_loop(self):
+        """Renew the pool leases of the slots this process holds"""
+        while self._tokens:
+            await asyncio.sleep(self.pool.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.pool.renew, list(self._tokens))
+            except Exception as e:
+                log_warning(logger, f"Failed to renew run slot leases: {e}")
+
+
+# Create singleton instance
+job_scheduler = FairScheduler.from_config()
+log_info(logger, f"Run scheduler: {job_scheduler.capacity} slots, "
+                 f"{job_scheduler.interactive_reserved} reserved for interactive requests"
+                 f"{', shared through Redis' if job_scheduler.pool else ''}")
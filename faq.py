@@ -39,6 +39,14 @@ class FAQManager:
         if os.path.exists(self.csv_path):
             shutil.copy2(self.csv_path, self.backup_path)
     
+    def get_version(self) -> str:
+        """Get a version token for the FAQ set that changes whenever the CSV is rewritten"""
+        try:
+            stat = os.stat(self.csv_path)
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+        except OSError:
+            return "missing"
+    
     def load_all_faqs(self) -> List[Dict]:
         """Load all FAQs from CSV"""
         faqs = []
@@ -1,27 +1,181 @@
 # faq_agent.py
 
+import hashlib
 import json
 import logging
+import threading
+import time
 from typing import List, Dict, Any, Optional
 from crewai import Agent, Task, Crew
 from langchain_openai import AzureChatOpenAI
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
 from faq import faq_manager, get_faq_answer
 from agents import llm  # Use the existing LLM configuration
+from cache import metrics_collector
+from config_system import config_system
+from embedding_service import embedding_service
 from logging_config import log_info, log_error, log_warning, log_debug
 
 logger = logging.getLogger(__name__)
 
+NO_MATCH_ANSWER = "I don't have specific information about that in our FAQ database. Please contact our team for a personalized response."
+
+# Resolution tiers reported by FAQAgent.get_tier_stats
+FAQ_TIERS = ("direct", "answer_cache", "synthesis", "no_match")
+
+
+class SemanticAnswerCache:
+    """
+    In-memory semantic cache for synthesized FAQ answers.
+    
+    Entries are bucketed by (channel, FAQ-set version, context fingerprint) and
+    matched by cosine similarity of the question embedding, so paraphrases of an
+    already-answered question reuse the synthesized answer instead of paying for
+    two LLM calls. The context goes into the synthesis prompts, so an answer is
+    only reused for the same context. max_entries caps all buckets together.
+    """
+    
+    def __init__(self, similarity_threshold: float = 0.92, max_entries: int = 1000, ttl: int = 86400):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._buckets: Dict[tuple, Dict[str, Any]] = {}
+        self._entries = 0
+    
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    @staticmethod
+    def context_fingerprint(context: Optional[Dict[str, Any]]) -> str:
+        """Stable hash of the context passed to synthesis; empty for no context"""
+        if not context:
+            return ""
+        encoded = json.dumps(context, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+    
+    def _drop(self, key: tuple, bucket: Dict[str, Any], count: int):
+        """Drop the count oldest entries of a bucket (entries are kept in insertion order)"""
+        del bucket["vectors"][:count]
+        del bucket["answers"][:count]
+        del bucket["created"][:count]
+        bucket["matrix"] = None
+        self._entries -= count
+        if not bucket["vectors"]:
+            del self._buckets[key]
+    
+    def _expire(self, key: tuple, bucket: Dict[str, Any]):
+        """Drop expired entries"""
+        cutoff = time.time() - self.ttl
+        expired = 0
+        while expired < len(bucket["created"]) and bucket["created"][expired] < cutoff:
+            expired += 1
+        if expired:
+            self._drop(key, bucket, expired)
+    
+    def get(self, embedding, channel: str, faq_version: str, context_key: str = "") -> Optional[Dict[str, Any]]:
+        """Return the cached answer for the most similar question above the threshold"""
+        query = self._normalize(embedding)
+        key = (channel, faq_version, context_key)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket:
+                self._expire(key, bucket)
+            if not bucket or not bucket["vectors"]:
+                self.misses += 1
+                return None
+            
+            if bucket["matrix"] is None:
+                bucket["matrix"] = np.vstack(bucket["vectors"])
+            similarities = bucket["matrix"] @ query
+            best_idx = int(np.argmax(similarities))
+            best_similarity = float(similarities[best_idx])
+            
+            if best_similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            result = dict(bucket["answers"][best_idx])
+        
+        result["cache_similarity"] = best_similarity
+        return result
+    
+    def set(self, embedding, channel: str, faq_version: str, result: Dict[str, Any], context_key: str = ""):
+        """Store a synthesized answer under its question embedding"""
+        key = (channel, faq_version, context_key)
+        with self._lock:
+            bucket = self._buckets.setdefault(
+                key,
+                {"vectors": [], "answers": [], "created": [], "matrix": None}
+            )
+            bucket["vectors"].append(self._normalize(embedding))
+            bucket["answers"].append(dict(result))
+            bucket["created"].append(time.time())
+            bucket["matrix"] = None
+            self._entries += 1
+            
+            # Evict the oldest entries across all buckets beyond capacity
+            while self._entries > self.max_entries:
+                oldest = min(self._buckets, key=lambda k: self._buckets[k]["created"][0])
+                self._drop(oldest, self._buckets[oldest], 1)
+    
+    def clear(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._buckets.clear()
+            self._entries = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit rate"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "buckets": len(self._buckets),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "similarity_threshold": self.similarity_threshold
+            }
+
+
 class FAQAgent:
     """Dedicated CrewAI agent for intelligent FAQ management and retrieval"""
     
     def __init__(self):
-        self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.semantic_model = embedding_service
         self.faq_cache = {}
-        self._load_faq_embeddings()
+        
+        # FAQ embeddings are computed on first search (see _refresh_if_stale); version, embeddings
+        # and entries are swapped as one tuple so that searches never see a half-loaded set
+        self._faq_index = (None, np.array([]), [])
+        self._reload_lock = threading.Lock()
+        
+        # Confidence thresholds for the tiered resolver
+        faq_config = config_system.get("faq", {})
+        self.direct_answer_threshold = faq_config.get("direct_answer_threshold", 0.9)
+        self.synthesis_threshold = faq_config.get("synthesis_threshold", 0.5)
+        self.direct_answer_template = faq_config.get("direct_answer_template", "{answer}")
+        
+        # Semantic cache for synthesized answers, invalidated when the FAQ set changes
+        self.answer_cache = SemanticAnswerCache(
+            similarity_threshold=faq_config.get("answer_cache_threshold", 0.92),
+            max_entries=faq_config.get("answer_cache_max_entries", 1000),
+            ttl=faq_config.get("answer_cache_ttl", 86400)
+        )
+        
+        # Per-tier hit counts and latency
+        self._tier_lock = threading.Lock()
+        self.tier_stats = {tier: {"count": 0, "total_latency": 0.0} for tier in FAQ_TIERS}
         
         # Create the FAQ specialist agent
         self.agent = Agent(
@@ -37,28 +191,57 @@ class FAQAgent:
             llm=llm
         )
     
-    def _load_faq_embeddings(self):
-        """Pre-compute embeddings for all FAQ entries for semantic search"""
+    @property
+    def faq_version(self) -> Optional[str]:
+        return self._faq_index[0]
+    
+    @property
+    def faq_embeddings(self) -> np.ndarray:
+        return self._faq_index[1]
+    
+    @property
+    def faq_data(self) -> List[Dict[str, Any]]:
+        return self._faq_index[2]
+    
+    def _load_faq_embeddings(self) -> bool:
+        """
+        Pre-compute embeddings for all FAQ entries for semantic search
+        
+        The new set replaces the current one only once it is fully encoded;
+        on failure the current set is kept and the next search tries again.
+        """
         try:
-            faqs = faq_manager.load_all_faqs()
-            self.faq_embeddings = []
-            self.faq_data = []
-            
-            for faq in faqs:
-                # Create a combined text for embedding
-                combined_text = f"{faq['question']} {faq['answer']} {faq.get('keywords', '')}"
-                embedding = self.semantic_model.encode(combined_text)
-                self.faq_embeddings.append(embedding)
-                self.faq_data.append(faq)
-            
-            self.faq_embeddings = np.array(self.faq_embeddings) if self.faq_embeddings else np.array([])
-            log_info(logger, f"Loaded {len(self.faq_data)} FAQ embeddings")
+            version = faq_manager.get_version()
+            faqs = list(faq_manager.load_all_faqs())
+            
+            # Encode all entries in one batch, using a combined text per entry
+            combined_texts = [
+                f"{faq['question']} {faq['answer']} {faq.get('keywords', '')}"
+                for faq in faqs
+            ]
+            embeddings = self.semantic_model.encode(combined_texts) if combined_texts else np.array([])
         except Exception as e:
             log_error(logger, "Error loading FAQ embeddings", e)
-            self.faq_embeddings = np.array([])
-            self.faq_data = []
+            return False
+        
+        self._faq_index = (version, embeddings, faqs)
+        log_info(logger, f"Loaded {len(faqs)} FAQ embeddings")
+        return True
+    
+    def _refresh_if_stale(self):
+        """Reload FAQ embeddings and drop cached answers when the FAQ set has changed"""
+        if faq_manager.get_version() == self.faq_version:
+            return
+        # Concurrent searches wait for one reload instead of each encoding the whole set
+        with self._reload_lock:
+            if faq_manager.get_version() == self.faq_version:
+                return
+            if self.faq_version is not None:
+                log_info(logger, "FAQ knowledge base changed, reloading embeddings and clearing answer cache")
+            if self._load_faq_embeddings():
+                self.answer_cache.clear()
     
-    def semantic_search(self, query: str, top_k: int = 5) -> List[Dict]:
+    def semantic_search(self, query: str, top_k: int = 5, query_embedding=None) -> List[Dict]:
         """
         Perform semantic search to find most relevant FAQ entries.
         
@@ -69,20 +252,25 @@ class FAQAgent:
         Args:
             query (str): The search query or question to find relevant FAQs for
             top_k (int, optional): Maximum number of results to return. Defaults to 5.
+            query_embedding (optional): Pre-computed embedding of the query, to
+                                        avoid encoding it again. Defaults to None.
             
         Returns:
             List[Dict]: List of relevant FAQ entries with similarity scores,
                         sorted by relevance (highest similarity first)
         """
-        if len(self.faq_embeddings) == 0:
+        self._refresh_if_stale()
+        _, faq_embeddings, faq_data = self._faq_index
+        if len(faq_embeddings) == 0:
             return []
         
         try:
             # Encode the query
-            query_embedding = self.semantic_model.encode(query)
+            if query_embedding is None:
+                query_embedding = self.semantic_model.encode(query)
             
             # Calculate cosine similarities
-            similarities = cosine_similarity([query_embedding], self.faq_embeddings)[0]
+            similarities = cosine_similarity([query_embedding], faq_embeddings)[0]
             
             # Get top-k most similar entries
             top_indices = similarities.argsort()[-top_k:][::-1]
@@ -90,7 +278,7 @@ class FAQAgent:
             results = []
             for idx in top_indices:
                 if similarities[idx] > 0.3:  # Threshold for relevance
-                    result = self.faq_data[idx].copy()
+                    result = faq_data[idx].copy()
                     result['similarity_score'] = float(similarities[idx])
                     results.append(result)
             
@@ -156,26 +344,149 @@ class FAQAgent:
                 "recommended_approach": "Provide direct answer"
             }
     
+    def classify_match(self, similarity: float) -> str:
+        """Map the best semantic search similarity to a resolution tier"""
+        if similarity >= self.direct_answer_threshold:
+            return "direct"
+        if similarity >= self.synthesis_threshold:
+            return "synthesis"
+        return "no_match"
+    
     def get_intelligent_answer(self, question: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Get an answer using the cheapest tier that can resolve the question.
+        
+        Strong FAQ matches are returned directly without any LLM call, mid-range
+        matches are served from the semantic answer cache or go through question
+        analysis and LLM synthesis, and weak matches short-circuit to the
+        "no specific information" answer.
+        
+        Args:
+            question (str): The prospect's question
+            context (Dict[str, Any], optional): Additional context for synthesis
+            
+        Returns:
+            Dict[str, Any]: Answer, confidence, sources, analysis and the tier used
+        """
+        start_time = time.time()
+        self._refresh_if_stale()
+        
+        try:
+            query_embedding = self.semantic_model.encode(question)
+        except Exception as e:
+            log_error(logger, "Error encoding question", e)
+            query_embedding = None
+        
+        relevant_faqs = self.semantic_search(question, top_k=5, query_embedding=query_embedding)
+        best_similarity = relevant_faqs[0]['similarity_score'] if relevant_faqs else 0.0
+        tier = self.classify_match(best_similarity)
+        
+        if tier == "direct":
+            result = self._direct_answer(question, relevant_faqs)
+        elif tier == "synthesis":
+            channel = (context or {}).get("channel", "default")
+            context_key = self.answer_cache.context_fingerprint(context)
+            cached = None
+            if query_embedding is not None:
+                cached = self.answer_cache.get(query_embedding, channel, self.faq_version, context_key)
+            
+            if cached is not None:
+                tier = "answer_cache"
+                result = cached
+                metrics_collector.increment_counter("faq_answer_cache_hit")
+            else:
+                result = self._synthesize_answer(question, context, relevant_faqs)
+                # Fallback answers (the LLM call failed) are returned but never cached
+                if not result.pop("fallback", False) and query_embedding is not None:
+                    self.answer_cache.set(query_embedding, channel, self.faq_version, result, context_key)
+        else:
+            result = {
+                "answer": NO_MATCH_ANSWER,
+                "confidence": 0.0,
+                "sources": [],
+                "analysis": {}
+            }
+        
+        result["tier"] = tier
+        self._record_tier(tier, time.time() - start_time)
+        return result
+    
+    def _direct_answer(self, question: str, relevant_faqs: List[Dict]) -> Dict[str, Any]:
+        """Answer straight from the best FAQ entry, optionally wrapped in a template"""
+        best_faq = relevant_faqs[0]
+        try:
+            answer = self.direct_answer_template.format(
+                answer=best_faq['answer'],
+                question=question,
+                faq_question=best_faq['question']
+            )
+        except (KeyError, IndexError, ValueError) as e:
+            log_warning(logger, f"Invalid direct answer template, using raw answer: {e}")
+            answer = best_faq['answer']
+        
+        return {
+            "answer": answer,
+            "confidence": min(0.95, best_faq['similarity_score']),
+            "sources": relevant_faqs[:3],
+            "analysis": {}
+        }
+    
+    def _record_tier(self, tier: str, latency: float):
+        """Record a tier hit and its latency"""
+        with self._tier_lock:
+            self.tier_stats[tier]["count"] += 1
+            self.tier_stats[tier]["total_latency"] += latency
+        metrics_collector.increment_counter(f"faq_tier_{tier}")
+        metrics_collector.record_timing(f"faq_tier_{tier}", latency)
+    
+    def get_tier_stats(self) -> Dict[str, Any]:
+        """Get hit rate and average latency for each resolution tier"""
+        with self._tier_lock:
+            total = sum(stats["count"] for stats in self.tier_stats.values())
+            tiers = {}
+            for tier, stats in self.tier_stats.items():
+                count = stats["count"]
+                tiers[tier] = {
+                    "count": count,
+                    "hit_rate": round(count / total, 4) if total else 0.0,
+                    "avg_latency_ms": round(stats["total_latency"] / count * 1000, 2) if count else 0.0
+                }
+        
+        return {
+            "total_requests": total,
+            "tiers": tiers,
+            "thresholds": {
+                "direct_answer": self.direct_answer_threshold,
+                "synthesis": self.synthesis_threshold
+            },
+            "answer_cache": self.answer_cache.get_stats()
+        }
+    
+    def _synthesize_answer(self, question: str, context: Dict[str, Any],
+                           relevant_faqs: List[Dict]) -> Dict[str, Any]:
         """Get intelligent answer combining semantic search and LLM reasoning"""
         
         # Analyze the question
         analysis = self.analyze_question(question, context)
         
-        # Perform semantic search
-        relevant_faqs = self.semantic_search(question, top_k=5)
-        
         # Also search for implicit concerns
         all_relevant = relevant_faqs.copy()
-        for concern in analysis.get('implicit_concerns', []):
-            implicit_results = self.semantic_search(concern, top_k=3)
+        concerns = [c for c in analysis.get('implicit_concerns', []) if isinstance(c, str) and c]
+        try:
+            # Encode all concerns in one batch rather than one model call each
+            concern_embeddings = self.semantic_model.encode(concerns) if concerns else []
+        except Exception as e:
+            log_error(logger, "Error encoding implicit concerns", e)
+            concern_embeddings = [None] * len(concerns)
+        for concern, concern_embedding in zip(concerns, concern_embeddings):
+            implicit_results = self.semantic_search(concern, top_k=3, query_embedding=concern_embedding)
             for result in implicit_results:
                 if result not in all_relevant:
                     all_relevant.append(result)
         
         if not all_relevant:
             return {
-                "answer": "I don't have specific information about that in our FAQ database. Please contact our team for a personalized response.",
+                "answer": NO_MATCH_ANSWER,
                 "confidence": 0.0,
                 "sources": [],
                 "analysis": analysis
@@ -269,14 +580,16 @@ class FAQAgent:
                     "answer": best_faq['answer'],
                     "confidence": best_faq['similarity_score'],
                     "sources": all_relevant[:3],
-                    "analysis": analysis
+                    "analysis": analysis,
+                    "fallback": True
                 }
             else:
                 return {
-                    "answer": "I don't have specific information about that in our FAQ database. Please contact our team for a personalized response.",
+                    "answer": NO_MATCH_ANSWER,
                     "confidence": 0.0,
                     "sources": [],
-                    "analysis": analysis
+                    "analysis": analysis,
+                    "fallback": True
                 }
     
     def suggest_new_faqs(self, unanswered_questions: List[str]) -> List[Dict[str, str]]:
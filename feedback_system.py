@@ -6,6 +6,7 @@ of AI workflow outputs. It provides functionality for rating outputs, collecting
 detailed feedback, and using that feedback to improve future performance.
 """
 
+import asyncio
 import json
 import logging
 import time
@@ -15,9 +16,11 @@ from enum import Enum
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 
-from database import get_database_manager
+from database import bind_positional, get_database_manager
+from metrics_rollup import Measurement, feedback_measurements
 from sqlalchemy import text
 from logging_config import log_info, log_warning, log_debug, log_error
+from pagination import CursorPage, KeysetPaginator, decode_cursor, encode_cursor
 from config_system import config_system
 from cache import cache_result
 
@@ -96,6 +99,7 @@ class DatabaseAdapter:
     
     def execute(self, sql, params=None):
         """Execute SQL statement"""
+        sql, params = bind_positional(sql, params)
         try:
             with self.db_manager.get_session() as session:
                 if params:
@@ -109,6 +113,7 @@ class DatabaseAdapter:
     
     def fetch_one(self, sql, params=None):
         """Fetch one row from SQL query"""
+        sql, params = bind_positional(sql, params)
         try:  
             with self.db_manager.get_session() as session:
                 if params:
@@ -123,6 +128,7 @@ class DatabaseAdapter:
     
     def fetch_all(self, sql, params=None):
         """Fetch all rows from SQL query"""
+        sql, params = bind_positional(sql, params)
         try:
             with self.db_manager.get_session() as session:
                 if params:
@@ -133,6 +139,22 @@ class DatabaseAdapter:
         except Exception as e:
             log_error(logger, f"Database fetch_all error: {e}")
             return []
+    
+    async def execute_async(self, sql, params=None):
+        """Execute SQL statement without blocking the event loop"""
+        try:
+            await self.db_manager.execute_async(sql, params)
+        except Exception as e:
+            log_error(logger, f"Database execute error: {e}")
+            raise
+    
+    async def fetch_all_async(self, sql, params=None):
+        """Fetch all rows from SQL query without blocking the event loop"""
+        try:
+            return await self.db_manager.fetch_all_async(sql, params)
+        except Exception as e:
+            log_error(logger, f"Database fetch_all error: {e}")
+            return []
 
 
 class FeedbackSystem:
@@ -140,6 +162,7 @@ class FeedbackSystem:
     
     def __init__(self):
         self.db_manager = DatabaseAdapter()
+        self.rollups = self.db_manager.db_manager.rollups
         self.config = self._load_config()
         
         # Initialize database tables
@@ -253,6 +276,17 @@ class FeedbackSystem:
                 ON feedback_entries(rating)
             """)
             
+            # Keyset pagination of the workflow and pending-review lists
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_feedback_workflow_created_at_id 
+                ON feedback_entries(workflow_id, created_at, id)
+            """)
+            
+            self.db_manager.execute("""
+                CREATE INDEX IF NOT EXISTS idx_feedback_status_created_at_id 
+                ON feedback_entries(status, created_at, id)
+            """)
+            
             log_info(logger, "Feedback system database initialized")
             
         except Exception as e:
@@ -346,6 +380,14 @@ class FeedbackSystem:
                 feedback.status.value,
                 feedback.created_at.isoformat()
             ))
+            self.rollups.record(feedback_measurements({
+                "workflow_id": feedback.workflow_id,
+                "feedback_type": feedback.feedback_type.value,
+                "rating": feedback.rating,
+                "suggested_improvement": feedback.suggested_improvement,
+                "status": feedback.status.value,
+                "created_at": feedback.created_at
+            }))
             
             # Perform automatic analysis if enabled
             if self.config.get("enable_auto_analysis", True):
@@ -358,6 +400,15 @@ class FeedbackSystem:
             log_error(logger, f"Failed to submit feedback: {e}")
             raise
     
+    async def submit_feedback_async(self, *args, **kwargs) -> str:
+        """
+        Submit feedback without blocking the event loop
+        
+        Submission also runs the automatic analysis, so the whole call is
+        offloaded to a worker thread.
+        """
+        return await asyncio.to_thread(self.submit_feedback, *args, **kwargs)
+    
     def _analyze_feedback_async(self, feedback_id: str):
         """Perform asynchronous feedback analysis"""
         try:
@@ -553,112 +604,113 @@ class FeedbackSystem:
             log_error(logger, f"Failed to get feedback for execution {execution_id}: {e}")
             return []
     
+    def _row_to_entry(self, row: Dict[str, Any]) -> FeedbackEntry:
+        """Convert a feedback_entries row into a FeedbackEntry"""
+        return FeedbackEntry(
+            id=row['id'],
+            execution_id=row['execution_id'],
+            workflow_id=row['workflow_id'],
+            feedback_type=FeedbackType(row['feedback_type']),
+            source=FeedbackSource(row['source']),
+            user_id=row['user_id'],
+            rating=row['rating'],
+            content=row['content'],
+            suggested_improvement=row['suggested_improvement'],
+            original_output=row['original_output'],
+            improved_output=row['improved_output'],
+            metadata=json.loads(row['metadata']) if row['metadata'] else None,
+            status=FeedbackStatus(row['status']),
+            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
+            reviewed_at=datetime.fromisoformat(row['reviewed_at']) if row['reviewed_at'] else None,
+            reviewed_by=row['reviewed_by'],
+            implementation_notes=row['implementation_notes']
+        )
+    
+    def _feedback_page_query(self, where: str, params: Dict[str, Any], page_size: int,
+                             cursor_values: Optional[List[Any]], descending: bool) -> Tuple[str, Dict[str, Any]]:
+        """Build the keyset query for one page of feedback entries ordered by (created_at, id)"""
+        conditions = [where]
+        params = {**params, "limit": page_size + 1}
+        if cursor_values:
+            keyset, keyset_params = KeysetPaginator.keyset_sql(
+                ["created_at", "id"], cursor_values, descending=descending
+            )
+            conditions.append(keyset)
+            params.update(keyset_params)
+        
+        order = "DESC" if descending else "ASC"
+        return f"""
+            SELECT * FROM feedback_entries 
+            WHERE {" AND ".join(conditions)}
+            ORDER BY created_at {order}, id {order}
+            LIMIT :limit
+        """, params
+    
+    def _build_feedback_page(self, rows: List[Dict[str, Any]], page_size: int) -> CursorPage:
+        """Turn page_size + 1 fetched rows into a page and its next cursor"""
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor([rows[-1]['created_at'], rows[-1]['id']])
+        
+        return CursorPage(items=[self._row_to_entry(row) for row in rows],
+                          page_size=page_size, next_cursor=next_cursor)
+    
     def get_feedback_for_workflow(self, workflow_id: str, limit: int = 100) -> List[FeedbackEntry]:
         """Get feedback for a specific workflow"""
+        return self.get_feedback_for_workflow_page(workflow_id, page_size=limit).items
+    
+    def get_feedback_for_workflow_page(self, workflow_id: str, page_size: int = 100,
+                                       cursor: Optional[str] = None) -> CursorPage:
+        """Get one page of feedback for a workflow, newest first"""
+        cursor_values = decode_cursor(cursor, expected_length=2) if cursor else None
         try:
-            rows = self.db_manager.fetch_all("""
-                SELECT * FROM feedback_entries 
-                WHERE workflow_id = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            """, (workflow_id, limit))
-            
-            feedback_list = []
-            for row in rows:
-                feedback = FeedbackEntry(
-                    id=row['id'],
-                    execution_id=row['execution_id'],
-                    workflow_id=row['workflow_id'],
-                    feedback_type=FeedbackType(row['feedback_type']),
-                    source=FeedbackSource(row['source']),
-                    user_id=row['user_id'],
-                    rating=row['rating'],
-                    content=row['content'],
-                    suggested_improvement=row['suggested_improvement'],
-                    original_output=row['original_output'],
-                    improved_output=row['improved_output'],
-                    metadata=json.loads(row['metadata']) if row['metadata'] else None,
-                    status=FeedbackStatus(row['status']),
-                    created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
-                    reviewed_at=datetime.fromisoformat(row['reviewed_at']) if row['reviewed_at'] else None,
-                    reviewed_by=row['reviewed_by'],
-                    implementation_notes=row['implementation_notes']
-                )
-                feedback_list.append(feedback)
-            
-            return feedback_list
-            
+            sql, params = self._feedback_page_query(
+                "workflow_id = :workflow_id", {"workflow_id": workflow_id},
+                page_size, cursor_values, descending=True
+            )
+            return self._build_feedback_page(self.db_manager.fetch_all(sql, params), page_size)
         except Exception as e:
             log_error(logger, f"Failed to get feedback for workflow {workflow_id}: {e}")
-            return []
+            return CursorPage(items=[], page_size=page_size)
+    
+    async def get_feedback_for_workflow_page_async(self, workflow_id: str, page_size: int = 100,
+                                                   cursor: Optional[str] = None) -> CursorPage:
+        """Async counterpart of get_feedback_for_workflow_page"""
+        cursor_values = decode_cursor(cursor, expected_length=2) if cursor else None
+        try:
+            sql, params = self._feedback_page_query(
+                "workflow_id = :workflow_id", {"workflow_id": workflow_id},
+                page_size, cursor_values, descending=True
+            )
+            return self._build_feedback_page(await self.db_manager.fetch_all_async(sql, params), page_size)
+        except Exception as e:
+            log_error(logger, f"Failed to get feedback for workflow {workflow_id}: {e}")
+            return CursorPage(items=[], page_size=page_size)
     
     @cache_result(key_prefix="feedback_summary", ttl=300)
     def get_feedback_summary(self, workflow_id: Optional[str] = None, days: int = 30) -> FeedbackSummary:
         """Get comprehensive feedback summary"""
         try:
             since_date = datetime.now() - timedelta(days=days)
+            rollups = self.rollups
             
-            # Base query conditions
-            where_conditions = ["created_at > ?"]
-            params = [since_date.isoformat()]
+            # Totals and breakdowns are summed from the feedback rollup buckets
+            type_results = rollups.query("feedback.entries", since_date, group_by=["label"], workflow_id=workflow_id)
+            feedback_by_type = {r['label']: r['sample_count'] for r in type_results}
+            total_feedback = sum(feedback_by_type.values())
             
-            if workflow_id:
-                where_conditions.append("workflow_id = ?")
-                params.append(workflow_id)
-            
-            where_clause = " AND ".join(where_conditions)
-            
-            # Total feedback count
-            total_result = self.db_manager.fetch_one(f"""
-                SELECT COUNT(*) as total FROM feedback_entries WHERE {where_clause}
-            """, params)
-            total_feedback = total_result['total'] if total_result else 0
-            
-            # Average rating
-            rating_result = self.db_manager.fetch_one(f"""
-                SELECT AVG(rating) as avg_rating FROM feedback_entries 
-                WHERE {where_clause} AND rating IS NOT NULL
-            """, params)
-            average_rating = rating_result['avg_rating'] if rating_result and rating_result['avg_rating'] else 0.0
-            
-            # Rating distribution
-            rating_dist_results = self.db_manager.fetch_all(f"""
-                SELECT rating, COUNT(*) as count FROM feedback_entries 
-                WHERE {where_clause} AND rating IS NOT NULL
-                GROUP BY rating
-            """, params)
-            rating_distribution = {r['rating']: r['count'] for r in rating_dist_results}
-            
-            # Feedback by type
-            type_results = self.db_manager.fetch_all(f"""
-                SELECT feedback_type, COUNT(*) as count FROM feedback_entries 
-                WHERE {where_clause}
-                GROUP BY feedback_type
-            """, params)
-            feedback_by_type = {r['feedback_type']: r['count'] for r in type_results}
+            rating_results = rollups.query("feedback.rating", since_date, group_by=["label"], workflow_id=workflow_id)
+            rating_distribution = {int(r['label']): r['sample_count'] for r in rating_results}
+            rating_count = sum(rating_distribution.values())
+            average_rating = sum(r['value_sum'] for r in rating_results) / rating_count if rating_count else 0.0
             
             # Recent feedback (last 7 days)
-            recent_date = datetime.now() - timedelta(days=7)
-            recent_params = params + [recent_date.isoformat()]
-            recent_result = self.db_manager.fetch_one(f"""
-                SELECT COUNT(*) as count FROM feedback_entries 
-                WHERE {where_clause} AND created_at > ?
-            """, recent_params)
-            recent_feedback_count = recent_result['count'] if recent_result else 0
-            
-            # Improvement suggestions
-            improvement_result = self.db_manager.fetch_one(f"""
-                SELECT COUNT(*) as count FROM feedback_entries 
-                WHERE {where_clause} AND suggested_improvement IS NOT NULL
-            """, params)
-            improvement_suggestions = improvement_result['count'] if improvement_result else 0
+            recent_date = max(since_date, datetime.now() - timedelta(days=7))
+            recent_feedback_count = rollups.total("feedback.entries", recent_date, workflow_id=workflow_id)['sample_count']
             
-            # Implemented improvements
-            implemented_result = self.db_manager.fetch_one(f"""
-                SELECT COUNT(*) as count FROM feedback_entries 
-                WHERE {where_clause} AND status = 'implemented'
-            """, params)
-            implemented_improvements = implemented_result['count'] if implemented_result else 0
+            improvement_suggestions = rollups.total("feedback.suggestions", since_date, workflow_id=workflow_id)['sample_count']
+            implemented_improvements = rollups.total("feedback.implemented", since_date, workflow_id=workflow_id)['sample_count']
             
             # Common issues (from analysis)
             common_issues = self._get_common_issues(workflow_id, days)
@@ -737,25 +789,22 @@ class FeedbackSystem:
         try:
             since_date = datetime.now() - timedelta(days=days)
             
-            results = self.db_manager.fetch_all("""
-                SELECT 
-                    workflow_id,
-                    COUNT(*) as feedback_count,
-                    AVG(rating) as avg_rating,
-                    COUNT(CASE WHEN rating <= 2 THEN 1 END) as negative_feedback
-                FROM feedback_entries 
-                WHERE created_at > ?
-                GROUP BY workflow_id
-                ORDER BY feedback_count DESC
-                LIMIT 10
-            """, (since_date.isoformat(),))
-            
-            return [{
-                'workflow_id': r['workflow_id'],
-                'feedback_count': r['feedback_count'],
-                'average_rating': float(r['avg_rating']) if r['avg_rating'] else 0.0,
-                'negative_feedback_count': r['negative_feedback']
-            } for r in results]
+            counts = self.rollups.query("feedback.entries", since_date, group_by=["workflow_id"])
+            ratings = {}
+            for r in self.rollups.query("feedback.rating", since_date, group_by=["workflow_id", "label"]):
+                ratings.setdefault(r['workflow_id'], []).append(r)
+            
+            top_workflows = []
+            for r in sorted(counts, key=lambda r: r['sample_count'], reverse=True)[:10]:
+                workflow_ratings = ratings.get(r['workflow_id'], [])
+                rated = sum(v['sample_count'] for v in workflow_ratings)
+                top_workflows.append({
+                    'workflow_id': r['workflow_id'],
+                    'feedback_count': r['sample_count'],
+                    'average_rating': sum(v['value_sum'] for v in workflow_ratings) / rated if rated else 0.0,
+                    'negative_feedback_count': sum(v['sample_count'] for v in workflow_ratings if int(v['label']) <= 2)
+                })
+            return top_workflows
             
         except Exception as e:
             log_error(logger, f"Failed to get top workflows: {e}")
@@ -766,6 +815,9 @@ class FeedbackSystem:
                               implementation_notes: Optional[str] = None) -> bool:
         """Update feedback status"""
         try:
+            previous = self.db_manager.fetch_one(
+                "SELECT workflow_id, status, created_at FROM feedback_entries WHERE id = ?", (feedback_id,)
+            )
             self.db_manager.execute("""
                 UPDATE feedback_entries 
                 SET status = ?, reviewed_at = ?, reviewed_by = ?, implementation_notes = ?
@@ -778,6 +830,15 @@ class FeedbackSystem:
                 feedback_id
             ))
             
+            # Keep the implemented count in the rollups in step with status transitions
+            if previous and (previous['status'] == 'implemented') != (status == FeedbackStatus.IMPLEMENTED):
+                row = dict(previous, status='implemented')
+                delta = 1 if status == FeedbackStatus.IMPLEMENTED else -1
+                self.rollups.record([
+                    Measurement(m.metric, m.timestamp, sample_count=delta, workflow_id=m.workflow_id)
+                    for m in feedback_measurements(row) if m.metric == "feedback.implemented"
+                ])
+            
             log_info(logger, f"Updated feedback {feedback_id} status to {status.value}")
             return True
             
@@ -787,42 +848,31 @@ class FeedbackSystem:
     
     def get_pending_feedback(self, limit: int = 50) -> List[FeedbackEntry]:
         """Get feedback entries that need review"""
+        return self.get_pending_feedback_page(page_size=limit).items
+    
+    def get_pending_feedback_page(self, page_size: int = 50, cursor: Optional[str] = None) -> CursorPage:
+        """Get one page of feedback entries that need review, oldest first"""
+        cursor_values = decode_cursor(cursor, expected_length=2) if cursor else None
         try:
-            rows = self.db_manager.fetch_all("""
-                SELECT * FROM feedback_entries 
-                WHERE status = 'pending'
-                ORDER BY created_at ASC
-                LIMIT ?
-            """, (limit,))
-            
-            feedback_list = []
-            for row in rows:
-                feedback = FeedbackEntry(
-                    id=row['id'],
-                    execution_id=row['execution_id'],
-                    workflow_id=row['workflow_id'],
-                    feedback_type=FeedbackType(row['feedback_type']),
-                    source=FeedbackSource(row['source']),
-                    user_id=row['user_id'],
-                    rating=row['rating'],
-                    content=row['content'],
-                    suggested_improvement=row['suggested_improvement'],
-                    original_output=row['original_output'],
-                    improved_output=row['improved_output'],
-                    metadata=json.loads(row['metadata']) if row['metadata'] else None,
-                    status=FeedbackStatus(row['status']),
-                    created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
-                    reviewed_at=datetime.fromisoformat(row['reviewed_at']) if row['reviewed_at'] else None,
-                    reviewed_by=row['reviewed_by'],
-                    implementation_notes=row['implementation_notes']
-                )
-                feedback_list.append(feedback)
-            
-            return feedback_list
-            
+            sql, params = self._feedback_page_query(
+                "status = 'pending'", {}, page_size, cursor_values, descending=False
+            )
+            return self._build_feedback_page(self.db_manager.fetch_all(sql, params), page_size)
         except Exception as e:
             log_error(logger, f"Failed to get pending feedback: {e}")
-            return []
+            return CursorPage(items=[], page_size=page_size)
+    
+    async def get_pending_feedback_page_async(self, page_size: int = 50, cursor: Optional[str] = None) -> CursorPage:
+        """Async counterpart of get_pending_feedback_page"""
+        cursor_values = decode_cursor(cursor, expected_length=2) if cursor else None
+        try:
+            sql, params = self._feedback_page_query(
+                "status = 'pending'", {}, page_size, cursor_values, descending=False
+            )
+            return self._build_feedback_page(await self.db_manager.fetch_all_async(sql, params), page_size)
+        except Exception as e:
+            log_error(logger, f"Failed to get pending feedback: {e}")
+            return CursorPage(items=[], page_size=page_size)
 
 
 # Create singleton instance
@@ -859,4 +909,22 @@ def update_feedback_status(feedback_id: str, status: FeedbackStatus,
 
 def get_pending_feedback(limit: int = 50) -> List[FeedbackEntry]:
     """Get pending feedback entries"""
-    return feedback_system.get_pending_feedback(limit)
\ No newline at end of file
+    return feedback_system.get_pending_feedback(limit)
+
+
+def get_pending_feedback_page(page_size: int = 50, cursor: Optional[str] = None) -> CursorPage:
+    """Get one page of pending feedback entries"""
+    return feedback_system.get_pending_feedback_page(page_size, cursor)
+
+
+async def submit_feedback_async(execution_id: str, workflow_id: str, feedback_type: FeedbackType,
+                                source: FeedbackSource, **kwargs) -> str:
+    """Submit feedback entry without blocking the event loop"""
+    return await feedback_system.submit_feedback_async(
+        execution_id, workflow_id, feedback_type, source, **kwargs
+    )
+
+
+async def get_pending_feedback_page_async(page_size: int = 50, cursor: Optional[str] = None) -> CursorPage:
+    """Get one page of pending feedback entries without blocking the event loop"""
+    return await feedback_system.get_pending_feedback_page_async(page_size, cursor)
@@ -18,7 +18,7 @@ from datetime import datetime
 LOG_LEVEL = os.environ.get("CREWAI_LOGGING_LEVEL", "INFO").upper()
 LOG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
-LOG_FILE = os.path.join('logs', f'app_{datetime.now().strftime("%Y%m%d")}.log')
+LOG_FILE = os.environ.get("CREWAI_LOGGING_FILE", os.path.join('logs', f'app_{datetime.now().strftime("%Y%m%d")}.log'))
 MAX_BYTES = 10485760  # 10MB
 BACKUP_COUNT = 10
 
@@ -47,6 +47,9 @@ def configure_logging(config_system=None):
     if isinstance(LOG_LEVEL, str):
         LOG_LEVEL = LOG_LEVEL.upper()
     
+    # Create logs directory if it doesn't exist; the file handler opens the log right away
+    os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+    
     logging.config.dictConfig({
         'version': 1,
         'disable_existing_loggers': False,
@@ -80,9 +83,6 @@ def configure_logging(config_system=None):
             },
         },
     })
-
-    # Create logs directory if it doesn't exist
-    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
     
     # Log startup message
     logging.getLogger(__name__).info(f"Logging system initialized with level {LOG_LEVEL}")
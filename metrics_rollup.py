@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained metric rollups for the dashboard summaries.
+
+Every observability, evaluation, feedback and agent-performance row adds its
+measurements to per-minute and per-day buckets keyed by workflow, agent,
+model and channel. Summaries then sum buckets instead of aggregating the
+source tables, so a dashboard read costs O(buckets) rather than O(rows).
+
+Usage (rebuild the rollups from the source tables):
+    python metrics_rollup.py --backfill [--source all|observability|evaluation|feedback|agent]
+"""
+
+import argparse
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, and_, func, inspect, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from logging_config import log_info
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("minute", "day")
+DIMENSIONS = ("workflow_id", "agent_id", "model_name", "channel", "label")
+SOURCES = ("observability", "evaluation", "feedback", "agent")
+
+
+@dataclass
+class Measurement:
+    """One contribution to a rollup bucket"""
+    metric: str
+    timestamp: datetime
+    sample_count: int = 1
+    value_sum: float = 0.0
+    workflow_id: str = ""
+    agent_id: str = ""
+    model_name: str = ""
+    channel: str = ""
+    label: str = ""
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its minute or day"""
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(second=0, microsecond=0)
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    """Accept datetimes and the ISO / CURRENT_TIMESTAMP strings stored by the raw-SQL tables"""
+    if isinstance(value, datetime):
+        return value
+    if value:
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", ""))
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+# Measurements per source row
+
+def observability_measurements(row: Dict[str, Any]) -> List[Measurement]:
+    """Executions, errors, duration and cache usage from an observability_metrics row"""
+    timestamp = _parse_timestamp(row.get("timestamp"))
+    workflow_id = row.get("workflow_id") or ""
+    measurements = [Measurement("observability.executions", timestamp, workflow_id=workflow_id)]
+    if row.get("duration_ms") is not None:
+        measurements.append(Measurement("observability.duration_ms", timestamp,
+                                        value_sum=float(row["duration_ms"]), workflow_id=workflow_id))
+    if (row.get("error_count") or 0) > 0:
+        measurements.append(Measurement("observability.errors", timestamp, workflow_id=workflow_id))
+    hits, misses = row.get("cache_hits") or 0, row.get("cache_misses") or 0
+    if hits or misses:
+        # sample_count counts lookups, value_sum counts hits
+        measurements.append(Measurement("observability.cache", timestamp, sample_count=hits + misses,
+                                        value_sum=float(hits), workflow_id=workflow_id))
+    return measurements
+
+
+def evaluation_measurements(row: Dict[str, Any]) -> List[Measurement]:
+    """Quality score from an evaluation_history row"""
+    return [Measurement(
+        "evaluation.quality_score", _parse_timestamp(row.get("timestamp")),
+        value_sum=float(row.get("quality_score") or 0),
+        workflow_id=row.get("workflow_id") or "", channel=row.get("channel") or ""
+    )]
+
+
+def feedback_measurements(row: Dict[str, Any]) -> List[Measurement]:
+    """Entries by type, ratings, suggestions and implemented status from a feedback_entries row"""
+    timestamp = _parse_timestamp(row.get("created_at"))
+    workflow_id = row.get("workflow_id") or ""
+    measurements = [Measurement("feedback.entries", timestamp, workflow_id=workflow_id,
+                                label=row.get("feedback_type") or "")]
+    if row.get("rating") is not None:
+        measurements.append(Measurement("feedback.rating", timestamp, value_sum=float(row["rating"]),
+                                        workflow_id=workflow_id, label=str(row["rating"])))
+    if row.get("suggested_improvement") is not None:
+        measurements.append(Measurement("feedback.suggestions", timestamp, workflow_id=workflow_id))
+    if row.get("status") == "implemented":
+        measurements.append(Measurement("feedback.implemented", timestamp, workflow_id=workflow_id))
+    return measurements
+
+
+def agent_measurements(row: Dict[str, Any]) -> List[Measurement]:
+    """Execution time, success, quality and cost from an agent_performance row"""
+    timestamp = _parse_timestamp(row.get("timestamp"))
+    keys = {"agent_id": row.get("agent_id") or "", "model_name": row.get("model_name") or ""}
+    measurements = [Measurement("agent.executions", timestamp,
+                                value_sum=float(row.get("execution_time") or 0), **keys)]
+    if row.get("success"):
+        measurements.append(Measurement("agent.successes", timestamp, **keys))
+        if row.get("quality_score") is not None:
+            measurements.append(Measurement("agent.quality", timestamp,
+                                            value_sum=float(row["quality_score"]), **keys))
+    if row.get("cost") is not None:
+        measurements.append(Measurement("agent.cost", timestamp, value_sum=float(row["cost"]), **keys))
+    return measurements
+
+
+SOURCE_TABLES = {
+    "observability": ("observability_metrics", "timestamp", "observability.", observability_measurements),
+    "evaluation": ("evaluation_history", "timestamp", "evaluation.", evaluation_measurements),
+    "feedback": ("feedback_entries", "created_at", "feedback.", feedback_measurements),
+    "agent": ("agent_performance", "timestamp", "agent.", agent_measurements),
+}
+
+
+class MetricRollups:
+    """Record measurements into rollup buckets and read summaries back"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.table = db_manager.metric_rollups_table
+
+    def record(self, measurements: Iterable[Measurement], session=None):
+        """
+        Add measurements to their minute and day buckets
+
+        Pass the session that inserted the source row to update the rollups
+        in the same transaction.
+        """
+        rows = self._bucket_rows(measurements)
+        if not rows:
+            return
+        if session is not None:
+            self._upsert(session, rows)
+            return
+        with self.db_manager.get_session() as own_session:
+            self._upsert(own_session, rows)
+
+    def _bucket_rows(self, measurements: Iterable[Measurement]) -> List[Dict[str, Any]]:
+        """Expand measurements to both granularities, merging those that land in the same bucket"""
+        merged = defaultdict(lambda: [0, 0.0])
+        for measurement in measurements:
+            for granularity in GRANULARITIES:
+                key = (measurement.metric, granularity, bucket_start(measurement.timestamp, granularity),
+                       *(getattr(measurement, dimension) for dimension in DIMENSIONS))
+                merged[key][0] += measurement.sample_count
+                merged[key][1] += measurement.value_sum
+        return [
+            {"metric": key[0], "granularity": key[1], "bucket_start": key[2],
+             **dict(zip(DIMENSIONS, key[3:])), "sample_count": totals[0], "value_sum": totals[1]}
+            for key, totals in merged.items()
+        ]
+
+    def _upsert(self, session, rows: List[Dict[str, Any]]):
+        """Insert new buckets and add to existing ones in one statement"""
+        dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(self.table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["metric", "granularity", "bucket_start", *DIMENSIONS],
+            set_={
+                "sample_count": self.table.c.sample_count + stmt.excluded.sample_count,
+                "value_sum": self.table.c.value_sum + stmt.excluded.value_sum
+            }
+        )
+        session.execute(stmt, rows)
+
+    def query(self, metric: str, since: Optional[datetime] = None, group_by: Sequence[str] = (),
+              granularity: Optional[str] = None, session=None, **filters) -> List[Dict[str, Any]]:
+        """
+        Sum a metric's buckets, optionally grouped by dimensions or bucket
+
+        Args:
+            metric: Metric name, e.g. "feedback.rating"
+            since: Only measurements at or after this minute; None for all time
+            group_by: Dimension names, and/or "bucket_start" to get a series
+            granularity: Force "minute" or "day" buckets (needed with group_by bucket_start)
+            session: Session to read with; a new one is opened by default
+            **filters: Dimension equality filters, e.g. workflow_id="..."
+
+        Returns:
+            List[Dict[str, Any]]: One row per group with sample_count and value_sum
+        """
+        table = self.table
+        conditions = [table.c.metric == metric]
+        if granularity:
+            conditions.append(table.c.granularity == granularity)
+            if since is not None:
+                conditions.append(table.c.bucket_start >= bucket_start(since, granularity))
+        elif since is None:
+            conditions.append(table.c.granularity == "day")
+        else:
+            # Minute buckets up to the first whole day, day buckets from there on
+            first_day = bucket_start(since, "day")
+            if first_day < since:
+                first_day += timedelta(days=1)
+            conditions.append(or_(
+                and_(table.c.granularity == "day", table.c.bucket_start >= first_day),
+                and_(table.c.granularity == "minute",
+                     table.c.bucket_start >= bucket_start(since, "minute"),
+                     table.c.bucket_start < first_day)
+            ))
+        for dimension, value in filters.items():
+            if value is not None:
+                conditions.append(table.c[dimension] == value)
+
+        group_columns = [table.c[name] for name in group_by]
+        stmt = select(
+            *group_columns,
+            func.coalesce(func.sum(table.c.sample_count), 0).label("sample_count"),
+            func.coalesce(func.sum(table.c.value_sum), 0).label("value_sum"),
+        ).where(and_(*conditions))
+        if group_columns:
+            stmt = stmt.group_by(*group_columns)
+
+        if session is not None:
+            return [dict(row._mapping) for row in session.execute(stmt)]
+        with self.db_manager.get_session() as own_session:
+            return [dict(row._mapping) for row in own_session.execute(stmt)]
+
+    def total(self, metric: str, since: Optional[datetime] = None, **filters) -> Dict[str, float]:
+        """Sum a metric over all its buckets; returns sample_count and value_sum"""
+        rows = self.query(metric, since, **filters)
+        return rows[0] if rows else {"sample_count": 0, "value_sum": 0.0}
+
+    def last_bucket(self, metric: str, **filters) -> Optional[datetime]:
+        """Start of the most recent minute bucket of a metric"""
+        table = self.table
+        conditions = [table.c.metric == metric, table.c.granularity == "minute"]
+        conditions += [table.c[dimension] == value for dimension, value in filters.items()]
+        with self.db_manager.get_session() as session:
+            return session.execute(select(func.max(table.c.bucket_start)).where(and_(*conditions))).scalar()
+
+    def backfill(self, sources: Sequence[str] = SOURCES, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Rebuild the rollups of the given sources from their tables
+
+        Existing buckets of those sources are cleared first, so the command is
+        safe to re-run, from the first day fully covered by raw rows (see
+        _rebuild_from); earlier buckets are kept, as retention has compacted
+        some of their rows away. Source tables that do not exist yet are
+        skipped.
+
+        The buckets are cleared, and a high-water mark of the table's position
+        key taken, in one transaction that holds off the table's writers. The
+        scan then reads rows up to the mark only: rows saved later record
+        their own measurements, so none is counted twice. A key that does not
+        grow with inserts (a text UUID id outside SQLite) gives no mark, so
+        the whole rebuild runs in that transaction instead.
+
+        Returns:
+            Dict[str, int]: Rows read per source
+        """
+        existing_tables = set(inspect(self.db_manager.engine).get_table_names())
+        processed = {}
+        for source in sources:
+            table_name, time_column, prefix, measure = SOURCE_TABLES[source]
+            if table_name not in existing_tables:
+                continue
+
+            key, ordered = self._position_key(table_name)
+            count, until = 0, None
+            with self.db_manager.get_session() as session:
+                start = self._rebuild_from(session, table_name, time_column)
+                if start is not None:
+                    if session.get_bind().dialect.name == "postgresql":
+                        # Wait for open inserts and hold off new ones until this transaction ends
+                        session.execute(text(f"LOCK TABLE {table_name} IN SHARE MODE"))
+                    session.execute(self.table.delete().where(and_(
+                        self.table.c.metric.like(f"{prefix}%"),
+                        self.table.c.bucket_start >= start
+                    )))
+                    if ordered:
+                        until = session.execute(text(f"SELECT MAX({key}) FROM {table_name}")).scalar()
+                    else:
+                        count = self._rebuild(table_name, time_column, measure, key, start, batch_size,
+                                              session=session)
+            if until is not None:
+                count = self._rebuild(table_name, time_column, measure, key, start, batch_size, until=until)
+
+            processed[source] = count
+            log_info(logger, f"Backfilled {source} rollups from {count} rows")
+        return processed
+
+    def _position_key(self, table_name: str) -> Tuple[str, bool]:
+        """Column to page a source table by, and whether it grows with every insert"""
+        if self.db_manager.config.db_type == "sqlite":
+            return "rowid", True
+        id_column = next(column for column in inspect(self.db_manager.engine).get_columns(table_name)
+                         if column["name"] == "id")
+        return "id", isinstance(id_column["type"], Integer)
+
+    def _rebuild_from(self, session, table_name: str, time_column: str) -> Optional[datetime]:
+        """
+        Start of the first day bucket fully covered by the table's raw rows; None without rows
+
+        That is the day of the oldest row, unless retention has compacted
+        partitions of the table up to a later day boundary.
+        """
+        oldest = session.execute(text(f"SELECT MIN({time_column}) FROM {table_name}")).scalar()
+        if oldest is None:
+            return None
+        start = bucket_start(_parse_timestamp(oldest), "day")
+        partitions = self.db_manager.retention_partitions_table
+        compacted = session.execute(select(func.max(partitions.c.partition_end))
+                                    .where(partitions.c.table_name == table_name)).scalar()
+        return max(start, _parse_timestamp(compacted)) if compacted is not None else start
+
+    def _rebuild(self, table_name: str, time_column: str, measure, key: str, start: datetime, batch_size: int,
+                 until: Any = None, session=None) -> int:
+        """Record the measurements of the rows from start on, up to key until; returns rows read"""
+        count = 0
+        for rows in self._source_batches(table_name, key, batch_size, until, session):
+            rows = [row for row in rows if _parse_timestamp(row[time_column]) >= start]
+            self.record([measurement for row in rows for measurement in measure(row)], session=session)
+            count += len(rows)
+        return count
+
+    def _source_batches(self, table_name: str, key: str, batch_size: int, until: Any = None,
+                        session=None) -> Iterable[List[Dict[str, Any]]]:
+        """
+        Yield the rows of a source table in batches, walking its position key up to until
+
+        The first batch is read without a cursor and later ones after the last
+        key read, so the cursor always has the key's own type: an integer id,
+        or the text UUID id of feedback_entries on PostgreSQL. Each batch is
+        read in its own session unless one is given.
+        """
+        bound = f" AND {key} <= :until" if until is not None else ""
+        first = f"SELECT {key} AS _position, * FROM {table_name} WHERE 1 = 1{bound} ORDER BY {key} LIMIT :limit"
+        after_sql = (f"SELECT {key} AS _position, * FROM {table_name} WHERE {key} > :after{bound} "
+                     f"ORDER BY {key} LIMIT :limit")
+        bounds = {"until": until} if until is not None else {}
+        sql, params = first, {"limit": batch_size, **bounds}
+        while True:
+            if session is not None:
+                rows = [dict(row._mapping) for row in session.execute(text(sql), params)]
+            else:
+                with self.db_manager.get_session() as own_session:
+                    rows = [dict(row._mapping) for row in own_session.execute(text(sql), params)]
+            if not rows:
+                return
+            yield rows
+            sql, params = after_sql, {"after": rows[-1]["_position"], "limit": batch_size, **bounds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain dashboard metric rollups")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild rollups from the source tables")
+    parser.add_argument("--source", choices=("all",) + SOURCES, default="all")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    from database import get_database_manager
+    rollups = get_database_manager().rollups
+    sources = SOURCES if args.source == "all" else (args.source,)
+
+    print("🚀 Backfilling metric rollups")
+    for source, rows in rollups.backfill(sources, batch_size=args.batch_size).items():
+        print(f"✅ {source}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ import sqlite3
 from datetime import datetime
 from pathlib import Path
 
+from execution_log import ExecutionLog
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -130,8 +132,10 @@ def migrate_legacy_data():
     if legacy_file.exists():
         logger.info(f"Found legacy execution history file: {legacy_file}")
         try:
-            with open(legacy_file, 'r') as f:
-                legacy_data = json.load(f)
+            # The export is only refreshed on compaction, so read the journal
+            # (seeded from the export if it does not exist yet)
+            legacy_data = ExecutionLog(str(logs_dir / "execution_events.jsonl"),
+                                       export_path=str(legacy_file)).all()
             
             if legacy_data:
                 logger.info(f"Migrating {len(legacy_data)} legacy execution records...")
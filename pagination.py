@@ -4,11 +4,20 @@ Pagination utilities for API endpoints
 This module provides standardized pagination functionality for API endpoints
 that return large datasets. It includes a Paginator class that handles
 pagination logic and a PaginatedResponse class for consistent response formatting.
+
+For database-backed lists, KeysetPaginator pushes pagination down to SQL:
+``WHERE (sort_key, id) < cursor ORDER BY sort_key DESC, id DESC LIMIT page_size``.
+The cost of a page is then independent of how deep it is and of the table
+size, and totals come from cheap count estimates instead of full scans.
 """
 
-from typing import List, Dict, Any, TypeVar, Generic, Optional, Callable
+import base64
+import json
+from datetime import datetime
+from typing import List, Dict, Any, TypeVar, Generic, Optional, Callable, Sequence, Tuple
 from math import ceil
 from fastapi import Query, HTTPException, status
+from sqlalchemy import and_, or_, select, func, literal_column, text
 
 T = TypeVar('T')
 
@@ -133,25 +142,265 @@ class Paginator:
         query_func: Callable[..., List[T]],
         page: int = 1,
         page_size: int = 10,
+        count_func: Optional[Callable[..., int]] = None,
         **query_params
     ) -> PaginatedResponse[T]:
         """
         Paginate a query function that returns a list of items
         
+        If count_func is given, the page is pushed down to the query: query_func
+        is called with ``limit`` and ``offset`` and must return only that page,
+        and count_func returns the total. Otherwise query_func must return all
+        items and the page is sliced in memory.
+        
         Args:
             query_func: A function that returns a list of items
             page: The page number (1-based)
             page_size: The number of items per page
-            **query_params: Additional parameters to pass to the query function
+            count_func: Optional function returning the total number of items
+            **query_params: Additional parameters to pass to the query and count functions
             
         Returns:
             PaginatedResponse: A paginated response object
         """
-        # Get all items from the query function
-        all_items = query_func(**query_params)
+        if count_func is None:
+            # Get all items from the query function
+            all_items = query_func(**query_params)
+            
+            # Use paginate_list to handle pagination
+            return Paginator.paginate_list(all_items, page, page_size)
+        
+        if page < 1 or page_size < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Page number and page size must be greater than 0"
+            )
+        
+        items = query_func(limit=page_size, offset=(page - 1) * page_size, **query_params)
+        total = count_func(**query_params)
+        return PaginatedResponse(items=items, total=total, page=page, page_size=page_size)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort-key values of the last item on a page as an opaque cursor
+    
+    Args:
+        values: Sort-key values, e.g. (started_at, id)
+        
+    Returns:
+        str: URL-safe cursor string
+    """
+    encoded = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(encoded, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, expected_length: Optional[int] = None) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(decoded, list):
+            raise ValueError("cursor is not a list")
+        values = [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) and "dt" in value else value
+            for value in decoded
+        ]
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination cursor: {e}"
+        )
+    
+    if expected_length is not None and len(values) != expected_length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor: wrong number of sort keys"
+        )
+    return values
+
+
+class CursorPage(Generic[T]):
+    """
+    Keyset-paginated response format
+    
+    Attributes:
+        items: The items on this page
+        page_size: Maximum number of items per page
+        next_cursor: Cursor for the following page, or None on the last page
+        total: Total number of items (may be an estimate, see total_is_estimate)
+        total_is_estimate: Whether total is an estimate rather than an exact count
+    """
+    
+    def __init__(
+        self,
+        items: List[T],
+        page_size: int,
+        next_cursor: Optional[str] = None,
+        total: Optional[int] = None,
+        total_is_estimate: bool = False
+    ):
+        self.items = items
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+    
+    def dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON response"""
+        return {
+            "items": self.items,
+            "pagination": {
+                "page_size": self.page_size,
+                "next_cursor": self.next_cursor,
+                "has_next": self.has_next,
+                "total": self.total,
+                "total_is_estimate": self.total_is_estimate
+            }
+        }
+
+
+class KeysetPaginator:
+    """
+    Keyset (cursor) pagination pushed down to SQL
+    
+    Pages are ordered by a unique sort key, typically (timestamp, id), and
+    each page starts strictly after the last row of the previous one. The
+    row-value comparison is expanded into OR/AND terms so it works on every
+    backend and can use a composite index on the sort columns.
+    """
+    
+    @staticmethod
+    def keyset_condition(columns: Sequence[Any], values: Sequence[Any], descending: bool = True):
+        """
+        Build ``(c1, c2, ...) < (v1, v2, ...)`` (or ``>`` when ascending) as a SQLAlchemy expression
+        """
+        terms = []
+        for i, column in enumerate(columns):
+            equal_prefix = [columns[j] == values[j] for j in range(i)]
+            beyond = column < values[i] if descending else column > values[i]
+            terms.append(and_(*equal_prefix, beyond))
+        return or_(*terms)
+    
+    @staticmethod
+    def keyset_sql(
+        column_names: Sequence[str],
+        values: Sequence[Any],
+        descending: bool = True,
+        param_prefix: str = "cursor"
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the keyset condition as a raw SQL fragment with named parameters
         
-        # Use paginate_list to handle pagination
-        return Paginator.paginate_list(all_items, page, page_size)
+        Returns:
+            Tuple[str, Dict[str, Any]]: The SQL fragment and its bind parameters
+        """
+        operator = "<" if descending else ">"
+        params = {f"{param_prefix}_{i}": value for i, value in enumerate(values)}
+        terms = []
+        for i, column in enumerate(column_names):
+            equal_prefix = [f"{column_names[j]} = :{param_prefix}_{j}" for j in range(i)]
+            terms.append("(" + " AND ".join(equal_prefix + [f"{column} {operator} :{param_prefix}_{i}"]) + ")")
+        return "(" + " OR ".join(terms) + ")", params
+    
+    @staticmethod
+    def paginate_select(
+        session,
+        stmt,
+        sort_columns: Sequence[Any],
+        page_size: int,
+        cursor: Optional[str] = None,
+        descending: bool = True,
+        offset: int = 0,
+        row_to_item: Callable[[Any], Any] = lambda row: dict(row._mapping)
+    ) -> CursorPage:
+        """
+        Fetch one page of a SELECT statement
+        
+        Args:
+            session: SQLAlchemy session
+            stmt: SELECT statement with any filters already applied
+            sort_columns: Columns forming a unique sort key, most significant first
+            page_size: Number of items per page
+            cursor: Cursor returned with the previous page
+            descending: Sort order
+            offset: Row offset, only for legacy page-number access without a cursor
+            row_to_item: Converts a result row into a response item
+            
+        Returns:
+            CursorPage: Items and the cursor for the following page (total not set)
+        """
+        if page_size < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Page size must be greater than 0"
+            )
+        
+        if cursor:
+            values = decode_cursor(cursor, expected_length=len(sort_columns))
+            stmt = stmt.where(KeysetPaginator.keyset_condition(sort_columns, values, descending))
+        elif offset:
+            stmt = stmt.offset(offset)
+        
+        order_by = [column.desc() if descending else column.asc() for column in sort_columns]
+        rows = session.execute(stmt.order_by(*order_by).limit(page_size + 1)).fetchall()
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor([last[column.name] for column in sort_columns])
+        
+        return CursorPage(items=[row_to_item(row) for row in rows], page_size=page_size, next_cursor=next_cursor)
+    
+    @staticmethod
+    def estimate_count(session, table, whereclause=None, exact_limit: int = 10000) -> Tuple[int, bool]:
+        """
+        Estimate the number of rows without scanning large tables
+        
+        Unfiltered counts use the planner statistics on PostgreSQL and the
+        highest rowid on SQLite. Filtered counts are exact up to exact_limit
+        rows and reported as estimates beyond that.
+        
+        Returns:
+            Tuple[int, bool]: The count and whether it is an estimate
+        """
+        dialect = session.get_bind().dialect.name
+        
+        if whereclause is None:
+            try:
+                if dialect == "postgresql":
+                    estimate = session.execute(
+                        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name"),
+                        {"name": table.name}
+                    ).scalar()
+                    if estimate is not None and estimate >= 0:
+                        return int(estimate), True
+                elif dialect == "sqlite":
+                    estimate = session.execute(text(f"SELECT MAX(rowid) FROM {table.name}")).scalar()
+                    if estimate is not None and estimate > exact_limit:
+                        return int(estimate), True
+            except Exception:
+                pass
+        
+        capped = select(literal_column("1")).select_from(table)
+        if whereclause is not None:
+            capped = capped.where(whereclause)
+        capped = capped.limit(exact_limit + 1).subquery()
+        count = session.execute(select(func.count()).select_from(capped)).scalar() or 0
+        if count > exact_limit:
+            return exact_limit, True
+        return count, False
 
 
 # Common pagination parameters for FastAPI endpoints
@@ -169,4 +418,21 @@ def pagination_params(
     Returns:
         Dict[str, int]: A dictionary with pagination parameters
     """
-    return {"page": page, "page_size": page_size}
\ No newline at end of file
+    return {"page": page, "page_size": page_size}
+
+
+def cursor_pagination_params(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    page: int = Query(1, ge=1, description="Page number (used only when no cursor is given)"),
+    page_size: int = Query(10, ge=1, le=100, description="Items per page")
+) -> Dict[str, Any]:
+    """
+    Pagination parameters for keyset-paginated endpoints
+    
+    Clients should follow ``next_cursor``; ``page`` is kept for backward
+    compatibility and falls back to OFFSET pagination.
+    
+    Returns:
+        Dict[str, Any]: A dictionary with cursor, page and page_size
+    """
+    return {"cursor": cursor, "page": page, "page_size": page_size}
\ No newline at end of file
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Time-partitioned retention and compaction for the high-volume history tables.
+
+Raw rows of observability_metrics, evaluation_history, performance_metrics,
+agent_performance and batch_jobs are kept for a configurable number of days.
+Rows are grouped into time partitions (a day or a month). Once a whole
+partition is older than its table's raw retention, it is downsampled into a
+per-hour summary table (``<table>_hourly``) and then removed:
+
+- PostgreSQL tables created with native RANGE partitioning detach and drop
+  the partition, which costs the same however many rows it held.
+- SQLite tables, and PostgreSQL tables created before partitioning, are
+  optionally copied to an archive database and then deleted in small
+  batches, each in its own short transaction, so writers are never blocked
+  for long. SQLite then returns the freed pages with an incremental vacuum.
+
+Summary rows are themselves dropped after the table's summary retention.
+
+Usage:
+    python retention.py --run [--table observability_metrics] [--dry-run]
+"""
+
+import argparse
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (Column, DateTime, Float, Index, Integer, MetaData, String, Table, UniqueConstraint,
+                        and_, cast, func, inspect, insert, literal_column, select, text)
+
+from config_system import config_system
+from logging_config import log_error, log_info, log_warning
+
+logger = logging.getLogger(__name__)
+
+PARTITION_INTERVALS = ("day", "month")
+
+
+@dataclass
+class RetentionSpec:
+    """How a table is partitioned and downsampled"""
+    time_column: str
+    dimensions: Tuple[str, ...]
+    measures: Tuple[str, ...]
+    # Only rows matching this filter are ever compacted
+    eligible: Optional[Callable[[Table], Any]] = None
+    # Created by DatabaseManager, so PostgreSQL can partition it natively
+    native: bool = False
+
+
+RETENTION_SPECS = {
+    "observability_metrics": RetentionSpec(
+        "timestamp", ("workflow_id",),
+        ("duration_ms", "cache_hits", "cache_misses", "error_count", "warning_count", "memory_usage_mb"),
+        native=True
+    ),
+    "evaluation_history": RetentionSpec(
+        "timestamp", ("workflow_id", "channel"), ("quality_score", "word_count"), native=True
+    ),
+    "performance_metrics": RetentionSpec(
+        "timestamp", ("metric_type", "metric_name", "workflow_id", "agent_id"), (), native=True
+    ),
+    "agent_performance": RetentionSpec(
+        "timestamp", ("agent_id", "model_name"), ("execution_time", "success", "quality_score", "cost")
+    ),
+    "batch_jobs": RetentionSpec(
+        "created_at", ("workflow_id", "status"), ("execution_time", "retry_count"),
+        # Jobs of batches that are still running are kept until they finish
+        eligible=lambda table: table.c.status.in_(("completed", "failed", "skipped"))
+    ),
+}
+
+DEFAULT_POLICIES = {
+    "observability_metrics": {"raw_days": 30, "summary_days": 365},
+    "evaluation_history": {"raw_days": 90, "summary_days": 730},
+    "performance_metrics": {"raw_days": 14, "summary_days": 365},
+    "agent_performance": {"raw_days": 90, "summary_days": 730},
+    "batch_jobs": {"raw_days": 30, "summary_days": 365},
+}
+
+
+def partition_start(timestamp: datetime, interval: str) -> datetime:
+    """Truncate a timestamp to the start of its day or month partition"""
+    start = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.replace(day=1) if interval == "month" else start
+
+
+def next_partition(start: datetime, interval: str) -> datetime:
+    """Start of the partition after the one starting at start"""
+    if interval == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_name(table_name: str, start: datetime) -> str:
+    """Name of the native PostgreSQL partition starting at start"""
+    return f"{table_name}_p{start:%Y%m%d}"
+
+
+def define_retention_tables(metadata: MetaData) -> Tuple[Table, Dict[str, Table]]:
+    """
+    Define the partition bookkeeping table and one hourly summary table per retained table
+
+    A summary table holds row_count per hour and dimension key, plus the
+    count, sum, min and max of each measure. Re-compacting late rows adds
+    further rows for the same hour and key, so readers sum them.
+
+    Returns:
+        Tuple[Table, Dict[str, Table]]: Bookkeeping table and summary tables by source table name
+    """
+    partitions = Table(
+        'retention_partitions',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('table_name', String(100), nullable=False),
+        Column('partition_start', DateTime, nullable=False),
+        Column('partition_end', DateTime, nullable=False),
+        # summarized: downsampled, raw rows still being removed; dropped: done
+        Column('state', String(20), nullable=False),
+        Column('rows_summarized', Integer, default=0),
+        Column('rows_deleted', Integer, default=0),
+        Column('updated_at', DateTime, default=datetime.now, onupdate=datetime.now),
+        UniqueConstraint('table_name', 'partition_start', name='uq_retention_partitions_table_start')
+    )
+
+    summaries = {}
+    for table_name, spec in RETENTION_SPECS.items():
+        name = f"{table_name}_hourly"
+        columns = [Column('id', Integer, primary_key=True), Column('hour', DateTime, nullable=False)]
+        columns += [Column(dimension, String(255)) for dimension in spec.dimensions]
+        columns.append(Column('row_count', Integer, nullable=False))
+        for measure in spec.measures:
+            columns += [Column(f"{measure}_count", Integer), Column(f"{measure}_sum", Float),
+                        Column(f"{measure}_min", Float), Column(f"{measure}_max", Float)]
+        columns.append(Index(f"idx_{name}_hour", 'hour'))
+        columns.append(Index(f"idx_{name}_{spec.dimensions[0]}_hour", spec.dimensions[0], 'hour'))
+        summaries[table_name] = Table(name, metadata, *columns)
+    return partitions, summaries
+
+
+class RetentionManager:
+    """Apply the retention policies: downsample expired partitions, then drop them"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.engine = db_manager.engine
+        self.dialect = self.engine.dialect.name
+        self.partitions_table = db_manager.retention_partitions_table
+        self.summary_tables = db_manager.hourly_summary_tables
+
+        config = config_system.get("retention", {})
+        self.enabled = config.get("enabled", True)
+        self.interval_minutes = config.get("interval_minutes", 60)
+        self.partition_interval = config.get("partition_interval", "day")
+        if self.partition_interval not in PARTITION_INTERVALS:
+            log_warning(logger, f"Unknown retention partition_interval {self.partition_interval!r}, using 'day'")
+            self.partition_interval = "day"
+        self.premake_partitions = config.get("premake_partitions", 3)
+        self.delete_batch_size = config.get("delete_batch_size", 2000)
+        self.delete_pause = config.get("delete_pause_ms", 50) / 1000.0
+        self.archive_dir = config.get("archive_dir", "")
+        self.incremental_vacuum_pages = config.get("incremental_vacuum_pages", 2000)
+        self.policies = {
+            table_name: {**defaults, **config.get("policies", {}).get(table_name, {})}
+            for table_name, defaults in DEFAULT_POLICIES.items()
+        }
+
+        self._run_lock = threading.Lock()
+        self._thread = None
+
+    # Native PostgreSQL partitions
+
+    def is_native(self, table_name: str) -> bool:
+        """Whether a table is a natively partitioned PostgreSQL table"""
+        if self.dialect != "postgresql" or not RETENTION_SPECS[table_name].native:
+            return False
+        with self.engine.connect() as conn:
+            kind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = :name"),
+                                {"name": table_name}).scalar()
+        return kind == "p"
+
+    def ensure_partitions(self):
+        """Create the default partition and partitions from the current period up to premake_partitions ahead"""
+        for table_name in RETENTION_SPECS:
+            if not self.is_native(table_name):
+                continue
+            start = partition_start(datetime.now(), self.partition_interval)
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT"
+                ))
+            for _ in range(self.premake_partitions + 1):
+                end = next_partition(start, self.partition_interval)
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(text(
+                            f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, start)} "
+                            f"PARTITION OF {table_name} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                        ))
+                except Exception as e:
+                    # Fails when the default partition already holds rows of that range
+                    log_warning(logger, f"Could not create partition {partition_name(table_name, start)}: {e}")
+                start = end
+
+    def _native_partitions(self, table_name: str) -> List[Tuple[str, datetime]]:
+        """Child partitions of a table with their start, oldest first; the default partition is excluded"""
+        with self.engine.connect() as conn:
+            names = conn.execute(text("""
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                WHERE parent.relname = :name
+            """), {"name": table_name}).scalars().all()
+        pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{8}})$")
+        children = [(name, datetime.strptime(match.group(1), "%Y%m%d"))
+                    for name in names if (match := pattern.match(name))]
+        return sorted(children, key=lambda child: child[1])
+
+    # Compaction
+
+    def run(self, tables: Optional[Sequence[str]] = None, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Apply the retention policy of each table once
+
+        Args:
+            tables: Tables to process (default: every table with a policy)
+            dry_run: Only count the partitions and rows that would be compacted
+
+        Returns:
+            Dict[str, Dict[str, int]]: Partitions, rows summarized and deleted, and summary rows pruned per table
+        """
+        with self._run_lock:
+            existing = set(inspect(self.engine).get_table_names())
+            results = {}
+            for table_name in tables or list(RETENTION_SPECS):
+                if table_name not in existing:
+                    continue
+                try:
+                    results[table_name] = self._apply_policy(table_name, dry_run)
+                except Exception as e:
+                    log_error(logger, f"Retention failed for {table_name}: {e}")
+            if not dry_run:
+                self._vacuum()
+                if self.dialect == "postgresql":
+                    self.ensure_partitions()
+            return results
+
+    def _apply_policy(self, table_name: str, dry_run: bool) -> Dict[str, int]:
+        policy = self.policies[table_name]
+        spec = RETENTION_SPECS[table_name]
+        table = Table(table_name, MetaData(), autoload_with=self.engine)
+        cutoff = partition_start(datetime.now() - timedelta(days=policy["raw_days"]), self.partition_interval)
+        stats = {"partitions": 0, "rows_summarized": 0, "rows_deleted": 0, "summary_rows_pruned": 0}
+
+        if self.is_native(table_name):
+            for child, start in self._native_partitions(table_name):
+                end = next_partition(start, self.partition_interval)
+                if end > cutoff:
+                    break
+                self._compact(table, spec, start, end, stats, dry_run, native_partition=child)
+
+        # Logical partitions: SQLite, unpartitioned PostgreSQL tables and old rows left in a default partition
+        end = None
+        while True:
+            oldest = self._oldest(table, spec, not_before=end)
+            if oldest is None:
+                break
+            start = partition_start(oldest, self.partition_interval)
+            end = next_partition(start, self.partition_interval)
+            if end > cutoff:
+                break
+            self._compact(table, spec, start, end, stats, dry_run)
+
+        stats["summary_rows_pruned"] = self._prune_summaries(table_name, policy["summary_days"], dry_run)
+        if stats["partitions"]:
+            log_info(logger, f"Retention {'(dry run) ' if dry_run else ''}{table_name}: {stats}")
+        return stats
+
+    def _oldest(self, table: Table, spec: RetentionSpec, not_before: Optional[datetime] = None) -> Optional[datetime]:
+        """Timestamp of the oldest row eligible for compaction, optionally at or after not_before"""
+        stmt = select(func.min(table.c[spec.time_column]))
+        if not_before is not None:
+            stmt = stmt.where(table.c[spec.time_column] >= not_before)
+        if spec.eligible:
+            stmt = stmt.where(spec.eligible(table))
+        with self.engine.connect() as conn:
+            value = conn.execute(stmt).scalar()
+        if value is None or isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(str(value).replace("Z", ""))
+
+    def _range(self, table: Table, spec: RetentionSpec, start: datetime, end: datetime):
+        """Filter selecting a partition's eligible rows"""
+        column = table.c[spec.time_column]
+        conditions = [column >= start, column < end]
+        if spec.eligible:
+            conditions.append(spec.eligible(table))
+        return and_(*conditions)
+
+    def _compact(self, table: Table, spec: RetentionSpec, start: datetime, end: datetime,
+                 stats: Dict[str, int], dry_run: bool, native_partition: Optional[str] = None) -> int:
+        """Downsample one partition, then drop or delete its rows; returns rows removed"""
+        where = self._range(table, spec, start, end)
+        if dry_run:
+            with self.engine.connect() as conn:
+                rows = conn.execute(select(func.count()).select_from(table).where(where)).scalar()
+            stats["partitions"] += 1
+            stats["rows_summarized"] += rows
+            return rows
+
+        summarized = self._summarize(table, spec, start, end, where)
+        if summarized is None:
+            # Another process is compacting this partition
+            return 0
+
+        if native_partition:
+            with self.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {native_partition}"))
+                conn.execute(text(f"DROP TABLE {native_partition}"))
+            deleted = summarized
+        else:
+            if self.archive_dir and self.dialect == "sqlite":
+                self._archive(table, start, where)
+            deleted = self._delete_in_batches(table, where)
+
+        with self.engine.begin() as conn:
+            conn.execute(self.partitions_table.update().where(and_(
+                self.partitions_table.c.table_name == table.name,
+                self.partitions_table.c.partition_start == start
+            )).values(state="dropped", rows_deleted=self.partitions_table.c.rows_deleted + deleted))
+
+        stats["partitions"] += 1
+        stats["rows_summarized"] += summarized
+        stats["rows_deleted"] += deleted
+        return deleted
+
+    def _summarize(self, table: Table, spec: RetentionSpec, start: datetime, end: datetime, where) -> Optional[int]:
+        """
+        Insert the partition's hourly summary and claim the partition in one transaction
+
+        A partition left in state "summarized" by an interrupted run is not
+        summarized again; its deletion simply resumes. A "dropped" partition
+        that has received late rows is summarized again for those rows only.
+
+        Returns:
+            Optional[int]: Rows summarized, or None if another process holds the partition
+        """
+        partitions = self.partitions_table
+        key = and_(partitions.c.table_name == table.name, partitions.c.partition_start == start)
+        with self.engine.begin() as conn:
+            state = conn.execute(select(partitions.c.state).where(key)).scalar()
+            if state == "summarized":
+                return conn.execute(select(partitions.c.rows_summarized).where(key)).scalar() or 0
+
+            rows = conn.execute(select(func.count()).select_from(table).where(where)).scalar()
+            if state is None:
+                conn.execute(partitions.insert().values(
+                    table_name=table.name, partition_start=start, partition_end=end,
+                    state="summarized", rows_summarized=rows, rows_deleted=0
+                ))
+            else:
+                claimed = conn.execute(partitions.update().where(and_(key, partitions.c.state == "dropped")).values(
+                    state="summarized", rows_summarized=partitions.c.rows_summarized + rows
+                ))
+                if claimed.rowcount != 1:
+                    return None
+
+            summary = self.summary_tables[table.name]
+            conn.execute(insert(summary).from_select(*self._summary_select(table, spec, where)))
+        return rows
+
+    def _summary_select(self, table: Table, spec: RetentionSpec, where) -> Tuple[List[str], Any]:
+        """Columns and SELECT that aggregate the rows matching where by hour and dimension"""
+        time_column = table.c[spec.time_column]
+        if self.dialect == "postgresql":
+            hour = func.date_trunc("hour", time_column)
+        else:
+            # Same text format SQLAlchemy stores DateTime values in
+            hour = func.strftime("%Y-%m-%d %H:00:00.000000", time_column)
+        dimensions = [table.c[dimension] for dimension in spec.dimensions]
+
+        names = ["hour", *spec.dimensions, "row_count"]
+        expressions = [hour, *dimensions, func.count()]
+        for measure in spec.measures:
+            value = cast(table.c[measure], Float)
+            names += [f"{measure}_count", f"{measure}_sum", f"{measure}_min", f"{measure}_max"]
+            expressions += [func.count(table.c[measure]), func.sum(value), func.min(value), func.max(value)]
+        return names, select(*expressions).where(where).group_by(hour, *dimensions)
+
+    def _archive(self, table: Table, start: datetime, where):
+        """Copy a partition's rows into a per-month SQLite archive database before they are deleted"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{table.name}_{start:%Y%m}.db")
+        archived = Table(table.name, MetaData(), *[Column(c.name, c.type) for c in table.c], schema="archive")
+        with self.engine.connect() as conn:
+            # ATTACH must run outside a transaction; the driver only opens one at the first write
+            conn.exec_driver_sql("ATTACH DATABASE ? AS archive", (path,))
+            try:
+                conn.exec_driver_sql(
+                    f"CREATE TABLE IF NOT EXISTS archive.{table.name} AS SELECT * FROM main.{table.name} WHERE 0"
+                )
+                conn.execute(insert(archived).from_select([c.name for c in table.c], select(table).where(where)))
+                conn.commit()
+            finally:
+                conn.exec_driver_sql("DETACH DATABASE archive")
+
+    def _delete_in_batches(self, table: Table, where) -> int:
+        """Delete the rows matching where a batch per transaction, pausing between batches"""
+        row_key = literal_column("ctid" if self.dialect == "postgresql" else "rowid")
+        batch = select(row_key).select_from(table).where(where).limit(self.delete_batch_size)
+        deleted = 0
+        while True:
+            with self.engine.begin() as conn:
+                count = conn.execute(table.delete().where(row_key.in_(batch.scalar_subquery()))).rowcount
+            deleted += count
+            if count < self.delete_batch_size:
+                return deleted
+            time.sleep(self.delete_pause)
+
+    def _prune_summaries(self, table_name: str, summary_days: int, dry_run: bool) -> int:
+        """Drop summary rows older than the table's summary retention"""
+        summary = self.summary_tables[table_name]
+        where = summary.c.hour < datetime.now() - timedelta(days=summary_days)
+        with self.engine.begin() as conn:
+            if dry_run:
+                return conn.execute(select(func.count()).select_from(summary).where(where)).scalar()
+            return conn.execute(summary.delete().where(where)).rowcount
+
+    def _vacuum(self):
+        """Return pages freed by deletes to the filesystem (SQLite with auto_vacuum=INCREMENTAL)"""
+        if self.dialect != "sqlite":
+            return
+        with self.engine.connect() as conn:
+            # 2 = INCREMENTAL; databases created before auto_vacuum was configured need one manual VACUUM
+            if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+                # The pragma frees one page per step, so it has to be stepped to completion
+                cursor = conn.connection.cursor()
+                try:
+                    cursor.execute(f"PRAGMA incremental_vacuum({int(self.incremental_vacuum_pages)})").fetchall()
+                finally:
+                    cursor.close()
+
+    # Scheduling
+
+    def start(self):
+        """Run the policies every interval_minutes in a background thread"""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+        self._thread.start()
+        log_info(logger, f"Retention scheduler started, interval {self.interval_minutes} minutes")
+
+    def _loop(self):
+        while True:
+            try:
+                self.run()
+            except Exception as e:
+                log_error(logger, f"Retention run failed: {e}")
+            time.sleep(self.interval_minutes * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply retention policies to the history tables")
+    parser.add_argument("--run", action="store_true", help="Compact and drop expired partitions")
+    parser.add_argument("--table", choices=tuple(RETENTION_SPECS), action="append",
+                        help="Limit to this table (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be compacted")
+    args = parser.parse_args()
+
+    if not args.run:
+        parser.print_help()
+        return
+
+    from database import get_database_manager
+    retention = get_database_manager().retention
+
+    print(f"🚀 Applying retention policies{' (dry run)' if args.dry_run else ''}")
+    for table_name, stats in retention.run(args.table, dry_run=args.dry_run).items():
+        print(f"✅ {table_name}: {stats['partitions']} partitions, {stats['rows_summarized']} rows summarized, "
+              f"{stats['rows_deleted']} deleted, {stats['summary_rows_pruned']} summary rows pruned")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,12 @@
 Selective cleanup script - keeps only exec_003 and removes all other executions
 """
 
-import json
 import sqlite3
 import os
 from datetime import datetime
 
+from execution_log import ExecutionLog
+
 def backup_data():
     """Create backup of current data before clearing"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -22,6 +23,12 @@ def backup_data():
         os.system(f"cp {json_file} {backup_dir}/execution_history.json")
         print("✅ Backed up JSON execution history")
     
+    # Backup execution journal
+    journal_file = "logs/execution_events.jsonl"
+    if os.path.exists(journal_file):
+        os.system(f"cp {journal_file} {backup_dir}/execution_events.jsonl")
+        print("✅ Backed up execution journal")
+    
     # Backup database
     db_file = "data/crewai.db"
     if os.path.exists(db_file):
@@ -31,32 +38,20 @@ def backup_data():
     return backup_dir
 
 def clean_json_keep_exec_003():
-    """Clean JSON execution history but keep exec_003"""
-    json_file = "logs/execution_history.json"
+    """Clean the execution journal but keep exec_003"""
     try:
-        # Load current data
-        with open(json_file, 'r') as f:
-            data = json.load(f)
+        # Read the live records from the journal; the JSON export may be stale
+        event_log = ExecutionLog()
+        filtered_data = [execution for execution in event_log.all() if execution.get('id') == 'exec_003']
         
-        # Find exec_003
-        exec_003 = None
-        for execution in data:
-            if execution.get('id') == 'exec_003':
-                exec_003 = execution
-                break
-        
-        if exec_003:
-            # Keep only exec_003
-            filtered_data = [exec_003]
+        if filtered_data:
             print(f"✅ Found exec_003, preserving it")
         else:
             # If exec_003 not found, clear everything
-            filtered_data = []
-            print("⚠️  exec_003 not found in JSON, clearing all")
+            print("⚠️  exec_003 not found in journal, clearing all")
         
-        # Write filtered data
-        with open(json_file, 'w') as f:
-            json.dump(filtered_data, f, indent=2, default=str)
+        # Rewrite the journal with the kept records; this also refreshes the JSON export
+        event_log.replace_all(filtered_data)
         
         print(f"✅ JSON cleanup complete - kept {len(filtered_data)} executions")
         return True
@@ -112,16 +107,14 @@ def verify_cleanup():
     """Verify that cleanup preserved exec_003"""
     print("\n🔍 Verifying selective cleanup...")
     
-    # Check JSON file
+    # Check execution journal
     try:
-        with open("logs/execution_history.json", 'r') as f:
-            data = json.load(f)
-            print(f"📄 JSON file: {len(data)} executions remaining")
-            if data:
-                for execution in data:
-                    print(f"   - {execution.get('id', 'unknown')}")
+        data = ExecutionLog().all()
+        print(f"📄 Execution journal: {len(data)} executions remaining")
+        for execution in data:
+            print(f"   - {execution.get('id', 'unknown')}")
     except:
-        print("❌ Could not verify JSON file")
+        print("❌ Could not verify execution journal")
     
     # Check database
     try:
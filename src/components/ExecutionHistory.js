@@ -24,8 +24,15 @@ const fetchExecutionHistory = async () => {
   if (!response.ok) throw new Error('Failed to fetch execution history');
   const data = await response.json();
   console.log('Execution history data:', data);
-  console.log('Executions array:', data.executions);
-  return data.executions || [];
+  console.log('Executions array:', data.items);
+  return data.items || [];
+};
+
+// List pages carry summaries only; input, output and steps are fetched per execution
+const fetchExecutionDetail = async (executionId) => {
+  const response = await fetch(`/api/execution-history/${encodeURIComponent(executionId)}`);
+  if (!response.ok) throw new Error('Failed to fetch execution details');
+  return response.json();
 };
 
 const fetchTestResults = async () => {
@@ -55,6 +62,19 @@ const ExecutionHistory = () => {
     refetchInterval: 5000 // Auto-refresh every 5 seconds
   });
 
+  const { data: executionDetail } = useQuery({
+    queryKey: ['execution-detail', selectedExecution?.id],
+    queryFn: () => fetchExecutionDetail(selectedExecution.id),
+    enabled: !!selectedExecution,
+    refetchInterval: selectedExecution?.status === 'running' ? 5000 : false
+  });
+  const executionDetails = selectedExecution && {
+    ...selectedExecution,
+    ...executionDetail,
+    output: executionDetail?.output_data,
+    error: executionDetail?.error_message
+  };
+
   const createDemoExecution = async () => {
     try {
       const response = await fetch('/api/demo-execution', { method: 'POST' });
@@ -305,21 +325,6 @@ const ExecutionHistory = () => {
                     <p className="text-xs text-gray-600 mt-1">{execution.progress}% complete</p>
                   </div>
                 )}
-
-                {/* Step indicators */}
-                <div className="mt-3 flex gap-1">
-                  {execution.steps?.map((step, index) => (
-                    <div
-                      key={index}
-                      className={`flex-1 h-1 rounded-full ${
-                        step.status === 'completed' ? 'bg-green-500' :
-                        step.status === 'running' ? 'bg-yellow-500' :
-                        step.status === 'failed' ? 'bg-red-500' :
-                        'bg-gray-300'
-                      }`}
-                    />
-                  ))}
-                </div>
               </div>
             ))}
           </div>
@@ -334,7 +339,7 @@ const ExecutionHistory = () => {
                 <div className="mb-4">
                   <h4 className="text-sm font-medium text-gray-700 mb-2">Input Data</h4>
                   <div className="bg-gray-50 rounded p-3 text-sm space-y-1">
-                    {Object.entries(selectedExecution.input_data || {}).map(([key, value]) => (
+                    {Object.entries(executionDetails.input_data || {}).map(([key, value]) => (
                       <div key={key} className="flex justify-between">
                         <span className="text-gray-600">{key}:</span>
                         <span className="font-medium text-gray-900 truncate ml-2" title={value}>
@@ -349,7 +354,7 @@ const ExecutionHistory = () => {
                 <div className="mb-4">
                   <h4 className="text-sm font-medium text-gray-700 mb-2">Steps</h4>
                   <div className="space-y-2">
-                    {selectedExecution.steps?.map((step, index) => (
+                    {executionDetails.steps?.map((step, index) => (
                       <div key={index} className="bg-gray-50 rounded p-3">
                         <div className="flex items-center justify-between mb-1">
                           <span className="font-medium text-sm">{step.name}</span>
@@ -365,7 +370,7 @@ const ExecutionHistory = () => {
                 </div>
 
                 {/* Output */}
-                {selectedExecution.output && (
+                {executionDetails.output && (
                   <div className="mt-6">
                     <h4 className="text-lg font-semibold text-gray-900 mb-4 flex items-center gap-2">
                       <MessageSquare className="w-5 h-5 text-blue-600" />
@@ -378,13 +383,13 @@ const ExecutionHistory = () => {
                           <div className="bg-white rounded-lg p-3 border border-blue-100">
                             <div className="text-xs text-gray-600 mb-1">Quality Score</div>
                             <div className="text-2xl font-bold text-green-600">
-                              {selectedExecution.output.quality_score}%
+                              {executionDetails.output.quality_score}%
                             </div>
                           </div>
                           <div className="bg-white rounded-lg p-3 border border-blue-100">
                             <div className="text-xs text-gray-600 mb-1">Response Rate</div>
                             <div className="text-2xl font-bold text-blue-600">
-                              {(selectedExecution.output.predicted_response_rate * 100).toFixed(0)}%
+                              {(executionDetails.output.predicted_response_rate * 100).toFixed(0)}%
                             </div>
                           </div>
                         </div>
@@ -397,7 +402,7 @@ const ExecutionHistory = () => {
                           </h5>
                           <div className="bg-white border-2 border-gray-200 rounded-xl p-5 text-sm leading-relaxed max-h-80 overflow-y-auto shadow-sm">
                             <div className="whitespace-pre-wrap font-medium text-gray-900">
-                              {selectedExecution.output.message}
+                              {executionDetails.output.message}
                             </div>
                           </div>
                         </div>
@@ -407,20 +412,20 @@ const ExecutionHistory = () => {
                 )}
 
                 {/* Feedback System */}
-                {selectedExecution.output && (
+                {executionDetails.output && (
                   <div className="mt-6">
                     <FeedbackSystem 
-                      executionId={selectedExecution.id}
-                      workflowId={selectedExecution.workflow_id || 'default_workflow'}
-                      outputContent={selectedExecution.output.message}
+                      executionId={executionDetails.id}
+                      workflowId={executionDetails.workflow_id || 'default_workflow'}
+                      outputContent={executionDetails.output.message}
                     />
                   </div>
                 )}
 
                 {/* Error */}
-                {selectedExecution.error && (
+                {executionDetails.error && (
                   <div className="mt-4 p-3 bg-red-50 rounded">
-                    <p className="text-sm text-red-800">{selectedExecution.error}</p>
+                    <p className="text-sm text-red-800">{executionDetails.error}</p>
                   </div>
                 )}
               </div>
@@ -17,7 +17,7 @@ import {
 import toast from 'react-hot-toast';
 
 const fetchAllRuns = async () => {
-  const response = await fetch('/api/execution-history');
+  const response = await fetch('/api/execution-history?view=full');
   if (!response.ok) throw new Error('Failed to fetch execution history');
   const data = await response.json();
   console.log('Fetched runs:', data);
@@ -149,7 +149,7 @@ const RunWorkflow = () => {
   // Function to check for recent duplicate executions
   const checkForDuplicates = async (trimmedInputs) => {
     try {
-      const response = await fetch('/api/execution-history?page=1&page_size=10');
+      const response = await fetch('/api/execution-history?page=1&page_size=10&view=full');
       if (!response.ok) return null;
       
       const data = await response.json();
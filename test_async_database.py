@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test the async database access path.
+
+This script:
+1. Checks that the async DatabaseManager methods write and read the same
+   executions, evaluations and observability metrics as their sync
+   counterparts, with the aiosqlite engine and with the worker-thread fallback
+2. Checks that ExecutionManager's async save, get and page methods agree with
+   the sync ones
+3. Checks that the async feedback and batch pages match the sync pages
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from execution_manager import ExecutionManager
+
+BASE = datetime(2025, 1, 1, 9, 0)
+
+
+def run(db, coro):
+    """Run a coroutine on a fresh event loop, closing the async connections it opened there"""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await db.dispose_async()
+    return asyncio.run(main())
+
+
+def execution(i: int) -> dict:
+    return {"id": f"exec_{i:02d}", "workflow_id": "email-workflow", "status": "completed" if i % 2 else "failed",
+            "started_at": BASE + timedelta(minutes=i), "input_data": {"channel": "email"},
+            "output_data": {"quality_score": 70 + i}}
+
+
+def as_tuple(page) -> tuple:
+    return page.items, page.next_cursor, page.total
+
+
+@pytest.mark.parametrize("async_driver", [True, False], ids=["aiosqlite", "thread_fallback"])
+def test_database_methods_match_sync(make_database_manager, async_driver):
+    """Rows saved by either API read back identically through both"""
+    db = make_database_manager("parity.db")
+    db._async_unavailable = not async_driver
+
+    async def save_and_read():
+        for i in range(6):
+            saved = (db.save_execution_record(execution(i)) if i % 2
+                     else await db.save_execution_record_async(execution(i)))
+            assert saved
+            evaluation = {"execution_id": f"exec_{i:02d}", "workflow_id": "email-workflow",
+                          "timestamp": BASE + timedelta(minutes=i), "quality_score": 70 + i, "channel": "email"}
+            metrics = {"execution_id": f"exec_{i:02d}", "workflow_id": "email-workflow",
+                       "timestamp": BASE + timedelta(minutes=i), "duration_ms": 100 * i, "error_count": 0}
+            assert (db.save_evaluation_result(evaluation) if i % 2
+                    else await db.save_evaluation_result_async(evaluation))
+            assert (db.save_observability_metrics(metrics) if i % 2
+                    else await db.save_observability_metrics_async(metrics))
+
+        first = await db.get_execution_page_async(page_size=4)
+        return {
+            "history": await db.get_execution_history_async(limit=10),
+            "pages": [as_tuple(first), as_tuple(await db.get_execution_page_async(page_size=4,
+                                                                                  cursor=first.next_cursor))],
+            "failed": as_tuple(await db.get_execution_page_async(page_size=10, status="failed")),
+            "scored": await db.get_scored_executions_async(limit=3),
+            "evaluations": await db.get_evaluation_history_async(limit=10),
+            "evaluation_page": as_tuple(await db.get_evaluation_page_async(page_size=4)),
+            "evaluation_metrics": await db.get_evaluation_metrics_async(),
+            "observability": await db.get_observability_history_async(limit=10),
+        }
+
+    result = run(db, save_and_read())
+    assert (db.async_engine is not None) == async_driver
+
+    first = db.get_execution_page(page_size=4)
+    assert result == {
+        "history": db.get_execution_history(limit=10),
+        "pages": [as_tuple(first), as_tuple(db.get_execution_page(page_size=4, cursor=first.next_cursor))],
+        "failed": as_tuple(db.get_execution_page(page_size=10, status="failed")),
+        "scored": db.get_scored_executions(limit=3),
+        "evaluations": db.get_evaluation_history(limit=10),
+        "evaluation_page": as_tuple(db.get_evaluation_page(page_size=4)),
+        "evaluation_metrics": db.get_evaluation_metrics(),
+        "observability": db.get_observability_history(limit=10),
+    }
+    assert [row["id"] for row in result["history"]] == [f"exec_{i:02d}" for i in reversed(range(6))]
+    assert result["evaluation_metrics"]["total_evaluations"] == 6
+
+
+def test_execution_manager_async_matches_sync(make_database_manager, set_config, tmp_path):
+    """Executions saved with the async API are journaled and stored like sync saves"""
+    set_config("executions", write_behind_enabled=False)
+    manager = ExecutionManager(json_file_path=str(tmp_path / "history.json"),
+                               log_path=str(tmp_path / "events.jsonl"))
+    manager.db_manager = db = make_database_manager("manager_parity.db")
+
+    async def save_and_read():
+        for i in range(5):
+            assert await manager.save_execution_async(execution(i))
+        assert await manager.update_execution_state_async(dict(execution(1), status="running"))
+        first = await manager.get_execution_page_async(page_size=3, summary=True)
+        return {
+            "one": await manager.get_execution_async("exec_01"),
+            "projected": await manager.get_execution_async("exec_02", columns=("id", "status", "quality_score")),
+            "all": await manager.get_all_executions_async(limit=10),
+            "pages": [as_tuple(first), as_tuple(await manager.get_execution_page_async(
+                page_size=3, cursor=first.next_cursor, summary=True))],
+        }
+
+    result = run(db, save_and_read())
+
+    first = manager.get_execution_page(page_size=3, summary=True)
+    projected = result.pop("projected")
+    assert result == {
+        "one": manager.get_execution("exec_01"),
+        "all": manager.get_all_executions(limit=10),
+        "pages": [as_tuple(first), as_tuple(manager.get_execution_page(page_size=3, cursor=first.next_cursor,
+                                                                         summary=True))],
+    }
+    assert result["one"]["status"] == "running"
+    assert projected == {"id": "exec_02", "status": "failed", "quality_score": 72}
+    assert manager.event_log.get("exec_01")["status"] == "running"
+
+
+def test_feedback_and_batch_pages_match_sync(make_processor):
+    """The async page methods run the same keyset queries as the sync ones"""
+    import database
+    from feedback_system import FeedbackSystem
+
+    processor = make_processor("pages_parity.db")
+    db = database.db_manager
+    feedback = FeedbackSystem()
+    with db.engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO feedback_entries (id, execution_id, workflow_id, feedback_type, source, status, created_at)
+            VALUES (:id, 'exec_01', 'email-workflow', 'rating', 'api', :status, :created_at)
+        """), [{"id": f"fb_{i:02d}", "status": "pending" if i % 3 else "reviewed",
+                "created_at": BASE + timedelta(seconds=i // 2)} for i in range(7)])
+
+    async def read_pages():
+        batch_ids = [await processor.create_batch(f"batch {i}", "email-workflow", [{"email": f"{i}@example.com"}])
+                     for i in range(3)]
+        workflow_page = await feedback.get_feedback_for_workflow_page_async("email-workflow", 3)
+        return batch_ids, {
+            "workflow": as_tuple(workflow_page),
+            "workflow_next": as_tuple(await feedback.get_feedback_for_workflow_page_async(
+                "email-workflow", 3, workflow_page.next_cursor)),
+            "pending": as_tuple(await feedback.get_pending_feedback_page_async(10)),
+            "batches": as_tuple(await processor.list_batches_page_async(page_size=2)),
+            "queued": as_tuple(await processor.list_batches_page_async(status_filter="pending", page_size=10)),
+            "status": await processor.get_batch_status_async("missing"),
+        }
+
+    batch_ids, result = run(db, read_pages())
+
+    workflow_page = feedback.get_feedback_for_workflow_page("email-workflow", 3)
+    assert result == {
+        "workflow": as_tuple(workflow_page),
+        "workflow_next": as_tuple(feedback.get_feedback_for_workflow_page("email-workflow", 3,
+                                                                          workflow_page.next_cursor)),
+        "pending": as_tuple(feedback.get_pending_feedback_page(10)),
+        "batches": as_tuple(processor.list_batches_page(page_size=2)),
+        "queued": as_tuple(processor.list_batches_page(status_filter="pending", page_size=10)),
+        "status": processor.get_batch_status("missing"),
+    }
+    assert [entry.id for entry in result["workflow"][0]] == ["fb_06", "fb_05", "fb_04"]
+    assert [entry.id for entry in result["pending"][0]] == ["fb_01", "fb_02", "fb_04", "fb_05"]
+    assert sorted(batch["batch_id"] for batch in result["queued"][0]) == sorted(batch_ids)
+    assert len(result["batches"][0]) == 2 and result["batches"][1] is not None
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test pre-flight batch estimates.
+
+This script:
+1. Fits agent run times on task complexity and checks per-input predictions,
+   timeout flags, and how the wall time scales with concurrency and with
+   steps that run side by side within the scheduler's slots
+2. Checks that retries, repeated inputs, shared profile steps, recorded costs
+   and token history are accounted for
+3. Checks the fallbacks without agent history (defaults, then past jobs of the
+   workflow) and the estimate of a created batch's unfinished jobs
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from agent_performance import AgentPerformanceTracker, TaskComplexityAnalyzer
+from batch_estimates import BatchEstimator
+from batch_processor import BatchProcessingConfig, JobStatus
+from conftest import FAST_CONFIG
+from fair_scheduler import FairScheduler
+
+WORKFLOW = "estimated-workflow"
+
+
+class WorkflowStepsExecutor:
+    """Workflow executor stand-in serving the steps of one workflow"""
+
+    def __init__(self, agents, shared=(), independent=False):
+        steps = [{"id": agent, "agent_id": agent, "prompt_id": agent, "order": order}
+                 for order, agent in enumerate(agents)]
+        self.config_manager = SimpleNamespace(
+            load_workflow_config=lambda workflow_id: SimpleNamespace(steps=steps) if workflow_id == WORKFLOW else None)
+        self.shared = list(shared)
+        self.independent = independent
+
+    def shared_step_ids(self, workflow_id, fields):
+        return self.shared
+
+    def step_dependencies(self, steps):
+        ids = [step["id"] for step in steps]
+        return {step_id: [] if self.independent else ids[:position] for position, step_id in enumerate(ids)}
+
+
+def task(n: int, length: int = 0) -> dict:
+    return {"n": n, "conversation_thread": "x" * length, "message_context": "cold outreach"}
+
+
+def complexity(input_data: dict) -> float:
+    return TaskComplexityAnalyzer().analyze_task_complexity(input_data)[0]
+
+
+def make_estimator(make_processor, name: str, agents, shared=(), **estimate_config):
+    processor = make_processor(name)
+    tracker = AgentPerformanceTracker()
+    estimator = BatchEstimator(processor, scheduler=FairScheduler(capacity=8, interactive_reserved=2),
+                               executor=WorkflowStepsExecutor(agents, shared),
+                               estimate_config=estimate_config)
+    return processor, tracker, estimator
+
+
+def test_durations_follow_complexity(make_processor):
+    """Each step takes 5s + 50s per unit of complexity: long inputs are flagged, lanes divide the wall time"""
+    _, tracker, estimator = make_estimator(make_processor, "estimates_complexity.db", ["research", "write"])
+    for agent in ("research", "write"):
+        for i in range(20):
+            run = task(i, length=i * 450)
+            tracker.track_execution(agent, "gpt-4", 5 + 50 * complexity(run) + (0.5 if i % 2 else -0.5), True,
+                                    task_data=run)
+
+    inputs = [task(i) for i in range(6)] + [task(100 + i, length=9000) for i in range(6)]
+    simple, hard = complexity(inputs[0]), complexity(inputs[-1])
+    config = BatchProcessingConfig(timeout_per_job=10 + 100 * (simple + hard) / 2)
+
+    estimate = estimator.estimate(WORKFLOW, enumerate(inputs), config, concurrency=1)
+    assert estimate.history["source"] == "agent_performance"
+    assert estimate.history["agents"] == {"research": 20, "write": 20}
+    assert [flagged["input"] for flagged in estimate.timeout_risk_inputs] == list(range(6, 12))
+    assert abs(estimate.timeout_risk_inputs[0]["expected_seconds"] - (10 + 100 * hard)) < 1
+    assert estimate.timeout_risk_jobs == 6 and estimate.expected_attempts_per_job == 1
+
+    serial = estimate.wall_time_seconds
+    assert serial.low < serial.expected < serial.high
+    assert abs(serial.expected - 6 * (20 + 100 * (simple + hard))) < 5
+    parallel = estimator.estimate(WORKFLOW, enumerate(inputs), config, concurrency=3).wall_time_seconds
+    assert abs(serial.expected / parallel.expected - 3) < 0.01
+    assert parallel.high - parallel.expected > (serial.high - serial.expected) / 3
+    assert estimate.total_tokens is None and estimate.total_cost is None and len(estimate.warnings) == 2
+
+    # Steps that need nothing from each other run side by side: a job takes its slower step
+    estimator.executor.independent = True
+    side_by_side = estimator.estimate(WORKFLOW, enumerate(inputs), config, concurrency=1)
+    assert abs(side_by_side.wall_time_seconds.expected - serial.expected / 2) < 5
+    assert side_by_side.timeout_risk_jobs == 0
+    # Each step in flight holds a slot: six lanes of two-step jobs are bound by the six batch slots
+    wide = estimator.estimate(WORKFLOW, enumerate(inputs), config, concurrency=6)
+    assert abs(wide.wall_time_seconds.expected - serial.expected / 6) < 5
+
+
+def test_retries_sharing_tokens_and_cost(make_processor):
+    """Half the research runs fail; research is shared by the jobs of a prospect and a repeated input runs once"""
+    processor, tracker, estimator = make_estimator(make_processor, "estimates_sharing.db", ["research", "write"],
+                                                   shared=["research"])
+    for i in range(10):
+        tracker.track_execution("research", "gpt-4", 20.0, i % 2 == 0, cost=0.02, task_data=task(i))
+        tracker.track_execution("write", "gpt-4", 10.0, True, cost=0.01, task_data=task(i))
+    for execution, tokens in enumerate((1000, 1200, 800)):
+        processor.db_manager.db_manager.save_observability_metrics({
+            "execution_id": f"exec-{execution}", "workflow_id": WORKFLOW, "timestamp": datetime.utcnow(),
+            "duration_ms": 30000, "token_usage": tokens})
+
+    profile = {"prospect_profile_url": "https://linkedin.com/in/ada"}
+    inputs = [{**profile, "n": n} for n in range(4)] + [{**profile, "n": 0}]
+    estimate = estimator.estimate(WORKFLOW, enumerate(inputs), BatchProcessingConfig(max_retries=1))
+
+    assert estimate.total_jobs == 5 and estimate.jobs_to_run == 4
+    # The repeated input skips both steps, the three later jobs of the prospect skip research
+    assert estimate.step_runs_saved == 5
+    assert estimate.expected_attempts_per_job == 1.5
+    assert abs(estimate.expected_failed_jobs - 4 * 0.25) < 1e-9
+    # Five step runs of two-step workflows at 1000 tokens per run, 1.5 attempts each
+    assert abs(estimate.total_tokens.expected - 3750) < 1e-6
+    assert estimate.history["cost_source"] == "agent_performance"
+    assert abs(estimate.total_cost.expected - 1.5 * (0.02 + 4 * 0.01)) < 1e-9
+    assert estimate.total_cost.low < estimate.total_cost.expected < estimate.total_cost.high
+    # Four jobs over three lanes: 1.5 * 60s of work, the longest job takes 30s
+    assert abs(estimate.wall_time_seconds.expected - 30) < 1e-6
+    assert estimate.concurrency == 3 and estimate.timeout_risk_jobs == 0
+
+
+def test_fallbacks_and_created_batches(make_processor):
+    """Without agent history, defaults then the workflow's past jobs are used; batches estimate unfinished jobs"""
+    processor, _, estimator = make_estimator(make_processor, "estimates_fallback.db", ["research", "write"],
+                                             default_step_seconds=20.0)
+
+    estimate = estimator.estimate(WORKFLOW, enumerate(task(i) for i in range(4)))
+    assert estimate.history["source"] == "default" and "research, write" in estimate.warnings[0]
+    assert abs(estimate.wall_time_seconds.expected - 4 * 40 / 3) < 1e-6
+
+    batch_id = asyncio.run(processor.create_batch("estimate", WORKFLOW, [task(i) for i in range(4)],
+                                                  {**FAST_CONFIG, "timeout_per_job": 10}))
+    for job in processor._claim_jobs(batch_id, 2):
+        job.status, job.execution_time, job.completed_at = JobStatus.COMPLETED, 30.0, datetime.now()
+        assert processor._update_job_status(job)
+
+    estimate = estimator.estimate_batch(batch_id, concurrency=2)
+    assert estimate.history["source"] == "batch_jobs" and estimate.history["job_samples"] == 2
+    assert estimate.total_jobs == 2 and estimate.wall_time_seconds.expected == 30
+    assert [flagged["input"] for flagged in estimate.timeout_risk_inputs] == [f"{batch_id}_{n:06d}" for n in (2, 3)]
+    assert estimator.estimate_batch("missing") is None
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test streaming batch ingestion and result export.
+
+This script:
+1. Parses CSV and JSON Lines uploads row by row and rejects malformed files
+2. Creates a batch from a generator and checks that jobs are inserted in
+   chunks while the generator is consumed
+3. Checks that a batch whose input fails midway leaves nothing behind
+4. Pages through a batch's results in job order, with and without a status filter
+"""
+
+import asyncio
+import io
+
+import pytest
+
+from batch_processor import iter_batch_inputs
+from conftest import FAST_CONFIG
+
+
+def test_uploads_are_parsed_row_by_row():
+    """CSV rows drop empty cells; JSON Lines skip blank lines and reject non-objects"""
+    csv_upload = io.BytesIO("﻿prospect_profile_url,channel,message_context\n"
+                            "https://linkedin.com/in/ada,linkedin,\n"
+                            "https://linkedin.com/in/bob,email,Follow up\n".encode())
+    assert list(iter_batch_inputs(csv_upload, "prospects.csv")) == [
+        {"prospect_profile_url": "https://linkedin.com/in/ada", "channel": "linkedin"},
+        {"prospect_profile_url": "https://linkedin.com/in/bob", "channel": "email", "message_context": "Follow up"}
+    ]
+    assert not csv_upload.closed
+
+    jsonl_upload = io.BytesIO(b'{"n": 1}\n\n{"n": 2}\n')
+    assert list(iter_batch_inputs(jsonl_upload, "inputs.ndjson")) == [{"n": 1}, {"n": 2}]
+
+    with pytest.raises(ValueError, match="Line 2 is not a JSON object"):
+        list(iter_batch_inputs(io.BytesIO(b'{"n": 1}\n[1, 2]\n'), "inputs.jsonl"))
+    with pytest.raises(ValueError, match="Unsupported batch file type"):
+        list(iter_batch_inputs(io.BytesIO(b"n\n1\n"), "inputs.xlsx"))
+
+
+def test_batch_is_created_from_a_generator_in_chunks(make_processor):
+    """2,500 generated inputs are inserted 1,000 at a time as they are produced"""
+    processor = make_processor("ingest.db")
+    processor.ingest_chunk_size = 1000
+    produced = []
+    chunks = []
+    execute_many = processor.db_manager.execute_many
+
+    def counting_execute_many(sql, rows):
+        chunks.append((len(rows), len(produced)))
+        return execute_many(sql, rows)
+
+    processor.db_manager.execute_many = counting_execute_many
+
+    def inputs():
+        for i in range(2500):
+            produced.append(i)
+            yield {"n": i, "prospect_profile_url": f"https://linkedin.com/in/prospect-{i % 10}"}
+
+    batch_id = asyncio.run(processor.create_batch("ingest", "linkedin-workflow", inputs(), FAST_CONFIG))
+
+    # Each chunk was written before the generator produced the next one
+    assert chunks == [(1000, 1000), (1000, 2000), (500, 2500)]
+    status = processor.get_batch_status(batch_id)
+    assert status["total_jobs"] == 2500 and processor.active_batches[batch_id]["total_jobs"] == 2500
+    metadata = processor.db_manager.fetch_one("SELECT metadata FROM batch_processing WHERE id = ?", (batch_id,))
+    assert '"unique_profiles": 10' in metadata["metadata"]
+
+
+def test_failed_ingestion_leaves_nothing_behind(make_processor):
+    """A bad row after the first chunk removes the batch and the jobs already inserted"""
+    processor = make_processor("ingest_failure.db")
+    processor.ingest_chunk_size = 10
+    upload = io.BytesIO(b"".join(b'{"n": %d}\n' % i for i in range(25)) + b"not json\n")
+
+    with pytest.raises(ValueError, match="Line 26 is not valid JSON"):
+        asyncio.run(processor.create_batch("broken", "linkedin-workflow",
+                                           iter_batch_inputs(upload, "inputs.jsonl"), FAST_CONFIG))
+
+    assert processor.db_manager.fetch_one("SELECT COUNT(*) AS jobs FROM batch_jobs")["jobs"] == 0
+    assert processor.db_manager.fetch_one("SELECT COUNT(*) AS batches FROM batch_processing")["batches"] == 0
+    assert not processor.active_batches
+
+
+def test_results_are_exported_page_by_page(make_processor):
+    """Every job is exported once, in job order, across pages of export_page_size"""
+    processor = make_processor("export.db")
+    processor.export_page_size = 7
+    batch_id = asyncio.run(processor.create_batch("export", "linkedin-workflow",
+                                                  [{"n": i} for i in range(20)], FAST_CONFIG))
+    processor.db_manager.execute("""
+        UPDATE batch_jobs SET status = 'completed', result = '{"ok": true}' WHERE id <= ?
+    """, (f"{batch_id}_000004",))
+
+    exported = list(processor.iter_batch_results(batch_id, include_details=True))
+    assert [job["input_data"]["n"] for job in exported] == list(range(20))
+    assert exported[0]["result"] == {"ok": True} and exported[-1]["result"] is None
+
+    completed = list(processor.iter_batch_results(batch_id, status_filter="completed"))
+    assert [job["job_id"] for job in completed] == [f"{batch_id}_{i:06d}" for i in range(5)]
+    assert "input_data" not in completed[0]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
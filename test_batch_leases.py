@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test leased batch jobs.
+
+This script:
+1. Checks that a job can only be claimed once, and again only after its lease expires
+2. Checks that a worker whose lease was taken over cannot overwrite the job
+3. Simulates a worker crash mid-batch and checks that a restarted worker resumes
+   the batch without re-running completed jobs
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import batch_processor as batch_module
+from batch_processor import BatchProcessor, BatchStatus, JobStatus
+from conftest import FAST_CONFIG, expire, job_rows
+
+
+class RecordingExecutor:
+    """Workflow executor stand-in that records which jobs ran"""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def run_full_workflow(self, workflow_id, input_data):
+        self.inputs.append(input_data["n"])
+        return {"n": input_data["n"]}
+
+
+def test_jobs_are_claimed_once_until_their_lease_expires(make_processor):
+    """Only one claim succeeds; an expired lease can be reclaimed; finished jobs never can"""
+    processor = make_processor("claims.db")
+    batch_id = asyncio.run(processor.create_batch("claims", "linkedin-workflow", [{"n": i} for i in range(2)],
+                                                  FAST_CONFIG))
+    first_id, second_id = (job.id for job in processor._load_batch_jobs(batch_id))
+
+    [first] = processor._claim_jobs(batch_id, 1)
+    assert first.id == first_id and first.lease_token
+    assert [job.id for job in processor._claim_jobs(batch_id, 2)] == [second_id]
+    assert processor._claim_jobs(batch_id, 2) == []
+
+    expire(processor, first_id)
+    [first] = processor._claim_jobs(batch_id, 2)
+    assert first.id == first_id
+
+    first.status, first.completed_at = JobStatus.COMPLETED, datetime.now()
+    assert processor._update_job_status(first)
+    expire(processor, second_id)
+    assert [job.id for job in processor._claim_jobs(batch_id, 2)] == [second_id]
+    assert job_rows(processor, batch_id)[first_id]["lease_owner"] is None
+
+
+def test_lost_lease_does_not_overwrite_new_owner(make_processor):
+    """A worker that lost its lease cannot save the job's state"""
+    processor = make_processor("fencing.db")
+    batch_id = asyncio.run(processor.create_batch("fencing", "linkedin-workflow", [{"n": 0}], FAST_CONFIG))
+    [job] = processor._claim_jobs(batch_id, 1)
+    job.status, job.started_at = JobStatus.RUNNING, datetime.now()
+    assert processor._update_job_status(job)
+
+    # Lease expires and another worker takes the job over
+    expire(processor, job.id)
+    other = BatchProcessor()
+    assert [taken.id for taken in other._claim_jobs(batch_id, 1)] == [job.id]
+
+    job.status, job.error_message = JobStatus.FAILED, "stale worker"
+    assert not processor._update_job_status(job)
+    row = job_rows(processor, batch_id)[job.id]
+    assert row["status"] == "running" and row["lease_owner"] == other.worker_id
+
+
+def test_restarted_worker_resumes_batch_without_rerunning_completed_jobs(make_processor, monkeypatch):
+    """Expired leases and pending jobs are picked up after a restart; completed jobs are not re-run"""
+    processor = make_processor("resume.db")
+    batch_id = asyncio.run(processor.create_batch("resume", "linkedin-workflow", [{"n": i} for i in range(6)],
+                                                  FAST_CONFIG))
+    jobs = processor._claim_jobs(batch_id, 2)
+
+    # The first worker finished two jobs and crashed while running two more
+    for job in jobs:
+        job.status, job.result, job.completed_at = JobStatus.COMPLETED, {"n": job.input_data["n"]}, datetime.now()
+        assert processor._update_job_status(job)
+    for n in (2, 3):
+        expire(processor, f"{batch_id}_{n:06d}")
+    processor._update_batch_status(batch_id, BatchStatus.RUNNING)
+
+    executor = RecordingExecutor()
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+    restarted = BatchProcessor()
+
+    async def resume():
+        resumed = await restarted.resume_batches()
+        await asyncio.gather(*restarted._batch_tasks.values())
+        return resumed
+
+    assert asyncio.run(resume()) == [batch_id]
+    assert sorted(executor.inputs) == [2, 3, 4, 5]
+
+    rows = job_rows(restarted, batch_id)
+    assert all(row["status"] == "completed" and row["lease_owner"] is None for row in rows.values())
+    status = restarted.get_batch_status(batch_id)
+    assert status["status"] == "completed" and status["completed_jobs"] == 6
+
+    # Nothing left to resume
+    assert asyncio.run(restarted.resume_batches()) == []
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
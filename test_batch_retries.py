@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test batch job retries and the batch circuit breaker.
+
+This script:
+1. Checks that errors are classified as transient, rate limited or permanent
+2. Checks the decorrelated jitter backoff and Retry-After handling
+3. Runs a batch and checks that permanent errors are not retried, transient
+   errors are, and that other jobs run while a job waits to retry
+4. Checks that the circuit breaker opens, probes and closes
+5. Simulates a provider outage and checks that the batch is paused instead of
+   burning its retries, then completes
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import batch_processor as batch_module
+from batch_processor import (BatchCircuitBreaker, BatchJob, BatchProcessingConfig, BatchProcessor,
+                             ErrorClass, classify_error)
+from error_handling import RateLimitError, ValidationError, WorkflowError
+
+
+class UpstreamError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def run_batch(processor: BatchProcessor, inputs, config):
+    async def run():
+        batch_id = await processor.create_batch("retries", "linkedin-workflow", inputs, config)
+        assert await processor.start_batch(batch_id)
+        await asyncio.gather(*processor._batch_tasks.values())
+        return batch_id
+
+    return asyncio.run(run())
+
+
+def test_errors_are_classified():
+    """Type and status decide first; the message decides for generic workflow errors"""
+    assert classify_error(RateLimitError("slow down")) == ErrorClass.RATE_LIMITED
+    assert classify_error(UpstreamError("Too Many Requests", 429)) == ErrorClass.RATE_LIMITED
+    assert classify_error(UpstreamError("bad gateway", 502)) == ErrorClass.TRANSIENT
+    assert classify_error(UpstreamError("bad request", 400)) == ErrorClass.PERMANENT
+    assert classify_error(TimeoutError("Job timed out after 300s")) == ErrorClass.TRANSIENT
+    assert classify_error(ValueError("Validation failed: ['missing channel']")) == ErrorClass.PERMANENT
+    assert classify_error(ValidationError("bad input")) == ErrorClass.PERMANENT
+    assert classify_error(WorkflowError("Workflow not found: nope")) == ErrorClass.PERMANENT
+    assert classify_error(WorkflowError("Connection reset by peer")) == ErrorClass.TRANSIENT
+    assert classify_error(RuntimeError("something odd")) == ErrorClass.TRANSIENT
+
+
+def test_backoff_is_jittered_capped_and_honours_retry_after():
+    """Delays grow from the base within three times the previous delay and stay under the cap"""
+    config = BatchProcessingConfig(retry_delay=1.0, retry_max_delay=10.0, rate_limit_delay=5.0)
+    job = BatchJob(id="job", batch_id="batch", input_data={}, workflow_id="linkedin-workflow")
+    previous = 0.0
+    for _ in range(20):
+        delay = BatchProcessor._retry_delay(job, ErrorClass.TRANSIENT, config, RuntimeError("boom"))
+        assert 1.0 <= delay <= min(10.0, max(1.0, previous) * 3)
+        job.retry_delay = previous = delay
+
+    job.retry_delay = 0.0
+    limited = RateLimitError("slow down", {"retry_after": 12})
+    assert 12.0 <= BatchProcessor._retry_delay(job, ErrorClass.RATE_LIMITED, config, limited) <= 12.0 * 3
+
+
+def test_permanent_errors_fail_at_once_and_retries_release_the_slot(make_processor, monkeypatch):
+    """A bad input runs once; a flaky job retries after its backoff while other jobs run"""
+    processor = make_processor("retries.db")
+    attempts = []
+
+    class FlakyExecutor:
+        async def run_full_workflow(self, workflow_id, input_data):
+            attempts.append(input_data["n"])
+            if input_data["n"] == 0 and attempts.count(0) < 3:
+                raise ConnectionError("connection reset")
+            if input_data["n"] == 1:
+                return {"status": "error", "error_message": "Workflow not found: linkedin-workflow"}
+            return {"n": input_data["n"]}
+
+    monkeypatch.setattr(batch_module, "workflow_executor", FlakyExecutor())
+    config = {"enable_validation": False, "enable_enrichment": False, "max_concurrent_jobs": 1,
+              "priority_processing": False, "retry_delay": 0.2, "retry_max_delay": 0.2, "max_retries": 3}
+    batch_id = run_batch(processor, [{"n": i} for i in range(6)], config)
+
+    assert attempts.count(0) == 3 and attempts.count(1) == 1
+    # With one consumer, the other jobs ran while job 0 waited to retry
+    assert attempts[:6] == [0, 1, 2, 3, 4, 5]
+
+    status = processor.get_batch_status(batch_id)
+    assert status["status"] == "completed"
+    assert status["completed_jobs"] == 5 and status["failed_jobs"] == 1
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    """Failures open the breaker; a failed probe doubles the cooldown; a good probe closes it"""
+    async def run():
+        breaker = BatchCircuitBreaker(window=4, min_attempts=4, failure_rate=0.5, cooldown=0.05, max_cooldown=1)
+        assert not await breaker.wait_until_allowed()
+        changes = [breaker.record(failed) for failed in (False, True, False, True)]
+        assert changes == [None, None, None, "opened"]
+
+        started = time.monotonic()
+        assert await breaker.wait_until_allowed()
+        assert time.monotonic() - started >= 0.04
+        assert breaker.record(True, probe=True) == "opened"
+
+        started = time.monotonic()
+        assert await breaker.wait_until_allowed()
+        assert time.monotonic() - started >= 0.09
+        assert breaker.record(False, probe=True) == "closed"
+        assert not await breaker.wait_until_allowed()
+
+    asyncio.run(run())
+
+
+def test_outage_pauses_the_batch_then_it_completes(make_processor, monkeypatch):
+    """During an outage the breaker pauses the batch; attempts stop piling up and the batch completes"""
+    processor = make_processor("outage.db")
+    outage_ends = time.monotonic() + 0.5
+    outage_attempts = []
+    statuses = set()
+
+    class OutageExecutor:
+        async def run_full_workflow(self, workflow_id, input_data):
+            [batch] = processor.active_batches.values()
+            statuses.add(batch["status"].value)
+            if time.monotonic() < outage_ends:
+                outage_attempts.append(input_data["n"])
+                raise UpstreamError("service unavailable", 503)
+            return {"n": input_data["n"]}
+
+    monkeypatch.setattr(batch_module, "workflow_executor", OutageExecutor())
+    config = {"enable_validation": False, "enable_enrichment": False, "max_concurrent_jobs": 2,
+              "retry_delay": 0, "max_retries": 10, "circuit_window": 4, "circuit_min_attempts": 4,
+              "circuit_failure_rate": 0.5, "circuit_cooldown": 0.2, "circuit_max_cooldown": 1}
+    batch_id = run_batch(processor, [{"n": i} for i in range(6)], config)
+
+    assert "paused" in statuses
+    assert len(outage_attempts) <= 4 + 2 + 2
+    status = processor.get_batch_status(batch_id)
+    assert status["status"] == "completed" and status["completed_jobs"] == 6
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test shared stages inside a batch.
+
+This script:
+1. Checks that profile fingerprints ignore URL case and trailing slashes and
+   leave out jobs without profile fields
+2. Runs a batch with many jobs per prospect and checks that the profile step
+   runs once per prospect, enrichment once per distinct input, and that the
+   saved LLM calls are reported
+"""
+
+import asyncio
+
+import pytest
+
+import batch_processor as batch_module
+from batch_processor import PROFILE_FIELDS, input_fingerprint
+
+
+class SharingExecutor:
+    """Workflow executor stand-in with one profile step shared by jobs of the same prospect"""
+
+    def __init__(self):
+        self.step_runs = []
+        self.shared_results = []
+
+    def shared_step_ids(self, workflow_id, fields):
+        return ["profile_enrichment"]
+
+    async def run_workflow_step(self, workflow_id, step_id, input_data):
+        self.step_runs.append(input_data["prospect_profile_url"])
+        await asyncio.sleep(0.01)
+        return {"step_id": step_id, "status": "success", "result": f"report on {input_data['prospect_profile_url']}"}
+
+    async def run_full_workflow(self, workflow_id, input_data, step_results=None):
+        report = step_results["profile_enrichment"]["result"]
+        assert input_data["prospect_profile_url"] in report
+        self.shared_results.append(report)
+        return {"report": report}
+
+
+def test_profile_fingerprint_normalizes_urls():
+    """Equivalent profile URLs share a fingerprint; other inputs do not affect it"""
+    first = {"prospect_profile_url": "https://linkedin.com/in/Ada/", "conversation_thread": "hi"}
+    second = {"prospect_profile_url": " https://LinkedIn.com/in/ada", "conversation_thread": "hello"}
+    assert input_fingerprint("profile", first, PROFILE_FIELDS) == input_fingerprint("profile", second, PROFILE_FIELDS)
+    assert input_fingerprint("input", first) != input_fingerprint("input", second)
+    assert input_fingerprint("profile", {"n": 1}, PROFILE_FIELDS) is None
+
+
+def test_batch_shares_profile_steps_and_enrichment(make_processor, monkeypatch):
+    """12 jobs for 3 prospects run the profile step 3 times and enrich 9 distinct inputs"""
+    processor = make_processor("sharing.db")
+    executor = SharingExecutor()
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+
+    enriched = []
+
+    async def counting_enrichment(inputs):
+        enriched.append(inputs["conversation_thread"])
+        return {**inputs, "enrichments": {"company_size": "startup"}}
+
+    inputs = []
+    for company in range(3):
+        threads = [{"prospect_profile_url": f"https://linkedin.com/in/prospect-{company}",
+                    "prospect_company_url": f"https://example-{company}.com",
+                    "conversation_thread": f"thread {company}-{thread}"} for thread in range(3)]
+        inputs.extend(threads + [dict(threads[0])])
+
+    config = {"enable_validation": False, "enable_enrichment": True, "retry_delay": 0, "max_concurrent_jobs": 4}
+    monkeypatch.setattr(batch_module, "enrich_workflow_context", counting_enrichment)
+
+    async def run():
+        batch_id = await processor.create_batch("sharing", "linkedin-workflow", inputs, config)
+        assert await processor.start_batch(batch_id)
+        await asyncio.gather(*processor._batch_tasks.values())
+        return batch_id
+
+    batch_id = asyncio.run(run())
+
+    assert sorted(executor.step_runs) == [f"https://linkedin.com/in/prospect-{c}" for c in range(3)]
+    assert len(executor.shared_results) == 12
+    assert len(enriched) == 9
+
+    status = processor.get_batch_status(batch_id)
+    assert status["completed_jobs"] == 12 and status["llm_calls_saved"] == 9
+    assert processor.get_batch_results(batch_id).summary["llm_calls_saved"] == 9
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
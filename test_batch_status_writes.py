@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test grouped job status writes.
+
+This script:
+1. Buffers the transitions of many jobs and checks that one flush saves the
+   latest state of each job and releases finished jobs' leases
+2. Checks that a write fenced out by a lost lease does not stop the rest of
+   the group from being saved
+3. Checks that buffered transitions are flushed in the background
+4. Checks that buffering a transition does not wait for a flush that is
+   writing to the database
+5. Checks that a failed flush raises and keeps its writes, behind newer
+   transitions, for the next flush
+"""
+
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from batch_processor import BatchProcessor, JobStatus
+from conftest import FAST_CONFIG, expire, job_rows
+
+
+def claim_all(processor: BatchProcessor, jobs: int):
+    batch_id = asyncio.run(processor.create_batch("writes", "linkedin-workflow", [{"n": i} for i in range(jobs)],
+                                                  FAST_CONFIG))
+    return batch_id, processor._claim_jobs(batch_id, jobs)
+
+
+def test_flush_saves_latest_state_of_each_job(make_processor):
+    """Running and completed transitions of 20 jobs are saved by one flush"""
+    processor = make_processor("grouped.db")
+    batch_id, jobs = claim_all(processor, 20)
+
+    async def run():
+        for job in jobs:
+            job.status, job.started_at = JobStatus.RUNNING, datetime.now()
+            processor.status_writer.submit(job)
+        for job in jobs[:15]:
+            job.status, job.result, job.completed_at = JobStatus.COMPLETED, {"n": 1}, datetime.now()
+            processor.status_writer.submit(job)
+        return processor.status_writer.flush()
+
+    assert asyncio.run(run()) == 20
+    rows = job_rows(processor, batch_id)
+    finished = [job.id for job in jobs[:15]]
+    assert all(rows[job_id]["status"] == "completed" and rows[job_id]["lease_owner"] is None
+               for job_id in finished)
+    assert all(rows[job.id]["status"] == "running" and rows[job.id]["lease_token"] == job.lease_token
+               for job in jobs[15:])
+    assert all(job.lease_token is None for job in jobs[:15])
+    assert processor.status_writer.flush() == 0
+
+
+def test_fenced_write_does_not_block_the_group(make_processor):
+    """A job whose lease was taken over keeps the new owner's state; the other writes apply"""
+    processor = make_processor("fenced.db")
+    batch_id, jobs = claim_all(processor, 5)
+    stale = jobs[2]
+    expire(processor, stale.id)
+    other = BatchProcessor()
+    assert [job.id for job in other._claim_jobs(batch_id, 5)] == [stale.id]
+
+    async def run():
+        for job in jobs:
+            job.status, job.completed_at = JobStatus.FAILED, datetime.now()
+            processor.status_writer.submit(job)
+        return processor.status_writer.flush()
+
+    assert asyncio.run(run()) == 4
+    rows = job_rows(processor, batch_id)
+    assert rows[stale.id]["status"] == "running" and rows[stale.id]["lease_owner"] == other.worker_id
+    assert all(rows[job.id]["status"] == "failed" for job in jobs if job is not stale)
+
+
+def test_buffered_writes_are_flushed_in_the_background(make_processor):
+    """Without an explicit flush, transitions reach the database after the flush interval"""
+    processor = make_processor("background.db")
+    processor.status_writer.flush_interval = 0.05
+    batch_id, [job] = claim_all(processor, 1)
+
+    async def run():
+        job.status, job.started_at = JobStatus.RUNNING, datetime.now()
+        processor.status_writer.submit(job)
+        assert job_rows(processor, batch_id)[job.id]["status"] == "pending"
+        for _ in range(50):
+            await asyncio.sleep(0.05)
+            if job_rows(processor, batch_id)[job.id]["status"] == "running":
+                return True
+        return False
+
+    assert asyncio.run(run())
+
+
+def test_submit_does_not_wait_for_a_running_flush(make_processor):
+    """A flush stuck in its database write only holds the write lock; submit() returns at once"""
+    processor = make_processor("unblocked.db")
+    batch_id, [first, second] = claim_all(processor, 2)
+    writer = processor.status_writer
+    writing, release = threading.Event(), threading.Event()
+    write = writer._write
+
+    def slow_write(writes):
+        writing.set()
+        release.wait(5)
+        return write(writes)
+
+    writer._write = slow_write
+
+    async def run():
+        first.status, first.started_at = JobStatus.RUNNING, datetime.now()
+        writer.submit(first)
+        flushing = asyncio.ensure_future(asyncio.to_thread(writer.flush))
+        assert await asyncio.to_thread(writing.wait, 5)
+
+        second.status, second.started_at = JobStatus.RUNNING, datetime.now()
+        writer.submit(second)
+        assert not release.is_set() and not flushing.done()
+        release.set()
+        return await flushing, await asyncio.to_thread(writer.flush)
+
+    assert asyncio.run(run()) == (1, 1)
+    rows = job_rows(processor, batch_id)
+    assert rows[first.id]["status"] == rows[second.id]["status"] == "running"
+
+
+def test_failed_flush_keeps_its_writes(make_processor, monkeypatch):
+    """A locked database fails the flush; the next flush saves the jobs' latest states"""
+    processor = make_processor("failed_flush.db")
+    batch_id, [done, newer] = claim_all(processor, 2)
+    writer = processor.status_writer
+    write = writer._write
+    writing, newer_buffered = threading.Event(), threading.Event()
+
+    def locked(writes):
+        writing.set()
+        newer_buffered.wait(5)
+        raise RuntimeError("database is locked")
+
+    async def run():
+        for job in (done, newer):
+            job.status, job.completed_at = JobStatus.COMPLETED, datetime.now()
+            writer.submit(job)
+        monkeypatch.setattr(writer, "_write", locked)
+        flushing = asyncio.ensure_future(asyncio.to_thread(writer.flush))
+        assert await asyncio.to_thread(writing.wait, 5)
+        # Buffered while the failing write runs, so newer than the write
+        newer.status, newer.error_message = JobStatus.FAILED, "newer"
+        writer.submit(newer)
+        newer_buffered.set()
+        with pytest.raises(RuntimeError, match="locked"):
+            await flushing
+        assert job_rows(processor, batch_id)[done.id]["status"] != "completed"
+        monkeypatch.setattr(writer, "_write", write)
+        return await asyncio.to_thread(writer.flush)
+
+    assert asyncio.run(run()) == 2
+    rows = job_rows(processor, batch_id)
+    assert rows[done.id]["status"] == "completed" and rows[done.id]["lease_owner"] is None
+    assert rows[newer.id]["status"] == "failed" and rows[newer.id]["error_message"] == "newer"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test batch workers on the Redis Streams job queue.
+
+This script:
+1. Starts a batch through one processor and runs it with two stream workers,
+   checking that the API process runs nothing itself and each job runs once
+2. Leaves entries pending under a stopped consumer and checks that another
+   worker reclaims them, without re-running a job that already finished
+3. Checks that batch status counts progress and running jobs across workers
+4. Checks that jobs left without an entry, by a publish that stopped part way
+   or by Redis losing the stream, are re-published and run once
+5. Checks that entries are only acknowledged once their job's final state
+   is saved
+
+The stream is an in-process stand-in for Redis, so no server is needed.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+import batch_processor as batch_module
+from batch_processor import BatchProcessor, BatchStatus, JobStatus
+from batch_queue import BatchJobStream
+from conftest import (FAST_CONFIG, FakeStreamRedis, expire, run_workers_until_finished,
+                      stream_processor)
+from error_handling import ConfigurationError
+
+
+class RecordingExecutor:
+    """Workflow executor stand-in that records which jobs ran"""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def run_full_workflow(self, workflow_id, input_data):
+        self.inputs.append(input_data["n"])
+        await asyncio.sleep(0.005)
+        return {"n": input_data["n"]}
+
+
+def test_stream_workers_run_each_job_once(make_processor, monkeypatch):
+    """30 jobs published by the API process are run once each by two workers"""
+    api = make_processor("stream_workers.db")
+    client = FakeStreamRedis()
+    api.job_stream = BatchJobStream(client, api.worker_id)
+    workers = [stream_processor(client), stream_processor(client)]
+    executor = RecordingExecutor()
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+
+    async def run():
+        batch_id = await api.create_batch("stream", "linkedin-workflow", [{"n": i} for i in range(30)],
+                                          FAST_CONFIG)
+        assert await api.start_batch(batch_id)
+        assert not api._batch_tasks and client.xlen("crewai:batch_jobs") == 30
+        await run_workers_until_finished(api, batch_id, workers)
+        return batch_id
+
+    batch_id = asyncio.run(run())
+
+    assert sorted(executor.inputs) == list(range(30))
+    status = api.get_batch_status(batch_id)
+    assert status["completed_jobs"] == 30 and status["progress_percentage"] == 100
+    assert status["queue"] == {"queued_entries": 0, "pending_entries": 0, "consumers": {}}
+
+
+def test_entries_of_a_stopped_worker_are_reclaimed(make_processor, monkeypatch):
+    """Entries a stopped consumer took are run by another worker; finished jobs are only acknowledged"""
+    api = make_processor("stream_reclaim.db")
+    client = FakeStreamRedis()
+    api.job_stream = BatchJobStream(client, api.worker_id)
+    executor = RecordingExecutor()
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+
+    batch_id = asyncio.run(api.create_batch("reclaim", "linkedin-workflow", [{"n": i} for i in range(4)],
+                                            FAST_CONFIG))
+    assert asyncio.run(api.start_batch(batch_id))
+
+    # The stopped consumer took three entries, finished the first job and crashed running the other two
+    crashed = BatchJobStream(client, "crashed-worker")
+    taken = crashed.read(3)
+    assert [job_id for _, _, job_id in taken] == [f"{batch_id}_{n:06d}" for n in range(3)]
+    finished = api._claim_job(taken[0][2])
+    finished.status, finished.result, finished.completed_at = JobStatus.COMPLETED, {"n": 0}, datetime.now()
+    assert api._update_job_status(finished)
+    for _, _, job_id in taken[1:]:
+        expire(api, job_id)
+    # A duplicate entry of the finished job
+    api.job_stream.publish(batch_id, [finished.id])
+
+    worker = stream_processor(client, reclaim_idle_ms=0)
+    asyncio.run(run_workers_until_finished(api, batch_id, [worker]))
+
+    assert sorted(executor.inputs) == [1, 2, 3]
+    assert api.get_batch_status(batch_id)["completed_jobs"] == 4
+    assert worker.job_stream.summary() == {"queued_entries": 0, "pending_entries": 0, "consumers": {}}
+
+
+def test_status_counts_jobs_across_workers(make_processor):
+    """Progress counts every finished job; running jobs are broken down by worker and set the ETA"""
+    processor = make_processor("stream_status.db")
+    with pytest.raises(ConfigurationError):
+        asyncio.run(processor.run_stream_worker())
+
+    other = BatchProcessor()
+    batch_id = asyncio.run(processor.create_batch("status", "linkedin-workflow", [{"n": i} for i in range(10)],
+                                                  FAST_CONFIG))
+    processor._update_batch_status(batch_id, BatchStatus.RUNNING)
+
+    for job in processor._claim_jobs(batch_id, 4):
+        job.status, job.execution_time, job.completed_at = JobStatus.COMPLETED, 2.0, datetime.now()
+        assert processor._update_job_status(job)
+    for owner, jobs in ((processor, 2), (other, 1)):
+        for job in owner._claim_jobs(batch_id, jobs):
+            job.status, job.started_at = JobStatus.RUNNING, datetime.now()
+            assert owner._update_job_status(job)
+
+    status = processor.get_batch_status(batch_id)
+    assert status["progress_percentage"] == 40 and status["running_jobs"] == 3
+    assert status["workers"] == {processor.worker_id: 2, other.worker_id: 1}
+    # Six jobs left, three running at a time, two seconds each
+    eta = (datetime.fromisoformat(status["estimated_completion"]) - datetime.now()).total_seconds()
+    assert 3 < eta <= 4
+    assert "queue" not in status
+
+
+def test_jobs_without_entries_are_republished(make_processor, monkeypatch):
+    """A partly published batch and a batch whose stream was lost are both finished by an idle worker"""
+    api = make_processor("stream_orphans.db")
+    client = FakeStreamRedis()
+    api.job_stream = BatchJobStream(client, api.worker_id)
+    executor = RecordingExecutor()
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+    worker = stream_processor(client)
+    worker.reclaim_interval_seconds = 0
+
+    # The API process stopped after publishing two of six jobs
+    partial = asyncio.run(api.create_batch("partial", "linkedin-workflow", [{"n": i} for i in range(6)],
+                                           FAST_CONFIG))
+    api._update_batch_status(partial, BatchStatus.RUNNING)
+    assert api.job_stream.mark_published(partial, 50)
+    api.job_stream.publish(partial, [f"{partial}_{n:06d}" for n in range(2)])
+    # Nothing is re-published while the publish may still be under way
+    assert worker._republish_orphaned_jobs() == 0
+    time.sleep(0.06)
+    asyncio.run(run_workers_until_finished(api, partial, [worker]))
+    assert sorted(executor.inputs) == list(range(6))
+
+    # Redis lost the stream after a worker took two entries and crashed running one of them
+    lost = asyncio.run(api.create_batch("lost", "linkedin-workflow", [{"n": i} for i in range(10, 14)],
+                                        FAST_CONFIG))
+    assert asyncio.run(api.start_batch(lost))
+    taken = BatchJobStream(client, "crashed-worker").read(2)
+    expire(api, taken[0][2])
+    client.flushall()
+    asyncio.run(run_workers_until_finished(api, lost, [worker]))
+
+    assert sorted(executor.inputs) == list(range(6)) + list(range(10, 14))
+    assert api.get_batch_status(lost)["completed_jobs"] == 4
+    assert worker.job_stream.summary() == {"queued_entries": 0, "pending_entries": 0, "consumers": {}}
+
+
+def test_entries_wait_for_their_job_state_to_be_saved(make_processor, monkeypatch):
+    """While status writes fail, finished jobs keep their entries; they are acknowledged once saved"""
+    api = make_processor("stream_unsaved.db")
+    client = FakeStreamRedis()
+    api.job_stream = BatchJobStream(client, api.worker_id)
+    executor = RecordingExecutor()
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+    worker = stream_processor(client)
+    write, locked = worker.status_writer._write, [True]
+
+    def flaky_write(writes):
+        if locked[0]:
+            raise RuntimeError("database is locked")
+        return write(writes)
+
+    monkeypatch.setattr(worker.status_writer, "_write", flaky_write)
+
+    async def run():
+        batch_id = await api.create_batch("unsaved", "linkedin-workflow", [{"n": i} for i in range(3)], FAST_CONFIG)
+        assert await api.start_batch(batch_id)
+        stop = asyncio.Event()
+        running = asyncio.create_task(worker.run_stream_worker(3, stop))
+        for _ in range(200):
+            if len(executor.inputs) == 3:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        pending, completed = client.xpending("crewai:batch_jobs", "workers")["pending"], \
+            api.get_batch_status(batch_id)["completed_jobs"]
+
+        locked[0] = False
+        for _ in range(200):
+            if api.get_batch_status(batch_id)["status"] == BatchStatus.COMPLETED.value:
+                break
+            await asyncio.sleep(0.02)
+        stop.set()
+        await running
+        return batch_id, pending, completed
+
+    batch_id, pending, completed = asyncio.run(run())
+    assert pending == 3 and completed == 0
+    assert sorted(executor.inputs) == [0, 1, 2]
+    assert api.get_batch_status(batch_id)["completed_jobs"] == 3
+    assert worker.job_stream.summary() == {"queued_entries": 0, "pending_entries": 0, "consumers": {}}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
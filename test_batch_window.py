@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test windowed batch scheduling.
+
+This script:
+1. Runs a batch larger than its chunk size and checks that no more than
+   chunk_size jobs are leased at any time
+2. Checks that every job runs exactly once and that higher priority jobs are
+   claimed first
+3. Checks the running job duration average and the concurrency-aware ETA
+4. Checks that progress writes are throttled and the final progress is saved
+"""
+
+import asyncio
+
+import pytest
+
+import batch_processor as batch_module
+from batch_processor import BatchProgressTracker, BatchStatus, JobStatus
+
+
+class WindowCheckingExecutor:
+    """Workflow executor stand-in that records the leased jobs while each job runs"""
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.inputs = []
+        self.max_leased = 0
+
+    async def run_full_workflow(self, workflow_id, input_data):
+        # Save buffered job updates so finished jobs have released their leases
+        self.processor.status_writer.flush()
+        leased = self.processor.db_manager.fetch_one(
+            "SELECT COUNT(*) AS leased FROM batch_jobs WHERE lease_owner IS NOT NULL"
+        )["leased"]
+        self.max_leased = max(self.max_leased, leased)
+        self.inputs.append(input_data["n"])
+        await asyncio.sleep(0)
+        return {"n": input_data["n"]}
+
+
+def test_batch_runs_in_a_bounded_window_in_priority_order(make_processor, monkeypatch):
+    """A 40 job batch never leases more than chunk_size jobs and runs each job once, by priority"""
+    processor = make_processor("window.db")
+    executor = WindowCheckingExecutor(processor)
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+
+    config = {"enable_validation": False, "enable_enrichment": False, "retry_delay": 0,
+              "chunk_size": 4, "max_concurrent_jobs": 2, "priority_processing": True}
+    # The last ten jobs have the highest priority
+    priority_map = {i: 1 for i in range(30, 40)}
+
+    async def run():
+        batch_id = await processor.create_batch("window", "linkedin-workflow", [{"n": i} for i in range(40)],
+                                                config, priority_map)
+        assert await processor.start_batch(batch_id)
+        await asyncio.gather(*processor._batch_tasks.values())
+        return batch_id
+
+    batch_id = asyncio.run(run())
+
+    assert sorted(executor.inputs) == list(range(40))
+    assert 0 < executor.max_leased <= 4
+    assert set(executor.inputs[:10]) == set(range(30, 40))
+
+    status = processor.get_batch_status(batch_id)
+    assert status["status"] == BatchStatus.COMPLETED.value and status["completed_jobs"] == 40
+
+
+def test_progress_tracker_smooths_job_time_and_divides_eta_by_concurrency():
+    """The ETA uses the weighted job time and runs the remaining jobs concurrency at a time"""
+    tracker = BatchProgressTracker(total_jobs=10, processed_jobs=2, smoothing=0.5)
+    assert tracker.eta_seconds(3) is None
+
+    tracker.record(JobStatus.COMPLETED, 4.0)
+    tracker.record(JobStatus.FAILED, 100.0)
+    tracker.record(JobStatus.COMPLETED, 2.0)
+    assert tracker.ewma_job_time == 3.0
+    assert (tracker.processed_jobs, tracker.completed_jobs, tracker.failed_jobs) == (5, 2, 1)
+    assert tracker.progress == 50.0
+
+    # Five jobs left: two rounds with three workers, five with one, one with more workers than jobs
+    assert tracker.eta_seconds(3) == 6.0
+    assert tracker.eta_seconds(1) == 15.0
+    assert tracker.eta_seconds(10) == 3.0
+
+
+def test_progress_writes_are_throttled_and_flushed_at_the_end(make_processor, monkeypatch):
+    """A fast batch writes progress about once per interval and saves its final progress"""
+    processor = make_processor("progress.db")
+    monkeypatch.setattr(batch_module, "workflow_executor", WindowCheckingExecutor(processor))
+    processor.progress_write_interval = 60
+
+    writes = []
+    execute = processor.db_manager.execute
+
+    def counting_execute(sql, params=None):
+        if "INTO batch_progress" in sql:
+            writes.append(params)
+        return execute(sql, params)
+
+    processor.db_manager.execute = counting_execute
+    config = {"enable_validation": False, "enable_enrichment": False, "retry_delay": 0, "max_concurrent_jobs": 2}
+
+    async def run():
+        batch_id = await processor.create_batch("progress", "linkedin-workflow", [{"n": i} for i in range(30)],
+                                                config)
+        assert await processor.start_batch(batch_id)
+        await asyncio.gather(*processor._batch_tasks.values())
+        return batch_id
+
+    batch_id = asyncio.run(run())
+
+    assert len(writes) == 2
+    status = processor.get_batch_status(batch_id)
+    assert status["progress_percentage"] == 100
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
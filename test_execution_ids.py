@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test execution id allocation.
+
+This script:
+1. Checks that ids keep the exec_ prefix, decode to their creation time and sort in creation order
+2. Allocates ids from many threads and from several processes and checks they are all unique
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from execution_ids import execution_id_timestamp, new_execution_id
+
+
+def allocate(count: int) -> list:
+    """Allocate count ids in one thread"""
+    return [new_execution_id() for _ in range(count)]
+
+
+def test_ids_are_prefixed_and_time_ordered():
+    """Ids look like exec_<ULID>, carry their timestamp and sort by creation"""
+    before = time.time()
+    ids = allocate(1000)
+    after = time.time()
+
+    assert all(execution_id.startswith("exec_") and len(execution_id) == 31 for execution_id in ids)
+    assert before - 0.001 <= execution_id_timestamp(ids[0]) <= execution_id_timestamp(ids[-1]) <= after
+    assert ids == sorted(ids)
+
+
+def test_ids_are_unique_across_threads_and_processes():
+    """Concurrent allocation needs no lock and never repeats an id"""
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        threaded = [execution_id for batch in pool.map(allocate, [2000] * 8) for execution_id in batch]
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        processes = [execution_id for batch in pool.map(allocate, [2000] * 4) for execution_id in batch]
+
+    ids = threaded + processes
+    assert len(set(ids)) == len(ids) == 24000
+
+
+if __name__ == "__main__":
+    for test in (test_ids_are_prefixed_and_time_ordered,
+                 test_ids_are_unique_across_threads_and_processes):
+        try:
+            test()
+            print(f"✅ PASSED - {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ FAILED - {test.__name__}\n{e}")
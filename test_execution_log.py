@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the append-only execution journal.
+
+This script:
+1. Checks that the offset index points at the latest version of each record
+   and survives reopening the journal
+2. Checks that a torn final line is truncated on open and later appends land
+   after the last good line
+3. Checks that compaction drops superseded and deleted lines, refreshes the
+   legacy export, and that replace_all keeps only the given records
+4. Checks that journals opened by two processes see each other's appends and
+   rewrites, and that compaction keeps the other process's records
+"""
+
+import json
+import os
+
+import pytest
+
+from execution_log import ExecutionLog
+
+
+def make_log(directory: str, **kwargs) -> ExecutionLog:
+    return ExecutionLog(os.path.join(directory, "events.jsonl"),
+                        export_path=os.path.join(directory, "history.json"), **kwargs)
+
+
+def read_lines(path: str):
+    with open(path, "rb") as f:
+        return f.readlines()
+
+
+def test_offset_index_points_at_latest_version(tmp_path):
+    """get() reads the line the index points at; reopening rebuilds the same index"""
+    directory = str(tmp_path)
+    log = make_log(directory)
+    for step in range(3):
+        log.put({"id": "a", "status": "running", "step": step})
+    log.put({"id": "b", "status": "completed"})
+    log.put({"id": "c", "status": "running"})
+    assert log.delete("c") and not log.delete("missing")
+
+    assert log.get("a") == {"id": "a", "status": "running", "step": 2}
+    assert log.get("c") is None and "c" not in log and len(log) == 2
+    assert [record["id"] for record in log.all()] == ["a", "b"]
+    # Two superseded puts of a, plus the put and tombstone of c
+    assert log.get_stats()["dead_lines"] == 4
+
+    lines = read_lines(log.log_path)
+    offsets = dict(log._index)
+    with open(log.log_path, "rb") as f:
+        f.seek(offsets["a"])
+        assert json.loads(f.readline())["record"]["step"] == 2
+    assert len(lines) == 6
+
+    reopened = make_log(directory)
+    assert reopened._index == offsets and reopened.get_stats() == log.get_stats()
+    assert reopened.get("b") == {"id": "b", "status": "completed"}
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    """A crash mid-append leaves a partial line that is dropped on the next open"""
+    directory = str(tmp_path)
+    log = make_log(directory)
+    log.put({"id": "a", "status": "completed"})
+    log.put({"id": "b", "status": "running"})
+    good_size = os.path.getsize(log.log_path)
+    with open(log.log_path, "ab") as f:
+        f.write(b'{"op": "put", "id": "b", "record": {"id": "b", "sta')
+
+    recovered = make_log(directory)
+    assert os.path.getsize(recovered.log_path) == good_size
+    assert recovered.get("b") == {"id": "b", "status": "running"} and len(recovered) == 2
+
+    recovered.put({"id": "b", "status": "completed"})
+    reopened = make_log(directory)
+    assert reopened.get("b") == {"id": "b", "status": "completed"}
+    assert all(json.loads(line) for line in read_lines(reopened.log_path))
+
+
+def test_compaction_and_replace_all(tmp_path):
+    """Compaction keeps one line per live record and refreshes the export, which is stale in between"""
+    directory = str(tmp_path)
+    log = make_log(directory, compaction_min_dead=10, compaction_ratio=1.0)
+    log.put({"id": "keep", "status": "completed"})
+    log.put({"id": "gone", "status": "completed"})
+    log.delete("gone")
+    for step in range(7):
+        log.put({"id": "busy", "step": step})
+    # 1 + 6 superseded busy lines + put and tombstone of gone: 8 dead lines, below the threshold
+    assert log.get_stats()["dead_lines"] == 8 and not os.path.exists(log.export_path)
+
+    log.put({"id": "busy", "step": 7})
+    log.put({"id": "busy", "step": 8})
+    # Ten dead lines against two live records triggered compaction
+    assert log.get_stats()["dead_lines"] == 0 and len(read_lines(log.log_path)) == 2
+    assert [record["id"] for record in log.all()] == ["keep", "busy"] and log.get("busy")["step"] == 8
+    with open(log.export_path) as f:
+        assert json.load(f) == log.all()
+
+    # Saves after compaction only reach the journal until the next export
+    log.put({"id": "new", "status": "running"})
+    with open(log.export_path) as f:
+        assert [record["id"] for record in json.load(f)] == ["keep", "busy"]
+
+    # Cleanup tools filter through replace_all instead of editing the export
+    log.replace_all([record for record in log.all() if record["id"] != "busy"])
+    assert log.ids() == ["keep", "new"] and log.get("busy") is None
+    with open(log.export_path) as f:
+        assert [record["id"] for record in json.load(f)] == ["keep", "new"]
+    assert make_log(directory).ids() == ["keep", "new"]
+
+
+def test_journal_shared_by_two_processes(tmp_path):
+    """Two handles on one journal stand in for an API worker and a cleanup script"""
+    directory = str(tmp_path)
+    api, other = make_log(directory), make_log(directory)
+    api.put({"id": "a", "status": "running"})
+    other.put({"id": "b", "status": "running"})
+    api.put({"id": "a", "status": "completed"})
+    assert api.get("b") == {"id": "b", "status": "running"}
+    assert [record["id"] for record in other.all()] == ["b", "a"] and other.get("a")["status"] == "completed"
+
+    # A cleanup script rewrites the journal; the API's next appends land after the rewrite
+    other.replace_all([record for record in other.all() if record["id"] != "a"])
+    api.put({"id": "c", "status": "running"})
+    assert api.ids() == ["b", "c"] and [record["id"] for record in other.all()] == ["b", "c"]
+
+    # Compaction by one handle keeps what the other appended since it last looked
+    other.put({"id": "d", "status": "running"})
+    api.compact()
+    assert [record["id"] for record in api.all()] == ["b", "c", "d"]
+    assert [record["id"] for record in make_log(directory).all()] == ["b", "c", "d"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the summary and detail views of execution history.
+
+This script:
+1. Checks that the detail fetch returns the input, output and step JSON left
+   out of summary pages, or only the requested columns, from the database,
+   live state and journal alike
+2. Checks that /api/execution-history returns summary rows by default and full
+   rows with the legacy 'output' alias for view=full
+3. Checks that /api/execution-history/{id} streams the full record, honours
+   fields and rejects unknown fields
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from database import EXECUTION_DETAIL_COLUMNS, EXECUTION_SUMMARY_COLUMNS
+from execution_manager import ExecutionManager
+
+STEPS = [{"name": "draft", "result": "x" * 2000}, {"name": "review", "result": "approved"}]
+
+
+def make_manager(make_database_manager, set_config, tmp_path, name: str) -> ExecutionManager:
+    """ExecutionManager on a scratch database with two stored executions"""
+    set_config("executions", write_behind_enabled=False)
+    manager = ExecutionManager(json_file_path=str(tmp_path / "history.json"),
+                               log_path=str(tmp_path / "events.jsonl"))
+    manager.db_manager = make_database_manager(name)
+    for i in range(2):
+        assert manager.save_execution({
+            "id": f"exec_{i}", "workflow_id": "email-workflow", "status": "completed",
+            "started_at": datetime(2025, 1, 1, 9, i), "input_data": {"channel": "email", "thread": "Hi"},
+            "output_data": {"quality_score": 90 + i, "message": "Thanks for reaching out"}, "steps": STEPS
+        })
+    return manager
+
+
+def fetch(manager: ExecutionManager, db, execution_id: str, columns=None):
+    """Fetch one execution on a fresh event loop, closing the async connections it opened there"""
+    async def main():
+        try:
+            return await manager.get_execution_async(execution_id, columns=columns)
+        finally:
+            await db.dispose_async()
+    return asyncio.run(main())
+
+
+def test_detail_fetch_returns_blobs(make_database_manager, set_config, tmp_path):
+    """Summary pages leave the JSON columns out; the detail fetch returns them, or just the requested ones"""
+    manager = make_manager(make_database_manager, set_config, tmp_path, "detail.db")
+    db = manager.db_manager
+    summary = manager.get_execution_page(page_size=10, summary=True).items
+    assert [tuple(item) for item in summary] == [EXECUTION_SUMMARY_COLUMNS] * 2
+
+    detail = fetch(manager, db, "exec_1")
+    assert set(EXECUTION_SUMMARY_COLUMNS + EXECUTION_DETAIL_COLUMNS) <= set(detail)
+    assert (detail["steps"], detail["output_data"]["message"]) == (STEPS, "Thanks for reaching out")
+    assert {name: detail[name] for name in EXECUTION_SUMMARY_COLUMNS} == summary[0]
+
+    assert fetch(manager, db, "exec_1", ("id", "steps", "quality_score")) == {
+        "id": "exec_1", "steps": STEPS, "quality_score": 91
+    }
+    assert fetch(manager, db, "missing") is None
+
+
+def test_detail_projection_of_live_and_journal_records(make_database_manager, set_config, tmp_path):
+    """Records not read from the database are projected to the same columns, generated ones included"""
+    manager = make_manager(make_database_manager, set_config, tmp_path, "detail_live.db")
+    db = manager.db_manager
+    manager.write_behind_enabled = True
+    manager.update_execution_state({"id": "exec_live", "workflow_id": "email-workflow", "status": "running",
+                                    "started_at": datetime(2025, 1, 1, 10), "input_data": {"channel": "linkedin"},
+                                    "output": {"quality_score": 75}, "steps": STEPS[:1]})
+    columns = ("id", "status", "channel", "quality_score", "steps")
+    assert fetch(manager, db, "exec_live", columns) == {
+        "id": "exec_live", "status": "running", "channel": "linkedin", "quality_score": 75, "steps": STEPS[:1]
+    }
+
+    manager.db_manager = None
+    assert fetch(manager, db, "exec_0", columns) == {
+        "id": "exec_0", "status": "completed", "channel": "email", "quality_score": 90, "steps": STEPS
+    }
+
+
+def test_history_endpoints_split_summary_and_detail(make_database_manager, set_config, tmp_path, monkeypatch):
+    """The list endpoint returns summary rows unless asked for full ones; the detail endpoint streams blobs"""
+    pytest.importorskip("uvicorn")
+    from fastapi.testclient import TestClient
+
+    import app
+
+    manager = make_manager(make_database_manager, set_config, tmp_path, "endpoints.db")
+    # TestClient runs each request on its own event loop, which pooled aiosqlite connections cannot follow
+    manager.db_manager._async_unavailable = True
+    monkeypatch.setattr(app, "execution_manager", manager)
+    client = TestClient(app.app)
+
+    summary = client.get("/api/execution-history", params={"page_size": 10}).json()
+    assert [item["id"] for item in summary["items"]] == ["exec_1", "exec_0"]
+    assert all(set(item) == set(EXECUTION_SUMMARY_COLUMNS) for item in summary["items"])
+
+    full = client.get("/api/execution-history", params={"page_size": 10, "view": "full"}).json()["items"][0]
+    assert full["output"] == full["output_data"] and full["steps"] == STEPS
+
+    detail = client.get("/api/execution-history/exec_1")
+    assert detail.headers["content-type"] == "application/json"
+    assert detail.json()["steps"] == STEPS and detail.json()["input_data"]["thread"] == "Hi"
+    assert client.get("/api/execution-history/exec_1", params={"fields": "steps, channel"}).json() == {
+        "id": "exec_1", "steps": STEPS, "channel": "email"
+    }
+    assert client.get("/api/execution-history/exec_1", params={"fields": "steps,password"}).status_code == 400
+    assert client.get("/api/execution-history/missing").status_code == 404
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
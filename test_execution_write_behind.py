@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the write-behind store for execution progress updates.
+
+This script:
+1. Checks that progress updates between flushes are coalesced into one
+   batched write per execution while readers see the latest state
+2. Checks that terminal states are flushed at once and then read from the
+   database
+3. Checks that updates still pending at shutdown are flushed
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+import execution_manager
+from execution_manager import ExecutionManager
+
+
+def make_manager(make_database_manager, set_config, tmp_path, name: str) -> ExecutionManager:
+    """ExecutionManager on a scratch database whose background flusher does not fire during a test"""
+    set_config("executions", write_behind_enabled=True, flush_interval_ms=60000)
+    manager = ExecutionManager(json_file_path=str(tmp_path / "history.json"),
+                               log_path=str(tmp_path / "events.jsonl"))
+    manager.db_manager = make_database_manager(name)
+    return manager
+
+
+def stored(manager: ExecutionManager) -> dict:
+    with manager.db_manager.get_session() as session:
+        rows = session.execute(text("SELECT id, status, progress FROM execution_history ORDER BY id"))
+        return {row.id: (row.status, row.progress) for row in rows}
+
+
+def update(manager: ExecutionManager, execution_id: str, status: str, progress: int) -> bool:
+    return manager.update_execution_state({"id": execution_id, "workflow_id": "email-workflow", "status": status,
+                                           "started_at": datetime(2025, 1, 1), "progress": progress})
+
+
+def test_progress_updates_are_coalesced(make_database_manager, set_config, tmp_path):
+    """Five updates of two executions become one batch of two rows"""
+    manager = make_manager(make_database_manager, set_config, tmp_path, "coalesce.db")
+    for progress in (25, 60, 85):
+        assert update(manager, "exec_a", "running", progress)
+    for progress in (10, 50):
+        assert update(manager, "exec_b", "running", progress)
+
+    assert manager.get_execution("exec_a")["progress"] == 85
+    assert stored(manager) == {}
+
+    assert manager.flush()
+    assert stored(manager) == {"exec_a": ("running", 85), "exec_b": ("running", 50)}
+    stats = manager.get_write_stats()
+    assert (stats["updates_received"], stats["updates_coalesced"]) == (5, 3)
+    assert (stats["db_batches"], stats["db_records_written"], stats["pending_flush"]) == (1, 2, 0)
+    # Nothing changed since, so the next flush writes nothing
+    assert manager.flush() and manager.get_write_stats()["db_batches"] == 1
+
+
+def test_terminal_states_are_flushed_at_once(make_database_manager, set_config, tmp_path):
+    """A completed execution is written immediately and leaves the in-memory store"""
+    manager = make_manager(make_database_manager, set_config, tmp_path, "terminal.db")
+    update(manager, "exec_a", "running", 60)
+    assert update(manager, "exec_a", "completed", 100)
+
+    assert stored(manager) == {"exec_a": ("completed", 100)}
+    stats = manager.get_write_stats()
+    assert (stats["forced_flushes"], stats["live_executions"]) == (1, 0)
+    assert manager.get_execution("exec_a")["status"] == "completed"
+
+
+def test_pending_updates_are_flushed_at_shutdown(make_database_manager, set_config, tmp_path, monkeypatch):
+    """The manager registers its flush to run at interpreter exit"""
+    registered = []
+    monkeypatch.setattr(execution_manager.atexit, "register", registered.append)
+    manager = make_manager(make_database_manager, set_config, tmp_path, "shutdown.db")
+    update(manager, "exec_a", "running", 85)
+    assert stored(manager) == {}
+
+    assert registered == [manager.flush]
+    for callback in registered:
+        callback()
+    assert stored(manager) == {"exec_a": ("running", 85)}
+    assert manager.event_log.get("exec_a")["progress"] == 85
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
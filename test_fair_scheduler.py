@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test weighted fair scheduling of workflow runs.
+
+This script:
+1. Checks that waiting batches are granted slots in proportion to their weights
+2. Checks that a batch started while a large one is running is served right away
+3. Checks that interactive requests keep their reserved slots and go first
+4. Checks that schedulers sharing a Redis slot pool respect its global capacity
+5. Runs two batches through one processor and checks that together they never
+   exceed the scheduler's capacity and the small batch is not starved
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import batch_processor as batch_module
+from conftest import FAST_CONFIG, FakePipeline
+from fair_scheduler import INTERACTIVE_FLOW, FairScheduler, RedisSlotPool, batch_flow
+
+
+class FakeSortedSetRedis:
+    """The sorted set commands RedisSlotPool uses"""
+
+    def __init__(self):
+        self.sets = {}
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.sets.setdefault(key, {})
+        expired = [member for member, score in members.items() if score <= float(high)]
+        for member in expired:
+            del members[member]
+        return len(expired)
+
+    def zadd(self, key, mapping, xx=False):
+        members = self.sets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            if xx and member not in members:
+                continue
+            added += member not in members
+            members[member] = score
+        return added
+
+    def zcard(self, key):
+        return len(self.sets.get(key, {}))
+
+    def zrem(self, key, *members):
+        return sum(self.sets.get(key, {}).pop(member, None) is not None for member in members)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+async def run_jobs(scheduler: FairScheduler, jobs, order: list):
+    """Run (flow, weight) jobs that each hold a slot for one loop iteration"""
+    async def job(flow, weight):
+        async with scheduler.slot(flow, weight):
+            order.append(flow)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(job(flow, weight) for flow, weight in jobs))
+
+
+def test_batches_share_slots_by_weight():
+    """A batch of weight 3 gets three grants for every grant of a batch of weight 1"""
+    scheduler = FairScheduler(capacity=1, interactive_reserved=0)
+    heavy, light = batch_flow("heavy"), batch_flow("light")
+    order = []
+
+    async def run():
+        # Both batches queue up behind a running job
+        token = await scheduler.acquire(batch_flow("first"))
+        queued = asyncio.ensure_future(run_jobs(scheduler, [(heavy, 3.0)] * 30 + [(light, 1.0)] * 30, order))
+        await asyncio.sleep(0)
+        await scheduler.release(batch_flow("first"), token)
+        await queued
+
+    asyncio.run(run())
+
+    assert 14 <= order[:20].count(heavy) <= 16
+    assert len(order) == 60 and scheduler.running == 0
+
+
+def test_late_batch_is_not_starved():
+    """A batch started after 50 grants of a 100 job batch runs its jobs within the next few grants"""
+    scheduler = FairScheduler(capacity=2, interactive_reserved=0)
+    big, small = batch_flow("big"), batch_flow("small")
+    order = []
+    late = []
+
+    async def job(flow):
+        async with scheduler.slot(flow):
+            order.append(flow)
+            if len(order) == 50:
+                late.append(asyncio.ensure_future(run_jobs(scheduler, [(small, 1.0)] * 5, order)))
+            await asyncio.sleep(0)
+
+    async def run():
+        await asyncio.gather(*(job(big) for _ in range(100)))
+        await asyncio.gather(*late)
+
+    asyncio.run(run())
+
+    small_positions = [i for i, flow in enumerate(order) if flow == small]
+    assert len(small_positions) == 5 and max(small_positions) < 62
+
+
+def test_interactive_requests_keep_their_reserve():
+    """Batches never take the reserved slot; a freed slot goes to a waiting interactive request first"""
+    scheduler = FairScheduler(capacity=3, interactive_reserved=1)
+    flow = batch_flow("batch")
+
+    async def run():
+        releases = [asyncio.Event() for _ in range(5)]
+
+        async def batch_job(release):
+            async with scheduler.slot(flow):
+                await release.wait()
+
+        batch_jobs = [asyncio.ensure_future(batch_job(release)) for release in releases]
+        await asyncio.sleep(0)
+        assert scheduler.running == 2
+        assert scheduler.snapshot()['flows'][flow] == {'weight': 1.0, 'running': 2, 'waiting': 3}
+
+        # The reserved slot is free for an interactive request
+        first = await asyncio.wait_for(scheduler.acquire(INTERACTIVE_FLOW), 0.1)
+        second = asyncio.ensure_future(scheduler.acquire(INTERACTIVE_FLOW))
+        await asyncio.sleep(0)
+        assert not second.done()
+
+        # A batch slot frees up: the waiting interactive request takes it before the waiting batch jobs
+        releases[0].set()
+        await asyncio.sleep(0.01)
+        assert second.done() and scheduler.snapshot()['flows'][flow]['waiting'] == 3
+
+        await scheduler.release(INTERACTIVE_FLOW, first)
+        await scheduler.release(INTERACTIVE_FLOW, second.result())
+        for release in releases:
+            release.set()
+        await asyncio.gather(*batch_jobs)
+        assert scheduler.running == 0
+
+    asyncio.run(run())
+
+
+def test_slot_pool_caps_runs_across_processes():
+    """Two schedulers sharing a pool of two slots hold at most two slots between them"""
+    client = FakeSortedSetRedis()
+    pools = [RedisSlotPool(client, capacity=2, lease_seconds=60) for _ in range(2)]
+    first, second = (FairScheduler(capacity=2, interactive_reserved=0, pool=pool, poll_interval=0.01)
+                     for pool in pools)
+    flow = batch_flow("batch")
+
+    async def run():
+        tokens = [await first.acquire(flow), await first.acquire(flow)]
+        waiting = asyncio.ensure_future(second.acquire(flow))
+        await asyncio.sleep(0.05)
+        assert not waiting.done() and client.zcard("crewai:run_slots") == 2
+
+        await first.release(flow, tokens.pop())
+        token = await asyncio.wait_for(waiting, 1)
+        assert client.zcard("crewai:run_slots") == 2
+
+        # A lease that is not renewed expires and frees its slot
+        client.sets["crewai:run_slots"][tokens[0]] = time.time() - 61
+        assert pools[1].try_acquire("other-process", 2)
+        await second.release(flow, token)
+
+    asyncio.run(run())
+
+
+class ConcurrencyRecordingExecutor:
+    """Workflow executor stand-in that records which jobs ran and how many ran at once"""
+
+    def __init__(self):
+        self.inputs = []
+        self.running = 0
+        self.max_running = 0
+
+    async def run_full_workflow(self, workflow_id, input_data):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.inputs.append(input_data["n"])
+        await asyncio.sleep(0.005)
+        self.running -= 1
+        return {"n": input_data["n"]}
+
+
+def test_batches_share_the_process_capacity(make_processor, monkeypatch):
+    """A 40 job and a 4 job batch never run more than two jobs at once, and the small one finishes first"""
+    processor = make_processor("fair.db")
+    processor.scheduler = FairScheduler(capacity=2, interactive_reserved=0)
+    executor = ConcurrencyRecordingExecutor()
+    monkeypatch.setattr(batch_module, "workflow_executor", executor)
+    config = {**FAST_CONFIG, "max_concurrent_jobs": 2}
+
+    async def run():
+        big = await processor.create_batch("big", "linkedin-workflow", [{"n": i} for i in range(40)], config)
+        assert await processor.start_batch(big)
+        await asyncio.sleep(0.02)
+        small = await processor.create_batch("small", "linkedin-workflow", [{"n": 100 + i} for i in range(4)],
+                                             config)
+        assert await processor.start_batch(small)
+        await asyncio.gather(*processor._batch_tasks.values())
+
+    asyncio.run(run())
+
+    assert executor.max_running <= 2
+    assert sorted(executor.inputs) == list(range(40)) + [100, 101, 102, 103]
+    last_small = max(executor.inputs.index(100 + i) for i in range(4))
+    assert last_small < len(executor.inputs) - 10
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Test the FAQ agent's tiered resolver and semantic answer cache.
+
+This script:
+1. Checks that the configured thresholds map search similarities to the
+   direct, synthesis and no-match tiers, and that only the synthesis tier
+   pays for question analysis and synthesis
+2. Checks that cached answers are only reused for paraphrases asked on the
+   same channel, FAQ version and context, and that the cache is capped as a whole
+3. Checks that concurrent searches share one reload of a changed FAQ set,
+   which replaces the embeddings only once they are fully encoded
+4. Checks that the parallel workflow answers its FAQ questions in worker
+   threads, side by side, while the event loop keeps running
+"""
+
+import asyncio
+import json
+import threading
+import time
+import zlib
+
+import numpy as np
+import pytest
+
+import faq_agent
+from faq_agent import NO_MATCH_ANSWER, FAQAgent, SemanticAnswerCache
+
+FEES = {"question": "What are your fees?", "answer": "We charge a success fee.", "keywords": "fees"}
+
+
+class FakeEncoder:
+    """Embedding model stand-in returning a fixed vector per text, optionally slow or failing"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    def encode(self, sentences):
+        self.calls.append(sentences)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("encoder failed")
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        vectors = np.vstack([np.random.default_rng(zlib.crc32(text.encode())).random(8) for text in texts])
+        return vectors[0] if isinstance(sentences, str) else vectors
+
+
+class FakeFAQManager:
+    """FAQ knowledge base stand-in whose version changes with its entries"""
+
+    def __init__(self, faqs):
+        self.faqs = list(faqs)
+        self.version = "v1"
+
+    def get_version(self):
+        return self.version
+
+    def load_all_faqs(self):
+        return list(self.faqs)
+
+
+def make_agent(monkeypatch, similarity: float = 0.0) -> FAQAgent:
+    """FAQAgent with a fake encoder whose searches return FEES at the given similarity"""
+    agent = FAQAgent()
+    agent.semantic_model = FakeEncoder()
+    monkeypatch.setattr(agent, "_refresh_if_stale", lambda: None)
+    monkeypatch.setattr(agent, "semantic_search", lambda query, top_k=5, query_embedding=None: (
+        [dict(FEES, similarity_score=similarity)] if similarity else []))
+    agent.synthesized = []
+
+    def synthesize(question, context, relevant_faqs):
+        agent.synthesized.append(question)
+        return {"answer": f"Synthesized: {question}", "confidence": 0.8, "sources": relevant_faqs, "analysis": {}}
+
+    monkeypatch.setattr(agent, "_synthesize_answer", synthesize)
+    return agent
+
+
+def test_thresholds_come_from_config(set_config):
+    """Similarities at or above a threshold fall into its tier"""
+    set_config("faq", direct_answer_threshold=0.85, synthesis_threshold=0.6)
+    agent = FAQAgent()
+
+    assert [agent.classify_match(s) for s in (0.95, 0.85, 0.84, 0.6, 0.59, 0.0)] == [
+        "direct", "direct", "synthesis", "synthesis", "no_match", "no_match"
+    ]
+    assert agent.get_tier_stats()["thresholds"] == {"direct_answer": 0.85, "synthesis": 0.6}
+
+
+def test_tiers_only_synthesize_mid_range_matches(set_config, monkeypatch):
+    """Strong matches return the stored answer, weak ones the no-match answer, neither calls the LLM"""
+    set_config("faq", direct_answer_template="{answer} (re: {faq_question})")
+    analyzed = []
+    monkeypatch.setattr(FAQAgent, "analyze_question", lambda self, question, context=None: analyzed.append(question))
+
+    direct = make_agent(monkeypatch, similarity=0.95).get_intelligent_answer("How much do you charge?")
+    assert direct["tier"] == "direct"
+    assert direct["answer"] == "We charge a success fee. (re: What are your fees?)"
+    assert direct["confidence"] == 0.95
+
+    no_match = make_agent(monkeypatch, similarity=0.0).get_intelligent_answer("Who won the match?")
+    assert (no_match["tier"], no_match["answer"], no_match["sources"]) == ("no_match", NO_MATCH_ANSWER, [])
+    assert not analyzed
+
+    agent = make_agent(monkeypatch, similarity=0.7)
+    synthesis = agent.get_intelligent_answer("Do fees depend on the round size?")
+    assert synthesis["tier"] == "synthesis"
+    assert agent.synthesized == ["Do fees depend on the round size?"]
+
+
+def test_tier_stats_report_hit_rates(monkeypatch):
+    """Each answered question counts towards its tier's hit rate and latency"""
+    agent = make_agent(monkeypatch, similarity=0.95)
+    for _ in range(3):
+        agent.get_intelligent_answer("What are your fees?")
+    monkeypatch.setattr(agent, "semantic_search", lambda query, top_k=5, query_embedding=None: [])
+    agent.get_intelligent_answer("Unrelated")
+
+    stats = agent.get_tier_stats()
+    assert stats["total_requests"] == 4
+    assert stats["tiers"]["direct"]["count"] == 3 and stats["tiers"]["direct"]["hit_rate"] == 0.75
+    assert stats["tiers"]["no_match"]["hit_rate"] == 0.25
+    assert stats["tiers"]["synthesis"] == {"count": 0, "hit_rate": 0.0, "avg_latency_ms": 0.0}
+
+
+def test_answer_cache_keys_channel_version_and_context():
+    """A paraphrase hits only the bucket of its own channel, FAQ version and context"""
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    question = np.array([1.0, 0.0, 0.0])
+    paraphrase = np.array([0.98, 0.1, 0.0])
+    unrelated = np.array([0.0, 1.0, 0.0])
+    context_key = cache.context_fingerprint({"channel": "email", "thread": "Hi"})
+    cache.set(question, "email", "v1", {"answer": "Success fee"}, context_key)
+
+    hit = cache.get(paraphrase, "email", "v1", context_key)
+    assert hit["answer"] == "Success fee" and hit["cache_similarity"] > 0.9
+    assert cache.get(unrelated, "email", "v1", context_key) is None
+    assert cache.get(question, "linkedin", "v1", context_key) is None
+    assert cache.get(question, "email", "v2", context_key) is None
+    assert cache.get(question, "email", "v1", cache.context_fingerprint({"channel": "email"})) is None
+    assert cache.get(question, "email", "v1") is None
+    # Key order does not change the fingerprint
+    assert cache.context_fingerprint({"thread": "Hi", "channel": "email"}) == context_key
+    assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 5
+
+
+def test_answer_cache_caps_all_buckets_together():
+    """Beyond max_entries the oldest entry is evicted, whichever bucket it is in"""
+    cache = SemanticAnswerCache(max_entries=3)
+    vectors = np.eye(4)
+    for i, channel in enumerate(["email", "linkedin", "email", "sms"]):
+        cache.set(vectors[i], channel, "v1", {"answer": f"answer {i}"})
+
+    assert cache.get_stats()["entries"] == 3
+    assert cache.get(vectors[0], "email", "v1") is None
+    assert [cache.get(vectors[i], channel, "v1")["answer"] for i, channel in
+            [(1, "linkedin"), (2, "email"), (3, "sms")]] == ["answer 1", "answer 2", "answer 3"]
+
+
+def test_synthesized_answers_are_reused_per_context(monkeypatch):
+    """The same question reuses its synthesized answer, unless the channel or context differs"""
+    agent = make_agent(monkeypatch, similarity=0.7)
+    email = {"channel": "email", "thread_analysis": {"stage": "intro"}}
+
+    first = agent.get_intelligent_answer("What are your fees?", email)
+    again = agent.get_intelligent_answer("What are your fees?", dict(email))
+    assert (first["tier"], again["tier"]) == ("synthesis", "answer_cache")
+    assert again["answer"] == first["answer"]
+
+    agent.get_intelligent_answer("What are your fees?", {"channel": "linkedin", "thread_analysis": {"stage": "intro"}})
+    agent.get_intelligent_answer("What are your fees?", {"channel": "email", "thread_analysis": {"stage": "follow-up"}})
+    assert len(agent.synthesized) == 3
+
+
+def test_concurrent_searches_share_one_reload(monkeypatch):
+    """Searches racing a changed FAQ set wait for a single encode of it"""
+    manager = FakeFAQManager([FEES, {"question": "How long does it take?", "answer": "Eight weeks."}])
+    monkeypatch.setattr(faq_agent, "faq_manager", manager)
+    agent = FAQAgent()
+    agent.semantic_model = FakeEncoder(delay=0.2)
+
+    threads = [threading.Thread(target=agent._refresh_if_stale) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(agent.semantic_model.calls) == 1
+    assert agent.faq_version == "v1" and len(agent.faq_data) == 2 and agent.faq_embeddings.shape == (2, 8)
+
+
+def test_reload_swaps_in_only_a_fully_encoded_set(monkeypatch):
+    """A failed reload keeps the current set and cached answers; a successful one replaces both"""
+    manager = FakeFAQManager([FEES])
+    monkeypatch.setattr(faq_agent, "faq_manager", manager)
+    agent = FAQAgent()
+    agent.semantic_model = FakeEncoder()
+    agent._refresh_if_stale()
+    agent.answer_cache.set(np.ones(8), "email", "v1", {"answer": "Success fee"})
+
+    manager.faqs.append({"question": "How long does it take?", "answer": "Eight weeks."})
+    manager.version = "v2"
+    agent.semantic_model.fail = True
+    agent._refresh_if_stale()
+    assert agent.faq_version == "v1" and len(agent.faq_data) == 1
+    assert agent.answer_cache.get_stats()["entries"] == 1
+
+    agent.semantic_model.fail = False
+    agent._refresh_if_stale()
+    assert agent.faq_version == "v2" and len(agent.faq_data) == 2
+    assert agent.answer_cache.get_stats()["entries"] == 0
+
+
+def test_parallel_workflow_answers_faqs_off_the_loop(monkeypatch):
+    """Blocking FAQ lookups overlap in worker threads instead of stalling the event loop"""
+    import workflow
+
+    questions = ["What are your fees?", "How long does it take?", "Do you work with seed rounds?"]
+    analysis = {"personalization_data": {"explicit_questions": questions[:2], "implicit_needs": questions[2:]}}
+
+    async def thread_analysis(conversation_thread, channel):
+        yield {"type": "thread_analysis_complete", "result": json.dumps(analysis)}
+
+    lookup_threads = []
+
+    def answer(question, context):
+        lookup_threads.append(threading.current_thread())
+        time.sleep(0.3)
+        return f"Answer to {question}"
+
+    monkeypatch.setattr(workflow, "run_thread_analysis_streaming", thread_analysis)
+    monkeypatch.setattr(workflow, "get_intelligent_faq_answer", answer)
+    monkeypatch.setattr(workflow.workflow_cache, "get_cached_workflow_result_smart", lambda *args: None)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        start = time.monotonic()
+        stream = workflow.run_workflow_parallel_streaming(
+            "faq-workflow", "thread", "email", "", "", "", include_profile=False, include_reply_generation=False)
+        answered = []
+        async for update in stream:
+            if update["type"] == "faq_answer_processed":
+                answered.append(update["question"])
+                if len(answered) == len(questions):
+                    break
+        await stream.aclose()
+        elapsed = time.monotonic() - start
+        ticker.cancel()
+        return threading.current_thread(), answered, elapsed, ticks
+
+    loop_thread, answered, elapsed, ticks = asyncio.run(run())
+    assert answered == questions
+    assert len(lookup_threads) == 3 and loop_thread not in lookup_threads
+    # Three 0.3s lookups in a row would take 0.9s, and the loop would not tick meanwhile
+    assert elapsed < 0.6
+    assert ticks >= 10
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
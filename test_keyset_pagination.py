@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test keyset (cursor) pagination.
+
+This script:
+1. Checks that cursors round-trip their sort-key values, datetimes included,
+   and that malformed cursors are rejected with a 400
+2. Walks execution history and feedback pages whose rows share timestamps and
+   checks that every row comes back exactly once, in sort-key order
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from pagination import decode_cursor, encode_cursor
+
+BASE = datetime(2025, 1, 1, 9, 30, 15, 250000)
+
+
+def walk(fetch_page):
+    """Follow next_cursor from the first page to the last, returning every page's items"""
+    pages, cursor = [], None
+    while True:
+        page = fetch_page(cursor)
+        pages.append(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    """Datetimes, strings and numbers come back as they went in; bad cursors are a client error"""
+    values = [BASE, "exec_00042", 7]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, expected_length=3) == values
+
+    for bad, expected_length in [("not-a-cursor!", None), (encode_cursor([BASE]), 2),
+                                 (encode_cursor([{"dt": "yesterday"}]), None)]:
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(bad, expected_length)
+        assert error.value.status_code == 400
+
+
+def test_execution_pages_break_timestamp_ties_by_id(make_database_manager):
+    """Executions started at the same instant are ordered by id and never skipped or repeated"""
+    db = make_database_manager("keyset_executions.db")
+    # Three executions per timestamp, so page boundaries fall inside groups of ties
+    started = {f"exec_{i:02d}": BASE + timedelta(seconds=i // 3) for i in range(14)}
+    with db.engine.begin() as conn:
+        conn.execute(db.execution_history_table.insert(), [
+            {"id": execution_id, "workflow_id": "email-workflow", "started_at": started_at,
+             "status": "completed" if int(execution_id[-2:]) % 2 else "failed"}
+            for execution_id, started_at in started.items()
+        ])
+
+    pages = walk(lambda cursor: db.get_execution_page(page_size=4, cursor=cursor))
+    assert [len(items) for items in pages] == [4, 4, 4, 2]
+    ids = [item["id"] for items in pages for item in items]
+    assert ids == sorted(started, key=lambda execution_id: (started[execution_id], execution_id), reverse=True)
+
+    completed = walk(lambda cursor: db.get_execution_page(page_size=2, cursor=cursor, status="completed"))
+    assert [item["id"] for items in completed for item in items] == [i for i in ids if int(i[-2:]) % 2]
+    assert db.get_execution_page(page_size=2, status="completed").total == 7
+
+
+def test_feedback_pages_break_timestamp_ties_by_id(make_database_manager, monkeypatch):
+    """The raw-SQL keyset condition pages ties by id in both directions"""
+    import database
+    from feedback_system import FeedbackSystem
+
+    db = make_database_manager("keyset_feedback.db")
+    monkeypatch.setattr(database, "db_manager", db)
+    feedback = FeedbackSystem()
+    created = {f"fb_{i:02d}": BASE + timedelta(seconds=i // 4) for i in range(11)}
+    with db.engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO feedback_entries (id, execution_id, workflow_id, feedback_type, source, status, created_at)
+            VALUES (:id, 'exec_1', 'email-workflow', 'rating', 'api', 'pending', :created_at)
+        """), [{"id": feedback_id, "created_at": created_at} for feedback_id, created_at in created.items()])
+
+    def order(descending):
+        return sorted(created, key=lambda feedback_id: (created[feedback_id], feedback_id), reverse=descending)
+
+    newest_first = walk(lambda cursor: feedback.get_feedback_for_workflow_page("email-workflow", 3, cursor))
+    assert [entry.id for items in newest_first for entry in items] == order(descending=True)
+    oldest_first = walk(lambda cursor: feedback.get_pending_feedback_page(3, cursor))
+    assert [entry.id for items in oldest_first for entry in items] == order(descending=False)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Test the incrementally maintained metric rollups.
+
+This script:
+1. Saves evaluation and observability rows through DatabaseManager and checks
+   the rollup-backed summaries against aggregates over the raw rows
+2. Checks that windowed queries combine minute and day buckets correctly
+3. Checks that a backfill rebuilds the same buckets from the source tables,
+   paging text keys such as feedback_entries.id as well as integer ones
+4. Checks that a backfill keeps the buckets of days retention compacted and
+   counts rows saved while it runs once
+5. Checks that a tracked agent run and its rollups are saved together, and
+   that tables kept to one run per agent and model are migrated
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from metrics_rollup import Measurement, bucket_start
+
+
+def save_rows(db, rows: int = 40):
+    """Save evaluations and observability metrics spread over three days"""
+    base = datetime.now() - timedelta(days=2)
+    for i in range(rows):
+        timestamp = base + timedelta(minutes=97 * i)
+        db.save_evaluation_result({
+            "execution_id": f"exec_{i}",
+            "workflow_id": "linkedin-workflow",
+            "timestamp": timestamp,
+            "quality_score": 70 + i % 30,
+            "channel": "linkedin" if i % 3 else "email"
+        })
+        db.save_observability_metrics({
+            "execution_id": f"exec_{i}",
+            "workflow_id": "linkedin-workflow",
+            "timestamp": timestamp,
+            "duration_ms": 500 + 10 * i,
+            "error_count": 1 if i % 4 == 0 else 0,
+            "cache_hits": i % 3,
+            "cache_misses": 1
+        })
+
+
+def test_summaries_match_raw_aggregates(make_database_manager):
+    """Rollup-backed summaries equal the aggregates they replace"""
+    db = make_database_manager("rollups.db")
+    save_rows(db)
+
+    evaluations = db.evaluation_history_table
+    metrics = db.observability_metrics_table
+    with db.get_session() as session:
+        average_quality = session.execute(select(func.avg(evaluations.c.quality_score))).scalar()
+        channels = dict(session.execute(
+            select(evaluations.c.channel, func.count()).group_by(evaluations.c.channel)
+        ).all())
+        average_duration = session.execute(select(func.avg(metrics.c.duration_ms))).scalar()
+        errors = session.execute(select(func.count()).where(metrics.c.error_count > 0)).scalar()
+        hits, lookups = session.execute(select(
+            func.sum(metrics.c.cache_hits), func.sum(metrics.c.cache_hits + metrics.c.cache_misses)
+        )).one()
+
+    evaluation_metrics = db.get_evaluation_metrics()
+    assert evaluation_metrics["total_evaluations"] == 40
+    assert abs(evaluation_metrics["average_quality_score"] - average_quality) < 1e-9
+    assert evaluation_metrics["channel_distribution"] == channels
+    assert asyncio.run(db.get_evaluation_metrics_async()) == evaluation_metrics
+
+    performance = db.get_performance_metrics()
+    assert performance["total_executions"] == 40
+    assert abs(performance["average_duration_ms"] - average_duration) < 1e-9
+    assert abs(performance["error_rate"] - errors / 40) < 1e-9
+    assert abs(performance["cache_hit_rate"] - hits / lookups) < 1e-9
+    db.engine.dispose()
+
+
+def test_windowed_query_combines_minute_and_day_buckets(make_database_manager):
+    """A window starting mid-day counts minute buckets for that day and day buckets after it"""
+    db = make_database_manager("window.db")
+    day = datetime(2025, 3, 1)
+    db.rollups.record([
+        Measurement("test.events", day + timedelta(hours=hours), workflow_id=workflow_id)
+        for hours in (1, 10, 23, 25, 49, 60)
+        for workflow_id in ("a", "b")
+    ])
+
+    since = day + timedelta(hours=9, minutes=30)
+    assert db.rollups.total("test.events", since)["sample_count"] == 10
+    assert db.rollups.total("test.events", since, workflow_id="a")["sample_count"] == 5
+    assert db.rollups.total("test.events")["sample_count"] == 12
+
+    daily = db.rollups.query("test.events", group_by=["bucket_start"], granularity="day", workflow_id="b")
+    assert [row["sample_count"] for row in sorted(daily, key=lambda row: row["bucket_start"])] == [3, 1, 2]
+    db.engine.dispose()
+
+
+def test_backfill_rebuilds_rollups(make_database_manager):
+    """Backfilling from the source tables reproduces the incrementally maintained buckets"""
+    db = make_database_manager("backfill.db")
+    save_rows(db, rows=25)
+
+    columns = [c for c in db.metric_rollups_table.c if c.name != "id"]
+    with db.get_session() as session:
+        incremental = sorted(session.execute(select(*columns)).all())
+
+    assert db.rollups.backfill(["observability", "evaluation"], batch_size=7) == {
+        "observability": 25, "evaluation": 25
+    }
+    with db.get_session() as session:
+        rebuilt = sorted(session.execute(select(*columns)).all())
+
+    assert rebuilt == incremental
+    db.engine.dispose()
+
+
+def test_backfill_pages_text_keys(make_database_manager, monkeypatch):
+    """Outside SQLite the backfill pages by id, which is a text UUID for feedback_entries"""
+    db = make_database_manager("backfill_text_keys.db")
+    ids = [str(uuid.uuid4()) for _ in range(10)]
+    with db.get_session() as session:
+        session.execute(text("CREATE TABLE text_keyed (id TEXT PRIMARY KEY, n INTEGER)"))
+        for n, key in enumerate(ids):
+            session.execute(text("INSERT INTO text_keyed (id, n) VALUES (:id, :n)"), {"id": key, "n": n})
+
+    monkeypatch.setattr(db.config, "db_type", "postgresql")
+    assert db.rollups._position_key("text_keyed") == ("id", False)
+    batches = list(db.rollups._source_batches("text_keyed", "id", 4))
+    assert [len(rows) for rows in batches] == [4, 4, 2]
+    assert [row["id"] for rows in batches for row in rows] == sorted(ids)
+
+
+def test_backfill_keeps_compacted_days_and_counts_live_rows_once(make_database_manager, monkeypatch):
+    """A day retention deleted some rows of keeps its buckets; a row saved during the scan counts once"""
+    db = make_database_manager("backfill_live.db")
+    first_day = bucket_start(datetime.now() - timedelta(days=3), "day")
+    times = [first_day + timedelta(hours=hour) for hour in (1, 2, 3)]
+    times += [first_day + timedelta(days=1, hours=hour) for hour in (5, 6)]
+    for i, timestamp in enumerate(times):
+        db.save_evaluation_result({"execution_id": f"exec_{i}", "workflow_id": "wf", "timestamp": timestamp,
+                                   "quality_score": 80, "channel": "email"})
+
+    # Retention compacted the first day's partition and had deleted two of its rows so far
+    with db.get_session() as session:
+        session.execute(db.retention_partitions_table.insert().values(
+            table_name="evaluation_history", partition_start=first_day,
+            partition_end=first_day + timedelta(days=1), state="summarized"))
+        session.execute(text("DELETE FROM evaluation_history WHERE execution_id IN ('exec_0', 'exec_1')"))
+
+    scan = db.rollups._source_batches
+
+    def scan_while_saving(*args, **kwargs):
+        for position, rows in enumerate(scan(*args, **kwargs)):
+            if position == 0:
+                db.save_evaluation_result({"execution_id": "live", "workflow_id": "wf", "quality_score": 80,
+                                           "timestamp": first_day + timedelta(days=1, hours=7), "channel": "email"})
+            yield rows
+
+    monkeypatch.setattr(db.rollups, "_source_batches", scan_while_saving)
+    # Only the second day is rebuilt, from the rows there before the backfill started
+    assert db.rollups.backfill(["evaluation"], batch_size=1) == {"evaluation": 2}
+    assert db.rollups.total("evaluation.quality_score") == {"sample_count": 6, "value_sum": 480.0}
+    assert db.rollups.total("evaluation.quality_score", since=first_day + timedelta(days=1))["sample_count"] == 3
+
+
+def test_agent_run_and_rollups_share_a_transaction(make_database_manager, monkeypatch):
+    """A failed rollup upsert rolls back the agent_performance row it belongs to"""
+    import database
+    from agent_performance import AgentPerformanceTracker
+
+    db = make_database_manager("agent_runs.db")
+    monkeypatch.setattr(database, "db_manager", db)
+    tracker = AgentPerformanceTracker()
+    tracker.track_execution("research", "gpt-4", 3.0, True, quality_score=90)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("rollup upsert failed")
+
+    monkeypatch.setattr(db.rollups, "_upsert", fail)
+    tracker.track_execution("research", "gpt-4", 5.0, True, quality_score=70)
+
+    with db.get_session() as session:
+        assert session.execute(text("SELECT execution_time FROM agent_performance")).scalars().all() == [3.0]
+    assert db.rollups.total("agent.executions")["sample_count"] == 1
+
+
+def test_agent_pair_constraint_is_dropped(make_database_manager, monkeypatch):
+    """Tables created with UNIQUE(agent_id, model_name) are rebuilt without it, keeping their rows"""
+    import database
+    from agent_performance import AgentPerformanceTracker
+
+    db = make_database_manager("agent_pairs.db")
+    monkeypatch.setattr(database, "db_manager", db)
+    with db.get_session() as session:
+        session.execute(text(AgentPerformanceTracker._create_table_sql("agent_performance").replace(
+            "metadata TEXT", "metadata TEXT, UNIQUE(agent_id, model_name)")))
+        session.execute(text("INSERT INTO agent_performance (agent_id, model_name, execution_time, success) "
+                             "VALUES ('research', 'gpt-4', 2.0, 1)"))
+
+    tracker = AgentPerformanceTracker()
+    tracker.track_execution("research", "gpt-4", 3.0, True)
+    tracker.track_execution("research", "gpt-4", 4.0, True)
+
+    with db.get_session() as session:
+        times = session.execute(text("SELECT execution_time FROM agent_performance ORDER BY id")).scalars().all()
+        # An interrupted rebuild that dropped the old table is finished on the next start
+        session.execute(text("ALTER TABLE agent_performance RENAME TO agent_performance_rebuilt"))
+    assert times == [2.0, 3.0, 4.0]
+
+    AgentPerformanceTracker()
+    with db.get_session() as session:
+        assert session.execute(text("SELECT COUNT(*) FROM agent_performance")).scalar() == 3
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Test that the database queries behind the API endpoints are index-backed.
+
+This script:
+1. Runs each endpoint query method of DatabaseManager against a scratch SQLite database
+2. Captures every SELECT it issues and checks its EXPLAIN QUERY PLAN for
+   full table scans and temporary ORDER BY b-trees
+3. Checks that migrate_schema adds generated columns and indexes to a database
+   created by an earlier version
+4. Checks that summary execution pages leave out the JSON blobs, including for
+   in-flight executions and the journal fallback
+5. Checks the plans of the feedback and batch list and status queries, which
+   create their own tables and indexes
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, List, Tuple
+
+import pytest
+from sqlalchemy import event, text
+
+from database import EXECUTION_SUMMARY_COLUMNS, DatabaseManager
+from execution_manager import ExecutionManager
+
+
+def seed(db: DatabaseManager, rows: int = 500):
+    """Insert executions, evaluations and observability metrics"""
+    base = datetime(2025, 1, 1)
+    with db.engine.begin() as conn:
+        conn.execute(db.execution_history_table.insert(), [{
+            "id": f"exec_{i:05d}",
+            "workflow_id": "linkedin-workflow" if i % 2 else "email-workflow",
+            "status": "completed" if i % 3 else "failed",
+            "started_at": base + timedelta(minutes=i),
+            "input_data": {"channel": "linkedin" if i % 2 else "email"},
+            "output_data": {"quality_score": 80 + i % 20} if i % 3 else {},
+            "progress": 100
+        } for i in range(rows)])
+        conn.execute(db.evaluation_history_table.insert(), [{
+            "execution_id": f"exec_{i:05d}",
+            "workflow_id": "linkedin-workflow",
+            "timestamp": base + timedelta(minutes=i),
+            "quality_score": 80 + i % 20,
+            "channel": "linkedin" if i % 2 else "email"
+        } for i in range(rows)])
+        conn.execute(db.observability_metrics_table.insert(), [{
+            "execution_id": f"exec_{i:05d}",
+            "workflow_id": "linkedin-workflow",
+            "timestamp": base + timedelta(minutes=i),
+            "duration_ms": 1000 + i
+        } for i in range(rows)])
+        conn.execute(text("ANALYZE"))
+
+
+def capture_selects(db: DatabaseManager, call: Callable[[], Any]) -> List[Tuple[str, Any]]:
+    """Run call and return the SELECT statements it sent to the database"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        call()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return statements
+
+
+def query_plan(db: DatabaseManager, statement: str, parameters: Any) -> List[str]:
+    """Return the steps of a statement's EXPLAIN QUERY PLAN"""
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def plan_problems(db: DatabaseManager, statement: str, parameters: Any, tables: Iterable[str] = ()) -> List[str]:
+    """
+    Return the plan steps that scan a table without an index or order rows in a temp b-tree
+
+    Tables of DatabaseManager are known; pass the names and aliases of raw-SQL tables in tables.
+    """
+    tables = set(db.metadata.tables) | set(tables)
+    problems = []
+    for detail in query_plan(db, statement, parameters):
+        # Scans of subqueries are fine; their own steps are checked separately
+        scanned = detail.split()[1] if detail.startswith("SCAN") else None
+        if scanned in tables and "INDEX" not in detail:
+            problems.append(detail)
+        # Grouping rollup buckets sorts a bounded number of rows; sorting a page query does not
+        if "USE TEMP B-TREE FOR ORDER BY" in detail:
+            problems.append(detail)
+    return problems
+
+
+def endpoint_queries(db: DatabaseManager) -> List[Tuple[str, Callable[[], Any]]]:
+    """Database calls made by the API endpoints"""
+    first_page = db.get_execution_page(page_size=20)
+    return [
+        ("execution history page", lambda: db.get_execution_page(page_size=20)),
+        ("execution history next page", lambda: db.get_execution_page(page_size=20, cursor=first_page.next_cursor)),
+        ("execution history by status", lambda: db.get_execution_page(page_size=20, status="completed")),
+        ("execution history by workflow", lambda: db.get_execution_page(page_size=20, workflow_id="email-workflow")),
+        ("execution history by channel", lambda: db.get_execution_page(page_size=20, channel="linkedin")),
+        ("execution history summary page",
+         lambda: db.get_execution_page(page_size=20, status="completed", columns=EXECUTION_SUMMARY_COLUMNS)),
+        ("recent executions", lambda: db.get_execution_history(limit=50)),
+        ("scored executions", lambda: db.get_scored_executions(limit=50)),
+        ("evaluation history page", lambda: db.get_evaluation_page(page_size=20)),
+        ("evaluation history by workflow", lambda: db.get_evaluation_page(page_size=20, workflow_id="linkedin-workflow")),
+        ("recent evaluations", lambda: db.get_evaluation_history(limit=30)),
+        ("evaluation metrics", lambda: db.get_evaluation_metrics()),
+        ("performance metrics", lambda: db.get_performance_metrics()),
+        ("recent observability metrics", lambda: db.get_observability_history(limit=30)),
+    ]
+
+
+def test_endpoint_queries_use_indexes(make_database_manager):
+    """Every SELECT behind the endpoints is served by an index"""
+    db = make_database_manager("plans.db")
+    seed(db)
+
+    failures = []
+    for name, call in endpoint_queries(db):
+        statements = capture_selects(db, call)
+        assert statements, f"{name} issued no SELECT"
+        for statement, parameters in statements:
+            problems = plan_problems(db, statement, parameters)
+            if problems:
+                failures.append(f"{name}: {problems} in {' '.join(statement.split())}")
+
+    db.engine.dispose()
+    assert not failures, "\n".join(failures)
+
+
+def test_generated_columns_extract_json_fields(make_database_manager):
+    """channel and quality_score are derived from input_data and output_data"""
+    db = make_database_manager("generated.db")
+    seed(db, rows=10)
+
+    page = db.get_execution_page(page_size=10, channel="email")
+    assert page.items and all(item["input_data"]["channel"] == "email" for item in page.items)
+
+    scored = db.get_scored_executions(limit=10)
+    assert scored and all(item["quality_score"] == item["output_data"]["quality_score"] for item in scored)
+
+    # Generated columns read back from a row are ignored on save instead of failing
+    record = dict(scored[0], progress=50)
+    assert db.save_execution_record(record)
+    db.engine.dispose()
+
+
+def test_migrate_schema_upgrades_existing_database(make_database_manager, tmp_path):
+    """Tables created before the generated columns existed get them, and their indexes, on startup"""
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    conn.execute("""
+        CREATE TABLE execution_history (
+            id VARCHAR(50) PRIMARY KEY, workflow_id VARCHAR(100) NOT NULL, workflow_name VARCHAR(255),
+            status VARCHAR(50) NOT NULL, started_at DATETIME NOT NULL, completed_at DATETIME,
+            duration INTEGER, input_data JSON, output_data JSON, error_message TEXT, steps JSON,
+            current_step VARCHAR(100), progress INTEGER, executed_by VARCHAR(100), created_at DATETIME
+        )
+    """)
+    conn.execute("""
+        INSERT INTO execution_history (id, workflow_id, status, started_at, input_data, output_data)
+        VALUES ('legacy_1', 'linkedin-workflow', 'completed', '2025-01-01 00:00:00.000000',
+                '{"channel": "email"}', '{"quality_score": 91}')
+    """)
+    conn.commit()
+    conn.close()
+
+    db = make_database_manager("legacy.db")
+    with db.engine.connect() as conn:
+        row = conn.execute(text("SELECT channel, quality_score FROM execution_history")).one()
+        indexes = {r[1] for r in conn.execute(text("PRAGMA index_list('execution_history')"))}
+    assert tuple(row) == ("email", 91)
+    assert "idx_execution_history_channel_started_at" in indexes
+    assert db.migrate_schema() == {"columns": [], "indexes": []}
+    db.engine.dispose()
+
+
+def test_summary_pages_leave_out_json_blobs(make_database_manager, tmp_path):
+    """Summary pages carry only the summary columns, whether read from the database, live state or journal"""
+    db = make_database_manager("summary.db")
+    seed(db, rows=30)
+    manager = ExecutionManager(json_file_path=str(tmp_path / "history.json"),
+                               log_path=str(tmp_path / "events.jsonl"))
+    manager.db_manager = db
+    manager.write_behind_enabled = True
+    assert manager.update_execution_state({
+        "id": "exec_00029", "workflow_id": "email-workflow", "status": "running",
+        "started_at": datetime(2025, 1, 1, 0, 29), "progress": 40,
+        "input_data": {"channel": "email"}, "output_data": {"quality_score": 77}, "steps": [{"name": "draft"}]
+    })
+
+    page = manager.get_execution_page(page_size=10, summary=True)
+    assert [tuple(item) for item in page.items] == [EXECUTION_SUMMARY_COLUMNS] * 10
+    live = page.items[0]
+    assert (live["id"], live["progress"], live["channel"], live["quality_score"]) == ("exec_00029", 40, "email", 77)
+    assert "output_data" in manager.get_execution_page(page_size=10).items[0]
+
+    manager.db_manager = None
+    manager.event_log.put({"id": "journal_1", "workflow_id": "email-workflow", "status": "completed",
+                           "started_at": "2025-02-01T00:00:00", "input_data": {"channel": "linkedin"},
+                           "output_data": {"message": "Hi"}})
+    journal = manager.get_execution_page(page_size=10, summary=True).items
+    assert journal[0]["id"] == "journal_1" and journal[0]["channel"] == "linkedin"
+    assert all(tuple(item) == EXECUTION_SUMMARY_COLUMNS for item in journal)
+    db.engine.dispose()
+
+
+def test_feedback_and_batch_queries_use_indexes(make_processor):
+    """The feedback and batch lists page along their keyset indexes; batch status reads by key"""
+    from feedback_system import FeedbackSystem
+
+    processor = make_processor("raw_plans.db")
+    feedback = FeedbackSystem()
+    db = processor.db_manager.db_manager
+    base = datetime(2025, 1, 1)
+    with db.engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO feedback_entries (id, execution_id, workflow_id, feedback_type, source, rating, status, created_at)
+            VALUES (:id, :execution_id, :workflow_id, 'rating', 'api', 4, :status, :created_at)
+        """), [{"id": f"fb_{i:05d}", "execution_id": f"exec_{i:05d}", "workflow_id": f"workflow-{i % 5}",
+                "status": "pending" if i % 4 else "reviewed", "created_at": base + timedelta(minutes=i)}
+               for i in range(500)])
+        conn.execute(text("""
+            INSERT INTO batch_processing (id, name, workflow_id, status, total_jobs, created_at)
+            VALUES (:id, 'batch', 'email-workflow', :status, 0, :created_at)
+        """), [{"id": f"batch_{i:05d}", "status": "completed" if i % 3 else "running",
+                "created_at": base + timedelta(minutes=i)} for i in range(300)])
+        conn.execute(text("ANALYZE"))
+
+    workflow_page = feedback.get_feedback_for_workflow_page("workflow-1", page_size=10)
+    batch_page = processor.list_batches_page(page_size=10)
+    assert workflow_page.next_cursor and batch_page.next_cursor
+
+    queries = [
+        ("feedback for workflow", lambda: feedback.get_feedback_for_workflow_page("workflow-1", page_size=10),
+         "idx_feedback_workflow_created_at_id"),
+        ("feedback for workflow next page",
+         lambda: feedback.get_feedback_for_workflow_page("workflow-1", page_size=10, cursor=workflow_page.next_cursor),
+         "idx_feedback_workflow_created_at_id"),
+        ("pending feedback", lambda: feedback.get_pending_feedback_page(page_size=10),
+         "idx_feedback_status_created_at_id"),
+        ("batch list", lambda: processor.list_batches_page(page_size=10), "idx_batch_processing_created_at_id"),
+        ("batch list next page", lambda: processor.list_batches_page(page_size=10, cursor=batch_page.next_cursor),
+         "idx_batch_processing_created_at_id"),
+        ("batch list by status", lambda: processor.list_batches_page(status_filter="running", page_size=10),
+         "idx_batch_processing_created_at_id"),
+        ("batch status", lambda: processor.get_batch_status("batch_00005"), "idx_batch_jobs_batch_status_lease"),
+    ]
+    raw_tables = {"feedback_entries", "batch_processing", "bp", "batch_progress", "pr", "batch_jobs"}
+
+    failures = []
+    for name, call, index in queries:
+        statements = capture_selects(db, call)
+        assert statements, f"{name} issued no SELECT"
+        plans = [query_plan(db, statement, parameters) for statement, parameters in statements]
+        if not any(index in detail for plan in plans for detail in plan):
+            failures.append(f"{name}: {index} not used in {plans}")
+        for statement, parameters in statements:
+            problems = plan_problems(db, statement, parameters, tables=raw_tables)
+            if problems:
+                failures.append(f"{name}: {problems} in {' '.join(statement.split())}")
+
+    assert not failures, "\n".join(failures)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
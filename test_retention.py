@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test retention and compaction of the history tables.
+
+This script:
+1. Compacts expired observability partitions of a scratch SQLite database and
+   checks the hourly summaries, the archive and the rows that are kept
+2. Checks that an interrupted compaction resumes without summarizing twice
+3. Checks that a rollup backfill keeps buckets of compacted rows
+4. Checks that new databases get incremental auto-vacuum, and that opening a
+   connection does not wait behind an open write to set it
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from retention import RETENTION_SPECS
+
+
+@pytest.fixture
+def make_retained_database(make_database_manager, set_config, tmp_path):
+    """Create DatabaseManagers with small delete batches and an archive directory in tmp_path"""
+    set_config("retention", archive_dir=str(tmp_path / "archive"), delete_batch_size=50, delete_pause_ms=0)
+    return make_database_manager
+
+
+def save_metrics(db, days: int = 40, per_day: int = 48):
+    """Save observability metrics every half hour for the past days"""
+    start = datetime.now() - timedelta(days=days)
+    for i in range(days * per_day):
+        db.save_observability_metrics({
+            "execution_id": f"exec_{i}",
+            "workflow_id": "linkedin-workflow" if i % 2 else "email-workflow",
+            "timestamp": start + timedelta(minutes=30 * i),
+            "duration_ms": 100 + i % 50,
+            "error_count": 1 if i % 5 == 0 else 0
+        })
+
+
+def test_expired_partitions_are_summarized_and_dropped(make_retained_database, tmp_path):
+    """Rows past raw retention move to hourly summaries and the archive; newer rows stay"""
+    db = make_retained_database("compact.db")
+    save_metrics(db)
+    metrics = db.observability_metrics_table
+    hourly = db.hourly_summary_tables["observability_metrics"]
+    with db.get_session() as session:
+        total, duration_sum = session.execute(select(func.count(), func.sum(metrics.c.duration_ms))).one()
+
+    stats = db.retention.run(["observability_metrics"])["observability_metrics"]
+    cutoff = (datetime.now() - timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    with db.get_session() as session:
+        kept, oldest, kept_duration = session.execute(
+            select(func.count(), func.min(metrics.c.timestamp), func.sum(metrics.c.duration_ms))
+        ).one()
+        summarized, summarized_duration = session.execute(
+            select(func.sum(hourly.c.row_count), func.sum(hourly.c.duration_ms_sum))
+        ).one()
+
+    assert stats["partitions"] >= 9 and stats["rows_deleted"] == stats["rows_summarized"]
+    assert oldest >= cutoff
+    assert kept + summarized == total
+    assert kept_duration + summarized_duration == duration_sum
+
+    archived = 0
+    for path in (tmp_path / "archive").iterdir():
+        conn = sqlite3.connect(path)
+        archived += conn.execute("SELECT COUNT(*) FROM observability_metrics").fetchone()[0]
+        conn.close()
+    assert archived == summarized
+
+    # Nothing left to compact
+    assert db.retention.run(["observability_metrics"])["observability_metrics"]["partitions"] == 0
+    db.engine.dispose()
+
+
+def test_interrupted_compaction_resumes_without_double_counting(make_retained_database):
+    """A partition left summarized but not deleted is only deleted on the next run"""
+    db = make_retained_database("resume.db")
+    save_metrics(db, days=33)
+    hourly = db.hourly_summary_tables["observability_metrics"]
+
+    # Simulate a crash between downsampling and deleting the oldest partition
+    table = db.observability_metrics_table
+    spec = RETENTION_SPECS["observability_metrics"]
+    start = (datetime.now() - timedelta(days=33)).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=1)
+    first = db.retention._summarize(table, spec, start, end, db.retention._range(table, spec, start, end))
+
+    db.retention.run(["observability_metrics"])
+    with db.get_session() as session:
+        summarized = session.execute(select(func.sum(hourly.c.row_count))).scalar()
+        states = session.execute(text("SELECT DISTINCT state FROM retention_partitions")).scalars().all()
+        remaining = session.execute(
+            select(func.count()).select_from(table).where(table.c.timestamp < end)
+        ).scalar()
+
+    assert first > 0 and remaining == 0
+    assert states == ["dropped"]
+    with db.get_session() as session:
+        deleted = session.execute(text("SELECT SUM(rows_deleted) FROM retention_partitions")).scalar()
+    assert summarized == deleted
+    db.engine.dispose()
+
+
+def test_backfill_keeps_rollups_of_compacted_rows(make_retained_database):
+    """Rebuilding rollups after compaction does not lose the compacted history"""
+    db = make_retained_database("backfill.db")
+    save_metrics(db, days=35)
+    before = db.rollups.total("observability.executions")["sample_count"]
+
+    db.retention.run(["observability_metrics"])
+    db.rollups.backfill(["observability"])
+
+    assert db.rollups.total("observability.executions")["sample_count"] == before
+    db.engine.dispose()
+
+
+def test_auto_vacuum_is_only_set_on_new_databases(make_retained_database):
+    """Connections opened during a write transaction are tuned at once instead of waiting for the lock"""
+    db = make_retained_database("auto_vacuum.db")
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+
+    # Both connections below are new ones
+    db.engine.dispose()
+    with db.engine.begin() as writer:
+        writer.execute(text("DELETE FROM observability_metrics"))
+        start = time.monotonic()
+        with db.engine.connect() as reader:
+            assert reader.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert time.monotonic() - start < 1
+    db.engine.dispose()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite connection model and tuning of DatabaseManager.
+
+This script:
+1. Checks that database.sqlite_pool selects the connection pool, and that
+   in-memory databases always share one connection
+2. Checks that every new connection gets the configured journal, durability,
+   cache, mmap and busy-timeout pragmas
+3. Checks that in WAL mode a reader on its own pooled connection is not
+   blocked by an open write transaction
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, SingletonThreadPool, StaticPool
+
+from database import DatabaseManager
+
+
+def pragmas(db: DatabaseManager) -> dict:
+    with db.engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")}
+
+
+@pytest.mark.parametrize("mode, pool_class", [
+    ("queue", QueuePool), ("per_thread", SingletonThreadPool), ("static", StaticPool)
+])
+def test_pool_mode_selects_pool(make_database_manager, set_config, mode, pool_class):
+    """Each sqlite_pool mode maps to its SQLAlchemy pool, sized by sqlite_pool_size"""
+    set_config("database", sqlite_pool=mode, sqlite_pool_size=4)
+    db = make_database_manager(f"pool_{mode}.db")
+
+    assert type(db.engine.pool) is pool_class
+    if mode == "queue":
+        assert db.engine.pool.size() == 4
+
+
+def test_memory_database_shares_one_connection(set_config):
+    """Every thread has to see the same in-memory database, whatever the configured mode"""
+    set_config("database", type="sqlite", sqlite_path=":memory:", sqlite_pool="queue")
+    db = DatabaseManager()
+    try:
+        assert type(db.engine.pool) is StaticPool
+    finally:
+        db.engine.dispose()
+
+
+def test_connections_get_configured_pragmas(make_database_manager, set_config):
+    """The defaults tune for concurrency; each pragma follows its config key"""
+    assert pragmas(make_database_manager("pragmas_default.db")) == {
+        "journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000,
+        "cache_size": -65536, "mmap_size": 256 * 1024 * 1024, "temp_store": 2
+    }
+
+    set_config("database", sqlite_journal_mode="DELETE", sqlite_synchronous="FULL", sqlite_busy_timeout_ms=250,
+               sqlite_cache_size_kb=2048, sqlite_mmap_size_mb=0)
+    assert pragmas(make_database_manager("pragmas_custom.db")) == {
+        "journal_mode": "delete", "synchronous": 2, "busy_timeout": 250,
+        "cache_size": -2048, "mmap_size": 0, "temp_store": 2
+    }
+
+
+def test_reader_is_not_blocked_by_open_write(make_database_manager):
+    """With WAL and a connection per session, reads proceed during a write transaction"""
+    db = make_database_manager("wal_concurrency.db")
+    with db.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE counters (name TEXT PRIMARY KEY, value INTEGER)"))
+        conn.execute(text("INSERT INTO counters VALUES ('runs', 1)"))
+
+    read = {}
+
+    def reader():
+        with db.get_session() as session:
+            read["value"] = session.execute(text("SELECT value FROM counters")).scalar()
+
+    with db.get_session() as writer:
+        writer.execute(text("UPDATE counters SET value = 2"))
+        thread = threading.Thread(target=reader)
+        thread.start()
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+        # The reader sees the last committed value, not the open write
+        assert read["value"] == 1
+
+    with db.get_session() as session:
+        assert session.execute(text("SELECT value FROM counters")).scalar() == 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
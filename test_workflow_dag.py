@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test the dependency-driven step scheduler of WorkflowExecutor.
+
+This script:
+1. Checks which earlier steps each step needs, from depends_on and from the
+   {step_id_result} references in its prompt
+2. Runs the default workflow's steps with a cap of three and checks that the
+   independent steps overlap up to the cap, with the same results as one at a time
+3. Checks that precomputed step results are used and that a step raising
+   cancels the steps still running
+4. Checks that inside scheduler run slots every step in flight holds a slot,
+   so parallel steps of several runs stay within the scheduler's capacity
+"""
+
+import asyncio
+
+import pytest
+
+from config_manager import config_manager
+from fair_scheduler import FairScheduler, batch_flow
+from workflow_executor import WorkflowExecutor
+
+
+class RecordingStepExecutor(WorkflowExecutor):
+    """WorkflowExecutor whose steps record their context instead of calling an LLM"""
+
+    def __init__(self, delays=None, failing: str = None):
+        super().__init__()
+        self.delays = delays or {}
+        self.failing = failing
+        self.running = 0
+        self.max_running = 0
+        self.cancelled = []
+
+    async def run_workflow_step(self, workflow_id, step_id, input_data):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(step_id, 0.02))
+            if step_id == self.failing:
+                raise RuntimeError(f"{step_id} failed")
+            return {"step_id": step_id, "result": f"{step_id}<{','.join(input_data)}>", "status": "success"}
+        except asyncio.CancelledError:
+            self.cancelled.append(step_id)
+            raise
+        finally:
+            self.running -= 1
+
+
+def steps_with_prompts(executor: WorkflowExecutor, steps, prompts):
+    for prompt_id, template in prompts.items():
+        executor.prompt_cache[prompt_id] = template
+    return steps
+
+
+def test_dependencies_come_from_depends_on_and_prompts():
+    """Prompts add the steps they read; steps without depends_on or a prompt need every earlier step"""
+    executor = WorkflowExecutor()
+    steps = steps_with_prompts(executor, [
+        {"id": "analysis", "prompt_id": "p_analysis"},
+        {"id": "profile", "prompt_id": "p_profile"},
+        {"id": "retired", "enabled": False},
+        {"id": "reply", "prompt_id": "p_reply", "depends_on": ["profile", "retired"]},
+        {"id": "python", "type": "python"},
+        {"id": "check", "depends_on": []},
+    ], {
+        "p_analysis": "Analyze {conversation_thread} before {reply_result}",
+        "p_profile": "Profile {prospect_profile_url}",
+        "p_reply": "Reply using {analysis_result}",
+    })
+
+    assert executor.step_dependencies(steps) == {
+        "analysis": [],  # reply runs later, so its result is never in the context
+        "profile": [],
+        "reply": ["analysis", "profile"],
+        "python": ["analysis", "profile", "reply"],
+        "check": [],
+    }
+
+    with pytest.raises(ValueError, match="check"):
+        executor.step_dependencies(steps[:-1] + [{"id": "check", "depends_on": ["later"]}, {"id": "later"}])
+
+
+def test_default_workflow_runs_independent_steps_together():
+    """The five steps needing nothing run three at a time, and a step needing all earlier steps sees them all"""
+    steps = sorted(config_manager.load_workflow_config("default_workflow").steps, key=lambda step: step["order"])
+    input_data = {"conversation_thread": "Hi", "prospect_profile_url": "https://linkedin.com/in/ada"}
+
+    async def run(executor: WorkflowExecutor, max_parallel: int):
+        return await executor._run_steps("default_workflow", steps, dict(input_data), "dag-test", max_parallel)
+
+    sequential_executor = RecordingStepExecutor()
+    sequential = asyncio.run(run(sequential_executor, 1))
+    parallel_executor = RecordingStepExecutor()
+    parallel = asyncio.run(run(parallel_executor, 3))
+
+    assert sequential_executor.max_running == 1 and parallel_executor.max_running == 3
+    assert list(parallel) == [step["id"] for step in steps]
+    assert parallel == sequential
+    # The last step needs everything before it, so it sees the whole sequential context
+    assert parallel["escalation_check"]["result"] == "escalation_check<{}>".format(
+        ",".join(list(input_data) + [f"{step['id']}_result" for step in steps[:-1]]))
+    assert parallel["faq_processing"]["result"] == "faq_processing<conversation_thread,prospect_profile_url>"
+
+
+def test_precomputed_results_and_failures():
+    """Steps in step_results are not run; a raising step cancels its running siblings"""
+    executor = RecordingStepExecutor()
+    steps = steps_with_prompts(executor, [
+        {"id": "shared", "prompt_id": "p_shared"},
+        {"id": "reply", "prompt_id": "p_reply"},
+    ], {"p_shared": "Profile {prospect_profile_url}", "p_reply": "Reply using {shared_result}"})
+    precomputed = {"shared": {"step_id": "shared", "result": "cached profile", "status": "success"}}
+
+    results = asyncio.run(executor._run_steps("wf", steps, {"prospect_profile_url": "u"}, "dag-shared", 2,
+                                              step_results=precomputed))
+    assert results["shared"] is precomputed["shared"]
+    assert results["reply"]["result"] == "reply<prospect_profile_url,shared_result>"
+
+    executor = RecordingStepExecutor(delays={"slow": 1.0}, failing="fast")
+    executor.prompt_cache["p_slow"] = "Slow {conversation_thread}"
+    steps = [{"id": "slow", "prompt_id": "p_slow"}, {"id": "fast", "depends_on": []}, {"id": "after"}]
+
+    with pytest.raises(RuntimeError, match="fast failed"):
+        asyncio.run(executor._run_steps("wf", steps, {}, "dag-failing", 3))
+    assert executor.cancelled == ["slow"]
+
+
+def test_parallel_steps_hold_scheduler_slots():
+    """Two runs of three parallel steps share three slots; a run alone on one slot runs its steps one at a time"""
+    steps = sorted(config_manager.load_workflow_config("default_workflow").steps, key=lambda step: step["order"])
+    input_data = {"conversation_thread": "Hi", "prospect_profile_url": "https://linkedin.com/in/ada"}
+
+    async def run(executor: WorkflowExecutor, scheduler: FairScheduler, flow: str):
+        async with scheduler.slot(flow):
+            return await executor._run_steps("default_workflow", steps, dict(input_data), f"dag-{flow}", 3)
+
+    async def run_both(executor: WorkflowExecutor, scheduler: FairScheduler):
+        return await asyncio.gather(run(executor, scheduler, batch_flow("a")), run(executor, scheduler, batch_flow("b")))
+
+    expected = asyncio.run(RecordingStepExecutor()._run_steps("default_workflow", steps, dict(input_data), "dag", 1))
+    executor, scheduler = RecordingStepExecutor(), FairScheduler(capacity=3, interactive_reserved=0)
+    assert asyncio.run(run_both(executor, scheduler)) == [expected, expected]
+    assert executor.max_running == 3 and scheduler.running == 0
+    assert not any(flow["running"] or flow["waiting"] for flow in scheduler.snapshot()["flows"].values())
+
+    executor = RecordingStepExecutor()
+    assert asyncio.run(run(executor, FairScheduler(capacity=1, interactive_reserved=0), batch_flow("a"))) == expected
+    assert executor.max_running == 1
+
+
+if __name__ == "__main__":
+    for test in (test_dependencies_come_from_depends_on_and_prompts,
+                 test_default_workflow_runs_independent_steps_together,
+                 test_precomputed_results_and_failures,
+                 test_parallel_steps_hold_scheduler_slots):
+        try:
+            test()
+            print(f"✅ PASSED - {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ FAILED - {test.__name__}\n{e}")
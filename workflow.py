@@ -1524,8 +1524,10 @@ async def run_workflow_parallel_streaming(
                 for q in all_queries:
 
                     async def faq_task(query):
-                        # Use intelligent FAQ agent for better answers
-                        answer = get_intelligent_faq_answer(query, {
+                        # Use intelligent FAQ agent for better answers. Run it in a
+                        # worker thread so the queries really overlap (their
+                        # embedding lookups get coalesced by the embedding batcher)
+                        answer = await asyncio.to_thread(get_intelligent_faq_answer, query, {
                             "thread_analysis": thread_data,
                             "channel": norm_channel
                         })
@@ -5,14 +5,17 @@ Enhanced workflow executor with configuration management and individual agent te
 import asyncio
 import json
 import logging
+import re
 import time
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from crewai import Agent, Task
 from langchain_openai import AzureChatOpenAI
 
 from config_manager import config_manager
+from config_system import config_system
 from main import safe_exec_python
 from simple_observability import simple_observability as observability_manager
 from evaluation_system import evaluation_system, EvaluationMetric
@@ -20,6 +23,7 @@ from database import get_database_manager
 from agent_performance import select_best_model, track_agent_execution
 from input_validator import validate_workflow_inputs
 from context_enricher import enrich_workflow_context
+from fair_scheduler import current_run_slot
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +111,126 @@ class WorkflowExecutor:
             rendered = rendered.replace(f"{{{var_name}}}", str(var_value))
         return rendered
 
+    def shared_step_ids(self, workflow_id: str, fields: Iterable[str]) -> List[str]:
+        """
+        Agent steps of a workflow whose prompt only reads the given input fields
+        
+        Such a step's output is the same for every input that agrees on those
+        fields, so callers running many inputs can run it once per distinct
+        value and pass the result to run_full_workflow as step_results.
+        """
+        workflow_config = self.config_manager.load_workflow_config(workflow_id)
+        if not workflow_config:
+            return []
+        
+        fields = set(fields)
+        shared = []
+        for step in workflow_config.steps:
+            if not step.get("enabled", True) or not step.get("agent_id") or not step.get("prompt_id"):
+                continue
+            placeholders = set(re.findall(r"\{(\w+)\}", self._get_prompt_template(step["prompt_id"])))
+            if placeholders and placeholders <= fields:
+                shared.append(step["id"])
+        return shared
+
+    def step_dependencies(self, steps: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Earlier steps each enabled step needs the results of, for steps in run order
+        
+        A step needs the steps listed in its depends_on and those whose
+        results its prompt reads ({step_id_result}). A step declaring neither
+        depends_on nor a prompt, such as a python step, may read anything in
+        its context, so it needs every earlier step. Later steps never count:
+        their results are not in the context when running in order either.
+        
+        Raises:
+            ValueError: If depends_on names a step that does not run before the step
+        """
+        dependencies = {}
+        earlier, earlier_enabled = set(), []
+        for step in steps:
+            declared = step.get("depends_on")
+            if step.get("enabled", True):
+                unknown = [step_id for step_id in declared or () if step_id not in earlier]
+                if unknown:
+                    raise ValueError(f"Step {step['id']} depends on {', '.join(unknown)}, "
+                                     f"which do not run before it")
+                if declared is None and not step.get("prompt_id"):
+                    dependencies[step["id"]] = list(earlier_enabled)
+                else:
+                    needed = set(declared or ())
+                    if step.get("prompt_id"):
+                        needed.update(re.findall(r"\{(\w+)_result\}", self._get_prompt_template(step["prompt_id"])))
+                    dependencies[step["id"]] = [step_id for step_id in earlier_enabled if step_id in needed]
+                earlier_enabled.append(step["id"])
+            earlier.add(step["id"])
+        return dependencies
+
+    @staticmethod
+    def _max_parallel_steps(settings: Optional[Dict[str, Any]]) -> int:
+        """Steps of one run executed at once: the workflow's max_parallel_steps, or 1 without parallel_execution"""
+        settings = settings or {}
+        if not settings.get("parallel_execution", True):
+            return 1
+        default = config_system.get("workflow", {}).get("max_parallel_steps", 3)
+        return max(1, int(settings.get("max_parallel_steps", default)))
+
+    async def _run_steps(
+        self, workflow_id: str, steps: List[Dict[str, Any]], input_data: Dict[str, Any],
+        execution_id: str, max_parallel: int,
+        step_results: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the enabled steps, each as soon as the steps it needs are done
+        
+        Up to max_parallel steps run at once; inside a scheduler run slot,
+        each step beyond the first in flight also takes a slot of the run's
+        flow (see fair_scheduler.RunSlot). Each step's context holds the
+        inputs and the results of the steps it needs, directly or through
+        other steps; a step needing every earlier step gets exactly the
+        context of a sequential run. Results are returned in step order.
+        """
+        dependencies = self.step_dependencies(steps)
+        position = {step_id: index for index, step_id in enumerate(dependencies)}
+        needed = {}
+        for step_id, direct in dependencies.items():
+            needed[step_id] = set(direct).union(*(needed[dependency] for dependency in direct))
+
+        semaphore = asyncio.Semaphore(max_parallel)
+        run_slot = current_run_slot()
+        results: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step_id: str) -> None:
+            if dependencies[step_id]:
+                await asyncio.gather(*(tasks[dependency] for dependency in dependencies[step_id]))
+            if step_results and step_id in step_results:
+                results[step_id] = step_results[step_id]
+            else:
+                context = input_data.copy()
+                context.update({f"{dependency}_result": results[dependency]["result"]
+                                for dependency in sorted(needed[step_id], key=position.get)})
+                async with semaphore, run_slot.step() if run_slot else nullcontext():
+                    results[step_id] = await self.run_workflow_step(workflow_id, step_id, context)
+
+            # Update progress in observability
+            observability_manager.update_workflow(
+                execution_id,
+                steps_completed=len(results)
+            )
+
+        for step_id in dependencies:
+            tasks[step_id] = asyncio.create_task(run_step(step_id))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {step_id: results[step_id] for step_id in dependencies}
+
     async def test_agent(
         self, agent_id: str, test_input: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -408,9 +532,15 @@ class WorkflowExecutor:
             }
 
     async def run_full_workflow(
-        self, workflow_id: str, input_data: Dict[str, Any], execution_id: Optional[str] = None
+        self, workflow_id: str, input_data: Dict[str, Any], execution_id: Optional[str] = None,
+        step_results: Optional[Dict[str, Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
-        """Run a complete workflow using current configurations"""
+        """
+        Run a complete workflow using current configurations
+        
+        step_results holds results of run_workflow_step already computed for
+        this input (see shared_step_ids); those steps are not run again.
+        """
         start_time = time.time()
         if execution_id is None:
             execution_id = f"{workflow_id}_{int(time.time() * 1000)}"
@@ -463,29 +593,12 @@ class WorkflowExecutor:
                 total_steps=len([s for s in steps if s.get("enabled", True)])
             )
 
-            # Execute steps sequentially
-            results = {}
-            context = input_data.copy()
-            completed_steps = 0
-
-            for step in steps:
-                if not step.get("enabled", True):
-                    continue
-
-                step_result = await self.run_workflow_step(
-                    workflow_id, step["id"], context
-                )
-                results[step["id"]] = step_result
-                completed_steps += 1
-
-                # Update progress in observability
-                observability_manager.update_workflow(
-                    execution_id,
-                    steps_completed=completed_steps
-                )
-
-                # Add step result to context for next steps
-                context[f"{step['id']}_result"] = step_result["result"]
+            # Execute steps as their inputs become ready
+            results = await self._run_steps(
+                workflow_id, steps, input_data, execution_id,
+                max_parallel=self._max_parallel_steps(workflow_config.settings),
+                step_results=step_results
+            )
 
             execution_time = time.time() - start_time
 